@@ -60,6 +60,44 @@
 #define BOOST_DURATION_MS   500     /* Maximum boost duration */
 #define CHARGE_TIMEOUT_MS   120000  /* 2 minutes charge timeout */
 
+/* Zero-crossing PLL
+ * The NCO advances once per TIM3 update event (PWM_FREQ) and wraps once
+ * per AC half-cycle; a full 2^32 phase span equals one half-cycle.
+ * Periods are measured in SYSCLK counts.
+ */
+#define PLL_HALF_PERIOD_NOM     (SYSCLK_FREQ / 120)     /* 60 Hz line */
+#define PLL_HALF_PERIOD_MIN     (SYSCLK_FREQ / 140)     /* 70 Hz line */
+#define PLL_HALF_PERIOD_MAX     (SYSCLK_FREQ / 90)      /* 45 Hz line */
+#define PLL_PERIOD_SHIFT        3       /* Period filter: 1/8 per edge */
+#define PLL_PHASE_SHIFT         1       /* Phase correction: 1/2 per edge */
+#define PLL_LOCK_ERR            (1UL << 26)  /* ~2.8 deg of half-cycle */
+#define PLL_LOCK_COUNT          8       /* Good edges before lock */
+#define PLL_TIMEOUT_TICKS       (2 * PWM_FREQ / 120)    /* 2 missed edges */
+#define PLL_WINDOW_GUARD        (1UL << 25)  /* ~1.4 deg guard band */
+#ifndef INJECT_SINE_SHAPING
+#define INJECT_SINE_SHAPING     0       /* 1 = scale window duty by |sin(phase)| */
+#endif
+#define ZC_PHASE_OFFSET         0       /* Detector lead, calibrate on HW */
+
+/* Event log
+ * Fixed-size binary records in a RAM ring that survives warm reset
+ * (.noinit). The ring is copied to the last flash page on faults and
+ * failed starts so it survives power loss; host side decoder lives in
+ * tools/decode_eventlog.py.
+ */
+#define EVENT_LOG_MAGIC         0x474F4C45UL    /* "ELOG" little-endian */
+#define EVENT_LOG_VERSION       1
+#define EVENT_LOG_CAPACITY      96      /* Records (16 bytes each) */
+#define EVENT_LOG_FLASH_ADDR    0x08007800UL    /* Page 15 */
+#define EVENT_LOG_FLASH_PAGE    15
+#define EVENT_PRE_DEPTH         4       /* Snapshots kept before a boost */
+#define EVENT_PRE_INTERVAL_MS   10
+#define EVENT_SAMPLE_MS         25      /* Snapshot interval while boosting */
+#ifndef EVENT_LOG_UART
+#define EVENT_LOG_UART          0       /* 1 = dump log on USART2 at boot */
+#endif
+#define EVENT_LOG_BAUD          115200
+
 /* State machine states */
 typedef enum {
     STATE_INIT,
@@ -81,6 +119,18 @@ typedef enum {
     FAULT_TIMEOUT
 } fault_code_t;
 
+/* Event log record types */
+typedef enum {
+    EVENT_BOOT = 1,     /* arg = RCC_CSR reset flags */
+    EVENT_STATE,        /* arg = previous state */
+    EVENT_PRE_BOOST,    /* arg = age of snapshot before trigger (ms) */
+    EVENT_BOOST_START,  /* arg = injection duty */
+    EVENT_BOOST_SAMPLE, /* arg = ms since boost start */
+    EVENT_BOOST_END,    /* arg = boost duration (ms) */
+    EVENT_FAULT,        /* arg = fault code */
+    EVENT_PLL           /* arg = 1 on lock, 0 on loss of lock */
+} event_type_t;
+
 /* ADC readings structure */
 typedef struct {
     uint16_t v_ac;      /* AC voltage (peak, ADC counts) */
@@ -89,6 +139,51 @@ typedef struct {
     uint16_t i_load;    /* Load current */
 } adc_readings_t;
 
+/* Zero-crossing PLL state (shared between TIM3 and EXTI ISRs) */
+typedef struct {
+    uint32_t ticks;         /* TIM3 update events since boot */
+    uint32_t phase;         /* NCO phase, 2^32 = one half-cycle */
+    uint32_t phase_inc;     /* NCO increment per update event */
+    uint32_t period;        /* Filtered half-cycle period (SYSCLK counts) */
+    uint32_t last_edge;     /* Timestamp of last ZC edge (SYSCLK counts) */
+    uint32_t last_edge_ticks;
+    uint32_t window_pos;    /* Injection half-window, positive bank */
+    uint32_t window_neg;    /* Injection half-window, negative bank */
+    uint16_t duty;          /* Duty applied inside the window */
+    uint8_t good_edges;
+    bool half_positive;     /* NCO's view of the current half-cycle */
+    bool locked;
+    bool inject;            /* ISR drives PWM when set */
+} pll_state_t;
+
+/* Event log record (16 bytes) */
+typedef struct {
+    uint32_t time_ms;
+    uint8_t type;       /* event_type_t */
+    uint8_t state;      /* softstart_state_t when logged */
+    uint16_t arg;
+    uint16_t v_ac;      /* Raw ADC snapshot */
+    uint16_t v_sc_pos;
+    uint16_t v_sc_neg;
+    uint16_t i_load;
+} event_record_t;
+
+/* Event log header (32 bytes), followed by the record ring */
+typedef struct {
+    uint32_t magic;
+    uint16_t version;
+    uint16_t capacity;
+    uint32_t head;          /* Records written since log creation */
+    uint32_t boot_count;
+    uint32_t uid[3];        /* Device unique ID */
+    uint32_t reserved;
+} event_log_header_t;
+
+typedef struct {
+    event_log_header_t hdr;
+    event_record_t rec[EVENT_LOG_CAPACITY];
+} event_log_t;
+
 /* Global state */
 extern volatile softstart_state_t g_state;
 extern volatile fault_code_t g_fault;
@@ -96,6 +191,7 @@ extern volatile uint32_t g_systick_ms;
 extern volatile bool g_zc_flag;
 extern volatile bool g_zc_polarity;  /* true = positive half-cycle */
 extern volatile adc_readings_t g_adc;
+extern volatile pll_state_t g_pll;
 
 /* Function prototypes */
 
@@ -117,6 +213,21 @@ void pwm_set_pos(uint16_t duty);    /* 0-PWM_PERIOD */
 void pwm_set_neg(uint16_t duty);
 void pwm_disable(void);
 
+/* Zero-crossing PLL */
+void pll_init(void);
+bool pll_locked(void);
+void pll_update_window(void);
+void pll_inject_start(uint16_t duty);
+void pll_inject_stop(void);
+
+/* Event log */
+void event_log_init(void);
+void event_log_add(event_type_t type, uint16_t arg, const adc_readings_t *adc);
+void event_log_pre_sample(const adc_readings_t *adc);
+void event_log_pre_flush(void);
+void event_log_commit(void);
+void event_log_dump_uart(void);
+
 /* Charging control */
 void charge_enable_pos(bool enable);
 void charge_enable_neg(bool enable);
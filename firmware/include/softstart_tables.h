@@ -0,0 +1,106 @@
+/*
+ * Generated by tools/gen_tables.py from softstart.h - do not edit.
+ * Regenerate with `make tables`.
+ */
+
+#ifndef SOFTSTART_TABLES_H
+#define SOFTSTART_TABLES_H
+
+#include <stdint.h>
+
+/*
+ * ADC conversions as reciprocal multiplies: (adc * MUL) >> SHIFT.
+ * adc * MUL stays below 2^32 for adc <= 4095.
+ */
+#define V_AC_MV_MUL         166691UL    /* 33330000/409500 mV per count (V_AC_RATIO) */
+#define V_AC_MV_SHIFT       11
+#define V_SC_MV_MUL         136983UL    /* 27390000/409500 mV per count (V_SC_RATIO) */
+#define V_SC_MV_SHIFT       11
+#define I_LOAD_MA_MUL       422813UL    /* 1000/310 mA per count (I_SENSE_COUNTS_PER_A) */
+#define I_LOAD_MA_SHIFT     17
+
+/*
+ * Injection half-window vs V_bank/V_peak: asin(x)/pi in Q16 (2^16 = one
+ * half-cycle) at x = i/256, interpolated by pll_window() from a
+ * Q12 ratio. Worst edge error 1.27 deg, inside PLL_WINDOW_GUARD.
+ */
+#define WINDOW_TABLE_BITS   8
+static const uint16_t window_table[257] = {
+        0,    81,   163,   244,   326,   407,   489,   570,
+      652,   734,   815,   897,   978,  1060,  1141,  1223,
+     1305,  1386,  1468,  1550,  1631,  1713,  1795,  1877,
+     1959,  2040,  2122,  2204,  2286,  2368,  2450,  2532,
+     2614,  2697,  2779,  2861,  2943,  3026,  3108,  3190,
+     3273,  3355,  3438,  3521,  3603,  3686,  3769,  3852,
+     3935,  4018,  4101,  4184,  4267,  4350,  4434,  4517,
+     4600,  4684,  4768,  4851,  4935,  5019,  5103,  5187,
+     5271,  5355,  5440,  5524,  5608,  5693,  5778,  5862,
+     5947,  6032,  6117,  6203,  6288,  6373,  6459,  6544,
+     6630,  6716,  6802,  6888,  6974,  7060,  7147,  7233,
+     7320,  7407,  7494,  7581,  7668,  7756,  7843,  7931,
+     8019,  8107,  8195,  8283,  8372,  8460,  8549,  8638,
+     8727,  8816,  8906,  8995,  9085,  9175,  9265,  9356,
+     9446,  9537,  9628,  9719,  9810,  9902,  9993, 10085,
+    10177, 10270, 10362, 10455, 10548, 10641, 10735, 10829,
+    10923, 11017, 11111, 11206, 11301, 11396, 11492, 11588,
+    11684, 11780, 11877, 11973, 12071, 12168, 12266, 12364,
+    12462, 12561, 12660, 12759, 12859, 12959, 13060, 13160,
+    13261, 13363, 13465, 13567, 13669, 13772, 13876, 13980,
+    14084, 14188, 14293, 14399, 14505, 14611, 14718, 14825,
+    14933, 15041, 15150, 15259, 15369, 15479, 15590, 15701,
+    15813, 15926, 16039, 16153, 16267, 16382, 16497, 16614,
+    16730, 16848, 16966, 17085, 17205, 17325, 17446, 17568,
+    17691, 17815, 17939, 18065, 18191, 18318, 18446, 18575,
+    18705, 18836, 18968, 19101, 19236, 19371, 19508, 19646,
+    19785, 19925, 20067, 20210, 20355, 20501, 20649, 20798,
+    20949, 21102, 21256, 21413, 21571, 21731, 21894, 22059,
+    22226, 22395, 22568, 22742, 22920, 23101, 23285, 23472,
+    23663, 23858, 24056, 24260, 24467, 24680, 24899, 25123,
+    25354, 25591, 25837, 26091, 26356, 26631, 26918, 27220,
+    27539, 27878, 28243, 28638, 29075, 29571, 30159, 30924,
+    32768
+};
+
+/*
+ * |sin| over one half-cycle in Q15, indexed by the top SINE_TABLE_BITS of
+ * the PLL phase (2^32 = half-cycle) and interpolated on the next 8 bits.
+ * Worst error 0.008% of full scale.
+ */
+#define SINE_TABLE_BITS     8
+static const uint16_t sine_table[257] = {
+        0,   402,   804,  1206,  1608,  2009,  2411,  2811,
+     3212,  3612,  4011,  4410,  4808,  5205,  5602,  5998,
+     6393,  6787,  7180,  7571,  7962,  8351,  8740,  9127,
+     9512,  9896, 10279, 10660, 11039, 11417, 11793, 12167,
+    12540, 12910, 13279, 13646, 14010, 14373, 14733, 15091,
+    15447, 15800, 16151, 16500, 16846, 17190, 17531, 17869,
+    18205, 18538, 18868, 19195, 19520, 19841, 20160, 20475,
+    20788, 21097, 21403, 21706, 22006, 22302, 22595, 22884,
+    23170, 23453, 23732, 24008, 24279, 24548, 24812, 25073,
+    25330, 25583, 25833, 26078, 26320, 26557, 26791, 27020,
+    27246, 27467, 27684, 27897, 28106, 28311, 28511, 28707,
+    28899, 29086, 29269, 29448, 29622, 29792, 29957, 30118,
+    30274, 30425, 30572, 30715, 30853, 30986, 31114, 31238,
+    31357, 31471, 31581, 31686, 31786, 31881, 31972, 32058,
+    32138, 32214, 32286, 32352, 32413, 32470, 32522, 32568,
+    32610, 32647, 32679, 32706, 32729, 32746, 32758, 32766,
+    32768, 32766, 32758, 32746, 32729, 32706, 32679, 32647,
+    32610, 32568, 32522, 32470, 32413, 32352, 32286, 32214,
+    32138, 32058, 31972, 31881, 31786, 31686, 31581, 31471,
+    31357, 31238, 31114, 30986, 30853, 30715, 30572, 30425,
+    30274, 30118, 29957, 29792, 29622, 29448, 29269, 29086,
+    28899, 28707, 28511, 28311, 28106, 27897, 27684, 27467,
+    27246, 27020, 26791, 26557, 26320, 26078, 25833, 25583,
+    25330, 25073, 24812, 24548, 24279, 24008, 23732, 23453,
+    23170, 22884, 22595, 22302, 22006, 21706, 21403, 21097,
+    20788, 20475, 20160, 19841, 19520, 19195, 18868, 18538,
+    18205, 17869, 17531, 17190, 16846, 16500, 16151, 15800,
+    15447, 15091, 14733, 14373, 14010, 13646, 13279, 12910,
+    12540, 12167, 11793, 11417, 11039, 10660, 10279,  9896,
+     9512,  9127,  8740,  8351,  7962,  7571,  7180,  6787,
+     6393,  5998,  5602,  5205,  4808,  4410,  4011,  3612,
+     3212,  2811,  2411,  2009,  1608,  1206,   804,   402,
+        0
+};
+
+#endif /* SOFTSTART_TABLES_H */
@@ -19,6 +19,7 @@
 
 /* Peripheral base addresses */
 #define TIM3_BASE       (APB1_BASE + 0x0400UL)
+#define USART2_BASE     (APB1_BASE + 0x4400UL)
 #define RCC_BASE        (AHB_BASE + 0x1000UL)
 #define FLASH_R_BASE    (AHB_BASE + 0x2000UL)
 #define PWR_BASE        (APB1_BASE + 0x7000UL)
@@ -143,6 +144,33 @@ typedef struct {
     volatile uint32_t EMR1;
 } EXTI_TypeDef;
 
+/* FLASH Registers */
+typedef struct {
+    volatile uint32_t ACR;
+    volatile uint32_t RESERVED0;
+    volatile uint32_t KEYR;
+    volatile uint32_t OPTKEYR;
+    volatile uint32_t SR;
+    volatile uint32_t CR;
+    volatile uint32_t ECCR;
+} FLASH_TypeDef;
+
+/* USART Registers */
+typedef struct {
+    volatile uint32_t CR1;
+    volatile uint32_t CR2;
+    volatile uint32_t CR3;
+    volatile uint32_t BRR;
+    volatile uint32_t GTPR;
+    volatile uint32_t RTOR;
+    volatile uint32_t RQR;
+    volatile uint32_t ISR;
+    volatile uint32_t ICR;
+    volatile uint32_t RDR;
+    volatile uint32_t TDR;
+    volatile uint32_t PRESC;
+} USART_TypeDef;
+
 /* SYSCFG Registers */
 typedef struct {
     volatile uint32_t CFGR1;
@@ -162,6 +190,11 @@ typedef struct {
 #define TIM3        ((TIM_TypeDef *)TIM3_BASE)
 #define EXTI        ((EXTI_TypeDef *)EXTI_BASE)
 #define SYSCFG      ((SYSCFG_TypeDef *)SYSCFG_BASE)
+#define FLASH       ((FLASH_TypeDef *)FLASH_R_BASE)
+#define USART2      ((USART_TypeDef *)USART2_BASE)
+
+/* 96-bit unique device ID */
+#define UID_BASE    0x1FFF7590UL
 
 /* RCC bit definitions */
 #define RCC_CR_HSION            (1UL << 8)
@@ -173,9 +206,32 @@ typedef struct {
 #define RCC_IOPENR_GPIOFEN      (1UL << 5)
 
 #define RCC_APBENR1_TIM3EN      (1UL << 1)
+#define RCC_APBENR1_USART2EN    (1UL << 17)
 #define RCC_APBENR2_ADCEN       (1UL << 20)
 #define RCC_APBENR2_SYSCFGEN    (1UL << 0)
 
+#define RCC_CSR_RMVF            (1UL << 23)
+#define RCC_CSR_RSTF_SHIFT      24      /* Reset flags in bits 24-31 */
+
+/* FLASH bit definitions */
+#define FLASH_KEY1              0x45670123UL
+#define FLASH_KEY2              0xCDEF89ABUL
+#define FLASH_SR_EOP            (1UL << 0)
+#define FLASH_SR_ERRORS         0x000003FAUL    /* OPERR..FASTERR */
+#define FLASH_SR_BSY1           (1UL << 16)
+#define FLASH_CR_PG             (1UL << 0)
+#define FLASH_CR_PER            (1UL << 1)
+#define FLASH_CR_PNB_SHIFT      3
+#define FLASH_CR_STRT           (1UL << 16)
+#define FLASH_CR_LOCK           (1UL << 31)
+#define FLASH_PAGE_SIZE         2048
+
+/* USART bit definitions */
+#define USART_CR1_UE            (1UL << 0)
+#define USART_CR1_TE            (1UL << 3)
+#define USART_ISR_TC            (1UL << 6)
+#define USART_ISR_TXE           (1UL << 7)
+
 /* GPIO mode definitions */
 #define GPIO_MODE_INPUT         0x00
 #define GPIO_MODE_OUTPUT        0x01
@@ -196,6 +252,8 @@ typedef struct {
 /* Timer bit definitions */
 #define TIM_CR1_CEN             (1UL << 0)
 #define TIM_CR1_ARPE            (1UL << 7)
+#define TIM_DIER_UIE            (1UL << 0)
+#define TIM_SR_UIF              (1UL << 0)
 #define TIM_CCMR1_OC1M_PWM1     (0x06UL << 4)
 #define TIM_CCMR1_OC2M_PWM1     (0x06UL << 12)
 #define TIM_CCMR1_OC1PE         (1UL << 3)
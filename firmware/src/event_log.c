@@ -0,0 +1,226 @@
+/*
+ * Generator Soft-Start Firmware
+ * Binary Event Log
+ *
+ * Fixed-size records in a RAM ring placed in .noinit so the history
+ * survives watchdog and warm resets. On faults and failed starts the
+ * ring is copied to the last flash page so it also survives power loss.
+ * All logging happens from main-loop context; nothing here is ISR-safe.
+ */
+
+#include "softstart.h"
+
+/* RAM ring, not zeroed by the startup code */
+static event_log_t event_log __attribute__((section(".noinit")));
+
+/* Snapshots taken while READY, emitted when a boost is triggered */
+static event_record_t pre_ring[EVENT_PRE_DEPTH];
+static uint8_t pre_count = 0;
+static uint8_t pre_next = 0;
+static uint32_t pre_last_ms = 0;
+
+/*
+ * Check that a log image matches this firmware's layout
+ */
+static bool event_log_valid(const event_log_t *log) {
+    return log->hdr.magic == EVENT_LOG_MAGIC &&
+           log->hdr.version == EVENT_LOG_VERSION &&
+           log->hdr.capacity == EVENT_LOG_CAPACITY;
+}
+
+/*
+ * Fill a record with the current state and an ADC snapshot
+ */
+static void event_fill(event_record_t *rec, event_type_t type, uint16_t arg,
+                       const adc_readings_t *adc) {
+    rec->time_ms = millis();
+    rec->type = (uint8_t)type;
+    rec->state = (uint8_t)g_state;
+    rec->arg = arg;
+    rec->v_ac = adc->v_ac;
+    rec->v_sc_pos = adc->v_sc_pos;
+    rec->v_sc_neg = adc->v_sc_neg;
+    rec->i_load = adc->i_load;
+}
+
+/*
+ * Restore or create the log and record the boot
+ */
+void event_log_init(void) {
+    const event_log_t *saved = (const event_log_t *)EVENT_LOG_FLASH_ADDR;
+    const volatile uint32_t *uid = (const volatile uint32_t *)UID_BASE;
+    adc_readings_t none = {0};
+    uint16_t reset_flags;
+    uint32_t i;
+
+    /* Warm reset keeps the RAM copy; otherwise fall back to flash */
+    if (!event_log_valid(&event_log)) {
+        if (event_log_valid(saved)) {
+            event_log = *saved;
+        } else {
+            event_log.hdr.magic = EVENT_LOG_MAGIC;
+            event_log.hdr.version = EVENT_LOG_VERSION;
+            event_log.hdr.capacity = EVENT_LOG_CAPACITY;
+            event_log.hdr.head = 0;
+            event_log.hdr.boot_count = 0;
+            event_log.hdr.reserved = 0;
+        }
+    }
+
+    event_log.hdr.boot_count++;
+    for (i = 0; i < 3; i++) {
+        event_log.hdr.uid[i] = uid[i];
+    }
+
+    /* Capture and clear the reset cause */
+    reset_flags = (uint16_t)(RCC->CSR >> RCC_CSR_RSTF_SHIFT);
+    RCC->CSR |= RCC_CSR_RMVF;
+
+    event_log_add(EVENT_BOOT, reset_flags, &none);
+}
+
+/*
+ * Append a record, overwriting the oldest when full
+ */
+void event_log_add(event_type_t type, uint16_t arg, const adc_readings_t *adc) {
+    uint32_t slot = event_log.hdr.head % EVENT_LOG_CAPACITY;
+
+    event_fill(&event_log.rec[slot], type, arg, adc);
+    event_log.hdr.head++;
+}
+
+/*
+ * Keep a short history of snapshots ahead of a possible boost
+ */
+void event_log_pre_sample(const adc_readings_t *adc) {
+    uint32_t now = millis();
+
+    if (pre_count > 0 && (now - pre_last_ms) < EVENT_PRE_INTERVAL_MS) {
+        return;
+    }
+    pre_last_ms = now;
+
+    event_fill(&pre_ring[pre_next], EVENT_PRE_BOOST, 0, adc);
+    pre_next = (uint8_t)((pre_next + 1) % EVENT_PRE_DEPTH);
+    if (pre_count < EVENT_PRE_DEPTH) {
+        pre_count++;
+    }
+}
+
+/*
+ * Emit the pre-trigger snapshots, oldest first, and reset the history
+ */
+void event_log_pre_flush(void) {
+    uint32_t now = millis();
+    uint8_t idx = (uint8_t)((pre_next + EVENT_PRE_DEPTH - pre_count) % EVENT_PRE_DEPTH);
+    uint32_t slot;
+    uint32_t age;
+
+    while (pre_count > 0) {
+        age = now - pre_ring[idx].time_ms;
+        pre_ring[idx].arg = (uint16_t)(age > 0xFFFF ? 0xFFFF : age);
+
+        slot = event_log.hdr.head % EVENT_LOG_CAPACITY;
+        event_log.rec[slot] = pre_ring[idx];
+        event_log.hdr.head++;
+
+        idx = (uint8_t)((idx + 1) % EVENT_PRE_DEPTH);
+        pre_count--;
+    }
+    pre_next = 0;
+}
+
+/*
+ * Wait for the flash controller to go idle
+ */
+static void flash_wait(void) {
+    while (FLASH->SR & FLASH_SR_BSY1);
+}
+
+/*
+ * Copy the RAM log to the reserved flash page
+ * Stalls the CPU for the page erase (~22 ms); call with outputs off.
+ */
+void event_log_commit(void) {
+    const uint32_t *src = (const uint32_t *)&event_log;
+    volatile uint32_t *dst = (volatile uint32_t *)EVENT_LOG_FLASH_ADDR;
+    uint32_t words = sizeof(event_log_t) / 4;
+    uint32_t i;
+
+    /* Unlock */
+    flash_wait();
+    if (FLASH->CR & FLASH_CR_LOCK) {
+        FLASH->KEYR = FLASH_KEY1;
+        FLASH->KEYR = FLASH_KEY2;
+    }
+    FLASH->SR = FLASH_SR_ERRORS | FLASH_SR_EOP;
+
+    /* Erase the log page */
+    FLASH->CR = FLASH_CR_PER | ((uint32_t)EVENT_LOG_FLASH_PAGE << FLASH_CR_PNB_SHIFT);
+    FLASH->CR |= FLASH_CR_STRT;
+    flash_wait();
+    FLASH->CR &= ~FLASH_CR_PER;
+
+    /* Program in 64-bit double words */
+    if (!(FLASH->SR & FLASH_SR_ERRORS)) {
+        FLASH->CR |= FLASH_CR_PG;
+        for (i = 0; i + 1 < words; i += 2) {
+            dst[i] = src[i];
+            dst[i + 1] = src[i + 1];
+            flash_wait();
+            if (FLASH->SR & FLASH_SR_ERRORS) {
+                break;
+            }
+        }
+        FLASH->CR &= ~FLASH_CR_PG;
+    }
+
+    FLASH->SR = FLASH_SR_ERRORS | FLASH_SR_EOP;
+    FLASH->CR |= FLASH_CR_LOCK;
+}
+
+#if EVENT_LOG_UART
+/*
+ * Send one byte on USART2 (blocking)
+ */
+static void uart_putc(uint8_t c) {
+    while (!(USART2->ISR & USART_ISR_TXE));
+    USART2->TDR = c;
+}
+
+/*
+ * Dump the raw log image on USART2_TX (PA14, AF1)
+ * PA14 doubles as SWCLK, so the pin is handed back to SWD afterwards.
+ */
+void event_log_dump_uart(void) {
+    const uint8_t *p = (const uint8_t *)&event_log;
+    uint32_t moder = GPIOA->MODER;
+    uint32_t afrh = GPIOA->AFRH;
+    uint32_t i;
+
+    RCC->APBENR1 |= RCC_APBENR1_USART2EN;
+
+    GPIOA->AFRH = (afrh & ~(0xFUL << ((14 - 8) * 4))) | (1UL << ((14 - 8) * 4));
+    GPIOA->MODER = (moder & ~(3UL << (14 * 2))) | (2UL << (14 * 2));
+
+    USART2->CR1 = 0;
+    USART2->BRR = (SYSCLK_FREQ + EVENT_LOG_BAUD / 2) / EVENT_LOG_BAUD;
+    USART2->CR1 = USART_CR1_TE | USART_CR1_UE;
+
+    for (i = 0; i < sizeof(event_log_t); i++) {
+        uart_putc(p[i]);
+    }
+    while (!(USART2->ISR & USART_ISR_TC));
+
+    USART2->CR1 = 0;
+    RCC->APBENR1 &= ~RCC_APBENR1_USART2EN;
+    GPIOA->AFRH = afrh;
+    GPIOA->MODER = moder;
+}
+#else
+/*
+ * UART dump disabled; read the log over SWD instead
+ */
+void event_log_dump_uart(void) {
+}
+#endif
@@ -7,6 +7,7 @@
  */
 
 #include "softstart.h"
+#include "softstart_tables.h"
 
 /* Global state variables */
 volatile softstart_state_t g_state = STATE_INIT;
@@ -15,10 +16,13 @@ volatile uint32_t g_systick_ms = 0;
 volatile bool g_zc_flag = false;
 volatile bool g_zc_polarity = false;
 volatile adc_readings_t g_adc = {0};
+volatile pll_state_t g_pll = {0};
 
 /* Local variables */
 static uint32_t state_entry_time = 0;
 static uint16_t boost_duty = 0;
+static uint32_t boost_sample_time = 0;
+static bool pll_was_locked = false;
 
 /*
  * System Initialization
@@ -138,6 +142,11 @@ void timer_init(void) {
 
     /* Generate update event to load registers */
     TIM3->EGR = TIM_EGR_UG;
+    TIM3->SR = 0;
+
+    /* Update interrupt clocks the zero-crossing PLL */
+    TIM3->DIER = TIM_DIER_UIE;
+    *NVIC_ISER |= (1UL << TIM3_IRQn);
 
     /* Enable timer */
     TIM3->CR1 |= TIM_CR1_CEN;
@@ -179,6 +188,129 @@ void SysTick_Handler(void) {
     g_systick_ms++;
 }
 
+/*
+ * Timestamp in SYSCLK counts from the TIM3 update count and counter
+ */
+static uint32_t pll_timestamp(void) {
+    uint32_t ticks = g_pll.ticks;
+    uint32_t cnt = TIM3->CNT;
+
+    /* Update pending but not yet serviced: counter already wrapped */
+    if ((TIM3->SR & TIM_SR_UIF) && cnt < PWM_PERIOD / 2) {
+        ticks++;
+    }
+    return ticks * PWM_PERIOD + cnt;
+}
+
+/*
+ * Zero-crossing edge: measure the half-cycle and pull the NCO onto it
+ */
+static void pll_zc_edge(void) {
+    uint32_t now = pll_timestamp();
+    uint32_t interval = now - g_pll.last_edge;
+
+    g_pll.last_edge = now;
+    g_pll.last_edge_ticks = g_pll.ticks;
+
+    if (interval < PLL_HALF_PERIOD_MIN || interval > PLL_HALF_PERIOD_MAX) {
+        /* First edge after a dropout, or noise: restart acquisition */
+        g_pll.phase = ZC_PHASE_OFFSET;
+        g_pll.half_positive = g_zc_polarity;
+        g_pll.good_edges = 0;
+        g_pll.locked = false;
+        return;
+    }
+
+    /* Frequency: track the measured half-cycle period */
+    int32_t period_err = (int32_t)(interval - g_pll.period);
+    g_pll.period += (uint32_t)(period_err / (1 << PLL_PERIOD_SHIFT));
+    g_pll.phase_inc = (uint32_t)(((uint64_t)PWM_PERIOD << 32) / g_pll.period);
+
+    /* Phase: the NCO should wrap exactly on the edge */
+    uint32_t old_phase = g_pll.phase;
+    int32_t err = (int32_t)(old_phase - ZC_PHASE_OFFSET);
+    uint32_t new_phase = old_phase - (uint32_t)(err / (1 << PLL_PHASE_SHIFT));
+    g_pll.phase = new_phase;
+
+    if (err < 0 && new_phase > old_phase) {
+        /* Edge came early and the NCO has not wrapped yet */
+        g_pll.half_positive = !g_zc_polarity;
+    } else {
+        g_pll.half_positive = g_zc_polarity;
+    }
+
+    /* Lock detection */
+    uint32_t abs_err = (err < 0) ? (0u - (uint32_t)err) : (uint32_t)err;
+    if (abs_err < PLL_LOCK_ERR) {
+        if (g_pll.good_edges < PLL_LOCK_COUNT) {
+            g_pll.good_edges++;
+        }
+        if (g_pll.good_edges >= PLL_LOCK_COUNT) {
+            g_pll.locked = true;
+        }
+    } else if (abs_err > 4 * PLL_LOCK_ERR) {
+        g_pll.good_edges = 0;
+        g_pll.locked = false;
+    }
+}
+
+/*
+ * Program the duty for the next PWM period. CCRx are preloaded, so the
+ * value written now takes effect at the next update event: the window is
+ * evaluated one NCO step ahead so PWM edges land on its boundaries.
+ */
+static void pll_schedule_pwm(void) {
+    uint32_t phase = g_pll.phase;
+    uint32_t next = phase + g_pll.phase_inc;
+    bool positive = g_pll.half_positive;
+
+    if (next < phase) {
+        positive = !positive;  /* Next period starts the new half-cycle */
+    }
+
+    uint32_t window = positive ? g_pll.window_pos : g_pll.window_neg;
+    bool open = g_pll.locked && (next < window || (0u - next) < window);
+    uint32_t duty = g_pll.duty;
+
+#if INJECT_SINE_SHAPING
+    /* Follow the line voltage: duty * |sin|, table interpolated on phase */
+    uint32_t idx = next >> (32 - SINE_TABLE_BITS);
+    uint32_t frac = (next >> (24 - SINE_TABLE_BITS)) & 255;
+    int32_t a = sine_table[idx];
+    int32_t b = sine_table[idx + 1];
+    duty = (duty * (uint32_t)(a + (((b - a) * (int32_t)frac) >> 8))) >> 15;
+#endif
+
+    TIM3->CCR1 = (open && positive) ? duty : 0;
+    TIM3->CCR2 = (open && !positive) ? duty : 0;
+}
+
+/*
+ * TIM3 Interrupt Handler (PWM update, advances the PLL)
+ */
+void TIM3_IRQHandler(void) {
+    if (TIM3->SR & TIM_SR_UIF) {
+        TIM3->SR = (uint32_t)~TIM_SR_UIF;  /* Clear update flag */
+        g_pll.ticks++;
+
+        uint32_t prev = g_pll.phase;
+        g_pll.phase = prev + g_pll.phase_inc;
+        if (g_pll.phase < prev) {
+            g_pll.half_positive = !g_pll.half_positive;
+        }
+
+        /* Zero-crossings stopped (generator stall, detector fault) */
+        if ((g_pll.ticks - g_pll.last_edge_ticks) > PLL_TIMEOUT_TICKS) {
+            g_pll.good_edges = 0;
+            g_pll.locked = false;
+        }
+
+        if (g_pll.inject) {
+            pll_schedule_pwm();
+        }
+    }
+}
+
 /*
  * EXTI0_1 Interrupt Handler (Zero-crossing)
  */
@@ -189,7 +321,82 @@ void EXTI0_1_IRQHandler(void) {
 
         g_zc_flag = true;
         g_zc_polarity = !g_zc_polarity;  /* Toggle polarity */
+
+        pll_zc_edge();
+    }
+}
+
+/*
+ * Zero-crossing PLL initialization (nominal 60 Hz)
+ */
+void pll_init(void) {
+    g_pll.phase = 0;
+    g_pll.period = PLL_HALF_PERIOD_NOM;
+    g_pll.phase_inc = (uint32_t)(((uint64_t)PWM_PERIOD << 32) / PLL_HALF_PERIOD_NOM);
+    g_pll.window_pos = 0;
+    g_pll.window_neg = 0;
+    g_pll.good_edges = 0;
+    g_pll.locked = false;
+    g_pll.inject = false;
+}
+
+/*
+ * True once the NCO tracks the zero-crossings
+ */
+bool pll_locked(void) {
+    return g_pll.locked;
+}
+
+/*
+ * Half-window (2^32 = half-cycle) where |V_ac| < V_bank
+ */
+static uint32_t pll_window(uint16_t v_sc_adc, uint32_t v_peak_mv) {
+    uint32_t v_bank = adc_to_voltage_mv(v_sc_adc, V_SC_RATIO);
+
+    if (v_peak_mv == 0) {
+        return 0;
+    }
+
+    /* V_bank / V_peak in Q12, clamped to 1.0 */
+    uint32_t ratio = (v_bank * 4096) / v_peak_mv;
+    if (ratio > 4096) {
+        ratio = 4096;
     }
+
+    uint32_t idx = ratio >> (12 - WINDOW_TABLE_BITS);
+    uint32_t frac = ratio & ((1u << (12 - WINDOW_TABLE_BITS)) - 1);
+    uint32_t a = window_table[idx];
+    uint32_t b = (idx < (1u << WINDOW_TABLE_BITS)) ? window_table[idx + 1] : a;
+    uint32_t window = (a + (((b - a) * frac) >> (12 - WINDOW_TABLE_BITS))) << 16;
+
+    /* Guard band against residual phase jitter */
+    return (window > PLL_WINDOW_GUARD) ? window - PLL_WINDOW_GUARD : 0;
+}
+
+/*
+ * Recompute injection windows from the latest bank and line voltages
+ */
+void pll_update_window(void) {
+    uint32_t v_peak = adc_to_voltage_mv(g_adc.v_ac, V_AC_RATIO);
+
+    g_pll.window_pos = pll_window(g_adc.v_sc_pos, v_peak);
+    g_pll.window_neg = pll_window(g_adc.v_sc_neg, v_peak);
+}
+
+/*
+ * Hand PWM over to the PLL: the TIM3 ISR gates duty to the windows
+ */
+void pll_inject_start(uint16_t duty) {
+    if (duty > PWM_PERIOD) duty = PWM_PERIOD;
+    g_pll.duty = duty;
+    g_pll.inject = true;
+}
+
+/*
+ * Take PWM back from the PLL (outputs are left as-is)
+ */
+void pll_inject_stop(void) {
+    g_pll.inject = false;
 }
 
 /*
@@ -254,6 +461,7 @@ void pwm_set_neg(uint16_t duty) {
  * Disable all PWM outputs
  */
 void pwm_disable(void) {
+    pll_inject_stop();
     TIM3->CCR1 = 0;
     TIM3->CCR2 = 0;
 }
@@ -302,9 +510,16 @@ void led_toggle(void) {
  * Convert ADC reading to voltage in mV
  */
 uint32_t adc_to_voltage_mv(uint16_t adc_val, uint32_t ratio) {
-    /* voltage = adc * vref / 4096 * ratio / 100 */
-    uint32_t mv = ((uint32_t)adc_val * ADC_VREF_MV * ratio) / (ADC_MAX * 100);
-    return mv;
+    /* voltage = adc * vref / 4096 * ratio / 100, as reciprocal multiplies
+     * (tools/gen_tables.py) since the M0+ has no divide instruction */
+    if (ratio == V_AC_RATIO) {
+        return ((uint32_t)adc_val * V_AC_MV_MUL) >> V_AC_MV_SHIFT;
+    }
+    if (ratio == V_SC_RATIO) {
+        return ((uint32_t)adc_val * V_SC_MV_MUL) >> V_SC_MV_SHIFT;
+    }
+    /* Other dividers: the product overflows 32 bits above ~130 counts */
+    return (uint32_t)(((uint64_t)adc_val * ADC_VREF_MV * ratio) / (ADC_MAX * 100));
 }
 
 /*
@@ -312,13 +527,27 @@ uint32_t adc_to_voltage_mv(uint16_t adc_val, uint32_t ratio) {
  */
 uint32_t adc_to_current_ma(uint16_t adc_val) {
     /* current = adc * 1000 / 310 */
-    return ((uint32_t)adc_val * 1000) / I_SENSE_COUNTS_PER_A;
+    return ((uint32_t)adc_val * I_LOAD_MA_MUL) >> I_LOAD_MA_SHIFT;
+}
+
+/*
+ * Change state and log the transition
+ */
+static void set_state(softstart_state_t next, uint32_t now) {
+    softstart_state_t prev = g_state;
+
+    g_state = next;
+    state_entry_time = now;
+    event_log_add(EVENT_STATE, (uint16_t)prev, (const adc_readings_t *)&g_adc);
 }
 
 /*
  * Enter fault state
  */
 void enter_fault(fault_code_t code) {
+    /* Logged before the state change so the record keeps the prior state */
+    event_log_add(EVENT_FAULT, (uint16_t)code, (const adc_readings_t *)&g_adc);
+
     g_fault = code;
     g_state = STATE_FAULT;
 
@@ -326,6 +555,9 @@ void enter_fault(fault_code_t code) {
     pwm_disable();
     charge_enable_pos(false);
     charge_enable_neg(false);
+
+    /* Outputs are off, safe to stall for the flash write */
+    event_log_commit();
 }
 
 /*
@@ -391,6 +623,13 @@ void state_machine_run(void) {
 
     /* Read ADC values */
     adc_read_all((adc_readings_t *)&g_adc);
+    pll_update_window();
+
+    /* Log PLL lock changes */
+    if (pll_locked() != pll_was_locked) {
+        pll_was_locked = !pll_was_locked;
+        event_log_add(EVENT_PLL, pll_was_locked, (const adc_readings_t *)&g_adc);
+    }
 
     /* Check safety limits (except in fault state) */
     if (g_state != STATE_FAULT && g_state != STATE_INIT) {
@@ -402,8 +641,7 @@ void state_machine_run(void) {
     switch (g_state) {
         case STATE_INIT:
             /* Initialization complete, go to charging */
-            g_state = STATE_CHARGING;
-            state_entry_time = now;
+            set_state(STATE_CHARGING, now);
             led_set(false);
             break;
 
@@ -421,8 +659,7 @@ void state_machine_run(void) {
 
             /* Check if fully charged */
             if (supercaps_charged()) {
-                g_state = STATE_READY;
-                state_entry_time = now;
+                set_state(STATE_READY, now);
             }
 
             /* Timeout check */
@@ -439,11 +676,17 @@ void state_machine_run(void) {
             /* Solid LED when ready */
             led_set(true);
 
+            /* Keep a short ADC history ahead of the trigger */
+            event_log_pre_sample((const adc_readings_t *)&g_adc);
+
             /* Check for motor start */
             if (check_motor_start()) {
-                g_state = STATE_BOOSTING;
-                state_entry_time = now;
+                event_log_pre_flush();
+                set_state(STATE_BOOSTING, now);
                 boost_duty = PWM_PERIOD / 2;  /* Start at 50% duty */
+                boost_sample_time = now;
+                event_log_add(EVENT_BOOST_START, boost_duty,
+                              (const adc_readings_t *)&g_adc);
 
                 /* Disable charging during boost */
                 charge_enable_pos(false);
@@ -463,30 +706,47 @@ void state_machine_run(void) {
                 }
             }
 
-            /* Apply appropriate PWM based on polarity */
-            if (g_zc_polarity) {
-                pwm_set_pos(boost_duty);
-                pwm_set_neg(0);
+            if (pll_locked()) {
+                /* Window edges are scheduled from the TIM3 update ISR */
+                pll_inject_start(boost_duty);
             } else {
-                pwm_set_pos(0);
-                pwm_set_neg(boost_duty);
+                /* No phase lock: apply PWM based on polled polarity */
+                pll_inject_stop();
+                if (g_zc_polarity) {
+                    pwm_set_pos(boost_duty);
+                    pwm_set_neg(0);
+                } else {
+                    pwm_set_pos(0);
+                    pwm_set_neg(boost_duty);
+                }
             }
 
             /* Fast LED blink during boost */
             led_set((now / 50) & 1);
 
-            /* Check if boost duration exceeded */
+            /* Periodic snapshot of the boost */
+            if ((now - boost_sample_time) >= EVENT_SAMPLE_MS) {
+                boost_sample_time = now;
+                event_log_add(EVENT_BOOST_SAMPLE, (uint16_t)(now - state_entry_time),
+                              (const adc_readings_t *)&g_adc);
+            }
+
+            /* Check if boost duration exceeded (failed start) */
             if ((now - state_entry_time) > BOOST_DURATION_MS) {
-                g_state = STATE_COOLDOWN;
-                state_entry_time = now;
                 pwm_disable();
+                event_log_add(EVENT_BOOST_END, (uint16_t)(now - state_entry_time),
+                              (const adc_readings_t *)&g_adc);
+                set_state(STATE_COOLDOWN, now);
+                event_log_commit();
             }
 
             /* Check if motor has started (current dropped) */
-            if (!check_motor_start() && (now - state_entry_time) > STARTUP_DETECT_MS) {
-                g_state = STATE_COOLDOWN;
-                state_entry_time = now;
+            if (g_state == STATE_BOOSTING && !check_motor_start() &&
+                (now - state_entry_time) > STARTUP_DETECT_MS) {
                 pwm_disable();
+                event_log_add(EVENT_BOOST_END, (uint16_t)(now - state_entry_time),
+                              (const adc_readings_t *)&g_adc);
+                set_state(STATE_COOLDOWN, now);
             }
             break;
 
@@ -496,8 +756,7 @@ void state_machine_run(void) {
             led_set(false);
 
             if ((now - state_entry_time) > 1000) {
-                g_state = STATE_CHARGING;
-                state_entry_time = now;
+                set_state(STATE_CHARGING, now);
             }
             break;
 
@@ -528,8 +787,11 @@ void state_machine_run(void) {
 int main(void) {
     /* Initialize peripherals */
     system_init();
+    event_log_init();
+    event_log_dump_uart();
     gpio_init();
     adc_init();
+    pll_init();
     timer_init();
     exti_init();
     systick_init();
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Decode soft-start firmware event logs.
+
+Reads raw log images produced by `make dump-log`, `make dump-log-ram`, the
+gdb `dump_eventlog` helper, or a UART capture (EVENT_LOG_UART=1), and prints
+per-event timelines and aggregate statistics across units.
+
+The binary layout mirrors event_log_t in firmware/include/softstart.h.
+"""
+
+import argparse
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+
+# Mirrors softstart.h
+EVENT_LOG_MAGIC = 0x474F4C45
+EVENT_LOG_VERSION = 1
+BOOST_DURATION_MS = 500
+ADC_VREF_MV = 3300
+ADC_MAX = 4095
+V_AC_RATIO = 10100
+V_SC_RATIO = 8300
+I_SENSE_COUNTS_PER_A = 310
+
+HEADER_DTYPE = np.dtype([
+    ('magic', '<u4'),
+    ('version', '<u2'),
+    ('capacity', '<u2'),
+    ('head', '<u4'),
+    ('boot_count', '<u4'),
+    ('uid', '<u4', (3,)),
+    ('reserved', '<u4'),
+])
+
+RECORD_DTYPE = np.dtype([
+    ('time_ms', '<u4'),
+    ('type', 'u1'),
+    ('state', 'u1'),
+    ('arg', '<u2'),
+    ('v_ac', '<u2'),
+    ('v_sc_pos', '<u2'),
+    ('v_sc_neg', '<u2'),
+    ('i_load', '<u2'),
+])
+
+EVENT_NAMES = {
+    1: 'BOOT',
+    2: 'STATE',
+    3: 'PRE_BOOST',
+    4: 'BOOST_START',
+    5: 'BOOST_SAMPLE',
+    6: 'BOOST_END',
+    7: 'FAULT',
+    8: 'PLL',
+}
+EVENT_BOOT, EVENT_STATE, EVENT_PRE_BOOST, EVENT_BOOST_START = 1, 2, 3, 4
+EVENT_BOOST_SAMPLE, EVENT_BOOST_END, EVENT_FAULT, EVENT_PLL = 5, 6, 7, 8
+
+STATE_NAMES = ['INIT', 'IDLE', 'CHARGING', 'READY', 'BOOSTING', 'COOLDOWN', 'FAULT']
+FAULT_NAMES = ['NONE', 'OVERVOLTAGE', 'UNDERVOLTAGE', 'OVERCURRENT', 'SUPERCAP_OV',
+               'TIMEOUT']
+
+# RCC_CSR reset flags, shifted down by 24
+RESET_FLAGS = {
+    1 << 1: 'OBL',
+    1 << 2: 'PIN',
+    1 << 3: 'PWR',
+    1 << 4: 'SFT',
+    1 << 5: 'IWDG',
+    1 << 6: 'WWDG',
+    1 << 7: 'LPWR',
+}
+
+
+def adc_to_volts(counts: np.ndarray, ratio: int) -> np.ndarray:
+    """Convert ADC counts to volts using the firmware's divider ratio."""
+    return counts.astype(float) * ADC_VREF_MV * ratio / (ADC_MAX * 100) / 1000.0
+
+
+def adc_to_amps(counts: np.ndarray) -> np.ndarray:
+    """Convert current-sense ADC counts to amps."""
+    return counts.astype(float) / I_SENSE_COUNTS_PER_A
+
+
+def find_logs(data: bytes) -> List[dict]:
+    """
+    Locate every valid log image in a raw byte stream.
+
+    Returns one dict per image with the header fields, a unit id string and
+    the records ordered oldest to newest. Each record is tagged with its
+    sequence number so overlapping dumps of the same unit can be merged.
+    """
+    logs = []
+    magic = EVENT_LOG_MAGIC.to_bytes(4, 'little')
+    pos = data.find(magic)
+
+    while pos >= 0:
+        if pos + HEADER_DTYPE.itemsize > len(data):
+            break
+        hdr = np.frombuffer(data, HEADER_DTYPE, count=1, offset=pos)[0]
+        capacity = int(hdr['capacity'])
+        size = HEADER_DTYPE.itemsize + capacity * RECORD_DTYPE.itemsize
+
+        if hdr['version'] != EVENT_LOG_VERSION or capacity == 0 or pos + size > len(data):
+            pos = data.find(magic, pos + 1)
+            continue
+
+        ring = np.frombuffer(data, RECORD_DTYPE, count=capacity,
+                             offset=pos + HEADER_DTYPE.itemsize)
+        head = int(hdr['head'])
+        count = min(head, capacity)
+        first = head - count
+        order = (np.arange(first, head) % capacity).astype(int)
+
+        logs.append({
+            'unit': '-'.join(f'{w:08X}' for w in hdr['uid']),
+            'boot_count': int(hdr['boot_count']),
+            'head': head,
+            'seq': np.arange(first, head),
+            'records': ring[order].copy(),
+        })
+        pos = data.find(magic, pos + size)
+
+    return logs
+
+
+def merge_logs(logs: List[dict]) -> Dict[str, dict]:
+    """Merge dumps per unit, keeping each sequence number once."""
+    units: Dict[str, dict] = {}
+    for log in logs:
+        unit = units.setdefault(log['unit'], {'seq': [], 'records': [], 'boot_count': 0})
+        unit['seq'].append(log['seq'])
+        unit['records'].append(log['records'])
+        unit['boot_count'] = max(unit['boot_count'], log['boot_count'])
+
+    for unit in units.values():
+        seq = np.concatenate(unit['seq'])
+        records = np.concatenate(unit['records'])
+        seq, idx = np.unique(seq, return_index=True)
+        unit['seq'] = seq
+        unit['records'] = records[idx]
+
+    return units
+
+
+def describe_arg(rec: np.void) -> str:
+    """Human-readable meaning of a record's argument field."""
+    etype, arg = int(rec['type']), int(rec['arg'])
+    if etype == EVENT_BOOT:
+        flags = [name for bit, name in RESET_FLAGS.items() if arg & bit]
+        return 'reset=' + ('|'.join(flags) if flags else 'none')
+    if etype == EVENT_STATE:
+        return f"from {STATE_NAMES[arg] if arg < len(STATE_NAMES) else arg}"
+    if etype == EVENT_PRE_BOOST:
+        return f"t-{arg}ms"
+    if etype == EVENT_BOOST_START:
+        return f"duty={arg}"
+    if etype == EVENT_BOOST_SAMPLE:
+        return f"+{arg}ms"
+    if etype == EVENT_BOOST_END:
+        return f"after {arg}ms" + (' (timeout)' if arg > BOOST_DURATION_MS else '')
+    if etype == EVENT_FAULT:
+        return FAULT_NAMES[arg] if arg < len(FAULT_NAMES) else str(arg)
+    if etype == EVENT_PLL:
+        return 'locked' if arg else 'lost lock'
+    return str(arg)
+
+
+def print_timeline(unit_id: str, unit: dict):
+    """Print every event for one unit, oldest first."""
+    records = unit['records']
+    v_ac = adc_to_volts(records['v_ac'], V_AC_RATIO)
+    v_pos = adc_to_volts(records['v_sc_pos'], V_SC_RATIO)
+    v_neg = adc_to_volts(records['v_sc_neg'], V_SC_RATIO)
+    i_load = adc_to_amps(records['i_load'])
+
+    print("=" * 96)
+    print(f"UNIT {unit_id}  ({len(records)} records, {unit['boot_count']} boots)")
+    print("=" * 96)
+    print(f"{'Seq':>6} {'Time (ms)':>10}  {'Event':<13}{'State':<10}{'Detail':<22}"
+          f"{'V_AC':>7} {'V_SC+':>7} {'V_SC-':>7} {'I (A)':>7}")
+    print("-" * 96)
+
+    for k, rec in enumerate(records):
+        etype = int(rec['type'])
+        state = int(rec['state'])
+        print(f"{unit['seq'][k]:>6} {int(rec['time_ms']):>10}  "
+              f"{EVENT_NAMES.get(etype, str(etype)):<13}"
+              f"{STATE_NAMES[state] if state < len(STATE_NAMES) else state:<10}"
+              f"{describe_arg(rec):<22}"
+              f"{v_ac[k]:>7.1f} {v_pos[k]:>7.1f} {v_neg[k]:>7.1f} {i_load[k]:>7.2f}")
+    print()
+
+
+def extract_boosts(records: np.ndarray) -> List[dict]:
+    """Group records into boost episodes (pre-trigger snapshots through end)."""
+    boosts = []
+    current = None
+
+    for rec in records:
+        etype = int(rec['type'])
+        if etype == EVENT_BOOST_START:
+            current = {'start': rec, 'samples': [rec], 'end': None, 'fault': None}
+        elif current is None:
+            continue
+        elif etype == EVENT_BOOST_SAMPLE:
+            current['samples'].append(rec)
+        elif etype in (EVENT_BOOST_END, EVENT_FAULT, EVENT_BOOT):
+            if etype == EVENT_BOOST_END:
+                current['end'] = rec
+                current['samples'].append(rec)
+            elif etype == EVENT_FAULT:
+                current['fault'] = int(rec['arg'])
+            boosts.append(current)
+            current = None
+
+    return boosts
+
+
+def print_stats(units: Dict[str, dict]):
+    """Print aggregate statistics across all units."""
+    fault_counts: Dict[str, int] = defaultdict(int)
+    reset_counts: Dict[str, int] = defaultdict(int)
+    durations = []
+    min_bank_v = []
+    peak_currents = []
+    outcomes = {'started': 0, 'timeout': 0, 'fault': 0, 'truncated': 0}
+    pll_losses = 0
+
+    for unit in units.values():
+        records = unit['records']
+        types = records['type']
+
+        for rec in records[types == EVENT_FAULT]:
+            arg = int(rec['arg'])
+            fault_counts[FAULT_NAMES[arg] if arg < len(FAULT_NAMES) else str(arg)] += 1
+        for rec in records[types == EVENT_BOOT]:
+            reset_counts[describe_arg(rec)] += 1
+        pll_losses += int(np.sum((types == EVENT_PLL) & (records['arg'] == 0)))
+
+        for boost in extract_boosts(records):
+            samples = np.array(boost['samples'], dtype=RECORD_DTYPE)
+            bank = np.minimum(adc_to_volts(samples['v_sc_pos'], V_SC_RATIO),
+                              adc_to_volts(samples['v_sc_neg'], V_SC_RATIO))
+            min_bank_v.append(bank.min())
+            peak_currents.append(adc_to_amps(samples['i_load']).max())
+
+            if boost['fault'] is not None:
+                outcomes['fault'] += 1
+            elif boost['end'] is None:
+                outcomes['truncated'] += 1
+            else:
+                duration = int(boost['end']['arg'])
+                durations.append(duration)
+                if duration > BOOST_DURATION_MS:
+                    outcomes['timeout'] += 1
+                else:
+                    outcomes['started'] += 1
+
+    print("=" * 60)
+    print(f"AGGREGATE STATISTICS ({len(units)} units)")
+    print("=" * 60)
+    print(f"Boots recorded:       {sum(reset_counts.values())}")
+    for cause, n in sorted(reset_counts.items()):
+        print(f"  {cause:<20}{n:>6}")
+    print(f"PLL lock losses:      {pll_losses}")
+
+    n_boosts = sum(outcomes.values())
+    print(f"\nBoost episodes:       {n_boosts}")
+    for outcome, n in outcomes.items():
+        pct = 100.0 * n / n_boosts if n_boosts else 0.0
+        print(f"  {outcome:<20}{n:>6}  ({pct:.0f}%)")
+
+    if durations:
+        d = np.array(durations)
+        print(f"\nBoost duration (ms):  mean {d.mean():.0f}, median {np.median(d):.0f}, "
+              f"max {d.max()}")
+    if min_bank_v:
+        v = np.array(min_bank_v)
+        print(f"Min bank voltage (V): mean {v.mean():.1f}, worst {v.min():.1f}")
+        i = np.array(peak_currents)
+        print(f"Peak current (A):     mean {i.mean():.1f}, worst {i.max():.1f}")
+
+    print(f"\nFaults:               {sum(fault_counts.values())}")
+    for name, n in sorted(fault_counts.items(), key=lambda kv: -kv[1]):
+        print(f"  {name:<20}{n:>6}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Decode soft-start event logs')
+    parser.add_argument('files', nargs='+', help='Raw dumps (flash, RAM or UART capture)')
+    parser.add_argument('--timeline', action='store_true', help='Print per-event timelines')
+    parser.add_argument('--stats', action='store_true', help='Print aggregate statistics')
+    args = parser.parse_args()
+
+    logs = []
+    for path in args.files:
+        with open(path, 'rb') as f:
+            found = find_logs(f.read())
+        if not found:
+            print(f"Warning: no event log found in {path}", file=sys.stderr)
+        logs.extend(found)
+
+    if not logs:
+        return 1
+
+    units = merge_logs(logs)
+    if args.timeline or not args.stats:
+        for unit_id, unit in units.items():
+            print_timeline(unit_id, unit)
+    if args.stats or not args.timeline:
+        print_stats(units)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Generate firmware lookup tables and fixed-point constants.
+
+Writes include/softstart_tables.h from the constants in softstart.h:
+
+  - ADC conversions as reciprocal multiplies. The Cortex-M0+ has no
+    divide instruction, so `adc * k / d` costs a libgcc call on every
+    conversion; `(adc * MUL) >> SHIFT` is one MULS and a shift. For each
+    conversion the (MUL, SHIFT) pair that fits 32 bits for every ADC count
+    and best reproduces the exact quotient is searched for, and checked
+    against the float model for all 4096 counts.
+  - The injection half-window table (asin(x)/pi vs V_bank/V_peak, Q16),
+    previously typed into main.c, with the firmware's interpolation checked
+    against the float window angle. The edge error must stay inside
+    PLL_WINDOW_GUARD; near V_bank = V_peak asin is steep enough that this
+    takes 2^8 segments (the old 32 were off by up to 3.6 deg).
+  - A |sin| duty table over one half-cycle, indexed by the top bits of the
+    PLL phase (i.e. by timer ticks into the half-cycle), for shaping the
+    injected current to the line voltage (INJECT_SINE_SHAPING).
+
+Every table and constant is validated before the header is written; the
+run fails if any error exceeds its limit. --check compares the generated
+header with the one on disk (for CI).
+
+Usage:
+    ./tools/gen_tables.py            # regenerate include/softstart_tables.h
+    ./tools/gen_tables.py --check    # fail if it is stale
+"""
+
+import argparse
+import os
+import re
+import sys
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+FIRMWARE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_H = os.path.join(FIRMWARE_DIR, 'include', 'softstart.h')
+TABLES_H = os.path.join(FIRMWARE_DIR, 'include', 'softstart_tables.h')
+
+WINDOW_BITS = 8          # Window table: 2^8 + 1 entries over V_bank/V_peak 0..1
+SINE_BITS = 8            # Sine table: 2^8 + 1 entries over the half-cycle
+
+# Validation limits
+MAX_CONVERSION_ERROR = 1         # Counts of the result (mV or mA) vs exact quotient
+MAX_SINE_ERROR = 1 / 256         # Interpolated |sin| vs float, fraction of full scale
+
+
+def read_defines(path: str = CONFIG_H) -> Dict[str, int]:
+    """Integer #defines of softstart.h, with C integer arithmetic."""
+    values: Dict[str, int] = {}
+    pattern = re.compile(r'^\s*#define\s+(\w+)\s+(.+?)\s*$')
+    with open(path) as f:
+        for line in f:
+            m = pattern.match(re.sub(r'/\*.*?\*/', '', line))
+            if not m:
+                continue
+            expr = re.sub(r'(\d+)U?L?\b', r'\1', m.group(2)).replace('/', '//')
+            try:
+                values[m.group(1)] = int(eval(expr, {'__builtins__': {}}, dict(values)))
+            except (NameError, SyntaxError, TypeError):
+                pass
+    return values
+
+
+# =============================================================================
+# Reciprocal multiplies
+# =============================================================================
+
+def reciprocal(num: int, den: int, max_input: int) -> Tuple[int, int, int]:
+    """
+    (mul, shift, max_error) with (x * mul) >> shift closest to x * num // den
+    for every 0 <= x <= max_input, and x * mul < 2^32. Exact pairs are
+    preferred; among equals the smallest shift wins.
+    """
+    x = np.arange(max_input + 1, dtype=np.int64)
+    exact = x * num // den
+    best = None
+    for shift in range(32):
+        base = num * (1 << shift) // den
+        for mul in (base, base + 1):
+            if mul <= 0 or max_input * mul >= 1 << 32:
+                continue
+            error = int(np.abs(((x * mul) >> shift) - exact).max())
+            if best is None or error < best[2]:
+                best = (mul, shift, error)
+    if best is None:
+        raise ValueError(f"no 32-bit reciprocal for {num}/{den} over 0..{max_input}")
+    return best
+
+
+def conversions(d: Dict[str, int]) -> List[dict]:
+    """The firmware's ADC conversions as exact rationals of the count."""
+    adc_max = d['ADC_MAX']
+    out = []
+    for name, ratio in (('V_AC', 'V_AC_RATIO'), ('V_SC', 'V_SC_RATIO')):
+        # mV = adc * vref * ratio / (ADC_MAX * 100), as adc_to_voltage_mv()
+        out.append(dict(name=f'{name}_MV', ratio=ratio, num=d['ADC_VREF_MV'] * d[ratio],
+                        den=adc_max * 100, unit='mV'))
+    # mA = adc * 1000 / I_SENSE_COUNTS_PER_A, as adc_to_current_ma()
+    out.append(dict(name='I_LOAD_MA', ratio='I_SENSE_COUNTS_PER_A', num=1000,
+                    den=d['I_SENSE_COUNTS_PER_A'], unit='mA'))
+    for c in out:
+        c['mul'], c['shift'], c['error'] = reciprocal(c['num'], c['den'], adc_max)
+        x = np.arange(adc_max + 1, dtype=np.int64)
+        c['float_error'] = float(np.abs(((x * c['mul']) >> c['shift']) - x * c['num'] / c['den']).max())
+        # What the previous 32-bit multiply-then-divide returned
+        legacy = ((x * c['num']) & 0xFFFFFFFF) // c['den']
+        c['legacy_error'] = float(np.abs(legacy - x * c['num'] / c['den']).max())
+    return out
+
+
+# =============================================================================
+# Phase tables
+# =============================================================================
+
+def window_table(bits: int = WINDOW_BITS) -> np.ndarray:
+    """Half-window asin(x)/pi in Q16 (32768 = quarter cycle) at x = i / 2^bits."""
+    x = np.arange((1 << bits) + 1) / (1 << bits)
+    return np.round(np.arcsin(x) / np.pi * 65536).astype(np.int64)
+
+
+def window_error_deg(table: np.ndarray, bits: int = WINDOW_BITS) -> float:
+    """
+    Worst window edge error (degrees of line phase) of pll_window()'s
+    interpolation for every Q12 ratio, against the float asin.
+    """
+    ratio = np.arange(4097, dtype=np.int64)
+    frac_bits = 12 - bits
+    idx = ratio >> frac_bits
+    frac = ratio & ((1 << frac_bits) - 1)
+    a = table[idx]
+    b = table[np.minimum(idx + 1, len(table) - 1)]
+    window = a + (((b - a) * frac) >> frac_bits)
+    exact = np.arcsin(ratio / 4096) / np.pi * 65536
+    return float(np.abs(window - exact).max() / 65536 * 180)
+
+
+def sine_table(full_scale: int, bits: int = SINE_BITS) -> np.ndarray:
+    """|sin| over one half-cycle, 2^bits + 1 entries, scaled to full_scale."""
+    theta = np.arange((1 << bits) + 1) * np.pi / (1 << bits)
+    return np.round(np.sin(theta) * full_scale).astype(np.int64)
+
+
+def sine_error(table: np.ndarray, full_scale: int, bits: int = SINE_BITS) -> float:
+    """Worst error of the table interpolated as the firmware does, vs float |sin|."""
+    phase = np.arange(0, 1 << 32, 1 << 14, dtype=np.int64)     # 2^18 phases
+    shift = 32 - bits
+    idx = phase >> shift
+    frac = (phase >> (shift - 8)) & 255
+    a = table[idx]
+    b = table[idx + 1]
+    value = a + (((b - a) * frac) >> 8)
+    exact = np.sin(phase / 2.0 ** 32 * np.pi) * full_scale
+    return float(np.abs(value - exact).max() / full_scale)
+
+
+# =============================================================================
+# Header
+# =============================================================================
+
+def c_array(name: str, values: np.ndarray, ctype: str = 'uint16_t', per_line: int = 8) -> str:
+    width = len(str(int(values.max())))
+    rows = [', '.join(f'{int(v):>{width}}' for v in values[i:i + per_line])
+            for i in range(0, len(values), per_line)]
+    body = ',\n    '.join(rows)
+    return f"static const {ctype} {name}[{len(values)}] = {{\n    {body}\n}};"
+
+
+def render(d: Dict[str, int]) -> Tuple[str, List[str]]:
+    """Header text and a validation report; raises ValueError on any failure."""
+    report = []
+    failures = []
+
+    lines = [
+        "/*",
+        " * Generated by tools/gen_tables.py from softstart.h - do not edit.",
+        " * Regenerate with `make tables`.",
+        " */",
+        "",
+        "#ifndef SOFTSTART_TABLES_H",
+        "#define SOFTSTART_TABLES_H",
+        "",
+        "#include <stdint.h>",
+        "",
+        "/*",
+        " * ADC conversions as reciprocal multiplies: (adc * MUL) >> SHIFT.",
+        f" * adc * MUL stays below 2^32 for adc <= {d['ADC_MAX']}.",
+        " */",
+    ]
+    for c in conversions(d):
+        mul = f"{c['mul']}UL"
+        lines.append(f"#define {c['name'] + '_MUL':<20}{mul:<12}"
+                     f"/* {c['num']}/{c['den']} {c['unit']} per count ({c['ratio']}) */")
+        lines.append(f"#define {c['name'] + '_SHIFT':<20}{c['shift']}")
+        report.append(f"{c['name']:<10} mul {c['mul']:>10} >> {c['shift']:<2}  "
+                      f"max error vs exact quotient {c['error']} {c['unit']}, "
+                      f"vs float {c['float_error']:.2f} {c['unit']} "
+                      f"(32-bit multiply-then-divide: {c['legacy_error']:.0f} {c['unit']})")
+        if c['error'] > MAX_CONVERSION_ERROR:
+            failures.append(f"{c['name']}: error {c['error']} {c['unit']}")
+
+    # The window edge may move by no more than the guard band that
+    # pll_window() takes off it (2^32 = one half-cycle = 180 deg)
+    guard_deg = d['PLL_WINDOW_GUARD'] / 2 ** 32 * 180
+    window = window_table()
+    window_err = window_error_deg(window)
+    report.append(f"{'window':<10} {len(window)} entries, max edge error "
+                  f"{window_err:.3f} deg (guard band {guard_deg:.3f})")
+    if window_err > guard_deg:
+        failures.append(f"window table: {window_err:.3f} deg")
+
+    duty_scale = 1 << 15
+    sine = sine_table(duty_scale)
+    sine_err = sine_error(sine, duty_scale)
+    report.append(f"{'sine':<10} {len(sine)} entries, max error {sine_err * 100:.4f}% "
+                  f"of full scale (limit {MAX_SINE_ERROR * 100:.4f}%)")
+    if sine_err > MAX_SINE_ERROR:
+        failures.append(f"sine table: {sine_err:.5f}")
+
+    lines += [
+        "",
+        "/*",
+        " * Injection half-window vs V_bank/V_peak: asin(x)/pi in Q16 (2^16 = one",
+        f" * half-cycle) at x = i/{1 << WINDOW_BITS}, interpolated by pll_window() from a",
+        f" * Q12 ratio. Worst edge error {window_err:.2f} deg, inside PLL_WINDOW_GUARD.",
+        " */",
+        f"#define {'WINDOW_TABLE_BITS':<20}{WINDOW_BITS}",
+        c_array('window_table', window),
+        "",
+        "/*",
+        " * |sin| over one half-cycle in Q15, indexed by the top SINE_TABLE_BITS of",
+        " * the PLL phase (2^32 = half-cycle) and interpolated on the next 8 bits.",
+        f" * Worst error {sine_err * 100:.3f}% of full scale.",
+        " */",
+        f"#define {'SINE_TABLE_BITS':<20}{SINE_BITS}",
+        c_array('sine_table', sine),
+        "",
+        "#endif /* SOFTSTART_TABLES_H */",
+        "",
+    ]
+    if failures:
+        raise ValueError("validation failed: " + "; ".join(failures))
+    return "\n".join(lines), report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate softstart_tables.h')
+    parser.add_argument('--check', action='store_true',
+                        help='Exit 1 if the header on disk differs from the generated one')
+    parser.add_argument('-o', '--output', default=TABLES_H)
+    args = parser.parse_args()
+
+    try:
+        text, report = render(read_defines())
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    for line in report:
+        print(line)
+
+    if args.check:
+        try:
+            with open(args.output) as f:
+                current = f.read()
+        except OSError:
+            current = None
+        if current != text:
+            print(f"{args.output} is stale; run tools/gen_tables.py", file=sys.stderr)
+            return 1
+        return 0
+
+    with open(args.output, 'w') as f:
+        f.write(text)
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
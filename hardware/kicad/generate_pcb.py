@@ -17,6 +17,11 @@ import re
 from pathlib import Path
 from dataclasses import dataclass, field
 
+# Shared stage timing (stdlib only) from the analysis scripts
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from instrument import add_arguments, configure_from_args, main_stage, stage
+
 # Simple S-expression parser (avoid kicad_tools dependency on numpy)
 class SExp:
     """Simple S-expression node."""
@@ -663,6 +668,7 @@ def generate_pcb(components: list[Component], board_width: float, board_height:
     return "\n".join(sections)
 
 
+@main_stage
 def main():
     """Generate PCB from schematic."""
     import argparse
@@ -672,7 +678,9 @@ def main():
                        help="Use compact 4-layer layout (160x100mm)")
     parser.add_argument("--output", "-o", type=str, default=None,
                        help="Output PCB filename")
+    add_arguments(parser)
     args = parser.parse_args()
+    configure_from_args(args)
 
     # Paths
     script_dir = Path(__file__).parent
@@ -708,18 +716,21 @@ def main():
 
     # Parse schematic
     print(f"Parsing schematic: {sch_path}")
-    components = parse_schematic(str(sch_path))
+    with stage("parse"):
+        components = parse_schematic(str(sch_path))
     print(f"Found {len(components)} components")
 
     # Group components
-    groups = group_components(components)
+    with stage("group"):
+        groups = group_components(components)
     for name, comps in groups.items():
         if comps:
             print(f"  {name}: {len(comps)} components")
 
     # Place components
     print("\nPlacing components...")
-    place_components(groups, board_width, board_height, compact=compact)
+    with stage("place"):
+        place_components(groups, board_width, board_height, compact=compact)
 
     # Flatten groups back to list
     all_components = []
@@ -728,10 +739,11 @@ def main():
 
     # Generate PCB
     print("\nGenerating PCB file...")
-    pcb_content = generate_pcb(all_components, board_width, board_height, num_layers=num_layers)
+    with stage("emit"):
+        pcb_content = generate_pcb(all_components, board_width, board_height, num_layers=num_layers)
 
-    # Write PCB file
-    pcb_path.write_text(pcb_content)
+        # Write PCB file
+        pcb_path.write_text(pcb_content)
     print(f"Wrote: {pcb_path}")
     print(f"File size: {pcb_path.stat().st_size} bytes")
 
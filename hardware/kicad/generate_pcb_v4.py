@@ -21,6 +21,11 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "kicad-tools
 from kicad_tools.schema.pcb import PCB
 from kicad_tools.project import Project
 
+# Shared stage timing (stdlib only) from the analysis scripts
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from instrument import add_arguments, configure_from_args, main_stage
+
 BOARD_WIDTH = 200.0
 BOARD_HEIGHT = 120.0
 MARGIN = 5.0
@@ -359,5 +364,17 @@ def generate_pcb():
     print("Done!")
 
 
-if __name__ == "__main__":
+@main_stage
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate the PCB and manufacturing files with kicad-tools")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
     generate_pcb()
+
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,11 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "kicad-tools
 
 from kicad_tools.schematic.models import Schematic, SnapMode
 
+# Shared stage timing (stdlib only) from the analysis scripts
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from instrument import add_arguments, configure_from_args, main_stage
+
 
 def create_softstart_schematic():
     """Create the soft-start schematic Rev B."""
@@ -1898,5 +1903,17 @@ def create_softstart_schematic():
     return sch
 
 
-if __name__ == "__main__":
+@main_stage
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate the soft-start schematic")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
     create_softstart_schematic()
+
+
+if __name__ == "__main__":
+    main()
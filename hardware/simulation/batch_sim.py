@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Batch ngspice runner with parameter sweeps and parallel execution.
+
+Treats the .cir decks as templates: `.param NAME=value` lines are rewritten,
+subcircuit models on X instances can be swapped (e.g. a different LM7812
+model), and subcircuit instance parameters can be overridden. Each rendered
+deck is run with `ngspice -b` in a process pool and the `meas` results are
+collected into one table. A --set or --sweep name is applied to the decks
+that define it; a name no selected deck defines is an error.
+
+Runs are cached under results/cache/<hash>/, keyed on the rendered deck plus
+the contents of every included library, so identical decks are never
+re-simulated. Without ngspice on the PATH the decks are run with the
+pure-Python fallback in mna_solver.py instead (or force it with --solver mna);
+the solver is part of the cache key.
+
+Usage:
+    ./batch_sim.py droop_event.cir --sweep T_DROOP_DURATION=0.1,0.2,0.5
+    ./batch_sim.py startup_transient.cir --sweep SC_INIT_V=0,20,40 \\
+        --xparam SUPERCAP_BANK_30S:Cell_Cap=10,12 --csv results/startup.csv
+    ./batch_sim.py all --set GEN_ZINT=3 -j 8
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Shared stage timing (stdlib only) from the analysis scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+
+from instrument import DUMP_ENV_VAR, ENV_VAR, add_arguments, configure_from_args, main_stage
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(SCRIPT_DIR, 'results', 'cache')
+
+MNA_SOLVER = os.path.join(SCRIPT_DIR, 'mna_solver.py')
+
+DECKS = ['startup_transient.cir', 'droop_event.cir', 'brownout_threshold.cir']
+
+PARAM_RE = re.compile(r'^(\s*\.param\s+)(\w+)(\s*=\s*)(\{[^}]*\}|\S+)(.*)$', re.IGNORECASE)
+INCLUDE_RE = re.compile(r'^(\s*\.(?:include|lib)\s+)(\S+)(.*)$', re.IGNORECASE)
+WRDATA_RE = re.compile(r'^(\s*wrdata\s+)(\S+)(.*)$', re.IGNORECASE)
+MEAS_RE = re.compile(r'^\s*(\w+)\s*=\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)')
+MEAS_FAIL_RE = re.compile(r'meas\w*\s+(?:tran\s+)?(\w+)\s.*failed', re.IGNORECASE)
+MEAS_DECL_RE = re.compile(r'^\s*meas\s+\w+\s+(\w+)\s', re.IGNORECASE)
+
+
+@dataclass
+class SimJob:
+    """One deck with its parameter, model and instance-parameter overrides."""
+    deck: str
+    params: Dict[str, str] = field(default_factory=dict)
+    models: Dict[str, str] = field(default_factory=dict)
+    xparams: Dict[Tuple[str, str], str] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return os.path.splitext(os.path.basename(self.deck))[0]
+
+    def overrides(self) -> Dict[str, str]:
+        """Flat view of all overrides for the results table."""
+        out = dict(self.params)
+        out.update({f'model:{k}': v for k, v in self.models.items()})
+        out.update({f'{s}:{p}': v for (s, p), v in self.xparams.items()})
+        return out
+
+
+def render_deck(job: SimJob) -> Tuple[str, List[str]]:
+    """
+    Apply overrides to a deck.
+
+    Returns the rendered text and the absolute paths of included files.
+    Includes are made absolute and wrdata outputs are redirected to the
+    run directory so rendered decks can run from anywhere.
+    """
+    deck_path = os.path.abspath(os.path.join(SCRIPT_DIR, job.deck))
+    deck_dir = os.path.dirname(deck_path)
+    with open(deck_path) as f:
+        lines = f.read().splitlines()
+
+    unused = set(job.params)
+    includes = []
+    out = []
+
+    for line in lines:
+        m = PARAM_RE.match(line)
+        if m and m.group(2) in job.params:
+            name = m.group(2)
+            line = f"{m.group(1)}{name}{m.group(3)}{job.params[name]}{m.group(5)}"
+            unused.discard(name)
+
+        m = INCLUDE_RE.match(line)
+        if m:
+            path = os.path.join(deck_dir, m.group(2))
+            includes.append(path)
+            line = f"{m.group(1)}{path}{m.group(3)}"
+
+        m = WRDATA_RE.match(line)
+        if m:
+            line = f"{m.group(1)}{os.path.basename(m.group(2))}{m.group(3)}"
+
+        if line.lstrip()[:1].upper() == 'X' and (job.models or job.xparams):
+            line = _rewrite_instance(line, job)
+
+        out.append(line)
+
+    if unused:
+        raise ValueError(f"{job.deck}: no .param for {', '.join(sorted(unused))}")
+
+    return '\n'.join(out) + '\n', includes
+
+
+def _rewrite_instance(line: str, job: SimJob) -> str:
+    """Swap the subcircuit model and override name=value instance params."""
+    tokens = line.split()
+    # Subcircuit name is the last token that is not a name=value pair
+    positional = [i for i, t in enumerate(tokens) if '=' not in t]
+    idx = positional[-1]
+    subckt = tokens[idx]
+
+    overrides = {p: v for (s, p), v in job.xparams.items() if s.upper() == subckt.upper()}
+    if subckt in job.models:
+        tokens[idx] = job.models[subckt]
+
+    for i, tok in enumerate(tokens):
+        key = tok.split('=', 1)[0]
+        if '=' in tok and key in overrides:
+            tokens[i] = f"{key}={overrides.pop(key)}"
+    tokens.extend(f"{k}={v}" for k, v in overrides.items())
+
+    return ' '.join(tokens)
+
+
+def deck_hash(text: str, includes: List[str], solver: str = 'ngspice') -> str:
+    """Content hash of a rendered deck, everything it includes and the solver."""
+    h = hashlib.sha256(text.encode())
+    if solver != 'ngspice':
+        includes = includes + [MNA_SOLVER]
+    for path in includes:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def parse_measurements(log: str, deck_text: str) -> Dict[str, float]:
+    """Pull `meas` results out of ngspice output; failed measurements are NaN."""
+    declared = []
+    for line in deck_text.splitlines():
+        m = MEAS_DECL_RE.match(line)
+        if m:
+            declared.append(m.group(1).lower())
+
+    results = {name: float('nan') for name in declared}
+    for line in log.splitlines():
+        m = MEAS_RE.match(line)
+        if m and m.group(1).lower() in results:
+            results[m.group(1).lower()] = float(m.group(2))
+        m = MEAS_FAIL_RE.search(line)
+        if m:
+            results[m.group(1).lower()] = float('nan')
+
+    return results
+
+
+def run_deck(args: Tuple[str, str, str]) -> Dict[str, float]:
+    """Worker: run one rendered deck in its cache directory."""
+    text, run_dir, solver = args
+    os.makedirs(run_dir, exist_ok=True)
+    deck_file = os.path.join(run_dir, 'deck.cir')
+    with open(deck_file, 'w') as f:
+        f.write(text)
+
+    if solver == 'ngspice':
+        cmd = ['ngspice', '-b', 'deck.cir']
+    else:
+        cmd = [sys.executable, MNA_SOLVER, 'deck.cir']
+    # A profiled batch should not profile (and log) every solver run too
+    env = {k: v for k, v in os.environ.items() if k not in (ENV_VAR, DUMP_ENV_VAR)}
+    proc = subprocess.run(cmd, cwd=run_dir, env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                          universal_newlines=True)
+    with open(os.path.join(run_dir, 'ngspice.log'), 'w') as f:
+        f.write(proc.stdout)
+
+    meas = parse_measurements(proc.stdout, text)
+    if proc.returncode == 0:
+        with open(os.path.join(run_dir, 'meas.json'), 'w') as f:
+            json.dump(meas, f, indent=1)
+    return meas
+
+
+def pick_solver(solver: str = 'auto') -> str:
+    """Resolve 'auto' to ngspice when installed, else the MNA fallback."""
+    if solver == 'auto':
+        return 'ngspice' if shutil.which('ngspice') else 'mna'
+    if solver == 'ngspice' and shutil.which('ngspice') is None:
+        raise RuntimeError("ngspice not found (see README.md for install instructions)")
+    return solver
+
+
+def run_batch(jobs: List[SimJob], workers: Optional[int] = None,
+              use_cache: bool = True, solver: str = 'auto') -> List[dict]:
+    """
+    Run all jobs, reusing cached results for decks already simulated.
+
+    Returns one row per job: deck name, overrides, cache key, whether it was
+    served from cache, the solver and the measurements.
+    """
+    solver = pick_solver(solver)
+    rendered = []
+    pending: Dict[str, str] = {}
+
+    for job in jobs:
+        text, includes = render_deck(job)
+        key = deck_hash(text, includes, solver)
+        cached = os.path.join(CACHE_DIR, key, 'meas.json')
+        hit = use_cache and os.path.exists(cached)
+        if not hit:
+            pending[key] = text  # Identical decks within a batch run once
+        rendered.append((job, key, hit))
+
+    fresh: Dict[str, Dict[str, float]] = {}
+    if pending:
+        keys = list(pending)
+        tasks = [(pending[k], os.path.join(CACHE_DIR, k), solver) for k in keys]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for key, meas in zip(keys, pool.map(run_deck, tasks)):
+                fresh[key] = meas
+
+    rows = []
+    for job, key, hit in rendered:
+        if key in fresh:
+            meas = fresh[key]
+        else:
+            with open(os.path.join(CACHE_DIR, key, 'meas.json')) as f:
+                meas = json.load(f)
+        row = {'deck': job.name, 'key': key, 'cached': hit, 'solver': solver}
+        row.update(job.overrides())
+        row.update(meas)
+        rows.append(row)
+
+    return rows
+
+
+def expand_sweeps(deck: str, fixed: Dict[str, str], sweeps: Dict[str, List[str]],
+                  models: Dict[str, str],
+                  xsweeps: Dict[Tuple[str, str], List[str]]) -> List[SimJob]:
+    """Cartesian product of all swept values."""
+    names = list(sweeps) + list(xsweeps)
+    values = list(sweeps.values()) + list(xsweeps.values())
+    jobs = []
+
+    for combo in itertools.product(*values):
+        params = dict(fixed)
+        xparams = {}
+        for name, value in zip(names, combo):
+            if isinstance(name, tuple):
+                xparams[name] = value
+            else:
+                params[name] = value
+        jobs.append(SimJob(deck, params, dict(models), xparams))
+
+    return jobs
+
+
+def print_table(rows: List[dict]):
+    """Print results grouped by deck."""
+    for deck in dict.fromkeys(r['deck'] for r in rows):
+        group = [r for r in rows if r['deck'] == deck]
+        columns = [c for c in group[0] if c not in ('deck', 'key', 'cached', 'solver')]
+        widths = [max(len(c), 10) for c in columns]
+
+        print("=" * (sum(widths) + 2 * len(widths) + 8))
+        print(f"{deck.upper()} ({group[0]['solver']})")
+        print("=" * (sum(widths) + 2 * len(widths) + 8))
+        print("  ".join(f"{c:>{w}}" for c, w in zip(columns, widths)) + "  cached")
+        print("-" * (sum(widths) + 2 * len(widths) + 8))
+        for r in group:
+            cells = []
+            for c, w in zip(columns, widths):
+                v = r.get(c, '')
+                cells.append(f"{v:>{w}.4g}" if isinstance(v, float) else f"{v!s:>{w}}")
+            print("  ".join(cells) + ("     yes" if r['cached'] else "      no"))
+        print()
+
+
+def write_csv(rows: List[dict], path: str):
+    """Write all rows to one CSV, union of columns."""
+    columns = list(dict.fromkeys(c for r in rows for c in r))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _parse_assignments(items: List[str]) -> Dict[str, List[str]]:
+    out = {}
+    for item in items:
+        name, _, values = item.partition('=')
+        if not values:
+            raise SystemExit(f"Expected NAME=value[,value...], got '{item}'")
+        out[name] = values.split(',')
+    return out
+
+
+@main_stage
+def main():
+    parser = argparse.ArgumentParser(description='Batch ngspice runner')
+    parser.add_argument('decks', nargs='+', help="Deck files, or 'all'")
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help='Fixed .param override')
+    parser.add_argument('--sweep', action='append', default=[], metavar='NAME=V1,V2',
+                        help='Swept .param (cartesian product)')
+    parser.add_argument('--model', action='append', default=[], metavar='OLD=NEW',
+                        help='Swap a subcircuit model on X instances')
+    parser.add_argument('--xparam', action='append', default=[],
+                        metavar='SUBCKT:NAME=V1,V2',
+                        help='Swept subcircuit instance parameter')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes')
+    parser.add_argument('--no-cache', action='store_true', help='Re-run cached decks')
+    parser.add_argument('--csv', help='Write the results table to CSV')
+    parser.add_argument('--solver', choices=['auto', 'ngspice', 'mna'], default='auto',
+                        help='Simulator (auto: ngspice if installed, else mna_solver.py)')
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    decks = DECKS if args.decks == ['all'] else args.decks
+    fixed = {k: v[0] for k, v in _parse_assignments(args.set).items()}
+    sweeps = _parse_assignments(args.sweep)
+    models = {k: v[0] for k, v in _parse_assignments(args.model).items()}
+    xsweeps = {}
+    for name, values in _parse_assignments(args.xparam).items():
+        subckt, _, pname = name.partition(':')
+        xsweeps[(subckt, pname)] = values
+
+    defined = {}
+    for deck in decks:
+        with open(os.path.join(SCRIPT_DIR, deck)) as f:
+            defined[deck] = {m.group(2) for m in map(PARAM_RE.match, f) if m}
+    # A misspelt override would otherwise run (and cache) the nominal deck
+    unknown = (set(fixed) | set(sweeps)) - set().union(*defined.values())
+    if unknown:
+        print(f"Error: no selected deck has a .param for {', '.join(sorted(unknown))}",
+              file=sys.stderr)
+        return 1
+
+    jobs = []
+    for deck in decks:
+        # Only apply .param overrides the deck actually defines
+        deck_fixed = {k: v for k, v in fixed.items() if k in defined[deck]}
+        deck_sweeps = {k: v for k, v in sweeps.items() if k in defined[deck]}
+        jobs.extend(expand_sweeps(deck, deck_fixed, deck_sweeps, models, xsweeps))
+
+    try:
+        rows = run_batch(jobs, workers=args.jobs, use_cache=not args.no_cache,
+                         solver=args.solver)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print_table(rows)
+    if args.csv:
+        write_csv(rows, args.csv)
+        print(f"Wrote {len(rows)} rows to {args.csv}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1380 @@
+#!/usr/bin/env python3
+"""
+Pure-Python transient solver for the simulation decks (ngspice fallback).
+
+Modified nodal analysis over the subset of SPICE the decks and
+lib/components.lib use:
+
+    R, C, L                 linear elements (C/L with IC=)
+    D                       junction diode (Is, N, Rs)
+    V, I                    DC, SIN and PWL sources
+    B, E VALUE, G VALUE     behavioral voltage/current sources
+    S                       voltage-controlled switch (Ron, Roff, Vt)
+    X / .subckt             hierarchical subcircuits with parameters
+
+plus .param, .include, .model, .ic and .tran (with uic). The .control block
+is scanned for `meas tran` and `wrdata` so the same decks produce the same
+measurement names and output files as `ngspice -b`.
+
+Each timestep is solved with a chord Newton iteration that reuses the sparse
+LU factorization of the Jacobian until convergence slows, so most steps cost
+a residual evaluation and a triangular solve instead of a refactorization.
+
+Usage:
+    ./mna_solver.py droop_event.cir
+    ./mna_solver.py brownout_threshold.cir --set RAMP_TIME=2 --method be
+"""
+
+import argparse
+import math
+import os
+import re
+import sys
+import time as _time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+# Shared stage timing (stdlib only) from the analysis scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+
+from instrument import add_arguments, configure_from_args, main_stage
+
+VT = 0.025852           # Thermal voltage at 300 K
+GMIN = 1e-12            # Shunt conductance on every node and junction
+RELTOL = 1e-3
+VNTOL = 1e-6
+ABSTOL = 1e-9
+ABSTOL_I = 1e-6        # KCL residual tolerance (A)
+MAX_ITER = 40
+EXP_LIMIT = 40.0        # Diode exponent linearized above this
+DERIV_MAX = 1e6         # Bound on behavioral-source partial derivatives
+
+SUFFIXES = {'t': 1e12, 'g': 1e9, 'meg': 1e6, 'k': 1e3, 'mil': 25.4e-6,
+            'm': 1e-3, 'u': 1e-6, 'n': 1e-9, 'p': 1e-12, 'f': 1e-15}
+NUMBER_RE = re.compile(r'^([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)(meg|mil|[tgkmunpf])?[a-z]*$',
+                       re.IGNORECASE)
+
+
+def parse_number(token: str) -> float:
+    """Parse a SPICE number with optional scale suffix (10u, 1meg, 1G)."""
+    m = NUMBER_RE.match(token.strip())
+    if not m:
+        raise ValueError(f"Not a number: {token}")
+    scale = SUFFIXES[m.group(2).lower()] if m.group(2) else 1.0
+    return float(m.group(1)) * scale
+
+
+# ============================================================================
+# Expressions
+# ============================================================================
+
+def _div(a, b):
+    # Same guard ngspice applies to behavioral-source division
+    if abs(b) < 1e-20:
+        b = 1e-20 if b >= 0 else -1e-20
+    return a / b
+
+
+def _pow(a, b):
+    try:
+        return math.pow(a, b)
+    except (ValueError, OverflowError):
+        return 0.0
+
+
+def _exp(a):
+    return math.exp(min(a, 700.0))
+
+
+FUNCTIONS = {
+    'sin': math.sin, 'cos': math.cos, 'tan': math.tan, 'tanh': math.tanh,
+    'sinh': math.sinh, 'cosh': math.cosh, 'atan': math.atan, 'asin': math.asin,
+    'acos': math.acos, 'exp': _exp, 'log': math.log, 'ln': math.log,
+    'log10': math.log10, 'sqrt': lambda a: math.sqrt(max(a, 0.0)), 'abs': abs,
+    'min': min, 'max': max, 'pow': _pow, 'pwr': _pow, 'floor': math.floor,
+    'ceil': math.ceil, 'u': lambda a: 1.0 if a > 0 else 0.0,
+    'sgn': lambda a: (a > 0) - (a < 0),
+}
+EVAL_GLOBALS = {f'_f_{k}': v for k, v in FUNCTIONS.items()}
+EVAL_GLOBALS.update({'_div': _div, '_pow': _pow,
+                     '__builtins__': {'float': float, 'bool': bool}})
+
+TOKEN_RE = re.compile(r'\s*(?:'
+                      r'(?P<num>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?(?:meg|mil|[tgkmunpf])?[a-zA-Z]*)'
+                      r'|(?P<name>[A-Za-z_][\w.]*)'
+                      r'|(?P<op>\*\*|<=|>=|==|!=|&&|\|\||[-+*/^(),?:<>!]))')
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+class _ExprParser:
+    """
+    Recursive-descent translator from a SPICE expression to Python source.
+
+    Parameters are folded in as constants; V(a[,b]) and I(Vx) become indexed
+    reads of the unknown vector `x`; `time` becomes `t`.
+    """
+
+    def __init__(self, text: str, lookup_param: Callable[[str], float],
+                 node_ref: Optional[Callable[[str], Optional[int]]] = None,
+                 branch_ref: Optional[Callable[[str], int]] = None):
+        self.text = text
+        self.pos = 0
+        self.lookup_param = lookup_param
+        self.node_ref = node_ref
+        self.branch_ref = branch_ref
+        self.deps: List[int] = []
+        self.uses_time = False
+
+    def _peek(self) -> Tuple[str, str]:
+        m = TOKEN_RE.match(self.text, self.pos)
+        if not m or m.end() == self.pos:
+            if self.text[self.pos:].strip():
+                raise ExpressionError(f"Bad expression near '{self.text[self.pos:]}'")
+            return ('end', '')
+        kind = m.lastgroup
+        return (kind, m.group(kind))
+
+    def _next(self) -> Tuple[str, str]:
+        m = TOKEN_RE.match(self.text, self.pos)
+        tok = self._peek()
+        if tok[0] != 'end':
+            self.pos = m.end()
+        return tok
+
+    def _expect(self, op: str):
+        tok = self._next()
+        if tok != ('op', op):
+            raise ExpressionError(f"Expected '{op}' in '{self.text}'")
+
+    def parse(self) -> str:
+        out = self._ternary()
+        if self._peek()[0] != 'end':
+            raise ExpressionError(f"Trailing input in '{self.text}'")
+        return out
+
+    def _ternary(self) -> str:
+        cond = self._or()
+        if self._peek() == ('op', '?'):
+            self._next()
+            a = self._ternary()
+            self._expect(':')
+            b = self._ternary()
+            return f"({a} if {cond} else {b})"
+        return cond
+
+    def _or(self) -> str:
+        left = self._and()
+        while self._peek() == ('op', '||'):
+            self._next()
+            left = f"float(bool({left}) or bool({self._and()}))"
+        return left
+
+    def _and(self) -> str:
+        left = self._cmp()
+        while self._peek() == ('op', '&&'):
+            self._next()
+            left = f"float(bool({left}) and bool({self._cmp()}))"
+        return left
+
+    def _cmp(self) -> str:
+        left = self._add()
+        while self._peek()[0] == 'op' and self._peek()[1] in ('<', '>', '<=', '>=', '==', '!='):
+            op = self._next()[1]
+            left = f"float({left} {op} {self._add()})"
+        return left
+
+    def _add(self) -> str:
+        left = self._mul()
+        while self._peek()[0] == 'op' and self._peek()[1] in ('+', '-'):
+            op = self._next()[1]
+            left = f"({left} {op} {self._mul()})"
+        return left
+
+    def _mul(self) -> str:
+        left = self._unary()
+        while self._peek()[0] == 'op' and self._peek()[1] in ('*', '/'):
+            op = self._next()[1]
+            right = self._unary()
+            left = f"({left} * {right})" if op == '*' else f"_div({left}, {right})"
+        return left
+
+    def _unary(self) -> str:
+        tok = self._peek()
+        if tok == ('op', '-'):
+            self._next()
+            return f"(-{self._unary()})"
+        if tok == ('op', '+'):
+            self._next()
+            return self._unary()
+        if tok == ('op', '!'):
+            self._next()
+            return f"float(not {self._unary()})"
+        return self._power()
+
+    def _power(self) -> str:
+        base = self._primary()
+        if self._peek()[0] == 'op' and self._peek()[1] in ('^', '**'):
+            self._next()
+            return f"_pow({base}, {self._unary()})"
+        return base
+
+    def _raw_args(self) -> List[str]:
+        """Node/device names inside V(...) or I(...), taken verbatim."""
+        self._expect('(')
+        end = self.text.index(')', self.pos)
+        args = [a.strip() for a in self.text[self.pos:end].split(',')]
+        self.pos = end + 1
+        return args
+
+    def _primary(self) -> str:
+        kind, value = self._next()
+        if kind == 'num':
+            return repr(parse_number(value))
+        if kind == 'op' and value == '(':
+            inner = self._ternary()
+            self._expect(')')
+            return f"({inner})"
+        if kind != 'name':
+            raise ExpressionError(f"Unexpected '{value}' in '{self.text}'")
+
+        lname = value.lower()
+        is_call = self._peek() == ('op', '(')
+
+        if is_call and lname == 'v':
+            if self.node_ref is None:
+                raise ExpressionError(f"V() not allowed here: '{self.text}'")
+            terms = []
+            for sign, node in zip(('', '-'), self._raw_args()):
+                idx = self.node_ref(node)
+                if idx is not None:
+                    self.deps.append(idx)
+                    terms.append(f"{sign}x[{idx}]")
+            return f"({' '.join(terms) or '0.0'})".replace(' -', ' - ')
+        if is_call and lname == 'i':
+            if self.branch_ref is None:
+                raise ExpressionError(f"I() not allowed here: '{self.text}'")
+            idx = self.branch_ref(self._raw_args()[0])
+            self.deps.append(idx)
+            return f"x[{idx}]"
+        if is_call:
+            if lname not in FUNCTIONS:
+                raise ExpressionError(f"Unknown function '{value}'")
+            self._next()
+            args = []
+            if self._peek() != ('op', ')'):
+                args.append(self._ternary())
+                while self._peek() == ('op', ','):
+                    self._next()
+                    args.append(self._ternary())
+            self._expect(')')
+            return f"_f_{lname}({', '.join(args)})"
+
+        if lname == 'time':
+            self.uses_time = True
+            return 't'
+        if lname == 'pi':
+            return repr(math.pi)
+        return repr(self.lookup_param(value))
+
+
+def eval_param(text: str, lookup_param: Callable[[str], float]) -> float:
+    """Evaluate a constant expression (parameters only)."""
+    text = text.strip()
+    if text.startswith('{') and text.endswith('}'):
+        text = text[1:-1]
+    try:
+        return parse_number(text)
+    except ValueError:
+        pass
+    src = _ExprParser(text, lookup_param).parse()
+    return float(eval(src, EVAL_GLOBALS))
+
+
+# ============================================================================
+# Netlist parsing
+# ============================================================================
+
+@dataclass
+class Subckt:
+    name: str
+    ports: List[str]
+    defaults: List[Tuple[str, str]]
+    body: List[str]
+
+
+@dataclass
+class Deck:
+    title: str = ''
+    lines: List[str] = field(default_factory=list)
+    params: List[Tuple[str, str]] = field(default_factory=list)
+    subckts: Dict[str, Subckt] = field(default_factory=dict)
+    tran: Optional[List[str]] = None
+    ic: Dict[str, str] = field(default_factory=dict)
+    control: List[str] = field(default_factory=list)
+
+
+def _logical_lines(path: str) -> List[str]:
+    """Read a netlist, expanding .include and joining '+' continuations."""
+    out: List[str] = []
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path) as f:
+        raw = f.read().splitlines()
+
+    for line in raw:
+        stripped = line.strip()
+        if stripped.startswith('+'):
+            if out:
+                out[-1] += ' ' + stripped[1:]
+            continue
+        out.append(line)
+
+    expanded = []
+    for line in out:
+        s = line.strip()
+        if s.lower().startswith(('.include', '.lib ')):
+            inc = s.split(None, 1)[1].strip().strip('"\'')
+            expanded.extend(_logical_lines(os.path.join(base, inc)))
+        else:
+            expanded.append(line)
+    return expanded
+
+
+def _strip_comment(line: str) -> str:
+    s = line.strip()
+    if s.startswith('*'):
+        return ''
+    depth = 0
+    for i, ch in enumerate(s):
+        if ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+        elif ch == ';' and depth == 0:
+            return s[:i].strip()
+    return s
+
+
+def split_tokens(line: str) -> List[str]:
+    """Whitespace split that keeps {...} and (...) groups intact."""
+    line = re.sub(r'\s*=\s*', '=', line)
+    tokens, cur, depth = [], '', 0
+    for ch in line:
+        if ch in '{(':
+            depth += 1
+        elif ch in '})':
+            depth -= 1
+        if ch.isspace() and depth == 0:
+            if cur:
+                tokens.append(cur)
+            cur = ''
+        else:
+            cur += ch
+    if cur:
+        tokens.append(cur)
+    # "D (Is=...)" -> "D(Is=...)"
+    merged: List[str] = []
+    for tok in tokens:
+        if tok.startswith('(') and merged:
+            merged[-1] += tok
+        else:
+            merged.append(tok)
+    return merged
+
+
+def _assignments(tokens: List[str]) -> List[Tuple[str, str]]:
+    return [tuple(t.split('=', 1)) for t in tokens if '=' in t]  # type: ignore
+
+
+def parse_deck(path: str, overrides: Optional[Dict[str, str]] = None) -> Deck:
+    """Parse a deck (and its includes) into top-level lines and subcircuits."""
+    deck = Deck()
+    lines = _logical_lines(path)
+    deck.title = lines[0].lstrip('* ').strip() if lines else ''
+    in_control = False
+    current: Optional[Subckt] = None
+
+    for raw in lines[1:]:
+        if in_control:
+            if raw.strip().lower().startswith('.endc'):
+                in_control = False
+            else:
+                deck.control.append(raw.strip())
+            continue
+
+        line = _strip_comment(raw)
+        if not line:
+            continue
+        low = line.lower()
+
+        if low.startswith('.control'):
+            in_control = True
+        elif low.startswith('.subckt'):
+            tokens = split_tokens(line)
+            ports = [t.lower() for t in tokens[2:] if '=' not in t and t.lower() != 'params:']
+            current = Subckt(tokens[1].upper(), ports, _assignments(tokens[2:]), [])
+        elif low.startswith('.ends'):
+            deck.subckts[current.name] = current
+            current = None
+        elif current is not None:
+            current.body.append(line)
+        elif low.startswith('.param'):
+            deck.params.extend(_assignments(split_tokens(line)[1:]))
+        elif low.startswith('.tran'):
+            deck.tran = split_tokens(line)[1:]
+        elif low.startswith('.ic'):
+            for tok in split_tokens(line)[1:]:
+                m = re.match(r'v\((\w+)\)=(.+)', tok, re.IGNORECASE)
+                if m:
+                    deck.ic[m.group(1).lower()] = m.group(2)
+        elif low.startswith('.title'):
+            deck.title = line[6:].strip()
+        elif low.startswith(('.end', '.options', '.option', '.temp')):
+            continue
+        else:
+            deck.lines.append(line)
+
+    if overrides:
+        lowered = {k.lower(): v for k, v in overrides.items()}
+        names = {k.lower() for k, _ in deck.params}
+        for name in lowered:
+            if name not in names:
+                raise ValueError(f"no .param {name} in {path}")
+        deck.params = [(k, lowered.get(k.lower(), v)) for k, v in deck.params]
+
+    return deck
+
+
+class Scope:
+    """Parameter namespace (subcircuit params shadow their parent's)."""
+
+    def __init__(self, parent: Optional['Scope'] = None):
+        self.parent = parent
+        self.values: Dict[str, float] = {}
+
+    def lookup(self, name: str) -> float:
+        key = name.lower()
+        scope: Optional[Scope] = self
+        while scope is not None:
+            if key in scope.values:
+                return scope.values[key]
+            scope = scope.parent
+        raise ExpressionError(f"Unknown parameter '{name}'")
+
+    def define(self, name: str, text: str):
+        self.values[name.lower()] = eval_param(text, self.lookup)
+
+    def value(self, text: str) -> float:
+        return eval_param(text, self.lookup)
+
+
+# ============================================================================
+# Flattened circuit
+# ============================================================================
+
+@dataclass
+class Behavioral:
+    name: str
+    kind: str               # 'v' (voltage) or 'i' (current)
+    p: int
+    n: int
+    text: str
+    scope: Scope
+    prefix: str
+    node_map: Dict[str, str]
+    func: Optional[Callable] = None
+    deps: List[int] = field(default_factory=list)
+    branch: int = -1
+
+
+@dataclass
+class Source:
+    name: str
+    kind: str               # 'v' or 'i'
+    p: int
+    n: int
+    func: Callable[[float], float]
+    breakpoints: List[float]
+    branch: int = -1
+
+
+class Circuit:
+    """Flattened netlist with node and branch indices assigned."""
+
+    def __init__(self):
+        self.node_index: Dict[str, int] = {}
+        self.resistors: List[Tuple[int, int, float]] = []
+        self.capacitors: List[Tuple[int, int, float, Optional[float]]] = []
+        self.inductors: List[Tuple[str, int, int, float, Optional[float]]] = []
+        self.diodes: List[Tuple[int, int, float, float]] = []
+        self.switches: List[Tuple[int, int, int, int, float, float, float]] = []
+        self.sources: List[Source] = []
+        self.behavioral: List[Behavioral] = []
+        self.branch_names: Dict[str, int] = {}
+        self.size = 0
+
+    def node(self, name: str) -> int:
+        """Index of a node; ground is -1."""
+        name = name.lower()
+        if name in ('0', 'gnd!'):
+            return -1
+        if name not in self.node_index:
+            self.node_index[name] = len(self.node_index)
+        return self.node_index[name]
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.node_index)
+
+
+def _source_function(spec: str, scope: Scope) -> Tuple[Callable[[float], float], List[float]]:
+    """DC value, SIN(...) or PWL(...) as a function of time."""
+    m = re.match(r'^(sin|pwl|dc)\s*\((.*)\)$', spec.strip(), re.IGNORECASE | re.DOTALL)
+    if not m:
+        value = scope.value(spec)
+        return (lambda t: value), []
+
+    kind = m.group(1).lower()
+    args = [scope.value(a) for a in split_tokens(m.group(2).replace(',', ' '))]
+
+    if kind == 'dc':
+        value = args[0]
+        return (lambda t: value), []
+    if kind == 'sin':
+        vo, va, freq = (args + [0.0, 0.0, 0.0])[:3]
+        td, theta, phase = (args[3:] + [0.0, 0.0, 0.0])[:3]
+        w = 2 * math.pi * freq
+        ph = math.radians(phase)
+
+        def sine(t: float) -> float:
+            if t < td:
+                return vo + va * math.sin(ph)
+            return vo + va * math.exp(-theta * (t - td)) * math.sin(w * (t - td) + ph)
+        return sine, [td] if td > 0 else []
+
+    times = np.array(args[0::2])
+    values = np.array(args[1::2])
+    return (lambda t: float(np.interp(t, times, values))), list(times)
+
+
+def _model_params(deck_models: Dict[str, Tuple[str, Dict[str, float]]], name: str):
+    key = name.lower()
+    if key not in deck_models:
+        raise ValueError(f"Unknown model '{name}'")
+    return deck_models[key]
+
+
+def flatten(deck: Deck, circuit: Circuit, lines: List[str], scope: Scope,
+            prefix: str = '', node_map: Optional[Dict[str, str]] = None,
+            models: Optional[Dict[str, Tuple[str, Dict[str, float]]]] = None):
+    """Add elements to the circuit, expanding X instances recursively."""
+    node_map = node_map or {}
+    models = dict(models or {})
+
+    def node(name: str) -> int:
+        name = name.lower()
+        if name in node_map:
+            return circuit.node(node_map[name])
+        if name == '0':
+            return -1
+        return circuit.node(prefix + name)
+
+    # Local .param and .model first (order matters for params)
+    for line in lines:
+        low = line.lower()
+        if low.startswith('.param'):
+            for name, text in _assignments(split_tokens(line)[1:]):
+                if name.lower() not in scope.values:   # instance values win
+                    scope.define(name, text)
+        elif low.startswith('.model'):
+            tokens = split_tokens(line)
+            m = re.match(r'^(\w+)\s*\((.*)\)$', tokens[2], re.DOTALL) if len(tokens) > 2 else None
+            mtype = (m.group(1) if m else tokens[2]).lower()
+            body = m.group(2) if m else ' '.join(tokens[3:])
+            params = {k.lower(): scope.value(v) for k, v in _assignments(split_tokens(body))}
+            models[tokens[1].lower()] = (mtype, params)
+
+    for line in lines:
+        if line.startswith('.'):
+            continue
+        tokens = split_tokens(line)
+        name = tokens[0]
+        kind = name[0].lower()
+        full = prefix + name.lower()
+        opts = dict((k.lower(), v) for k, v in _assignments(tokens))
+        positional = [t for t in tokens if '=' not in t]
+
+        if kind == 'r':
+            circuit.resistors.append((node(tokens[1]), node(tokens[2]), scope.value(tokens[3])))
+        elif kind == 'c':
+            ic = scope.value(opts['ic']) if 'ic' in opts else None
+            circuit.capacitors.append((node(tokens[1]), node(tokens[2]),
+                                       scope.value(tokens[3]), ic))
+        elif kind == 'l':
+            ic = scope.value(opts['ic']) if 'ic' in opts else None
+            circuit.inductors.append((full, node(tokens[1]), node(tokens[2]),
+                                      scope.value(tokens[3]), ic))
+        elif kind == 'd':
+            mtype, mp = _model_params(models, tokens[3])
+            a, k = node(tokens[1]), node(tokens[2])
+            rs = mp.get('rs', 0.0)
+            if rs > 0:
+                internal = circuit.node(full + '#a')
+                circuit.resistors.append((a, internal, rs))
+                a = internal
+            circuit.diodes.append((a, k, mp.get('is', 1e-14), mp.get('n', 1.0)))
+        elif kind == 's':
+            mtype, mp = _model_params(models, positional[5])
+            circuit.switches.append((node(tokens[1]), node(tokens[2]), node(tokens[3]),
+                                     node(tokens[4]), mp.get('ron', 1.0),
+                                     mp.get('roff', 1e12), mp.get('vt', 0.0)))
+        elif kind in 'vi':
+            spec = ' '.join(tokens[3:]) if len(tokens) > 3 else '0'
+            if spec.lower().startswith('dc ') or spec.lower().startswith('dc='):
+                spec = spec[3:]
+            func, bps = _source_function(spec, scope)
+            circuit.sources.append(Source(full, kind, node(tokens[1]), node(tokens[2]),
+                                          func, bps))
+        elif kind in 'beg':
+            if kind == 'b':
+                btype = 'v' if 'v' in opts else 'i'
+                text = opts[btype]
+            else:
+                btype = 'v' if kind == 'e' else 'i'
+                if 'value' not in opts:
+                    raise ValueError(f"{name}: only VALUE= behavioral form is supported")
+                text = opts['value']
+            circuit.behavioral.append(Behavioral(full, btype, node(tokens[1]), node(tokens[2]),
+                                                 text.strip()[1:-1] if text.strip().startswith('{')
+                                                 else text, scope, prefix, node_map))
+        elif kind == 'x':
+            sub_name = positional[-1].upper()
+            if sub_name not in deck.subckts:
+                raise ValueError(f"Unknown subcircuit '{positional[-1]}'")
+            sub = deck.subckts[sub_name]
+            conns = positional[1:-1]
+            if len(conns) != len(sub.ports):
+                raise ValueError(f"{name}: {len(conns)} nodes for {len(sub.ports)} ports")
+            child_map = {}
+            for port, conn in zip(sub.ports, conns):
+                conn = conn.lower()
+                child_map[port] = node_map.get(conn, conn if conn == '0' else prefix + conn)
+            child = Scope(scope)
+            for k, v in opts.items():
+                child.values[k] = scope.value(v)
+            for k, v in sub.defaults:
+                if k.lower() not in child.values:
+                    child.define(k, v)
+            flatten(deck, circuit, sub.body, child, full + '.', child_map, models)
+        else:
+            raise ValueError(f"Unsupported element '{name}'")
+
+
+def build_circuit(deck: Deck) -> Circuit:
+    """Flatten the deck and assign branch indices."""
+    circuit = Circuit()
+    scope = Scope()
+    for name, text in deck.params:
+        scope.define(name, text)
+    flatten(deck, circuit, deck.lines, scope)
+
+    k = circuit.n_nodes
+    for src in circuit.sources:
+        if src.kind == 'v':
+            src.branch = k
+            circuit.branch_names[src.name] = k
+            k += 1
+    for i, (name, *_rest) in enumerate(circuit.inductors):
+        circuit.branch_names[name] = k
+        k += 1
+    for b in circuit.behavioral:
+        if b.kind == 'v':
+            b.branch = k
+            circuit.branch_names[b.name] = k
+            k += 1
+    circuit.size = k
+
+    # Compile behavioral expressions now that every index is known
+    for b in circuit.behavioral:
+        def node_ref(name: str, b=b) -> Optional[int]:
+            name = name.lower()
+            if name in b.node_map:
+                idx = circuit.node(b.node_map[name])
+            elif name == '0':
+                idx = -1
+            else:
+                idx = circuit.node(b.prefix + name)
+            return idx if idx >= 0 else None
+
+        def branch_ref(name: str, b=b) -> int:
+            key = b.prefix + name.lower()
+            if key not in circuit.branch_names:
+                raise ExpressionError(f"No branch current for '{name}'")
+            return circuit.branch_names[key]
+
+        parser = _ExprParser(b.text, b.scope.lookup, node_ref, branch_ref)
+        src = parser.parse()
+        b.func = eval(f"lambda x, t: {src}", EVAL_GLOBALS)
+        b.deps = sorted(set(parser.deps))
+
+    if circuit.size > circuit.n_nodes + len(circuit.branch_names):
+        raise RuntimeError("branch bookkeeping mismatch")
+    return circuit
+
+
+# ============================================================================
+# Transient solver
+# ============================================================================
+
+class TransientSolver:
+    """Fixed-topology MNA transient with chord Newton and LU reuse."""
+
+    def __init__(self, circuit: Circuit, method: str = 'trap'):
+        self.c = circuit
+        self.method = method
+        self.n = circuit.size
+        nn = circuit.n_nodes
+        self.factorizations = 0
+
+        def idx(arr):
+            a = np.array(arr, dtype=int)
+            return np.where(a < 0, self.n, a)    # ground -> scratch slot
+
+        caps = circuit.capacitors
+        self.cp = idx([c[0] for c in caps])
+        self.cn = idx([c[1] for c in caps])
+        self.cval = np.array([c[2] for c in caps], dtype=float)
+
+        diodes = circuit.diodes
+        self.da = idx([d[0] for d in diodes])
+        self.dk = idx([d[1] for d in diodes])
+        self.d_is = np.array([d[2] for d in diodes], dtype=float)
+        self.d_nvt = np.array([d[3] * VT for d in diodes], dtype=float)
+        self.d_vcrit = self.d_nvt * np.log(self.d_nvt / (math.sqrt(2.0) * self.d_is))
+
+        # Incidence matrices scatter branch currents onto nodes in one product
+        self.d_inc = np.zeros((self.n + 1, len(diodes)))
+        self.d_inc[self.da, np.arange(len(diodes))] += 1.0
+        self.d_inc[self.dk, np.arange(len(diodes))] -= 1.0
+        self.c_inc = np.zeros((self.n + 1, len(caps)))
+        self.c_inc[self.cp, np.arange(len(caps))] += 1.0
+        self.c_inc[self.cn, np.arange(len(caps))] -= 1.0
+
+        # Constant conductance/incidence part
+        rows, cols, vals = [], [], []
+
+        def stamp(r, c, v):
+            if r >= 0 and c >= 0:
+                rows.append(r)
+                cols.append(c)
+                vals.append(v)
+
+        for a, b, r in circuit.resistors:
+            g = 1.0 / r
+            stamp(a, a, g), stamp(b, b, g), stamp(a, b, -g), stamp(b, a, -g)
+        for i in range(nn):
+            stamp(i, i, GMIN)
+        for src in circuit.sources:
+            if src.kind == 'v':
+                k = src.branch
+                stamp(src.p, k, 1.0), stamp(src.n, k, -1.0)
+                stamp(k, src.p, 1.0), stamp(k, src.n, -1.0)
+        for j, (name, p, q, _l, _ic) in enumerate(circuit.inductors):
+            k = circuit.branch_names[name]
+            stamp(p, k, 1.0), stamp(q, k, -1.0), stamp(k, p, 1.0), stamp(k, q, -1.0)
+        for b in circuit.behavioral:
+            if b.kind == 'v':
+                k = b.branch
+                stamp(b.p, k, 1.0), stamp(b.n, k, -1.0), stamp(k, b.p, 1.0), stamp(k, b.n, -1.0)
+        self.g_base = (np.array(rows, dtype=int), np.array(cols, dtype=int),
+                       np.array(vals, dtype=float))
+
+        # Capacitor companion pattern (scaled by geq)
+        rows, cols, sign, which = [], [], [], []
+        for j, (a, b, _c, _ic) in enumerate(caps):
+            for r, c, s in ((a, a, 1), (b, b, 1), (a, b, -1), (b, a, -1)):
+                if r >= 0 and c >= 0:
+                    rows.append(r), cols.append(c), sign.append(s), which.append(j)
+        self.cap_pattern = (np.array(rows, dtype=int), np.array(cols, dtype=int),
+                            np.array(sign, dtype=float), np.array(which, dtype=int))
+
+        # Diode Jacobian pattern (scaled by gd)
+        rows, cols, sign, which = [], [], [], []
+        for j, (a, k, _is, _n) in enumerate(diodes):
+            for r, c, s in ((a, a, 1), (k, k, 1), (a, k, -1), (k, a, -1)):
+                if r >= 0 and c >= 0:
+                    rows.append(r), cols.append(c), sign.append(s), which.append(j)
+        self.diode_pattern = (np.array(rows, dtype=int), np.array(cols, dtype=int),
+                              np.array(sign, dtype=float), np.array(which, dtype=int))
+
+        self.ind_branch = np.array([circuit.branch_names[l[0]] for l in circuit.inductors],
+                                   dtype=int)
+        self.ind_p = idx([l[1] for l in circuit.inductors])
+        self.ind_n = idx([l[2] for l in circuit.inductors])
+        self.ind_l = np.array([l[3] for l in circuit.inductors], dtype=float)
+
+        self.switch_state = np.zeros(len(circuit.switches), dtype=bool)
+
+    # -- element evaluation -------------------------------------------------
+
+    def _ext(self, x: np.ndarray) -> np.ndarray:
+        xe = np.empty(self.n + 1)
+        xe[:self.n] = x
+        xe[self.n] = 0.0
+        return xe
+
+    def _diodes(self, xe: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        vd = xe[self.da] - xe[self.dk]
+        arg = vd / self.d_nvt
+        clipped = np.minimum(arg, EXP_LIMIT)
+        ex = np.exp(clipped)
+        # Linear continuation above EXP_LIMIT keeps Newton from overflowing
+        current = self.d_is * (ex * (1.0 + arg - clipped) - 1.0) + GMIN * vd
+        gd = self.d_is * ex / self.d_nvt + GMIN
+        return current, gd
+
+    def _switch_g(self) -> np.ndarray:
+        sw = self.c.switches
+        return np.array([1.0 / (s[4] if on else s[5]) for s, on in zip(sw, self.switch_state)])
+
+    def _update_switches(self, x: np.ndarray):
+        xe = self._ext(x)
+        for j, s in enumerate(self.c.switches):
+            vc = xe[s[2] if s[2] >= 0 else self.n] - xe[s[3] if s[3] >= 0 else self.n]
+            self.switch_state[j] = vc > s[6]
+
+    def _damping(self, x: np.ndarray, dx: np.ndarray) -> float:
+        """
+        Newton step scale: cap node swings and limit forward junction steps
+        to a logarithmic increment (as SPICE's pnjlim does per device).
+        """
+        nn = self.c.n_nodes
+        alpha = 1.0
+        big = abs(dx[:nn]).max() if nn else 0.0
+        if big > 50.0:
+            alpha = 50.0 / big
+
+        if len(self.d_is):
+            xe = self._ext(x)
+            dxe = self._ext(dx)
+            v_old = xe[self.da] - xe[self.dk]
+            dv = (dxe[self.da] - dxe[self.dk]) * alpha
+            v_new = v_old + dv
+            vcrit = self.d_vcrit
+            limit = (v_new > vcrit) & (np.abs(dv) > 2 * self.d_nvt) & (dv > 0)
+            if limit.any():
+                nvt = self.d_nvt[limit]
+                allowed = np.where(v_old[limit] > 0,
+                                   nvt * np.log1p(dv[limit] / nvt),
+                                   np.maximum(vcrit[limit] - v_old[limit], 2 * nvt))
+                alpha *= float(np.min(np.minimum(allowed / dv[limit], 1.0)))
+        return alpha
+
+    def residual(self, x: np.ndarray, t: float, a_lin, b: np.ndarray) -> np.ndarray:
+        """F(x) = A x - b + nonlinear currents/constraints."""
+        xe = self._ext(x)
+        f = np.zeros(self.n + 1)
+        f[:self.n] = a_lin @ x - b
+
+        if len(self.d_is):
+            current, _ = self._diodes(xe)
+            f += self.d_inc @ current
+
+        for b_el in self.c.behavioral:
+            val = b_el.func(x, t)
+            if b_el.kind == 'v':
+                f[b_el.branch] -= val
+            else:
+                f[b_el.p if b_el.p >= 0 else self.n] += val
+                f[b_el.n if b_el.n >= 0 else self.n] -= val
+
+        if self.c.switches:
+            g = self._switch_g()
+            for j, s in enumerate(self.c.switches):
+                i = g[j] * (xe[s[0] if s[0] >= 0 else self.n] - xe[s[1] if s[1] >= 0 else self.n])
+                f[s[0] if s[0] >= 0 else self.n] += i
+                f[s[1] if s[1] >= 0 else self.n] -= i
+
+        return f[:self.n]
+
+    def jacobian(self, x: np.ndarray, t: float, a_lin) -> sp.csc_matrix:
+        """A + d(nonlinear)/dx; behavioral partials by finite differences."""
+        xe = self._ext(x)
+        rows, cols, vals = [], [], []
+
+        if len(self.d_is):
+            _, gd = self._diodes(xe)
+            r, c, s, w = self.diode_pattern
+            rows.append(r), cols.append(c), vals.append(s * gd[w])
+
+        for b_el in self.c.behavioral:
+            if not b_el.deps:
+                continue
+            base = b_el.func(x, t)
+            xp = x.copy()
+            for j in b_el.deps:
+                h = 1e-6 * max(1.0, abs(x[j]))
+                xp[j] = x[j] + h
+                d = (b_el.func(xp, t) - base) / h
+                xp[j] = x[j]
+                # Guarded divisions (x/V with V -> 0) give absurd slopes;
+                # the residual stays exact, so a bounded slope only slows
+                # convergence near the singularity instead of derailing it
+                d = max(-DERIV_MAX, min(DERIV_MAX, d))
+                if d == 0.0:
+                    continue
+                if b_el.kind == 'v':
+                    rows.append([b_el.branch]), cols.append([j]), vals.append([-d])
+                else:
+                    if b_el.p >= 0:
+                        rows.append([b_el.p]), cols.append([j]), vals.append([d])
+                    if b_el.n >= 0:
+                        rows.append([b_el.n]), cols.append([j]), vals.append([-d])
+
+        if self.c.switches:
+            g = self._switch_g()
+            for j, s in enumerate(self.c.switches):
+                for r, c, sign in ((s[0], s[0], 1), (s[1], s[1], 1), (s[0], s[1], -1),
+                                   (s[1], s[0], -1)):
+                    if r >= 0 and c >= 0:
+                        rows.append([r]), cols.append([c]), vals.append([sign * g[j]])
+
+        if rows:
+            nl = sp.coo_matrix((np.concatenate(vals), (np.concatenate(rows),
+                                                        np.concatenate(cols))),
+                               shape=(self.n, self.n))
+            return (a_lin + nl).tocsc()
+        return a_lin.tocsc()
+
+    # -- linear part per step size -------------------------------------------
+
+    def linear_matrix(self, geq_scale: float, req_scale: float):
+        """Constant part with capacitor/inductor companions for a given step."""
+        r0, c0, v0 = self.g_base
+        r, c, s, w = self.cap_pattern
+        rows = [r0, r]
+        cols = [c0, c]
+        vals = [v0, s * self.cval[w] * geq_scale]
+        if len(self.ind_branch):
+            k = self.ind_branch
+            rows.append(k), cols.append(k), vals.append(-self.ind_l * req_scale)
+        a = sp.coo_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                          shape=(self.n, self.n))
+        return a.tocsr()
+
+    def source_rhs(self, t: float) -> np.ndarray:
+        b = np.zeros(self.n + 1)
+        for src in self.c.sources:
+            v = src.func(t)
+            if src.kind == 'v':
+                b[src.branch] += v
+            else:
+                b[src.p if src.p >= 0 else self.n] -= v
+                b[src.n if src.n >= 0 else self.n] += v
+        return b
+
+    # -- Newton --------------------------------------------------------------
+
+    def newton(self, x0: np.ndarray, t: float, a_lin, b: np.ndarray,
+               lu_cache: dict) -> Tuple[Optional[np.ndarray], int]:
+        """
+        Chord Newton: keep the cached factorization while it converges,
+        refactor at the current iterate when it stalls.
+        """
+        x = x0.copy()
+        nn = self.c.n_nodes
+        prev_norm = None
+        step_ok = False
+        for it in range(1, MAX_ITER + 1):
+            f = self.residual(x, t, a_lin, b)
+
+            # Converged when the last update was small and KCL balances
+            if step_ok:
+                itol = ABSTOL_I + RELTOL * (abs(x[nn:]).max() if self.n > nn else 0.0)
+                if abs(f[:nn]).max() <= itol:
+                    return x, it - 1
+
+            fresh = lu_cache.get('lu') is None
+            if fresh:
+                lu_cache['lu'] = splu(self.jacobian(x, t, a_lin))
+                self.factorizations += 1
+                prev_norm = None
+            dx = lu_cache['lu'].solve(-f)
+            if not np.isfinite(dx).all():
+                return None, it
+
+            dx *= self._damping(x, dx)
+            x += dx
+
+            tol = RELTOL * np.abs(x)
+            tol[:nn] += VNTOL
+            tol[nn:] += ABSTOL
+            norm = (abs(dx) / tol).max()
+
+            # With a stale Jacobian a small step only counts once the
+            # contraction rate says the remaining error is small too
+            step_ok = norm <= 1.0 and (
+                fresh or (prev_norm is not None and norm < prev_norm and
+                          norm * norm / (prev_norm - norm) <= 1.0))
+
+            if prev_norm is not None and norm > 0.3 * prev_norm:
+                lu_cache['lu'] = None       # Stale Jacobian: refactor next pass
+            prev_norm = norm
+        return None, MAX_ITER
+
+    def operating_point(self, x0: np.ndarray) -> np.ndarray:
+        """DC solution at t=0 (capacitors open, inductors shorted)."""
+        a_lin = self.linear_matrix(0.0, 0.0)
+        b = self.source_rhs(0.0)[:self.n]
+        self._update_switches(x0)
+        x, _ = self.newton(x0, 0.0, a_lin, b, {})
+        if x is not None:
+            return x
+
+        # Gmin stepping
+        x = x0.copy()
+        for gmin in 10.0 ** np.arange(-2, -13, -1):
+            shunt = sp.diags(np.r_[np.full(self.c.n_nodes, gmin),
+                                   np.zeros(self.n - self.c.n_nodes)])
+            xs, _ = self.newton(x, 0.0, (a_lin + shunt).tocsr(), b, {})
+            if xs is None:
+                raise RuntimeError("DC operating point did not converge")
+            x = xs
+        x, _ = self.newton(x, 0.0, a_lin, b, {})
+        if x is None:
+            raise RuntimeError("DC operating point did not converge")
+        return x
+
+    def run(self, tstop: float, hmax: float, uic: bool = False,
+            ic: Optional[Dict[str, float]] = None,
+            breakpoints: Optional[List[float]] = None,
+            dv_max: float = 10.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Integrate to tstop. Steps are hmax/2^k; k rises when Newton fails or
+        a node moves more than dv_max volts, and falls again after a run of
+        easy steps. Returns (times, states).
+        """
+        c = self.c
+        ic = ic or {}
+        x = np.zeros(self.n)
+        for name, v in ic.items():
+            if name in c.node_index:
+                x[c.node_index[name]] = v
+
+        v_cap = np.zeros(len(self.cval))
+        if uic:
+            for j, (a, b, _cv, cic) in enumerate(c.capacitors):
+                if cic is not None:
+                    v_cap[j] = cic
+                else:
+                    v_cap[j] = (x[a] if a >= 0 else 0.0) - (x[b] if b >= 0 else 0.0)
+            i_ind = np.array([l[4] or 0.0 for l in c.inductors], dtype=float)
+        else:
+            x = self.operating_point(x)
+            xe = self._ext(x)
+            v_cap = xe[self.cp] - xe[self.cn]
+            i_ind = x[self.ind_branch] if len(self.ind_branch) else np.zeros(0)
+        i_cap = np.zeros(len(self.cval))
+        xe = self._ext(x)
+        v_ind = xe[self.ind_p] - xe[self.ind_n] if len(self.ind_branch) else np.zeros(0)
+
+        bps = sorted(set(b for b in (breakpoints or []) if 0 < b < tstop)) + [tstop]
+        times = [0.0]
+        states = [x.copy()]
+
+        t = 0.0
+        level = 4
+        max_level = 24
+        easy = 0
+        first_order = True
+        matrices: Dict[Tuple[int, bool], object] = {}
+        lu_caches: Dict[Tuple[int, bool], dict] = {}
+        bp_i = 0
+
+        while t < tstop * (1 - 1e-12):
+            while bps[bp_i] <= t * (1 + 1e-12):
+                bp_i += 1
+            h = hmax / (2 ** level)
+            partial = False
+            if t + h >= bps[bp_i] * (1 - 1e-9):
+                h = bps[bp_i] - t
+                partial = True
+
+            trap = self.method == 'trap' and not first_order
+            scale = (2.0 if trap else 1.0) / h
+            key = (level, trap) if not partial else None
+            if key is not None and key in matrices:
+                a_lin = matrices[key]
+            else:
+                a_lin = self.linear_matrix(scale, scale)
+                if key is not None:
+                    matrices[key] = a_lin
+            lu_cache = lu_caches.setdefault(key, {}) if key is not None else {}
+
+            # History sources
+            ieq = scale * self.cval * v_cap + (i_cap if trap else 0.0)
+            b = self.source_rhs(t + h)
+            b += self.c_inc @ ieq
+            if len(self.ind_branch):
+                b[self.ind_branch] -= self.ind_l * scale * i_ind + (v_ind if trap else 0.0)
+            b = b[:self.n]
+
+            self._update_switches(x)
+            x_new, iters = self.newton(x, t + h, a_lin, b, lu_cache)
+
+            nn = c.n_nodes
+            dv = np.max(np.abs(x_new[:nn] - x[:nn])) if x_new is not None and nn else 0.0
+            if x_new is None or (dv > dv_max and level < max_level):
+                if level >= max_level:
+                    raise RuntimeError(f"Timestep too small at t={t:.6g}s")
+                level += 1
+                easy = 0
+                continue
+
+            # Accept
+            xe = self._ext(x_new)
+            v_new = xe[self.cp] - xe[self.cn]
+            i_cap = scale * self.cval * v_new - ieq
+            v_cap = v_new
+            if len(self.ind_branch):
+                i_ind = x_new[self.ind_branch]
+                v_ind = xe[self.ind_p] - xe[self.ind_n]
+            x = x_new
+            t += h
+            times.append(t)
+            states.append(x.copy())
+
+            first_order = partial     # restart at first order after a breakpoint
+            if iters <= 3 and dv < dv_max / 4:
+                easy += 1
+                if easy >= 4 and level > 0:
+                    level -= 1
+                    easy = 0
+            else:
+                easy = 0
+
+        return np.array(times), np.array(states)
+
+
+# ============================================================================
+# Deck execution: .tran, meas and wrdata
+# ============================================================================
+
+class Result:
+    """Transient result with ngspice-style vector access."""
+
+    def __init__(self, circuit: Circuit, times: np.ndarray, states: np.ndarray):
+        self.circuit = circuit
+        self.time = times
+        self.states = states
+
+    def vector(self, spec: str) -> np.ndarray:
+        m = re.match(r'^\s*([vi])\(([^)]*)\)\s*$', spec, re.IGNORECASE)
+        if not m:
+            raise ValueError(f"Unsupported vector '{spec}'")
+        if m.group(1).lower() == 'i':
+            return self.states[:, self.circuit.branch_names[m.group(2).strip().lower()]]
+        out = np.zeros(len(self.time))
+        for sign, name in zip((1.0, -1.0), m.group(2).split(',')):
+            name = name.strip().lower()
+            if name == '0':
+                continue
+            if name not in self.circuit.node_index:
+                raise ValueError(f"Unknown node '{name}'")
+            out = out + sign * self.states[:, self.circuit.node_index[name]]
+        return out
+
+
+def _crossings(t: np.ndarray, v: np.ndarray, level: float, direction: str) -> np.ndarray:
+    d = v - level
+    s0, s1 = d[:-1], d[1:]
+    if direction == 'rise':
+        hit = (s0 < 0) & (s1 >= 0)
+    elif direction == 'fall':
+        hit = (s0 > 0) & (s1 <= 0)
+    else:
+        hit = ((s0 < 0) & (s1 >= 0)) | ((s0 > 0) & (s1 <= 0))
+    i = np.nonzero(hit)[0]
+    frac = s0[i] / (s0[i] - s1[i])
+    return t[i] + frac * (t[i + 1] - t[i])
+
+
+def measure(result: Result, tokens: List[str], lookup: Callable[[str], float]) -> float:
+    """Evaluate one `meas tran` command; NaN when it cannot be satisfied."""
+    t = result.time
+    opts = {}
+    args = []
+    for tok in tokens:
+        key, eq, val = tok.partition('=')
+        if eq and key.lower() in ('from', 'to', 'at', 'td', 'rise', 'fall', 'cross'):
+            opts[key.lower()] = val
+        else:
+            args.append(tok)
+
+    def num(name, default):
+        return eval_param(opts[name], lookup) if name in opts else default
+
+    t0 = num('from', t[0])
+    t1 = num('to', t[-1])
+    func = args[0].upper()
+
+    def when(spec: str) -> float:
+        vec, _, level = spec.rpartition('=')
+        v = result.vector(vec)
+        lvl = eval_param(level, lookup)
+        td = num('td', t0)
+        mask = t >= td
+        for direction in ('rise', 'fall', 'cross'):
+            if direction in opts:
+                n = opts[direction]
+                times = _crossings(t[mask], v[mask], lvl, direction)
+                if n.lower() == 'last':
+                    return times[-1] if len(times) else math.nan
+                n = int(eval_param(n, lookup))
+                return times[n - 1] if len(times) >= n else math.nan
+        times = _crossings(t[mask], v[mask], lvl, 'cross')
+        return times[0] if len(times) else math.nan
+
+    if func in ('MIN', 'MAX', 'AVG', 'RMS', 'PP', 'INTEG'):
+        v = result.vector(args[1])
+        mask = (t >= t0) & (t <= t1)
+        if mask.sum() < 1:
+            return math.nan
+        tw, vw = t[mask], v[mask]
+        if func == 'MIN':
+            return float(vw.min())
+        if func == 'MAX':
+            return float(vw.max())
+        if func == 'PP':
+            return float(vw.max() - vw.min())
+        span = tw[-1] - tw[0]
+        if func == 'INTEG':
+            return float(np.trapezoid(vw, tw))
+        if span <= 0:
+            return float(vw[0])
+        if func == 'AVG':
+            return float(np.trapezoid(vw, tw) / span)
+        return float(math.sqrt(np.trapezoid(vw * vw, tw) / span))
+
+    if func == 'FIND':
+        v = result.vector(args[1])
+        if 'at' in opts:
+            at = eval_param(opts['at'], lookup)
+        elif len(args) > 3 and args[2].upper() == 'WHEN':
+            at = when(args[3])
+        else:
+            return math.nan
+        if not (t[0] <= at <= t[-1]) or math.isnan(at):
+            return math.nan
+        return float(np.interp(at, t, v))
+
+    if func == 'WHEN':
+        return when(args[1])
+
+    raise ValueError(f"Unsupported meas function '{args[0]}'")
+
+
+def run_control(deck: Deck, result: Result, scope: Scope, out=sys.stdout) -> Dict[str, float]:
+    """Evaluate meas and wrdata commands from the .control block."""
+    results: Dict[str, float] = {}
+
+    def lookup(name: str) -> float:
+        if name.lower() in results:
+            value = results[name.lower()]
+            if math.isnan(value):
+                raise ExpressionError(f"{name} failed")
+            return value
+        return scope.lookup(name)
+
+    for line in deck.control:
+        line = _strip_comment(line)
+        if not line:
+            continue
+        tokens = split_tokens(line)
+        cmd = tokens[0].lower()
+        if cmd in ('meas', 'measure') and len(tokens) > 3 and tokens[1].lower() == 'tran':
+            name = tokens[2].lower()
+            try:
+                value = measure(result, tokens[3:], lookup)
+            except (ExpressionError, ValueError, IndexError):
+                value = math.nan
+            results[name] = value
+            if math.isnan(value):
+                print(f"meas tran {name} failed!", file=out)
+            else:
+                print(f"{name:<20}=  {value:e}", file=out)
+        elif cmd == 'wrdata' and len(tokens) > 2:
+            vectors = [result.vector(v) for v in tokens[2:]]
+            cols = []
+            for v in vectors:
+                cols.extend([result.time, v])
+            path = tokens[1]
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            np.savetxt(path, np.column_stack(cols), fmt='%.6e', delimiter=' ')
+
+    return results
+
+
+def simulate(path: str, overrides: Optional[Dict[str, str]] = None, method: str = 'trap',
+             dv_max: float = 10.0, out=sys.stdout) -> Tuple[Result, Dict[str, float]]:
+    """Parse, solve and post-process a deck the way `ngspice -b` would."""
+    deck = parse_deck(path, overrides)
+    if deck.tran is None:
+        raise ValueError(f"{path}: no .tran analysis")
+
+    scope = Scope()
+    for name, text in deck.params:
+        scope.define(name, text)
+    circuit = build_circuit(deck)
+
+    tran = [t for t in deck.tran if t.lower() != 'uic']
+    uic = len(tran) != len(deck.tran)
+    tstep = scope.value(tran[0])
+    tstop = scope.value(tran[1])
+    hmax = scope.value(tran[3]) if len(tran) > 3 else min(tstep, tstop / 50)
+    ic = {k: scope.value(v) for k, v in deck.ic.items()}
+
+    breakpoints = [bp for src in circuit.sources for bp in src.breakpoints]
+    solver = TransientSolver(circuit, method)
+    start = _time.perf_counter()
+    times, states = solver.run(tstop, hmax, uic, ic, breakpoints, dv_max)
+    elapsed = _time.perf_counter() - start
+    print(f"* {deck.title}: {len(times)} points, {solver.factorizations} LU "
+          f"factorizations, {elapsed:.2f} s", file=out)
+
+    result = Result(circuit, times, states)
+    return result, run_control(deck, result, scope, out)
+
+
+@main_stage
+def main():
+    parser = argparse.ArgumentParser(description='MNA transient solver (ngspice fallback)')
+    parser.add_argument('deck', help='Deck (.cir) file')
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help='Override a .param')
+    parser.add_argument('--method', choices=['trap', 'be'], default='trap',
+                        help='Integration method')
+    parser.add_argument('--dv-max', type=float, default=10.0,
+                        help='Largest node voltage change per step (V)')
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    overrides = dict(s.split('=', 1) for s in args.set)
+    try:
+        simulate(args.deck, overrides, args.method, args.dv_max)
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,6 +13,9 @@ GREEN='\033[0;32m'
 YELLOW='\033[1;33m'
 NC='\033[0m' # No Color
 
+# Simulator command (ngspice, or the Python MNA solver as a fallback)
+SIM="ngspice -b"
+
 # Check for ngspice
 check_ngspice() {
     if ! command -v ngspice &> /dev/null; then
@@ -28,6 +31,16 @@ check_ngspice() {
     echo -e "${GREEN}Found ngspice: $(ngspice --version | head -1)${NC}"
 }
 
+# Pick ngspice when installed, else fall back to mna_solver.py
+check_simulator() {
+    if command -v ngspice &> /dev/null; then
+        check_ngspice
+    else
+        SIM="python3 mna_solver.py"
+        echo -e "${YELLOW}ngspice not found, using mna_solver.py (measurements and wrdata only)${NC}"
+    fi
+}
+
 # Run a simulation
 run_sim() {
     local name=$1
@@ -39,7 +52,7 @@ run_sim() {
     echo -e "${YELLOW}========================================${NC}"
 
     if [ -f "$file" ]; then
-        ngspice -b "$file" 2>&1 | tee "results/${name}.log"
+        $SIM "$file" 2>&1 | tee "results/${name}.log"
         echo -e "${GREEN}Completed: $name${NC}"
     else
         echo -e "${RED}File not found: $file${NC}"
@@ -78,7 +91,7 @@ mkdir -p results
 
 case "${1:-all}" in
     all)
-        check_ngspice
+        check_simulator
         run_sim "startup_transient" "startup_transient.cir"
         run_sim "droop_event" "droop_event.cir"
         run_sim "brownout_threshold" "brownout_threshold.cir"
@@ -87,15 +100,15 @@ case "${1:-all}" in
         echo "Results in: $SCRIPT_DIR/results/"
         ;;
     startup)
-        check_ngspice
+        check_simulator
         run_sim "startup_transient" "startup_transient.cir"
         ;;
     droop)
-        check_ngspice
+        check_simulator
         run_sim "droop_event" "droop_event.cir"
         ;;
     brownout)
-        check_ngspice
+        check_simulator
         run_sim "brownout_threshold" "brownout_threshold.cir"
         ;;
     interactive)
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Fast readers for ngspice output.
+
+Parses `wrdata` text files (interleaved time/value column pairs, or a single
+scale column with `set wr_singlescale`) and raw files (binary or ASCII) into
+NumPy arrays without per-line Python parsing. Parsed data is cached next to
+the source as a structured `.npy` file and reopened memory-mapped, so runs
+can be compared repeatedly without re-parsing.
+
+Usage:
+    from spice_data import load, load_run, resample
+    d = load('results/droop_event.csv')
+    d['v(rail_3v3)'].min()
+
+    ./spice_data.py results/cache/*/droop_event.csv --column 'v(rail_3v3)'
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import re
+import sys
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Shared stage timing (stdlib only) from the analysis scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+
+from instrument import add_arguments, configure_from_args, main_stage
+
+CACHE_SUFFIX = '.npy'
+WRDATA_RE = re.compile(r'^\s*wrdata\s+(\S+)\s+(.*)$', re.IGNORECASE)
+
+
+class SpiceData:
+    """Named columns over a shared time axis, backed by one structured array."""
+
+    def __init__(self, table: np.ndarray, source: str = ''):
+        self.table = table
+        self.source = source
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.table.dtype.names[1:])
+
+    @property
+    def time(self) -> np.ndarray:
+        return self.table['time']
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.table[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.table.dtype.names
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def window(self, t0: float, t1: float) -> np.ndarray:
+        """Rows with t0 <= time <= t1 (time is monotonic)."""
+        lo = np.searchsorted(self.time, t0, side='left')
+        hi = np.searchsorted(self.time, t1, side='right')
+        return self.table[lo:hi]
+
+
+def _to_table(time: np.ndarray, columns: Dict[str, np.ndarray]) -> np.ndarray:
+    dtype = [('time', time.dtype)] + [(name, col.dtype) for name, col in columns.items()]
+    table = np.empty(len(time), dtype=dtype)
+    table['time'] = time
+    for name, col in columns.items():
+        table[name] = col
+    return table
+
+
+def wrdata_names(deck_path: str, output: Optional[str] = None) -> List[str]:
+    """Vector names from a deck's `wrdata` line (for headerless files)."""
+    with open(deck_path) as f:
+        for line in f:
+            m = WRDATA_RE.match(line)
+            if m and (output is None or
+                      os.path.basename(m.group(1)) == os.path.basename(output)):
+                return m.group(2).split()
+    return []
+
+
+def parse_wrdata(path: str, names: Optional[Sequence[str]] = None) -> np.ndarray:
+    """
+    Parse a wrdata text file into a structured array.
+
+    Handles both layouts ngspice writes: a (time, value) pair per vector, or
+    one shared scale column (`wr_singlescale`). A header line written with
+    `wr_vecnames` supplies the names; otherwise `names` is used, falling back
+    to col1..colN.
+    """
+    with open(path) as f:
+        first = f.readline()
+
+    header = None
+    try:
+        float(first.split()[0])
+    except (ValueError, IndexError):
+        header = first.split()
+
+    data = np.loadtxt(path, dtype=np.float64, skiprows=1 if header else 0, ndmin=2)
+    ncols = data.shape[1]
+
+    if header:
+        names = [n for n in header if n.lower() not in ('time', 'frequency')] or names
+
+    paired = (ncols % 2 == 0 and ncols >= 2 and
+              (ncols == 2 or np.array_equal(data[:, 0], data[:, 2])))
+    if names is not None and len(names) == ncols - 1 and ncols != 2:
+        paired = False
+
+    if paired:
+        values = data[:, 1::2]
+    else:
+        values = data[:, 1:]
+
+    if not names or len(names) != values.shape[1]:
+        names = [f'col{i + 1}' for i in range(values.shape[1])]
+
+    return _to_table(np.ascontiguousarray(data[:, 0]),
+                     {n: np.ascontiguousarray(values[:, i]) for i, n in enumerate(names)})
+
+
+def parse_raw(path: str, plot: int = 0) -> np.ndarray:
+    """
+    Parse an ngspice raw file (binary or ASCII) into a structured array.
+
+    Only the requested plot is returned; complex plots keep complex columns.
+    """
+    with open(path, 'rb') as f:
+        blob = f.read()
+
+    pos = 0
+    index = 0
+    while True:
+        header = {}
+        variables = []
+        in_vars = False
+        while True:
+            end = blob.index(b'\n', pos)
+            line = blob[pos:end].decode('ascii', 'replace').rstrip('\r')
+            pos = end + 1
+            if in_vars and line[:1] in (' ', '\t'):
+                fields = line.split()
+                variables.append(fields[1])
+                if len(variables) == int(header['no. variables']):
+                    in_vars = False
+                continue
+            key, _, value = line.partition(':')
+            key = key.strip().lower()
+            if key == 'variables':
+                in_vars = True
+            elif key in ('binary', 'values'):
+                break
+            else:
+                header[key] = value.strip()
+
+        nvars = int(header['no. variables'])
+        npoints = int(header['no. points'])
+        is_complex = 'complex' in header.get('flags', '').lower()
+        dtype = np.complex128 if is_complex else np.float64
+
+        if key == 'binary':
+            count = nvars * npoints
+            data = np.frombuffer(blob, dtype=dtype, count=count, offset=pos)
+            pos += count * np.dtype(dtype).itemsize
+            data = data.reshape(npoints, nvars)
+        else:
+            # ASCII: "index\tv0\n\tv1\n..." per point; complex as "re,im"
+            chunk_end = blob.find(b'Title:', pos)
+            chunk = blob[pos:chunk_end if chunk_end >= 0 else len(blob)]
+            tokens = chunk.replace(b',', b' ').split()
+            per_point = 1 + nvars * (2 if is_complex else 1)
+            flat = np.array(tokens[:npoints * per_point], dtype=np.float64)
+            flat = flat.reshape(npoints, per_point)[:, 1:]
+            data = flat[:, 0::2] + 1j * flat[:, 1::2] if is_complex else flat
+            pos += len(chunk)
+
+        if index == plot:
+            break
+        index += 1
+
+    scale = data[:, 0].real if not is_complex else data[:, 0]
+    return _to_table(np.ascontiguousarray(scale),
+                     {name: np.ascontiguousarray(data[:, i])
+                      for i, name in enumerate(variables[1:], start=1)})
+
+
+def cache_path(path: str, names: Optional[Sequence[str]] = None) -> str:
+    """
+    Cache file for path parsed with names. The names can change both the
+    labels and the column layout of a headerless wrdata file, so each set of
+    names gets its own cache.
+    """
+    if not names:
+        return path + CACHE_SUFFIX
+    key = hashlib.sha1('\0'.join(names).encode()).hexdigest()[:12]
+    return f'{path}.{key}{CACHE_SUFFIX}'
+
+
+def load(path: str, names: Optional[Sequence[str]] = None,
+         refresh: bool = False) -> SpiceData:
+    """
+    Load ngspice output, parsing once and memory-mapping the .npy cache after.
+
+    The cache is rebuilt whenever the source is newer than it, and is kept
+    per set of names (see cache_path).
+    """
+    cached = cache_path(path, names)
+    if (not refresh and os.path.exists(cached) and
+            os.path.getmtime(cached) >= os.path.getmtime(path)):
+        return SpiceData(np.load(cached, mmap_mode='r'), path)
+
+    with open(path, 'rb') as f:
+        is_raw = f.read(6) == b'Title:'
+    table = parse_raw(path) if is_raw else parse_wrdata(path, names)
+
+    np.save(cached, table)
+    return SpiceData(np.load(cached, mmap_mode='r'), path)
+
+
+def load_run(run_dir: str, output: str, refresh: bool = False) -> SpiceData:
+    """Load a wrdata file from a batch_sim.py cache directory, named from its deck."""
+    path = os.path.join(run_dir, output)
+    names = wrdata_names(os.path.join(run_dir, 'deck.cir'), output)
+    return load(path, names or None, refresh=refresh)
+
+
+def resample(runs: Sequence[SpiceData], column: str,
+             time: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Interpolate one column from many runs onto a shared time grid.
+
+    Returns an (n_runs, n_points) array; the grid defaults to the first run's
+    time axis. ngspice picks its own timesteps, so runs only line up after this.
+    """
+    if time is None:
+        time = np.asarray(runs[0].time)
+    out = np.empty((len(runs), len(time)))
+    for i, run in enumerate(runs):
+        out[i] = np.interp(time, run.time, run[column])
+    return out
+
+
+@main_stage
+def main():
+    parser = argparse.ArgumentParser(description='Summarize ngspice wrdata/raw output')
+    parser.add_argument('files', nargs='+', help='wrdata or raw files (globs allowed)')
+    parser.add_argument('--column', help='Column to summarize (default: all)')
+    parser.add_argument('--refresh', action='store_true', help='Ignore .npy caches')
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    paths = [p for pattern in args.files for p in sorted(glob.glob(pattern)) or [pattern]]
+
+    print(f"{'File':<48} {'Column':<16} {'Min':>10} {'Max':>10} {'Final':>10}")
+    print("-" * 98)
+    for path in paths:
+        run_dir = os.path.dirname(path)
+        if os.path.exists(os.path.join(run_dir, 'deck.cir')):
+            data = load_run(run_dir, os.path.basename(path), refresh=args.refresh)
+        else:
+            data = load(path, refresh=args.refresh)
+        columns = [args.column] if args.column else data.names
+        for name in columns:
+            col = data[name]
+            print(f"{path[-48:]:<48} {name:<16} {col.min():>10.4g} {col.max():>10.4g} "
+                  f"{col[-1]:>10.4g}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
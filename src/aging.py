@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Capacitor aging and end-of-life projection for boost designs.
+
+Energy margins are sized on new-part values. Both technologies wear out
+with time at voltage and temperature:
+
+    supercaps      capacitance fades ∝ √(equivalent hours), ESR rises
+                   linearly; rated endurance (e.g. 1000 h at 65 °C and
+                   rated voltage) ends at -30% C and 2x ESR. Life halves
+                   per +10 K and per +0.1 V of cell overvoltage; each start
+                   also adds a small cycling fade. Past rated life the
+                   linear ESR model no longer holds: ESR is held at its
+                   end-of-life multiple and sc_life (> 1) flags the part
+                   as worn out.
+    electrolytics  electrolyte loss: C fades linearly in equivalent hours
+                   against a 2000 h / 105 °C rating, with life halving
+                   per +10 K and scaling as (V_rated / V)^n for each
+                   part's own rating. Their ESR rise is not modelled;
+                   the energy models have no electrolytic ESR.
+
+Equivalent hours come from a UsageProfile (ambient, enclosure rise, hours
+a day the firmware holds the banks charged in STATE_READY, starts a day).
+Aged parts are written back into the DesignTable input columns, so the
+same energy models give energy_in_window(200) after N years. Designs,
+profiles and years are stacked into one table and evaluated in a single
+vectorized pass, which is what lets a sweep carry eol_margin_j as an
+ordinary column.
+"""
+
+import argparse
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy.special import ndtr
+
+from catalog import Catalog
+from design_table import DesignTable
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import pyplot, show
+from results import record
+
+HOURS_PER_YEAR = 8766.0
+
+
+@dataclass
+class AgingModel:
+    """Endurance ratings and acceleration rules for both technologies."""
+    temp_doubling_k: float = 10.0       # Life halves per this many kelvin
+    # Supercaps (EDLC)
+    sc_life_h: float = 1000.0
+    sc_life_temp: float = 65.0
+    sc_eol_fade: float = 0.30
+    sc_eol_esr: float = 2.0             # ESR multiple at end of rated life
+    sc_volt_doubling: float = 0.1       # Life halves per this much cell overvoltage (V)
+    sc_cycle_life: float = 500_000.0    # Full cycles to sc_eol_fade
+    # Aluminium electrolytics
+    elec_life_h: float = 2000.0
+    elec_life_temp: float = 105.0
+    elec_eol_fade: float = 0.20
+    elec_rated_voltage: float = 63.0    # For tables without an elec_rated_voltage column
+    elec_volt_exponent: float = 3.0
+    standby: float = 0.05               # Aging rate at 0 V relative to charged
+
+    def sc_hours(self, profile: 'UsageProfile', years: np.ndarray) -> np.ndarray:
+        """Equivalent hours at the supercap endurance rating."""
+        af = 2 ** ((profile.cell_temp - self.sc_life_temp) / self.temp_doubling_k
+                   + profile.overvoltage / self.sc_volt_doubling)
+        return years * HOURS_PER_YEAR * af * profile.duty(self.standby)
+
+    def elec_hours(self, profile: 'UsageProfile', years: np.ndarray, elec_voltage: np.ndarray,
+                   rated_voltage: Optional[np.ndarray] = None) -> np.ndarray:
+        """Equivalent hours at the electrolytic endurance rating."""
+        rated = self.elec_rated_voltage if rated_voltage is None else np.where(
+            rated_voltage > 0, rated_voltage, self.elec_rated_voltage)
+        volt = (np.maximum(elec_voltage, 1e-9) / rated) ** self.elec_volt_exponent
+        af = 2 ** ((profile.cell_temp - self.elec_life_temp) / self.temp_doubling_k) * volt
+        return years * HOURS_PER_YEAR * af * profile.duty(self.standby)
+
+    def sc_life(self, profile: 'UsageProfile', years: np.ndarray) -> np.ndarray:
+        """Fraction of rated supercap endurance used (> 1: past end of life)."""
+        return self.sc_hours(profile, years) / self.sc_life_h
+
+    def sc_factors(self, profile: 'UsageProfile', years: np.ndarray):
+        """(capacitance, ESR) multipliers for supercaps after years."""
+        life = self.sc_life(profile, years)
+        cycles = profile.starts_per_day * 365.25 * years / self.sc_cycle_life
+        fade = self.sc_eol_fade * (np.sqrt(life) + cycles)
+        esr = 1 + (self.sc_eol_esr - 1) * np.minimum(life, 1.0)
+        return np.clip(1 - fade, 0.05, 1.0), esr
+
+    def elec_factors(self, profile: 'UsageProfile', years: np.ndarray, elec_voltage: np.ndarray,
+                     rated_voltage: Optional[np.ndarray] = None) -> np.ndarray:
+        """Capacitance multiplier for electrolytics after years."""
+        life = self.elec_hours(profile, years, elec_voltage, rated_voltage) / self.elec_life_h
+        return np.clip(1 - self.elec_eol_fade * life, 0.05, 1.0)
+
+
+@dataclass
+class UsageProfile:
+    """How a unit is used, for aging."""
+    name: str
+    ambient_c: float = 30.0
+    enclosure_rise_c: float = 10.0      # Parts above ambient inside the box
+    powered_hours_per_day: float = 8.0  # Banks held charged (STATE_READY)
+    starts_per_day: float = 30.0
+    overvoltage: float = 0.0            # Worst cell above rating (V), see cell_string.py
+
+    @property
+    def cell_temp(self) -> float:
+        return self.ambient_c + self.enclosure_rise_c
+
+    def duty(self, standby: float) -> float:
+        """Fraction of calendar time aging at full rate."""
+        on = self.powered_hours_per_day / 24
+        return on + (1 - on) * standby
+
+
+PROFILES = [
+    UsageProfile('weekend generator', ambient_c=30.0, powered_hours_per_day=2.0,
+                 starts_per_day=8.0),
+    UsageProfile('summer daily', ambient_c=32.0, powered_hours_per_day=10.0,
+                 starts_per_day=40.0),
+    UsageProfile('hot, always on', ambient_c=40.0, enclosure_rise_c=15.0,
+                 powered_hours_per_day=24.0, starts_per_day=60.0),
+]
+
+
+def aged_table(table: DesignTable, profiles: Sequence[UsageProfile],
+               years: Sequence[float], model: Optional[AgingModel] = None) -> DesignTable:
+    """
+    One row per (design, profile, year), in that order, with aged part
+    values in the input columns and columns design, profile, years,
+    sc_life, sc_fade, sc_esr_ratio, elec_fade added. Electrolytics age
+    against the table's elec_rated_voltage column (Catalog.design_sweep)
+    where present, else the model's single rating.
+    """
+    model = model or AgingModel()
+    n, p, y = len(table), len(profiles), len(years)
+    rows = table[np.repeat(np.arange(n), p * y)]
+    yrs = np.tile(np.asarray(years, dtype=float), n * p)
+    prof = np.tile(np.repeat(np.arange(p), y), n)
+
+    rated = rows.column('elec_rated_voltage') if 'elec_rated_voltage' in rows.columns else None
+    life = np.empty(len(rows))
+    sc_c = np.empty(len(rows))
+    sc_r = np.empty(len(rows))
+    el_c = np.empty(len(rows))
+    for k, profile in enumerate(profiles):
+        at = prof == k
+        life[at] = model.sc_life(profile, yrs[at])
+        sc_c[at], sc_r[at] = model.sc_factors(profile, yrs[at])
+        el_c[at] = model.elec_factors(profile, yrs[at], rows.elec_voltage[at],
+                                      None if rated is None else rated[at])
+
+    return rows.with_columns(
+        sc_capacitance=rows.sc_capacitance * sc_c,
+        sc_esr=rows.sc_esr * sc_r,
+        elec_capacitance_uf=rows.elec_capacitance_uf * el_c,
+        design=np.repeat(np.arange(n), p * y),
+        profile=np.asarray([profiles[k].name for k in prof], dtype=object),
+        years=yrs,
+        sc_life=life,
+        sc_fade=1 - sc_c,
+        sc_esr_ratio=sc_r,
+        elec_fade=1 - el_c,
+    )
+
+
+def delivered_energy(aged: DesignTable, window_ms: float = 200) -> np.ndarray:
+    """
+    energy_in_window of an aged_table, less the supercaps' extra I²·ESR loss.
+
+    The loss is taken at the injection current or, if lower, the current at
+    which the aged bank delivers its maximum power (V / 2·ESR): past that
+    point drawing more current only delivers less.
+    """
+    extra_esr = aged.sc_bank_esr * (1 - 1 / aged.sc_esr_ratio)
+    current = np.minimum(aged.effective_current,
+                         np.divide(aged.sc_bank_voltage, 2 * aged.sc_bank_esr,
+                                   out=np.full(len(aged), np.inf), where=aged.sc_bank_esr > 0))
+    loss = current ** 2 * extra_esr * window_ms / 1000
+    return np.maximum(aged.energy_in_window(window_ms) - loss, 0.0)
+
+
+def project(table: DesignTable, profiles: Sequence[UsageProfile] = PROFILES,
+            years: Sequence[float] = tuple(range(11)), window_ms: float = 200,
+            required_j: float = 174.0, required_cv: float = 0.15,
+            model: Optional[AgingModel] = None) -> Dict[str, np.ndarray]:
+    """
+    Energy in the window and start success for every design, profile and
+    year, each shaped (designs, profiles, years).
+
+    Start success is the chance a start needing Normal(required_j,
+    required_cv·required_j) joules gets it (174 J: 8000 BTU on an EU1000i,
+    analyze_motor_startup).
+    """
+    aged = aged_table(table, profiles, years, model)
+    shape = (len(table), len(profiles), len(years))
+    energy = delivered_energy(aged, window_ms).reshape(shape)
+    return {
+        'years': np.asarray(years, dtype=float),
+        'energy_j': energy,
+        'success': ndtr((energy - required_j) / (required_cv * required_j)),
+        'sc_life': aged.sc_life.reshape(shape),
+        'sc_fade': aged.sc_fade.reshape(shape),
+        'sc_esr_ratio': aged.sc_esr_ratio.reshape(shape),
+        'elec_fade': aged.elec_fade.reshape(shape),
+    }
+
+
+def with_eol_margin(table: DesignTable, target_j: float = 200.0, years: float = 10.0,
+                    profiles: Sequence[UsageProfile] = PROFILES, window_ms: float = 200,
+                    model: Optional[AgingModel] = None) -> DesignTable:
+    """
+    The sweep table with end-of-life columns: eol_energy_j and eol_margin_j
+    for the harshest profile, plus eol_margin_j[<profile name>] per profile.
+    """
+    result = project(table, profiles, [years], window_ms, model=model)
+    energy = result['energy_j'][:, :, 0]
+    columns = {f'eol_margin_j[{p.name}]': energy[:, k] - target_j
+               for k, p in enumerate(profiles)}
+    return table.with_columns(eol_energy_j=energy.min(axis=1),
+                              eol_margin_j=energy.min(axis=1) - target_j, **columns)
+
+
+# =============================================================================
+# Report
+# =============================================================================
+
+def print_projection(table: DesignTable, result: Dict[str, np.ndarray],
+                     profiles: Sequence[UsageProfile], index: int = 0,
+                     every: int = 2):
+    """Year-by-year energy and start success of one design."""
+    row = table[index]
+    print("\n" + "=" * 84)
+    print(f"AGING: {row.total_supercaps}SC + {row.total_electrolytics}E, "
+          f"{result['energy_j'][index, 0, 0]:.0f}J in 200ms new")
+    print("=" * 84)
+    print(f"{'Profile':<20} {'Year':>5} {'SC fade':>8} {'ESR':>6} {'Elec fade':>10} "
+          f"{'E_200ms':>9} {'Success':>8}")
+    print("-" * 84)
+    for k, profile in enumerate(profiles):
+        for j in range(0, len(result['years']), every):
+            print(f"{profile.name:<20} {result['years'][j]:>5.0f} "
+                  f"{result['sc_fade'][index, k, j] * 100:>7.1f}% "
+                  f"{result['sc_esr_ratio'][index, k, j]:>5.2f}x "
+                  f"{result['elec_fade'][index, k, j] * 100:>9.1f}% "
+                  f"{result['energy_j'][index, k, j]:>8.0f}J "
+                  f"{result['success'][index, k, j] * 100:>7.1f}%"
+                  f"{'  past SC rated life' if result['sc_life'][index, k, j] > 1 else ''}")
+
+
+def print_eol_sweep(table: DesignTable, target_j: float, years: float,
+                    profiles: Sequence[UsageProfile] = PROFILES, count: int = 5):
+    """Cheapest designs meeting the target new, and after years under each profile."""
+    print("\n" + "=" * 96)
+    print(f"CHEAPEST DESIGNS FOR {target_j:.0f}J IN 200ms: NEW vs AFTER {years:.0f} YEARS")
+    print("=" * 96)
+    margins = [f'eol_margin_j[{p.name}]' for p in profiles]
+    sections = [("Sized on new parts", table.energy_new_j >= target_j)]
+    sections += [(f"Sized for {p.name}", table.column(m) >= 0) for p, m in zip(profiles, margins)]
+    for title, ok in sections:
+        rows = table[ok]
+        rows = rows[np.argsort(rows.total_cost, kind='stable')][:count]
+        print(f"\n{title}:")
+        if not len(rows):
+            print("  (none)")
+            continue
+        print(f"  {'Supercap':<20} {'Config':<10} {'Cost':>8} {'New':>6}   Margin after "
+              f"{years:.0f} years: " + " / ".join(p.name for p in profiles))
+        for r in rows:
+            name = f"{r.total_supercaps}SC+{r.total_electrolytics}E"
+            eol = " ".join(f"{getattr(r, m):>+7.0f}J" for m in margins)
+            print(f"  {r.sc_part:<20} {name:<10} ${r.total_cost:>7.2f} "
+                  f"{r.energy_new_j:>5.0f}J   {eol}")
+
+
+def plot_projection(result: Dict[str, np.ndarray], profiles: Sequence[UsageProfile],
+                    labels: Sequence[str], save_path: Optional[str] = None):
+    """Energy and start success against years, per design and profile."""
+    plt = pyplot()
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(13, 5))
+    styles = ['-', '--', ':', '-.']
+    for i, label in enumerate(labels):
+        for k, profile in enumerate(profiles):
+            kwargs = dict(color=f'C{i}', linestyle=styles[k % len(styles)], linewidth=2,
+                          label=f'{label}, {profile.name}')
+            ax1.plot(result['years'], result['energy_j'][i, k], **kwargs)
+            ax2.plot(result['years'], result['success'][i, k] * 100, **kwargs)
+
+    ax1.set_xlabel('Years in service')
+    ax1.set_ylabel('Energy in 200 ms (J)')
+    ax1.set_title('Deliverable energy')
+    ax1.grid(True, alpha=0.3)
+    ax1.legend(fontsize=7)
+
+    ax2.set_xlabel('Years in service')
+    ax2.set_ylabel('Start success (%)')
+    ax2.set_title('Chance a start gets the energy it needs')
+    ax2.set_ylim(0, 105)
+    ax2.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+
+    if save_path:
+        plt.savefig(save_path, dpi=150, bbox_inches='tight')
+        print(f"Saved: {save_path}")
+
+    return fig
+
+
+@main_stage
+def main(plot=True):
+    target_j, years = 174.0, 5.0
+
+    # Every catalog pair and cell count (catalog.py), new energy as a column
+    table = Catalog().design_sweep(max_current=40.0)
+    table = table[table.elec_current_ok]
+    table = table.with_columns(energy_new_j=table.energy_in_window(200))
+    table = with_eol_margin(table, target_j, years)
+    record('aging', table, dict(target_j=target_j, years=years),
+           **{k: table.column(k) for k in table.columns
+              if k == 'energy_new_j' or k.startswith('eol_margin_j[')})
+    print_eol_sweep(table, target_j, years)
+
+    # Year by year for the cheapest design sized on new parts, and for the mildest profile
+    picks: List[int] = []
+    for ok in (table.energy_new_j >= target_j, table.column(f'eol_margin_j[{PROFILES[0].name}]') >= 0):
+        index = np.flatnonzero(ok)
+        if len(index):
+            picks.append(int(index[np.argmin(table.total_cost[index])]))
+    chosen = table[np.asarray(picks, dtype=int)]
+    result = project(chosen)
+    for i in range(len(chosen)):
+        print_projection(chosen, result, PROFILES, index=i)
+
+    if plot:
+        labels = [f"{r.total_supercaps}SC+{r.total_electrolytics}E" for r in chosen]
+        plot_projection(result, PROFILES, labels, save_path='aging_projection.png')
+        show()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
+    main()
@@ -8,168 +8,45 @@ User plan:
 - Scale to 30 supercaps total
 """
 
+import argparse
+
 import numpy as np
-import matplotlib.pyplot as plt
-from dataclasses import dataclass
-from typing import List, Tuple
-
-
-@dataclass
-class SupercapDesign:
-    """Design configuration using 12F cells."""
-    name: str
-    cells_per_bank: int  # Series cells per bank
-    parallel_strings: int = 1  # Parallel strings per bank
-    electrolytics_per_bank: int = 0
-
-    # Component specs
-    SC_CAPACITANCE: float = 12.0  # Farads
-    SC_VOLTAGE: float = 2.7
-    SC_PRICE: float = 0.91
-    SC_ESR_MOHM: float = 36.0
-
-    ELEC_CAPACITANCE_UF: float = 4700
-    ELEC_VOLTAGE: float = 60.0  # Charge voltage
-    ELEC_PRICE: float = 0.80  # AliExpress
-
-    MAX_CURRENT: float = 20.0  # Amps
-
-    @property
-    def total_supercaps(self) -> int:
-        return 2 * self.cells_per_bank * self.parallel_strings
-
-    @property
-    def total_electrolytics(self) -> int:
-        return 2 * self.electrolytics_per_bank
-
-    @property
-    def sc_cost(self) -> float:
-        return self.total_supercaps * self.SC_PRICE
-
-    @property
-    def elec_cost(self) -> float:
-        return self.total_electrolytics * self.ELEC_PRICE
-
-    @property
-    def sc_bank_voltage(self) -> float:
-        return self.cells_per_bank * self.SC_VOLTAGE
-
-    @property
-    def sc_bank_capacitance(self) -> float:
-        """Capacitance of series-parallel bank."""
-        series_cap = self.SC_CAPACITANCE / self.cells_per_bank
-        return series_cap * self.parallel_strings
-
-    @property
-    def sc_bank_esr(self) -> float:
-        """ESR of series-parallel bank in ohms."""
-        series_esr = self.cells_per_bank * self.SC_ESR_MOHM / 1000
-        return series_esr / self.parallel_strings
-
-    @property
-    def elec_bank_capacitance(self) -> float:
-        return self.electrolytics_per_bank * self.ELEC_CAPACITANCE_UF * 1e-6
-
-    @property
-    def stacked_voltage(self) -> float:
-        if self.electrolytics_per_bank > 0:
-            return self.sc_bank_voltage + self.ELEC_VOLTAGE
-        return self.sc_bank_voltage
-
-    @property
-    def coverage(self) -> float:
-        v = self.stacked_voltage
-        V_PEAK = 170
-        if v >= V_PEAK:
-            return 1.0
-        return np.arcsin(v / V_PEAK) / (np.pi / 2)
-
-    @property
-    def sc_only_coverage(self) -> float:
-        v = self.sc_bank_voltage
-        V_PEAK = 170
-        if v >= V_PEAK:
-            return 1.0
-        return np.arcsin(v / V_PEAK) / (np.pi / 2)
-
-    @property
-    def elec_boost_duration_ms(self) -> float:
-        if self.elec_bank_capacitance == 0:
-            return 0
-        return (self.ELEC_VOLTAGE * self.elec_bank_capacitance / self.MAX_CURRENT) * 1000
-
-    @property
-    def sc_discharge_time_to_50pct_ms(self) -> float:
-        """Time to discharge supercaps to 50% voltage."""
-        v_drop = self.sc_bank_voltage * 0.5
-        return (v_drop * self.sc_bank_capacitance / self.MAX_CURRENT) * 1000
-
-    def energy_in_window(self, window_ms: float = 200) -> float:
-        """Calculate energy delivered in first N ms."""
-        window_s = window_ms / 1000
-        dt = 0.0005
-
-        total_energy = 0
-        t = 0
-
-        v_sc = self.sc_bank_voltage
-        v_elec = self.ELEC_VOLTAGE if self.electrolytics_per_bank > 0 else 0
-
-        while t < window_s:
-            if v_elec > 5:
-                v_total = v_sc + v_elec
-            else:
-                v_total = v_sc
-
-            if v_total > 0:
-                cov = np.arcsin(min(v_total / 170, 1.0)) / (np.pi / 2)
-            else:
-                cov = 0
-
-            power = v_total * self.MAX_CURRENT * cov
-            total_energy += power * dt
-
-            # Discharge
-            if v_elec > 5 and self.elec_bank_capacitance > 0:
-                v_elec -= (self.MAX_CURRENT * dt) / self.elec_bank_capacitance
-                v_elec = max(v_elec, 0)
-            elif self.sc_bank_capacitance > 0:
-                v_sc -= (self.MAX_CURRENT * dt) / self.sc_bank_capacitance
-                v_sc = max(v_sc, self.sc_bank_voltage * 0.5)
-
-            t += dt
-
-        return total_energy
-
-    @property
-    def effective_current(self) -> float:
-        return self.MAX_CURRENT * np.sqrt(self.coverage)
-
-    def print_summary(self):
-        print(f"\n{'='*60}")
-        print(f"Configuration: {self.name}")
-        print(f"{'='*60}")
-        print(f"Supercaps: {self.total_supercaps} × 12F 2.7V")
-        print(f"  Per bank: {self.cells_per_bank}S × {self.parallel_strings}P")
-        print(f"  Bank voltage: {self.sc_bank_voltage:.1f}V")
-        print(f"  Bank capacitance: {self.sc_bank_capacitance:.2f}F")
-        print(f"  Bank ESR: {self.sc_bank_esr*1000:.0f}mΩ")
-        print(f"  Cost: ${self.sc_cost:.2f}")
-
-        if self.electrolytics_per_bank > 0:
-            print(f"\nElectrolytics: {self.total_electrolytics} × 4700µF")
-            print(f"  Per bank: {self.electrolytics_per_bank}")
-            print(f"  Bank capacitance: {self.elec_bank_capacitance*1000:.1f}mF")
-            print(f"  Boost duration: {self.elec_boost_duration_ms:.0f}ms")
-            print(f"  Cost: ${self.elec_cost:.2f}")
-
-        print(f"\nPerformance:")
-        print(f"  Stacked voltage: {self.stacked_voltage:.1f}V")
-        print(f"  AC coverage: {self.coverage*100:.0f}%")
-        print(f"  SC discharge to 50%: {self.sc_discharge_time_to_50pct_ms:.0f}ms")
-        print(f"  Energy in 200ms: {self.energy_in_window(200):.0f}J")
-        print(f"  Energy in 500ms: {self.energy_in_window(500):.0f}J")
-        print(f"  Effective current: {self.effective_current:.1f}A RMS")
+
+from design_table import DesignRow, DesignTable
+from instrument import add_arguments, configure_from_args, main_stage
+from results import record
+
+
+# Tecate 12F 2.7V cells @ $0.91, AliExpress electrolytics @ $0.80, 20A injection
+CELL_12F = dict(sc_capacitance=12.0, sc_voltage=2.7, sc_price=0.91, sc_esr=0.036,
+                elec_price=0.80, max_current=20.0)
+
+
+def print_summary(design: DesignRow):
+    print(f"\n{'='*60}")
+    print(f"Configuration: {design.name}")
+    print(f"{'='*60}")
+    print(f"Supercaps: {design.total_supercaps} × 12F 2.7V")
+    print(f"  Per bank: {design.sc_per_bank}S × {design.sc_parallel}P")
+    print(f"  Bank voltage: {design.sc_bank_voltage:.1f}V")
+    print(f"  Bank capacitance: {design.sc_bank_capacitance:.2f}F")
+    print(f"  Bank ESR: {design.sc_bank_esr*1000:.0f}mΩ")
+    print(f"  Cost: ${design.sc_cost:.2f}")
+
+    if design.elec_per_bank > 0:
+        print(f"\nElectrolytics: {design.total_electrolytics} × 4700µF")
+        print(f"  Per bank: {design.elec_per_bank}")
+        print(f"  Bank capacitance: {design.elec_bank_capacitance*1000:.1f}mF")
+        print(f"  Boost duration: {design.elec_boost_duration_ms:.0f}ms")
+        print(f"  Cost: ${design.elec_cost:.2f}")
+
+    print(f"\nPerformance:")
+    print(f"  Stacked voltage: {design.stacked_voltage:.1f}V")
+    print(f"  AC coverage: {design.coverage*100:.0f}%")
+    print(f"  SC discharge to 50%: {design.sc_discharge_to_50pct_ms:.0f}ms")
+    print(f"  Energy in 200ms: {design.energy_in_window(200):.0f}J")
+    print(f"  Energy in 500ms: {design.energy_in_window(500):.0f}J")
+    print(f"  Effective current: {design.effective_current:.1f}A RMS")
 
 
 def analyze_30_supercap_configs():
@@ -180,27 +57,31 @@ def analyze_30_supercap_configs():
     print("=" * 70)
 
     # 30 total = 15 per bank
-    configs = [
+    layouts = [
         # Pure supercap configurations
-        SupercapDesign("15S per bank (no elec)", 15, 1, 0),
+        ("15S per bank (no elec)", 15, 1, 0),
 
         # With electrolytics
-        SupercapDesign("15S + 16 elec", 15, 1, 16),
-        SupercapDesign("15S + 20 elec", 15, 1, 20),
-        SupercapDesign("15S + 24 elec", 15, 1, 24),
+        ("15S + 16 elec", 15, 1, 16),
+        ("15S + 20 elec", 15, 1, 20),
+        ("15S + 24 elec", 15, 1, 24),
 
         # Alternative: 10S with more parallel (32 total, slightly over)
-        SupercapDesign("10S×1.5 (30 cells)", 10, 1, 20),  # Can't do 1.5P, use 10S
+        ("10S×1.5 (30 cells)", 10, 1, 20),  # Can't do 1.5P, use 10S
 
         # What about 12S? (24 total)
-        SupercapDesign("12S (24 cells) + 20 elec", 12, 1, 20),
+        ("12S (24 cells) + 20 elec", 12, 1, 20),
     ]
+    names, series, parallel, elec = zip(*layouts)
+    configs = DesignTable(names, sc_per_bank=series, sc_parallel=parallel,
+                          elec_per_bank=elec, **CELL_12F)
+    energy_200 = configs.energy_in_window(200)
 
     print(f"\n{'Config':<25} {'SCs':>4} {'Elec':>4} {'V_stack':>8} {'Cov%':>6} "
           f"{'E_200ms':>8} {'I_eff':>6} {'SC$':>6} {'E$':>6} {'Total':>7}")
     print("-" * 95)
 
-    for c in configs:
+    for c, energy in zip(configs, energy_200):
         # Check if stacked voltage exceeds electrolytic rating
         warning = ""
         if c.stacked_voltage > 100:
@@ -208,7 +89,7 @@ def analyze_30_supercap_configs():
 
         print(f"{c.name:<25} {c.total_supercaps:>4} {c.total_electrolytics:>4} "
               f"{c.stacked_voltage:>7.1f}V {c.coverage*100:>5.0f}% "
-              f"{c.energy_in_window(200):>7.0f}J {c.effective_current:>5.1f}A "
+              f"{energy:>7.0f}J {c.effective_current:>5.1f}A "
               f"${c.sc_cost:>5.2f} ${c.elec_cost:>5.2f} ${c.sc_cost + c.elec_cost:>6.2f}{warning}")
 
     return configs
@@ -254,12 +135,8 @@ Option C: Use 12S configuration (24 supercaps)
     print("OPTION B DETAILED: 15S + electrolytics charged to 50V")
     print("-" * 70)
 
-    @dataclass
-    class ModifiedDesign(SupercapDesign):
-        ELEC_VOLTAGE: float = 50.0  # Reduced charge voltage
-
-    design = ModifiedDesign("15S + 20 elec @ 50V", 15, 1, 20)
-    design.ELEC_VOLTAGE = 50.0  # Override
+    design = DesignTable(["15S + 20 elec @ 50V"], sc_per_bank=15, elec_per_bank=20,
+                         **dict(CELL_12F, elec_voltage=50.0))[0]  # Reduced charge voltage
 
     print(f"""
 Supercaps: 30 × 12F 2.7V @ $0.91 = ${30 * 0.91:.2f}
@@ -338,8 +215,10 @@ LABOR: Hand-solder ~70 through-hole components
     return total
 
 
+@main_stage
 def main():
     configs = analyze_30_supercap_configs()
+    record('12f_design', configs, energy_200ms_j=configs.energy_in_window(200))
     recommend_design()
     total = calculate_full_bom()
 
@@ -348,4 +227,7 @@ def main():
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
     main()
@@ -11,147 +11,38 @@ Design philosophy shift:
 - Budget: Provide enough to prevent generator trip/stall
 """
 
+import argparse
+
 import numpy as np
-import matplotlib.pyplot as plt
-from dataclasses import dataclass
 from typing import List
 
+from design_table import DesignTable
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import pyplot, show
+from results import record
+
+
+# Fixed electronics cost (simplified design)
+# - 2x MOSFET (discharge only): $4
+# - Simple comparator control (no MCU): $5
+# - Gate driver: $2
+# - Current sense resistor: $1
+# - Connectors, fuse: $10
+# - Simple PCB: $15
+ELECTRONICS_COST = 37.0  # Bare minimum
+
+
+def budget_table(names: List[str], supercaps_total, electrolytics_total,
+                 max_current_a=20.0, electronics_cost=ELECTRONICS_COST) -> DesignTable:
+    """Budget designs from total cell counts across both banks (100F cells, 20A)."""
+    return DesignTable(names,
+                       sc_per_bank=np.asarray(supercaps_total) // 2,
+                       elec_per_bank=np.asarray(electrolytics_total) // 2,
+                       max_current=max_current_a,
+                       fixed_cost=electronics_cost)
+
 
-@dataclass
-class BudgetConfig:
-    """Budget design configuration."""
-    name: str
-    supercaps_total: int  # Total across both banks
-    electrolytics_total: int
-    max_current_a: float = 20.0  # Reduced from 40A
-
-    # Component costs
-    SC_COST: float = 6.00
-    ELEC_COST: float = 2.28
-    SC_VOLTAGE: float = 2.7
-    SC_CAPACITANCE: float = 100.0
-    ELEC_CAPACITANCE_UF: float = 4700
-    ELEC_VOLTAGE: float = 60.0
-
-    # Fixed electronics cost (simplified design)
-    # - 2x MOSFET (discharge only): $4
-    # - Simple comparator control (no MCU): $5
-    # - Gate driver: $2
-    # - Current sense resistor: $1
-    # - Connectors, fuse: $10
-    # - Simple PCB: $15
-    ELECTRONICS_COST: float = 37.0  # Bare minimum
-
-    @property
-    def capacitor_cost(self) -> float:
-        return self.supercaps_total * self.SC_COST + self.electrolytics_total * self.ELEC_COST
-
-    @property
-    def total_cost(self) -> float:
-        return self.capacitor_cost + self.ELECTRONICS_COST
-
-    @property
-    def sc_per_bank(self) -> int:
-        return self.supercaps_total // 2
-
-    @property
-    def elec_per_bank(self) -> int:
-        return self.electrolytics_total // 2
-
-    @property
-    def sc_bank_voltage(self) -> float:
-        return self.sc_per_bank * self.SC_VOLTAGE
-
-    @property
-    def sc_bank_capacitance(self) -> float:
-        if self.sc_per_bank == 0:
-            return 0
-        return self.SC_CAPACITANCE / self.sc_per_bank
-
-    @property
-    def elec_bank_capacitance(self) -> float:
-        return self.elec_per_bank * self.ELEC_CAPACITANCE_UF * 1e-6
-
-    @property
-    def stacked_voltage(self) -> float:
-        if self.electrolytics_total > 0:
-            return self.sc_bank_voltage + self.ELEC_VOLTAGE
-        return self.sc_bank_voltage
-
-    @property
-    def coverage(self) -> float:
-        """Fraction of AC cycle we can inject."""
-        v = self.stacked_voltage
-        V_PEAK = 170
-        if v >= V_PEAK:
-            return 1.0
-        if v <= 0:
-            return 0
-        return np.arcsin(v / V_PEAK) / (np.pi / 2)
-
-    @property
-    def elec_boost_duration_ms(self) -> float:
-        """How long electrolytics provide boost."""
-        if self.elec_bank_capacitance == 0:
-            return 0
-        return (self.ELEC_VOLTAGE * self.elec_bank_capacitance / self.max_current_a) * 1000
-
-    def energy_in_window(self, window_ms: float = 200) -> float:
-        """Energy delivered in first N ms."""
-        window_s = window_ms / 1000
-        dt = 0.0005  # 0.5ms timestep
-
-        total_energy = 0
-        t = 0
-
-        # Track capacitor voltages
-        v_sc = self.sc_bank_voltage
-        v_elec = self.ELEC_VOLTAGE if self.electrolytics_total > 0 else 0
-
-        while t < window_s:
-            # Current voltage
-            if self.electrolytics_total > 0 and v_elec > 5:
-                v_total = v_sc + v_elec
-            else:
-                v_total = v_sc
-
-            # Coverage at this voltage
-            if v_total > 0:
-                cov = np.arcsin(min(v_total / 170, 1.0)) / (np.pi / 2)
-            else:
-                cov = 0
-
-            # Power and energy
-            power = v_total * self.max_current_a * cov
-            total_energy += power * dt
-
-            # Discharge capacitors
-            if self.electrolytics_total > 0 and v_elec > 5:
-                # Electrolytics discharge first
-                if self.elec_bank_capacitance > 0:
-                    v_elec -= (self.max_current_a * dt) / self.elec_bank_capacitance
-                    v_elec = max(v_elec, 0)
-            else:
-                # Supercaps discharge
-                if self.sc_bank_capacitance > 0:
-                    v_sc -= (self.max_current_a * dt) / self.sc_bank_capacitance
-                    v_sc = max(v_sc, self.sc_bank_voltage * 0.5)
-
-            t += dt
-
-        return total_energy
-
-    @property
-    def effective_rms_current(self) -> float:
-        """Effective RMS current contribution."""
-        return self.max_current_a * np.sqrt(self.coverage)
-
-    @property
-    def peak_power(self) -> float:
-        return self.stacked_voltage * self.max_current_a * self.coverage
-
-
-def generate_budget_configs(target_cost: float = 100) -> List[BudgetConfig]:
+def generate_budget_configs(target_cost: float = 100) -> DesignTable:
     """Generate configurations near target cost."""
 
     configs = []
@@ -163,7 +54,7 @@ def generate_budget_configs(target_cost: float = 100) -> List[BudgetConfig]:
     for sc in range(4, 14, 2):  # 4, 6, 8, 10, 12 total supercaps
         cost = sc * 6
         if cost <= cap_budget + 10:  # Allow some overage
-            configs.append(BudgetConfig(f"{sc}SC only", sc, 0))
+            configs.append((f"{sc}SC only", sc, 0))
 
     # Hybrid designs (fewer supercaps + some electrolytics)
     for sc in range(4, 10, 2):
@@ -173,9 +64,10 @@ def generate_budget_configs(target_cost: float = 100) -> List[BudgetConfig]:
         # Try a few electrolytic counts
         for elec in [8, 12, 16, 20]:
             if elec <= max_elec + 4:
-                configs.append(BudgetConfig(f"{sc}SC+{elec}E", sc, elec))
+                configs.append((f"{sc}SC+{elec}E", sc, elec))
 
-    return configs
+    names, sc_total, elec_total = zip(*configs)
+    return budget_table(list(names), sc_total, elec_total)
 
 
 def analyze_marginal_assist():
@@ -244,17 +136,17 @@ def analyze_budget_configs():
           f"{'E_200ms':>8} {'I_eff':>7} {'Notes':<20}")
     print("-" * 80)
 
+    energies = configs.energy_in_window(200)
     results = []
-    for c in configs:
-        energy = c.energy_in_window(200)
+    for c, energy in zip(configs, energies):
         results.append((c, energy))
 
         notes = ""
-        if c.electrolytics_total > 0:
+        if c.total_electrolytics > 0:
             notes = f"boost {c.elec_boost_duration_ms:.0f}ms"
 
         print(f"{c.name:<15} ${c.total_cost:>6.0f} {c.stacked_voltage:>7.1f}V "
-              f"{c.coverage*100:>5.0f}% {energy:>7.0f}J {c.effective_rms_current:>6.1f}A  {notes:<20}")
+              f"{c.coverage*100:>5.0f}% {energy:>7.0f}J {c.effective_current:>6.1f}A  {notes:<20}")
 
     print("-" * 80)
     print("Note: All use 20A max current (vs 40A in full design)")
@@ -356,6 +248,7 @@ Budget design reality check:
 
 def plot_comparison(save_path=None):
     """Plot budget vs full design comparison."""
+    plt = pyplot()
 
     fig, axes = plt.subplots(1, 2, figsize=(14, 5))
     fig.suptitle('Budget ($100) vs Full ($224) Design Comparison',
@@ -397,12 +290,12 @@ def plot_comparison(save_path=None):
     # Simulate energy over time
     time_ms = np.linspace(0, 300, 100)
 
-    budget = BudgetConfig("Budget", 6, 16, max_current_a=20)
-    full = BudgetConfig("Full", 16, 56, max_current_a=40)
-    full.ELECTRONICS_COST = 68  # Full electronics
+    designs = budget_table(["Budget", "Full"], [6, 16], [16, 56],
+                           max_current_a=[20, 40],
+                           electronics_cost=[ELECTRONICS_COST, 68])  # Full electronics
 
-    budget_energy = [budget.energy_in_window(t) for t in time_ms]
-    full_energy = [full.energy_in_window(t) for t in time_ms]
+    energy = np.array([designs.energy_in_window(t) for t in time_ms])
+    budget_energy, full_energy = energy.T
 
     ax2.plot(time_ms, budget_energy, 'b-', linewidth=2, label=f'Budget ($109)')
     ax2.plot(time_ms, full_energy, 'g-', linewidth=2, label=f'Full ($224)')
@@ -426,12 +319,20 @@ def plot_comparison(save_path=None):
     return fig
 
 
-def main():
+@main_stage
+def main(plot=True):
     analyze_marginal_assist()
-    analyze_budget_configs()
+    results = analyze_budget_configs()
+    record('budget', generate_budget_configs(100), dict(target_cost=100),
+           energy_200ms_j=[energy for _, energy in results])
     recommend_budget_design()
-    plot_comparison(save_path='budget_design_analysis.png')
+    if plot:
+        plot_comparison(save_path='budget_design_analysis.png')
+        show()
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
     main()
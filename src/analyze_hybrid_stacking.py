@@ -6,167 +6,63 @@ Concept: Charge supercaps and electrolytics separately at different voltage wind
 then switch them in SERIES during discharge for higher total voltage and coverage.
 """
 
+import argparse
+
 import numpy as np
-import matplotlib.pyplot as plt
-from dataclasses import dataclass
-from typing import List, Tuple
-
-
-@dataclass
-class HybridConfig:
-    """Configuration for hybrid stacking design."""
-    # Supercap parameters
-    supercap_cells: int
-    supercap_capacitance_F: float = 100.0
-    supercap_voltage_V: float = 2.7
-    supercap_cost_each: float = 6.0
-
-    # Electrolytic parameters
-    electrolytic_count: int = 0
-    electrolytic_capacitance_uF: float = 4700.0
-    electrolytic_voltage_V: float = 60.0  # Charge voltage (derated from 100V rating)
-    electrolytic_cost_each: float = 2.28
-
-    # System parameters
-    v_ac_peak: float = 170.0
-    max_current_A: float = 40.0
-
-    @property
-    def supercap_bank_voltage(self) -> float:
-        return self.supercap_cells * self.supercap_voltage_V
-
-    @property
-    def supercap_bank_capacitance(self) -> float:
-        return self.supercap_capacitance_F / self.supercap_cells
-
-    @property
-    def electrolytic_total_capacitance_F(self) -> float:
-        # Electrolytics in parallel
-        return self.electrolytic_count * self.electrolytic_capacitance_uF * 1e-6
-
-    @property
-    def total_series_voltage(self) -> float:
-        return self.supercap_bank_voltage + self.electrolytic_voltage_V
-
-    @property
-    def coverage_supercap_only(self) -> float:
-        v = self.supercap_bank_voltage
-        if v >= self.v_ac_peak:
-            return 1.0
-        return np.arcsin(v / self.v_ac_peak) / (np.pi / 2)
-
-    @property
-    def coverage_stacked(self) -> float:
-        v = self.total_series_voltage
-        if v >= self.v_ac_peak:
-            return 1.0
-        return np.arcsin(v / self.v_ac_peak) / (np.pi / 2)
-
-    @property
-    def electrolytic_discharge_time_s(self) -> float:
-        """Time for electrolytics to fully discharge at max current."""
-        if self.electrolytic_total_capacitance_F == 0:
-            return 0
-        return self.electrolytic_voltage_V * self.electrolytic_total_capacitance_F / self.max_current_A
-
-    @property
-    def supercap_energy_J(self) -> float:
-        # Per bank, discharge to 50%
-        c = self.supercap_bank_capacitance
-        v = self.supercap_bank_voltage
-        return 0.5 * c * (v**2 - (v/2)**2)
-
-    @property
-    def electrolytic_energy_J(self) -> float:
-        c = self.electrolytic_total_capacitance_F
-        v = self.electrolytic_voltage_V
-        return 0.5 * c * v**2
-
-    @property
-    def total_cost(self) -> float:
-        # ×2 for positive and negative banks
-        supercap_cost = 2 * self.supercap_cells * self.supercap_cost_each
-        elec_cost = 2 * self.electrolytic_count * self.electrolytic_cost_each
-        return supercap_cost + elec_cost
-
-    def power_at_time(self, t: float) -> Tuple[float, float, str]:
-        """
-        Calculate effective power at time t during discharge.
-
-        Returns: (power_watts, coverage_fraction, phase_description)
-        """
-        if t < self.electrolytic_discharge_time_s:
-            # Stacked mode - high voltage
-            v = self.total_series_voltage - (self.max_current_A * t / self.electrolytic_total_capacitance_F) if self.electrolytic_total_capacitance_F > 0 else self.supercap_bank_voltage
-            v = max(v, self.supercap_bank_voltage)  # Can't go below supercap voltage
-            coverage = np.arcsin(min(v / self.v_ac_peak, 1.0)) / (np.pi / 2)
-            power = v * self.max_current_A * coverage
-            return power, coverage, "stacked"
-        else:
-            # Supercap-only mode
-            # Account for supercap discharge
-            t_supercap = t - self.electrolytic_discharge_time_s
-            v = self.supercap_bank_voltage - (self.max_current_A * t_supercap / self.supercap_bank_capacitance)
-            v = max(v, self.supercap_bank_voltage / 2)  # Don't discharge below 50%
-            coverage = np.arcsin(min(v / self.v_ac_peak, 1.0)) / (np.pi / 2)
-            power = v * self.max_current_A * coverage
-            return power, coverage, "supercap_only"
-
-
-def simulate_discharge(config: HybridConfig, duration_s: float = 3.0, dt: float = 0.001) -> dict:
+from typing import List
+
+from design_table import DesignRow, DesignTable
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import pyplot, show
+from results import record
+
+
+def simulate_discharge(config: DesignRow, duration_s: float = 3.0, dt: float = 0.001) -> dict:
     """Simulate discharge over time."""
     times = np.arange(0, duration_s, dt)
-    powers = []
-    coverages = []
-    phases = []
-    energies = []
-
-    total_energy = 0
-    for t in times:
-        p, c, phase = config.power_at_time(t)
-        powers.append(p)
-        coverages.append(c)
-        phases.append(phase)
-        total_energy += p * dt
-        energies.append(total_energy)
+    powers, coverages, stacked = config.power_at(times)
+    energies = np.cumsum(powers * dt)
 
     return {
         'times': times,
         'powers': powers,
         'coverages': coverages,
-        'phases': phases,
+        'phases': np.where(stacked, 'stacked', 'supercap_only'),
         'cumulative_energy': energies,
-        'average_power': total_energy / duration_s,
+        'average_power': energies[-1] / duration_s,
         'config': config
     }
 
 
-def compare_configurations():
-    """Compare various hybrid configurations."""
-    configs = [
+def configuration_table() -> DesignTable:
+    """The supercap-only and hybrid layouts compared."""
+    layouts = [
         # Supercap only configurations
-        HybridConfig(supercap_cells=9, electrolytic_count=0),   # Current design
-        HybridConfig(supercap_cells=18, electrolytic_count=0),  # Double supercaps
-        HybridConfig(supercap_cells=25, electrolytic_count=0),  # For 67.5V
+        (9, 0),    # Current design
+        (18, 0),   # Double supercaps
+        (25, 0),   # For 67.5V
 
         # Hybrid stacking configurations
-        HybridConfig(supercap_cells=9, electrolytic_count=10),  # Small boost
-        HybridConfig(supercap_cells=9, electrolytic_count=20),  # Medium boost
-        HybridConfig(supercap_cells=9, electrolytic_count=40),  # Large boost
+        (9, 10),   # Small boost
+        (9, 20),   # Medium boost
+        (9, 40),   # Large boost
 
         # Larger supercap + boost
-        HybridConfig(supercap_cells=12, electrolytic_count=20),
-        HybridConfig(supercap_cells=15, electrolytic_count=20),
+        (12, 20),
+        (15, 20),
     ]
+    sc, elec = zip(*layouts)
+    return DesignTable(sc_per_bank=sc, elec_per_bank=elec, max_current=40.0)
 
-    # Run simulations
-    results = [simulate_discharge(c) for c in configs]
 
-    return results
+def compare_configurations():
+    """Compare various hybrid configurations."""
+    return [simulate_discharge(c) for c in configuration_table()]
 
 
 def plot_comparison(results: List[dict], save_path: str = None):
     """Plot comparison of configurations."""
+    plt = pyplot()
     fig, axes = plt.subplots(2, 2, figsize=(14, 10))
     fig.suptitle('Hybrid Stacking Analysis: Supercaps + Electrolytics', fontsize=14, fontweight='bold')
 
@@ -177,9 +73,9 @@ def plot_comparison(results: List[dict], save_path: str = None):
     ax1 = axes[0, 0]
     for i, r in enumerate(results):
         c = r['config']
-        label = f"{c.supercap_cells*2}SC"
-        if c.electrolytic_count > 0:
-            label += f"+{c.electrolytic_count*2}E"
+        label = f"{c.sc_per_bank*2}SC"
+        if c.elec_per_bank > 0:
+            label += f"+{c.elec_per_bank*2}E"
         label += f" (${c.total_cost:.0f})"
         ax1.plot(r['times'] * 1000, r['powers'], color=colors[i], linewidth=2, label=label)
 
@@ -217,16 +113,16 @@ def plot_comparison(results: List[dict], save_path: str = None):
     # Separate hybrid vs supercap-only
     for i, r in enumerate(results):
         c = r['config']
-        marker = 's' if c.electrolytic_count > 0 else 'o'
-        color = 'blue' if c.electrolytic_count == 0 else 'green'
-        label = 'Supercap only' if c.electrolytic_count == 0 and i == 0 else None
-        label = 'Hybrid' if c.electrolytic_count > 0 and i == 3 else label
+        marker = 's' if c.elec_per_bank > 0 else 'o'
+        color = 'blue' if c.elec_per_bank == 0 else 'green'
+        label = 'Supercap only' if c.elec_per_bank == 0 and i == 0 else None
+        label = 'Hybrid' if c.elec_per_bank > 0 and i == 3 else label
         ax3.scatter(costs[i], avg_powers[i], color=color, marker=marker, s=100, label=label)
 
         # Annotate
-        txt = f"{c.supercap_cells*2}SC"
-        if c.electrolytic_count > 0:
-            txt += f"+{c.electrolytic_count*2}E"
+        txt = f"{c.sc_per_bank*2}SC"
+        if c.elec_per_bank > 0:
+            txt += f"+{c.elec_per_bank*2}E"
         ax3.annotate(txt, (costs[i], avg_powers[i]), textcoords="offset points",
                     xytext=(5, 5), fontsize=8)
 
@@ -243,16 +139,16 @@ def plot_comparison(results: List[dict], save_path: str = None):
     table_data = []
     for r in results:
         c = r['config']
-        sc_str = f"{c.supercap_cells*2}"
-        elec_str = f"{c.electrolytic_count*2}" if c.electrolytic_count > 0 else "-"
+        sc_str = f"{c.sc_per_bank*2}"
+        elec_str = f"{c.elec_per_bank*2}" if c.elec_per_bank > 0 else "-"
         table_data.append([
             sc_str,
             elec_str,
             f"${c.total_cost:.0f}",
-            f"{c.supercap_bank_voltage:.1f}V",
-            f"{c.total_series_voltage:.1f}V" if c.electrolytic_count > 0 else "-",
-            f"{c.coverage_stacked*100:.1f}%" if c.electrolytic_count > 0 else f"{c.coverage_supercap_only*100:.1f}%",
-            f"{c.electrolytic_discharge_time_s*1000:.0f}ms" if c.electrolytic_count > 0 else "-",
+            f"{c.sc_bank_voltage:.1f}V",
+            f"{c.stacked_voltage:.1f}V" if c.elec_per_bank > 0 else "-",
+            f"{c.coverage*100:.1f}%" if c.elec_per_bank > 0 else f"{c.sc_only_coverage*100:.1f}%",
+            f"{c.elec_boost_s*1000:.0f}ms" if c.elec_per_bank > 0 else "-",
             f"{r['average_power']:.0f}W",
         ])
 
@@ -288,15 +184,15 @@ def print_summary(results: List[dict]):
 
     for r in results:
         c = r['config']
-        name = f"{c.supercap_cells*2}SC"
-        if c.electrolytic_count > 0:
-            name += f"+{c.electrolytic_count*2}E"
+        name = f"{c.sc_per_bank*2}SC"
+        if c.elec_per_bank > 0:
+            name += f"+{c.elec_per_bank*2}E"
 
-        v_stack = f"{c.total_series_voltage:.1f}V" if c.electrolytic_count > 0 else "-"
-        coverage = c.coverage_stacked if c.electrolytic_count > 0 else c.coverage_supercap_only
-        boost = f"{c.electrolytic_discharge_time_s*1000:.0f}ms" if c.electrolytic_count > 0 else "-"
+        v_stack = f"{c.stacked_voltage:.1f}V" if c.elec_per_bank > 0 else "-"
+        coverage = c.coverage if c.elec_per_bank > 0 else c.sc_only_coverage
+        boost = f"{c.elec_boost_s*1000:.0f}ms" if c.elec_per_bank > 0 else "-"
 
-        print(f"{name:<20} ${c.total_cost:>7.0f} {c.supercap_bank_voltage:>8.1f}V {v_stack:>10} "
+        print(f"{name:<20} ${c.total_cost:>7.0f} {c.sc_bank_voltage:>8.1f}V {v_stack:>10} "
               f"{coverage*100:>9.1f}% {boost:>10} {r['average_power']:>10.0f}W")
 
     print("=" * 100)
@@ -305,28 +201,36 @@ def print_summary(results: List[dict]):
     print("\nKEY FINDINGS:")
 
     # Best supercap-only
-    sc_only = [r for r in results if r['config'].electrolytic_count == 0]
+    sc_only = [r for r in results if r['config'].elec_per_bank == 0]
     best_sc = max(sc_only, key=lambda r: r['average_power'] / r['config'].total_cost)
-    print(f"\nBest supercap-only: {best_sc['config'].supercap_cells*2} cells")
+    print(f"\nBest supercap-only: {best_sc['config'].sc_per_bank*2} cells")
     print(f"  Cost: ${best_sc['config'].total_cost:.0f}, Power: {best_sc['average_power']:.0f}W")
 
     # Best hybrid
-    hybrid = [r for r in results if r['config'].electrolytic_count > 0]
+    hybrid = [r for r in results if r['config'].elec_per_bank > 0]
     if hybrid:
         best_hybrid = max(hybrid, key=lambda r: r['average_power'] / r['config'].total_cost)
-        print(f"\nBest hybrid: {best_hybrid['config'].supercap_cells*2}SC + {best_hybrid['config'].electrolytic_count*2}E")
+        print(f"\nBest hybrid: {best_hybrid['config'].sc_per_bank*2}SC + {best_hybrid['config'].elec_per_bank*2}E")
         print(f"  Cost: ${best_hybrid['config'].total_cost:.0f}, Power: {best_hybrid['average_power']:.0f}W")
-        print(f"  Boost duration: {best_hybrid['config'].electrolytic_discharge_time_s*1000:.0f}ms")
-        print(f"  Stacked voltage: {best_hybrid['config'].total_series_voltage:.1f}V")
-        print(f"  Coverage during boost: {best_hybrid['config'].coverage_stacked*100:.1f}%")
+        print(f"  Boost duration: {best_hybrid['config'].elec_boost_s*1000:.0f}ms")
+        print(f"  Stacked voltage: {best_hybrid['config'].stacked_voltage:.1f}V")
+        print(f"  Coverage during boost: {best_hybrid['config'].coverage*100:.1f}%")
 
 
-def main():
+@main_stage
+def main(plot=True):
     results = compare_configurations()
+    record('hybrid_stacking', configuration_table(),
+           energy_200ms_j=[r['cumulative_energy'][r['times'] < 0.2][-1] for r in results],
+           average_power_w=[r['average_power'] for r in results])
     print_summary(results)
-    plot_comparison(results, save_path='hybrid_stacking_analysis.png')
-    plt.show()
+    if plot:
+        plot_comparison(results, save_path='hybrid_stacking_analysis.png')
+        show()
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
     main()
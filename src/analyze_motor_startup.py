@@ -15,11 +15,17 @@ Sources:
 - Typical 8000 BTU window AC: ~7A FLA, ~35A LRA
 """
 
+import argparse
+
 import numpy as np
-import matplotlib.pyplot as plt
 from dataclasses import dataclass
 from typing import Tuple, List
 
+from design_table import DesignTable
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import pyplot, show
+from results import record
+
 
 @dataclass
 class WindowACSpec:
@@ -62,47 +68,62 @@ class GeneratorSpec:
         return self.max_watts / self.voltage
 
 
+@dataclass
+class StartupProfile:
+    """Breakpoints and shape of the modelled start (defaults: typical compressor)."""
+    surge_ms: float = 8.3         # Magnetizing surge (first half-cycle)
+    surge_level: float = 1.5      # Surge current settles to this x LRA (+0.5 x LRA transient)
+    locked_ms: float = 100.0      # End of locked rotor
+    locked_droop: float = 0.1     # Fractional current drop over the locked-rotor phase
+    decay_rate: float = 3.0       # Exponential rate of the acceleration decay
+    pf_ramp_ms: float = 50.0      # PF starts improving after this
+
+
+DEFAULT_PROFILE = StartupProfile()
+
+
 def motor_current_profile(t_ms: float, ac: WindowACSpec,
-                          startup_time_ms: float = 300) -> float:
+                          startup_time_ms: float = 300,
+                          profile: StartupProfile = DEFAULT_PROFILE) -> float:
     """
     Model motor current draw over time during startup.
 
     Returns current in Amps RMS.
 
-    Profile:
+    Profile (default breakpoints; see StartupProfile, calibration.py fits them):
     - 0-8ms: Initial magnetizing surge (peak current, brief)
-    - 8ms-180ms: Locked rotor current (LRA)
-    - 180ms-startup_time: Exponential decay to FLA
+    - 8ms-100ms: Locked rotor current (LRA)
+    - 100ms-startup_time: Exponential decay to FLA
     - After startup_time: FLA (steady state)
     """
     if t_ms < 0:
         return 0
 
     # Phase 1: Initial magnetizing surge (first half-cycle)
-    if t_ms < 8.3:
+    if t_ms < profile.surge_ms:
         # Brief spike, up to 2x LRA (asymmetric first cycle)
-        return ac.lra * (1.5 + 0.5 * np.exp(-t_ms / 2))
+        return ac.lra * (profile.surge_level + 0.5 * np.exp(-t_ms / 2))
 
     # Phase 2: Locked rotor (motor accelerating from standstill)
-    if t_ms < 100:
+    if t_ms < profile.locked_ms:
         # Current stays near LRA as motor starts to move
-        return ac.lra * (1.0 - 0.1 * (t_ms - 8.3) / 91.7)
+        return ac.lra * (1.0 - profile.locked_droop * (t_ms - profile.surge_ms)
+                         / (profile.locked_ms - profile.surge_ms))
 
     # Phase 3: Motor acceleration (current drops as back-EMF builds)
     if t_ms < startup_time_ms:
         # Exponential decay from ~0.9*LRA to FLA
-        progress = (t_ms - 100) / (startup_time_ms - 100)
-        current = ac.lra * 0.9 * (1 - progress) + ac.running_amps * progress
-        # Add some exponential character
-        decay = np.exp(-3 * progress)
-        return ac.lra * 0.9 * decay + ac.running_amps * (1 - decay)
+        progress = (t_ms - profile.locked_ms) / (startup_time_ms - profile.locked_ms)
+        decay = np.exp(-profile.decay_rate * progress)
+        return ac.lra * (1 - profile.locked_droop) * decay + ac.running_amps * (1 - decay)
 
     # Phase 4: Running
     return ac.running_amps
 
 
 def motor_power_factor_profile(t_ms: float, ac: WindowACSpec,
-                                startup_time_ms: float = 300) -> float:
+                                startup_time_ms: float = 300,
+                                profile: StartupProfile = DEFAULT_PROFILE) -> float:
     """
     Model power factor during startup.
 
@@ -112,13 +133,13 @@ def motor_power_factor_profile(t_ms: float, ac: WindowACSpec,
     if t_ms < 0:
         return 0
 
-    if t_ms < 50:
+    if t_ms < profile.pf_ramp_ms:
         # Initial surge - very low PF
         return ac.power_factor_locked
 
     if t_ms < startup_time_ms:
         # Gradual improvement
-        progress = (t_ms - 50) / (startup_time_ms - 50)
+        progress = (t_ms - profile.pf_ramp_ms) / (startup_time_ms - profile.pf_ramp_ms)
         return ac.power_factor_locked + (ac.power_factor_running - ac.power_factor_locked) * progress
 
     return ac.power_factor_running
@@ -126,7 +147,8 @@ def motor_power_factor_profile(t_ms: float, ac: WindowACSpec,
 
 def calculate_power_demand(ac: WindowACSpec, gen: GeneratorSpec,
                            startup_time_ms: float = 300,
-                           dt_ms: float = 1.0) -> dict:
+                           dt_ms: float = 1.0,
+                           profile: StartupProfile = DEFAULT_PROFILE) -> dict:
     """
     Calculate power demand profile and energy requirements.
     """
@@ -138,8 +160,8 @@ def calculate_power_demand(ac: WindowACSpec, gen: GeneratorSpec,
     real_powers = []
 
     for t in times:
-        i = motor_current_profile(t, ac, startup_time_ms)
-        pf = motor_power_factor_profile(t, ac, startup_time_ms)
+        i = motor_current_profile(t, ac, startup_time_ms, profile)
+        pf = motor_power_factor_profile(t, ac, startup_time_ms, profile)
 
         currents.append(i)
         power_factors.append(pf)
@@ -230,6 +252,7 @@ def analyze_scenarios():
 
 def plot_analysis(results: List[dict], save_path: str = None):
     """Plot comprehensive analysis."""
+    plt = pyplot()
 
     fig, axes = plt.subplots(2, 3, figsize=(16, 10))
     fig.suptitle('Window AC Startup Analysis with Honda EU1000i Generator',
@@ -447,17 +470,30 @@ def analyze_design_adequacy():
     }
 
 
-def main():
+@main_stage
+def main(plot=True):
     print("Analyzing window AC startup requirements...")
 
     results = analyze_scenarios()
+    # Requirements per AC unit, recorded against the design they are checked for
+    record('motor_startup', DesignTable(['16SC+56E'], sc_per_bank=8, elec_per_bank=28),
+           dict(generator=results[0]['gen'].name),
+           **{f'{key}[{r["ac"].name}]': r[column] for r in results
+              for key, column in (('shortfall_200ms_j', 'energy_shortfall_200ms'),
+                                  ('shortfall_500ms_j', 'energy_shortfall_500ms'),
+                                  ('peak_shortfall_w', 'peak_shortfall_power'),
+                                  ('peak_shortfall_a', 'peak_shortfall_current'))})
     print_analysis(results)
 
     analyze_design_adequacy()
 
-    plot_analysis(results, save_path='motor_startup_analysis.png')
-    # plt.show()  # Skip interactive display
+    if plot:
+        plot_analysis(results, save_path='motor_startup_analysis.png')
+        show()
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
     main()
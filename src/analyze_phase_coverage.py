@@ -13,8 +13,16 @@ This is actually FAVORABLE for our design because:
 - We're supplementing exactly when the generator struggles most
 """
 
+import argparse
+
 import numpy as np
-import matplotlib.pyplot as plt
+
+from design_table import DesignTable
+from instrument import add_arguments, configure_from_args, main_stage
+from phase_window import phase_window, phase_window_grid
+from plotting import pyplot, show
+from results import record
+from waveform import Waveform
 
 
 def analyze_phase_coverage():
@@ -50,16 +58,12 @@ def analyze_phase_coverage():
     # We inject in the same direction as V_ac (positive when V_ac positive)
     i_inject = np.where(can_inject, I_inject * np.sign(v_ac), 0)
 
-    # Actually, we should modulate to follow motor current phase
-    # For now, let's see the overlap
-
-    # Calculate what fraction of motor current demand we cover
-    # When we inject, how much of the motor's current are we supplying?
-    motor_current_during_injection = i_motor[can_inject]
-    avg_motor_current_during_injection = np.mean(np.abs(motor_current_during_injection))
-
-    # Coverage fraction (how much of cycle we cover)
-    coverage = np.sum(can_inject) / len(can_inject)
+    # Coverage and motor current during the window, in closed form. This
+    # replaced np.mean(can_inject) over the 1000 samples above, which read
+    # 32.0%; the exact arcsin(81.6/170)/(pi/2) is 31.87%, printed as 31.9%
+    window = phase_window(V_stacked, motor_pf, V_peak / np.sqrt(2), I_inject, motor_lra, freq)
+    avg_motor_current_during_injection = float(window['motor_in_window'])
+    coverage = float(window['coverage'])
 
     print("=" * 80)
     print("PHASE COVERAGE ANALYSIS")
@@ -84,8 +88,7 @@ def analyze_phase_coverage():
     #   sin(-phase_lag) ≈ sin(-70°) ≈ -0.94 of peak
     # So motor is drawing ~94% of peak current at zero crossing!
 
-    v_ac_zero_crossings = np.where(np.diff(np.sign(v_ac)))[0]
-    motor_at_zc = np.mean(np.abs(i_motor[v_ac_zero_crossings]))
+    motor_at_zc = float(window['motor_at_zc'])
 
     print(f"\nAt voltage zero-crossing:")
     print(f"  Motor current: {motor_at_zc:.1f}A (vs {motor_lra*np.sqrt(2):.1f}A peak)")
@@ -103,11 +106,14 @@ def analyze_phase_coverage():
         'i_inject': i_inject,
         'can_inject': can_inject,
         'coverage': coverage,
+        'motor_in_window': avg_motor_current_during_injection,
+        'motor_at_zc': motor_at_zc,
     }
 
 
 def plot_phase_analysis(data, save_path=None):
     """Plot the phase relationship."""
+    plt = pyplot()
 
     fig, axes = plt.subplots(3, 1, figsize=(12, 10))
     fig.suptitle('Phase Analysis: Motor Current vs Our Injection Window',
@@ -182,29 +188,13 @@ def analyze_power_delivery():
     V_peak = 170
     I_inject = 40  # Our injection current
     freq = 60
-    omega = 2 * np.pi * freq
-
-    # Simulation over one cycle
-    t = np.linspace(0, 1/freq, 10000)
-    dt = t[1] - t[0]
-
-    v_ac = V_peak * np.sin(omega * t)
-
-    # During injection window: inject current in phase with v_ac direction
-    # Power delivered = |v_ac| * I_inject when |v_ac| < V_stacked
-
-    power_injected = np.zeros_like(t)
-    for i, v in enumerate(v_ac):
-        if abs(v) < V_stacked:
-            # We inject at the instantaneous AC voltage (not our voltage)
-            # Actually, the load sees the AC voltage, we just add current
-            power_injected[i] = abs(v) * I_inject
 
-    # Average power over cycle
-    avg_power = np.mean(power_injected)
-
-    # Energy per cycle
-    energy_per_cycle = np.sum(power_injected) * dt
+    # During injection window: inject current in phase with v_ac direction.
+    # Power delivered = |v_ac| * I_inject when |v_ac| < V_stacked (the load
+    # sees the AC voltage, we just add current), integrated in closed form
+    window = phase_window(V_stacked, 1.0, V_peak / np.sqrt(2), I_inject, frequency=freq)
+    avg_power = float(window['avg_power'])
+    energy_per_cycle = float(window['energy_per_cycle'])
 
     print(f"\nPer-cycle analysis:")
     print(f"  Injection current: {I_inject}A")
@@ -226,6 +216,106 @@ def analyze_power_delivery():
     return avg_power, energy_200ms
 
 
+def analyze_operating_grid():
+    """
+    Coverage and motor overlap over stacked voltage x power factor x line voltage.
+
+    Evaluated in one call on the full grid (phase_window_grid), so the
+    heat-map resolution costs nothing.
+    """
+    print("\n" + "=" * 80)
+    print("OPERATING GRID: STACKED VOLTAGE x POWER FACTOR x LINE VOLTAGE")
+    print("=" * 80)
+
+    v_stacked = np.linspace(40, 170, 131)
+    power_factor = np.linspace(0.2, 0.9, 71)
+    v_line = np.array([108.0, 120.0, 126.0])  # -10%, nominal, +5%
+
+    grid = phase_window_grid(v_stacked, power_factor, v_line)
+    print(f"\n{grid['coverage'].size} operating points")
+
+    # Energy per 200ms (12 cycles) at 40A, and share of motor current we see
+    rows = phase_window_grid([60, 81.6, 100, 120], [0.35, 0.6], v_line)
+    print(f"\n{'V_stacked':>10} {'Line':>6} {'Coverage':>9} {'E/200ms':>9}"
+          f" {'Overlap @PF0.35':>16} {'Overlap @PF0.6':>15}")
+    print("-" * 70)
+    for i, vs in enumerate([60, 81.6, 100, 120]):
+        for k, vl in enumerate(v_line):
+            print(f"{vs:>9.1f}V {vl:>5.0f}V {rows['coverage'][i, 0, k]*100:>8.1f}%"
+                  f" {rows['energy_per_cycle'][i, 0, k]*12:>8.0f}J"
+                  f" {rows['motor_overlap'][i, 0, k]*100:>15.1f}%"
+                  f" {rows['motor_overlap'][i, 1, k]*100:>14.1f}%")
+
+    return {'v_stacked': v_stacked, 'power_factor': power_factor, 'v_line': v_line,
+            **grid}
+
+
+def analyze_waveform_distortion():
+    """
+    Same window on non-sinusoidal generator output at the same RMS.
+
+    Inverter generators flatten the top of the wave under overload. At the
+    same RMS a flatter wave rises faster through zero, so |V_ac| spends less
+    of the cycle below V_stacked and we inject less per cycle.
+    """
+    print("\n" + "=" * 80)
+    print("DISTORTED GENERATOR WAVEFORMS (120VAC RMS, 81.6V stacked, PF 0.35)")
+    print("=" * 80)
+
+    waveforms = [
+        ("Sine", None),
+        ("Clipped at 90%", Waveform.clipped(0.9)),
+        ("Clipped at 80%", Waveform.clipped(0.8)),
+        ("15% 3rd harmonic (flat)", Waveform.from_harmonics([1, 0, 0.15])),
+        ("15% 3rd harmonic (peaked)", Waveform.from_harmonics([1, 0, 0.15], [0, 0, np.pi])),
+    ]
+
+    print(f"\n{'Waveform':<27} {'Peak':>6} {'THD':>6} {'Coverage':>9} {'E/200ms':>8}"
+          f" {'Overlap':>8} {'I @ZC':>7}")
+    print("-" * 80)
+    windows = {}
+    for label, wave in waveforms:
+        w = windows[label] = phase_window(81.6, 0.35, 120, waveform=wave)
+        peak = 120 * np.sqrt(2) * (wave.peak if wave else 1.0)
+        thd = wave.thd if wave else 0.0
+        print(f"{label:<27} {peak:>5.0f}V {thd*100:>5.1f}% {float(w['coverage'])*100:>8.1f}%"
+              f" {float(w['energy_per_cycle'])*12:>7.0f}J {float(w['motor_overlap'])*100:>7.1f}%"
+              f" {float(w['motor_at_zc']):>6.1f}A")
+
+    return windows
+
+
+def plot_coverage_map(grid, save_path=None):
+    """Heat-maps of motor-current overlap vs stacked voltage and PF, with coverage contours."""
+    plt = pyplot()
+
+    v_line = grid['v_line']
+    fig, axes = plt.subplots(1, len(v_line), figsize=(15, 5), sharey=True)
+    fig.suptitle('Share of Motor Current Inside Our Injection Window',
+                 fontsize=14, fontweight='bold')
+
+    extent = [grid['power_factor'][0], grid['power_factor'][-1],
+              grid['v_stacked'][0], grid['v_stacked'][-1]]
+    for k, ax in enumerate(axes):
+        im = ax.imshow(grid['motor_overlap'][:, :, k] * 100, origin='lower', aspect='auto',
+                       extent=extent, cmap='viridis', vmin=0, vmax=100)
+        cs = ax.contour(grid['power_factor'], grid['v_stacked'],
+                        grid['coverage'][:, :, k] * 100, levels=[20, 32, 50, 75],
+                        colors='white', linewidths=1)
+        ax.clabel(cs, fmt='%d%% cov', fontsize=8)
+        ax.axhline(y=81.6, color='red', linestyle='--', linewidth=1)
+        ax.set_xlabel('Motor power factor')
+        ax.set_title(f'{v_line[k]:.0f} VAC line')
+    axes[0].set_ylabel('Stacked voltage (V)')
+    fig.colorbar(im, ax=axes, label='Motor |current| in window (%)')
+
+    if save_path:
+        plt.savefig(save_path, dpi=150, bbox_inches='tight')
+        print(f"Saved: {save_path}")
+
+    return fig
+
+
 def calculate_generator_relief():
     """
     Calculate how much we relieve the generator.
@@ -285,13 +375,28 @@ def calculate_generator_relief():
     print(f"    Motor needs: ~{33 * np.sqrt(2) * 0.94:.0f}A")
 
 
-def main():
+@main_stage
+def main(plot=True):
     data = analyze_phase_coverage()
-    analyze_power_delivery()
+    avg_power, energy_200ms = analyze_power_delivery()
+    grid = analyze_operating_grid()
+    windows = analyze_waveform_distortion()
     calculate_generator_relief()
 
-    plot_phase_analysis(data, save_path='phase_coverage_analysis.png')
-    # plt.show()
+    # Window figures for the 81.6V stacked design, per generator waveform
+    metrics = {'coverage': data['coverage'], 'motor_in_window_a': data['motor_in_window'],
+               'motor_at_zc_a': data['motor_at_zc'], 'avg_power_w': avg_power,
+               'ideal_energy_200ms_j': energy_200ms}
+    for label, w in windows.items():
+        metrics[f'coverage[{label}]'] = float(w['coverage'])
+        metrics[f'motor_overlap[{label}]'] = float(w['motor_overlap'])
+    record('phase_coverage', DesignTable(['16SC+56E'], sc_per_bank=8, elec_per_bank=28),
+           dict(power_factor=0.35, v_line=120), **metrics)
+
+    if plot:
+        plot_phase_analysis(data, save_path='phase_coverage_analysis.png')
+        plot_coverage_map(grid, save_path='phase_coverage_map.png')
+        show()
 
     print("\n" + "=" * 80)
     print("CONCLUSION")
@@ -318,4 +423,7 @@ For 10000 BTU, consider 20SC+56E ($248) or adding electrolytics.
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
     main()
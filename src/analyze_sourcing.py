@@ -7,11 +7,21 @@ Retail vs bulk/surplus pricing can differ significantly:
 - Electrolytics: $2.28 retail → $0.50-1 bulk
 - PCB: $20 JLCPCB → $0 perfboard
 - MCU: $4 STM32 → $1 ATtiny or comparators
+
+For a production run the per-scenario flat prices give way to vendor
+price-break tables, MOQs and shipping, and the cheapest mix of vendors per
+part is chosen by bom_optimizer.BomPricer (see production_run_analysis()).
 """
 
+import argparse
 from dataclasses import dataclass
 from typing import List
 
+from bom_optimizer import BomPricer, Offer, Vendor, price_designs
+from design_table import DesignTable
+from instrument import add_arguments, configure_from_args, main_stage
+from results import record
+
 
 @dataclass
 class SourcingScenario:
@@ -23,6 +33,32 @@ class SourcingScenario:
     notes: str = ""
 
 
+# Vendor price-break tables (unit price by order quantity); "electronics" is
+# the per-board kit of MOSFETs, driver, MCU, PCB and connectors
+VENDORS = [
+    Vendor("DigiKey", shipping=7.0, notes="New, guaranteed specs, fast shipping"),
+    Vendor("LCSC", shipping=18.0, notes="Chinese distributor, 2-week ship"),
+    Vendor("AliExpress", shipping=4.0, notes="Sold in lots of 10, test before use"),
+    Vendor("Surplus", shipping=12.0, notes="eBay lots, limited stock"),
+]
+
+OFFERS = [
+    Offer("DigiKey", "supercap", [(1, 6.00), (10, 5.40), (100, 4.62), (500, 4.10)]),
+    Offer("DigiKey", "electrolytic", [(1, 2.28), (10, 2.05), (100, 1.66), (500, 1.45)]),
+    Offer("DigiKey", "electronics", [(1, 68.0), (10, 61.0), (100, 52.0)]),
+    Offer("LCSC", "supercap", [(1, 4.50), (50, 3.95), (500, 3.40)]),
+    Offer("LCSC", "electrolytic", [(5, 1.50), (50, 1.28), (500, 1.06)], moq=5),
+    Offer("LCSC", "electronics", [(1, 55.0), (30, 48.0), (200, 41.0)]),
+    Offer("AliExpress", "supercap", [(10, 2.50), (100, 2.25), (1000, 1.95)], multiple=10),
+    Offer("AliExpress", "electrolytic", [(10, 0.80), (100, 0.70), (1000, 0.58)], multiple=10),
+    Offer("AliExpress", "electronics", [(1, 45.0), (50, 40.0)]),
+    Offer("Surplus", "supercap", [(1, 1.50)], stock=40),
+    Offer("Surplus", "electrolytic", [(1, 0.40)], stock=120),
+]
+
+RUN_SIZES = [1, 10, 100, 1000]
+
+
 def analyze_sourcing():
     """Compare different sourcing scenarios."""
 
@@ -134,6 +170,55 @@ def analyze_sourcing():
     return scenarios, configs
 
 
+def config_table(configs) -> DesignTable:
+    """(name, total supercaps, total electrolytics) configs as a DesignTable at retail prices."""
+    names, sc, elec = zip(*configs)
+    return DesignTable(list(names), sc_per_bank=[n // 2 for n in sc],
+                       elec_per_bank=[n // 2 for n in elec])
+
+
+def production_run_analysis(configs=None):
+    """Cheapest mixed-vendor BOM per board across production run sizes."""
+    configs = configs or [
+        ("Full (16SC+56E)", 16, 56),
+        ("Medium (12SC+40E)", 12, 40),
+        ("Budget (6SC+16E)", 6, 16),
+        ("Minimal (4SC+20E)", 4, 20),
+    ]
+    pricer = BomPricer(VENDORS, OFFERS)
+
+    print("\n" + "=" * 90)
+    print("PRODUCTION RUN PRICING (price breaks, MOQs, shipping)")
+    print("=" * 90)
+
+    print(f"\n{'Config':<20} {'Run':>6} {'Mixed/unit':>12} {'Single/unit':>12} "
+          f"{'(vendor)':<12} {'Saving':>7}")
+    print("-" * 90)
+    for name, sc, elec in configs:
+        for run in RUN_SIZES:
+            qty = {'supercap': sc * run, 'electrolytic': elec * run, 'electronics': run}
+            mixed, _ = pricer.price(qty)
+            single = [(float(pricer.price(qty, allowed=[v.name])[0]), v.name) for v in VENDORS]
+            best_single, vendor = min(single)
+            print(f"{name if run == RUN_SIZES[0] else '':<20} {run:>6} "
+                  f"{f'${mixed / run:.2f}':>12} {f'${best_single / run:.2f}':>12} {vendor:<12} "
+                  f"{1 - mixed / best_single:>6.0%}")
+        print()
+
+    name, sc, elec = configs[0]
+    run = 100
+    plan = pricer.plan({'supercap': sc * run, 'electrolytic': elec * run, 'electronics': run})
+    print(f"Cheapest orders for {run} × {name}:")
+    for order in plan.orders:
+        print(f"  {order.vendor:<12} {order.part:<13} {order.quantity:>6} × "
+              f"${order.unit_price:>6.2f} = ${order.cost:>9.2f}")
+    for vendor, cost in plan.shipping.items():
+        print(f"  {vendor:<12} {'shipping':<13} {'':>17} ${cost:>9.2f}")
+    print(f"  {'TOTAL':<26} {'':>17} ${plan.total:>9.2f}  (${plan.total / run:.2f}/unit)")
+
+    return pricer
+
+
 def supercap_alternatives():
     """Explore supercap alternatives and sourcing."""
 
@@ -368,8 +453,18 @@ PROTOTYPING STRATEGY:
 """)
 
 
+@main_stage
 def main():
-    analyze_sourcing()
+    scenarios, configs = analyze_sourcing()
+    pricer = production_run_analysis(configs)
+    table = config_table(configs)
+    # BOM per board: flat price per scenario, and the cheapest vendor mix per run size
+    metrics = {f'bom_usd[{s.name}]': table.total_supercaps * s.sc_price
+               + table.total_electrolytics * s.elec_price + s.electronics_price
+               for s in scenarios}
+    metrics.update({f'bom_usd[run {run}]': price_designs(pricer, table, run, {'electronics': 1})
+                    for run in RUN_SIZES})
+    record('sourcing', table, **metrics)
     supercap_alternatives()
     electrolytic_alternatives()
     diy_electronics()
@@ -377,4 +472,7 @@ def main():
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
     main()
@@ -12,11 +12,17 @@ But AC coverage (the fraction of the waveform we can inject into) follows
 an arcsin curve based on bank voltage vs AC peak voltage.
 """
 
+import argparse
+
 import numpy as np
-import matplotlib.pyplot as plt
 from dataclasses import dataclass
 from typing import List, Tuple
 
+from design_table import DesignTable
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import pyplot, show
+from results import record
+
 
 # =============================================================================
 # Configuration Parameters
@@ -170,6 +176,16 @@ def analyze_range(
     return [analyze_config(n, cell, ac, limits) for n in cell_counts]
 
 
+def config_table(cell_counts: List[int], cell: SupercapCell, ac: ACSystem,
+                 limits: SystemLimits) -> DesignTable:
+    """The same series-only configurations as a DesignTable (for results.record)."""
+    return DesignTable([f'{2 * n} cells ({n}S)' for n in cell_counts], sc_per_bank=cell_counts,
+                       sc_capacitance=cell.capacitance_F, sc_voltage=cell.voltage_V,
+                       sc_esr=cell.esr_ohm, sc_price=cell.cost_USD,
+                       max_current=limits.max_current_A, v_ac_peak=ac.voltage_peak,
+                       sc_floor=limits.min_discharge_ratio)
+
+
 # =============================================================================
 # Plotting Functions
 # =============================================================================
@@ -178,6 +194,7 @@ def plot_power_vs_cost(results: List[dict], save_path: str = None):
     """
     Create comprehensive visualization of power vs cost tradeoffs.
     """
+    plt = pyplot()
     fig, axes = plt.subplots(2, 3, figsize=(15, 10))
     fig.suptitle('Supercapacitor Configuration Analysis\nGenerator Power Assist',
                  fontsize=14, fontweight='bold')
@@ -324,6 +341,7 @@ def plot_motor_start_scenario(results: List[dict], save_path: str = None):
     """
     Plot a specific motor start scenario showing energy flow over time.
     """
+    plt = pyplot()
     fig, axes = plt.subplots(2, 2, figsize=(12, 10))
     fig.suptitle('Motor Start Assist Scenarios', fontsize=14, fontweight='bold')
 
@@ -453,7 +471,8 @@ def print_summary_table(results: List[dict]):
 # Main
 # =============================================================================
 
-def main():
+@main_stage
+def main(plot=True):
     """Run the analysis and generate plots."""
     # Define parameters
     cell = SupercapCell(
@@ -478,18 +497,23 @@ def main():
     # (total cells = 2x this for both banks)
     cell_counts = list(range(1, 41))
     results = analyze_range(cell_counts, cell, ac, limits)
+    configs = config_table(cell_counts, cell, ac, limits)
+    record('supercap_configs', configs, dict(assist_duration_s=limits.assist_duration_s),
+           energy_200ms_j=configs.energy_in_window(200),
+           usable_energy_j=[r['total_usable_energy_j'] for r in results],
+           power_effective_w=[r['power_effective_w'] for r in results],
+           assist_duration_s=[r['assist_duration_s'] for r in results])
 
     # Print summary
     print_summary_table(results)
 
-    # Generate plots
-    print("\nGenerating plots...")
+    if plot:
+        print("\nGenerating plots...")
 
-    fig1 = plot_power_vs_cost(results, save_path='supercap_analysis.png')
-    fig2 = plot_motor_start_scenario(results, save_path='motor_start_scenario.png')
+        fig1 = plot_power_vs_cost(results, save_path='supercap_analysis.png')
+        fig2 = plot_motor_start_scenario(results, save_path='motor_start_scenario.png')
 
-    # Show plots
-    plt.show()
+        show()
 
     # Print recommendations
     print("\n" + "=" * 60)
@@ -525,4 +549,7 @@ def main():
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
     main()
@@ -9,118 +9,52 @@ Simplicity benefits:
 - More robust
 """
 
+import argparse
+
 import numpy as np
-import matplotlib.pyplot as plt
-from dataclasses import dataclass
-
-
-@dataclass
-class SupercapOnlyDesign:
-    """Pure supercap design using 12F cells."""
-    name: str
-    cells_per_bank: int  # Series cells
-    parallel_strings: int = 1  # Parallel strings per bank
-
-    SC_CAPACITANCE: float = 12.0  # Farads
-    SC_VOLTAGE: float = 2.7
-    SC_PRICE: float = 0.91
-    SC_ESR_MOHM: float = 36.0
-
-    MAX_CURRENT: float = 25.0  # Can push higher with simpler design
-    ELECTRONICS_COST: float = 30.0  # Simpler electronics
-    PCB_COST: float = 12.0  # Smaller PCB
-
-    @property
-    def total_cells(self) -> int:
-        return 2 * self.cells_per_bank * self.parallel_strings
-
-    @property
-    def capacitor_cost(self) -> float:
-        return self.total_cells * self.SC_PRICE
-
-    @property
-    def total_cost(self) -> float:
-        return self.capacitor_cost + self.ELECTRONICS_COST + self.PCB_COST
-
-    @property
-    def bank_voltage(self) -> float:
-        return self.cells_per_bank * self.SC_VOLTAGE
-
-    @property
-    def bank_capacitance(self) -> float:
-        series_cap = self.SC_CAPACITANCE / self.cells_per_bank
-        return series_cap * self.parallel_strings
-
-    @property
-    def bank_esr(self) -> float:
-        series_esr = self.cells_per_bank * self.SC_ESR_MOHM / 1000
-        return series_esr / self.parallel_strings
-
-    @property
-    def coverage(self) -> float:
-        v = self.bank_voltage
-        if v >= 170:
-            return 1.0
-        return np.arcsin(v / 170) / (np.pi / 2)
-
-    @property
-    def effective_current(self) -> float:
-        return self.MAX_CURRENT * np.sqrt(self.coverage)
-
-    @property
-    def discharge_time_to_50pct_ms(self) -> float:
-        """Time to discharge to 50% voltage at max current."""
-        v_drop = self.bank_voltage * 0.5
-        return (v_drop * self.bank_capacitance / self.MAX_CURRENT) * 1000
-
-    @property
-    def usable_energy_j(self) -> float:
-        """Energy from 100% to 50% voltage."""
-        return 0.5 * self.bank_capacitance * (self.bank_voltage**2 - (self.bank_voltage/2)**2)
-
-    def energy_in_window(self, window_ms: float = 200) -> float:
-        """Energy delivered in first N ms."""
-        window_s = window_ms / 1000
-        dt = 0.0005
-
-        total_energy = 0
-        t = 0
-        v = self.bank_voltage
-
-        while t < window_s:
-            if v < self.bank_voltage * 0.5:
-                break
-
-            cov = np.arcsin(min(v / 170, 1.0)) / (np.pi / 2)
-            power = v * self.MAX_CURRENT * cov
-            total_energy += power * dt
-
-            # Discharge
-            v -= (self.MAX_CURRENT * dt) / self.bank_capacitance
-            t += dt
-
-        return total_energy
+
+from design_table import DesignTable
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import pyplot, show
+from results import record
+
+
+ELECTRONICS_COST = 30.0  # Simpler electronics
+PCB_COST = 12.0  # Smaller PCB
+
+
+def supercap_only_table(layouts) -> DesignTable:
+    """Pure supercap designs from (name, series cells, parallel strings) tuples."""
+    names, series, parallel = zip(*layouts)
+    return DesignTable(list(names), sc_per_bank=series, sc_parallel=parallel,
+                       sc_capacitance=12.0, sc_voltage=2.7, sc_price=0.91, sc_esr=0.036,
+                       max_current=25.0,  # Can push higher with simpler design
+                       fixed_cost=ELECTRONICS_COST + PCB_COST)
+
+
+def energy_in_window(designs: DesignTable, window_ms: float = 200):
+    """Energy delivered in first N ms; delivery stops at 50% bank voltage."""
+    return designs.energy_in_window(window_ms, hold_floor=False)
 
 
 def analyze_configurations():
     """Analyze various supercap-only configurations."""
 
-    configs = [
+    configs = supercap_only_table([
         # Pure series configurations
-        SupercapOnlyDesign("40 cells (20S)", 20, 1),
-        SupercapOnlyDesign("50 cells (25S)", 25, 1),
-        SupercapOnlyDesign("60 cells (30S)", 30, 1),
-        SupercapOnlyDesign("70 cells (35S)", 35, 1),
-        SupercapOnlyDesign("80 cells (40S)", 40, 1),
+        ("40 cells (20S)", 20, 1),
+        ("50 cells (25S)", 25, 1),
+        ("60 cells (30S)", 30, 1),
+        ("70 cells (35S)", 35, 1),
+        ("80 cells (40S)", 40, 1),
 
         # With some parallel for more capacitance
-        SupercapOnlyDesign("60 cells (15S×2P)", 15, 2),
-        SupercapOnlyDesign("80 cells (20S×2P)", 20, 2),
-        SupercapOnlyDesign("60 cells (20S×1.5P)", 20, 1),  # Not possible, placeholder
-    ]
-
-    # Remove invalid config
-    configs = [c for c in configs if c.parallel_strings == int(c.parallel_strings)]
+        ("60 cells (15S×2P)", 15, 2),
+        ("80 cells (20S×2P)", 20, 2),
+        ("60 cells (20S×1.5P)", 20, 1),  # Not possible, placeholder
+    ])
+    energy_200 = energy_in_window(configs, 200)
+    energy_500 = energy_in_window(configs, 500)
 
     print("=" * 90)
     print("SUPERCAP-ONLY DESIGNS: 12F 2.7V @ $0.91 each")
@@ -131,11 +65,11 @@ def analyze_configurations():
           f"{'t_50%':>7} {'E_200':>6} {'E_500':>6} {'I_eff':>6} {'Cost':>7}")
     print("-" * 90)
 
-    for c in configs:
-        print(f"{c.name:<22} {c.total_cells:>5} {c.bank_voltage:>6.1f}V "
-              f"{c.bank_capacitance:>5.2f}F {c.coverage*100:>4.0f}% "
-              f"{c.discharge_time_to_50pct_ms:>6.0f}ms {c.energy_in_window(200):>5.0f}J "
-              f"{c.energy_in_window(500):>5.0f}J {c.effective_current:>5.1f}A "
+    for c, e200, e500 in zip(configs, energy_200, energy_500):
+        print(f"{c.name:<22} {c.total_supercaps:>5} {c.sc_bank_voltage:>6.1f}V "
+              f"{c.sc_bank_capacitance:>5.2f}F {c.coverage*100:>4.0f}% "
+              f"{c.sc_discharge_to_50pct_ms:>6.0f}ms {e200:>5.0f}J "
+              f"{e500:>5.0f}J {c.effective_current:>5.1f}A "
               f"${c.total_cost:>6.2f}")
 
     return configs
@@ -149,7 +83,10 @@ def recommend_design():
     print("=" * 90)
 
     # 60 cells gives good balance
-    design = SupercapOnlyDesign("60 cells (30S×1P)", 30, 1)
+    designs = supercap_only_table([("60 cells (30S×1P)", 30, 1)])
+    design = designs[0]
+    energy_200, = energy_in_window(designs, 200)
+    energy_500, = energy_in_window(designs, 500)
 
     print(f"""
 CONFIGURATION: 60 × Tecate 12F 2.7V supercaps
@@ -158,21 +95,21 @@ CONFIGURATION: 60 × Tecate 12F 2.7V supercaps
 Layout: 30 cells per bank, 2 banks (positive/negative half-cycles)
 
 Electrical:
-  Bank voltage:     {design.bank_voltage:.1f}V
-  Bank capacitance: {design.bank_capacitance:.2f}F
-  Bank ESR:         {design.bank_esr*1000:.0f}mΩ
+  Bank voltage:     {design.sc_bank_voltage:.1f}V
+  Bank capacitance: {design.sc_bank_capacitance:.2f}F
+  Bank ESR:         {design.sc_bank_esr*1000:.0f}mΩ
   AC coverage:      {design.coverage*100:.0f}%
 
 Performance:
-  Discharge to 50%: {design.discharge_time_to_50pct_ms:.0f}ms
-  Energy in 200ms:  {design.energy_in_window(200):.0f}J
-  Energy in 500ms:  {design.energy_in_window(500):.0f}J
+  Discharge to 50%: {design.sc_discharge_to_50pct_ms:.0f}ms
+  Energy in 200ms:  {energy_200:.0f}J
+  Energy in 500ms:  {energy_500:.0f}J
   Effective I:      {design.effective_current:.1f}A RMS
 
 Cost:
   Supercaps:        60 × $0.91 = ${design.capacitor_cost:.2f}
-  Electronics:      ${design.ELECTRONICS_COST:.2f} (simplified)
-  PCB:              ${design.PCB_COST:.2f}
+  Electronics:      ${ELECTRONICS_COST:.2f} (simplified)
+  PCB:              ${PCB_COST:.2f}
   ─────────────────────────────────────
   TOTAL:            ${design.total_cost:.2f}
 
@@ -196,9 +133,9 @@ ADVANTAGES:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 Voltage                 81V                81.6V
 Coverage                32%                32%
-Energy (200ms)          ~{design.energy_in_window(200):.0f}J               206J
+Energy (200ms)          ~{energy_200:.0f}J               206J
 Capacitance             0.4F               12.5F + elec
-Discharge time          {design.discharge_time_to_50pct_ms:.0f}ms             197ms (boost)
+Discharge time          {design.sc_discharge_to_50pct_ms:.0f}ms             197ms (boost)
 
 Cost                    ${design.total_cost:.2f}             $224-292
 Complexity              LOW                HIGH
@@ -274,22 +211,23 @@ PCB size:    ~100×150mm (smaller than hybrid!)
 
 def plot_comparison(save_path=None):
     """Plot different configurations."""
+    plt = pyplot()
 
-    configs = [
-        SupercapOnlyDesign("40 cells", 20, 1),
-        SupercapOnlyDesign("50 cells", 25, 1),
-        SupercapOnlyDesign("60 cells", 30, 1),
-        SupercapOnlyDesign("80 cells", 40, 1),
-    ]
+    configs = supercap_only_table([
+        ("40 cells", 20, 1),
+        ("50 cells", 25, 1),
+        ("60 cells", 30, 1),
+        ("80 cells", 40, 1),
+    ])
 
     fig, axes = plt.subplots(1, 2, figsize=(12, 5))
     fig.suptitle('Supercap-Only Design Options (12F 2.7V @ $0.91)', fontsize=12, fontweight='bold')
 
     # Plot 1: Energy vs Cost
     ax1 = axes[0]
-    costs = [c.total_cost for c in configs]
-    energy_200 = [c.energy_in_window(200) for c in configs]
-    energy_500 = [c.energy_in_window(500) for c in configs]
+    costs = configs.total_cost
+    energy_200 = energy_in_window(configs, 200)
+    energy_500 = energy_in_window(configs, 500)
 
     x = np.arange(len(configs))
     width = 0.35
@@ -310,8 +248,8 @@ def plot_comparison(save_path=None):
 
     # Plot 2: Coverage and effective current
     ax2 = axes[1]
-    coverages = [c.coverage * 100 for c in configs]
-    currents = [c.effective_current for c in configs]
+    coverages = configs.coverage * 100
+    currents = configs.effective_current
 
     ax2.bar(x - width/2, coverages, width, label='Coverage %', color='orange', alpha=0.7)
     ax2_twin = ax2.twinx()
@@ -333,14 +271,22 @@ def plot_comparison(save_path=None):
         print(f"Saved: {save_path}")
 
 
-def main():
-    analyze_configurations()
+@main_stage
+def main(plot=True):
+    configs = analyze_configurations()
+    record('supercap_only_12f', configs, energy_200ms_j=energy_in_window(configs, 200),
+           energy_500ms_j=energy_in_window(configs, 500))
     recommend_design()
     total = calculate_bom()
-    plot_comparison(save_path='supercap_only_12f_analysis.png')
+    if plot:
+        plot_comparison(save_path='supercap_only_12f_analysis.png')
+        show()
 
     print(f"\n*** FINAL BOM: ${total:.2f} ***")
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
     main()
@@ -1,5 +1,10 @@
+import argparse
+import os
+
 import numpy as np
-import matplotlib.pyplot as plt
+
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import print_waveform_summary, pyplot, show
 
 
 class VoltageAssistSimulation:
@@ -64,8 +69,9 @@ class VoltageAssistSimulation:
 
         return v_gen, v_assist, v_total
 
-    def plot_waveforms(self):
+    def plot_waveforms(self, save_path=None):
         """Create visualization of all waveforms"""
+        plt = pyplot()
         v_gen, v_assist, v_total = self.calculate_waveforms()
 
         # Create subplots
@@ -95,10 +101,15 @@ class VoltageAssistSimulation:
         ax3.legend()
 
         plt.tight_layout()
-        plt.show()
 
-    def plot_detail_view(self, start_ms=8.0, duration_ms=2.0):
+        if save_path:
+            plt.savefig(save_path, dpi=150, bbox_inches="tight")
+            print(f"Saved: {save_path}")
+        show()
+
+    def plot_detail_view(self, start_ms=8.0, duration_ms=2.0, save_path=None):
         """Create detailed view around a zero crossing"""
+        plt = pyplot()
         v_gen, v_assist, v_total = self.calculate_waveforms()
 
         # Calculate array indices for the detail window
@@ -132,14 +143,33 @@ class VoltageAssistSimulation:
             f"Detailed View of Zero Crossing ({start_ms}-{start_ms+duration_ms}ms)"
         )
         plt.legend()
-        plt.show()
 
+        if save_path:
+            plt.savefig(save_path, dpi=150, bbox_inches="tight")
+            print(f"Saved: {save_path}")
+        show()
+
+
+@main_stage
+def main(plot=True, save_path=None):
+    sim = VoltageAssistSimulation()
+    if plot:
+        # Overall waveforms, then a detailed view around a zero crossing
+        detail_path = None
+        if save_path:
+            root, ext = os.path.splitext(save_path)
+            detail_path = f"{root}_detail{ext}"
+        sim.plot_waveforms(save_path)
+        sim.plot_detail_view(start_ms=8.0, duration_ms=2.0, save_path=detail_path)
+    else:
+        v_gen, v_assist, v_total = sim.calculate_waveforms()
+        print_waveform_summary(
+            "Voltage assist", sim.t, v_gen=v_gen, v_assist=v_assist, v_total=v_total
+        )
 
-# Create and run simulation
-sim = VoltageAssistSimulation()
-
-# Show overall waveforms
-sim.plot_waveforms()
 
-# Show detailed view around a zero crossing
-sim.plot_detail_view(start_ms=8.0, duration_ms=2.0)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Voltage assist around the zero crossing")
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
+    main()
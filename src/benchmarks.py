@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the computational hot paths, with regression tracking.
+
+Each Case builds its inputs once and times one call of the code under test:
+the DesignTable discharge models over the minimal-hybrid grid, the motor
+demand profile, the hybrid-stacking discharge, the generator and hybrid
+waveform simulations, the S-expression tokenizer and parser on
+hardware/kicad/softstart.kicad_sch, and the PCB placer. A call is repeated
+until a run lasts at least --min-time, and the best of --repeat runs is
+kept (the least disturbed by other load), reported as seconds per call and
+items per second.
+
+--save writes the results to a JSON baseline (data/bench_baseline.json by
+default; machine specific, so not committed). A later run compares against
+it and exits 1 when any case's time per call has grown by more than
+--threshold (25% by default). The baseline records the machine and library
+versions, and a comparison across different machines warns that the
+numbers are not comparable.
+
+Usage:
+    ./benchmarks.py --save              # record the baseline
+    ./benchmarks.py                     # compare against it
+    ./benchmarks.py parse_sexp place_components --threshold 0.1
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from instrument import add_arguments, configure_from_args, main_stage
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SRC_DIR)
+KICAD_DIR = os.path.join(ROOT_DIR, 'hardware', 'kicad')
+SCHEMATIC = os.path.join(KICAD_DIR, 'softstart.kicad_sch')
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, 'data', 'bench_baseline.json')
+DEFAULT_THRESHOLD = 0.25
+
+
+@dataclass
+class Case:
+    """One benchmark: setup() builds the inputs and returns (call to time, items per call)."""
+    name: str
+    setup: Callable[[], Tuple[Callable[[], object], int]]
+    unit: str = 'call'
+
+
+def _minimal_hybrid_grid():
+    from design_table import DesignTable
+
+    sc, elec = np.meshgrid(np.arange(2, 15), np.arange(0, 25), indexing='ij')
+    return DesignTable(sc_per_bank=sc.ravel(), elec_per_bank=elec.ravel(), max_current=40.0)
+
+
+def _energy_in_window():
+    table = _minimal_hybrid_grid()
+    return (lambda: table.energy_in_window(200)), len(table)
+
+
+def _energy_by_time():
+    table = _minimal_hybrid_grid()
+    return (lambda: table.energy_by_time(200)), len(table)
+
+
+def _power_demand():
+    from analyze_motor_startup import GeneratorSpec, WindowACSpec, calculate_power_demand
+
+    ac = WindowACSpec("8000 BTU", 8000, 720, 6.0)
+    gen = GeneratorSpec("Honda EU1000i", 900, 1000)
+    call = lambda: calculate_power_demand(ac, gen)
+    return call, len(call()['times'])
+
+
+def _simulate_discharge():
+    from analyze_hybrid_stacking import simulate_discharge
+    from design_table import DesignTable
+
+    row = DesignTable(sc_per_bank=[9], elec_per_bank=[20], max_current=40.0)[0]
+    call = lambda: simulate_discharge(row)
+    return call, len(call()['times'])
+
+
+def _generator_waveforms():
+    from generator import GeneratorSimulation
+
+    sim = GeneratorSimulation()
+    return sim.calculate_waveforms, len(sim.t)
+
+
+def _hybrid_waveforms():
+    from hybrid import HybridPowerSimulation
+
+    sim = HybridPowerSimulation()
+    return sim.calculate_waveforms, len(sim.t)
+
+
+def _generate_pcb():
+    if KICAD_DIR not in sys.path:
+        sys.path.insert(0, KICAD_DIR)
+    import generate_pcb
+    return generate_pcb
+
+
+def _schematic_text() -> str:
+    with open(SCHEMATIC) as f:
+        return f.read()
+
+
+def _tokenize():
+    tokenize = _generate_pcb().tokenize
+    text = _schematic_text()
+    return (lambda: tokenize(text)), len(tokenize(text))
+
+
+def _parse_sexp():
+    pcb = _generate_pcb()
+    text = _schematic_text()
+    return (lambda: pcb.parse_sexp(text)), len(pcb.tokenize(text))
+
+
+def _place_components():
+    pcb = _generate_pcb()
+    with contextlib.redirect_stdout(io.StringIO()):     # parse_schematic lists every part
+        components = pcb.parse_schematic(SCHEMATIC)
+    groups = pcb.group_components(components)
+    return (lambda: pcb.place_components(groups, 200.0, 120.0)), len(components)
+
+
+CASES = [
+    Case('energy_in_window', _energy_in_window, 'design'),
+    Case('energy_by_time', _energy_by_time, 'design'),
+    Case('calculate_power_demand', _power_demand, 'sample'),
+    Case('simulate_discharge', _simulate_discharge, 'sample'),
+    Case('generator_waveforms', _generator_waveforms, 'sample'),
+    Case('hybrid_waveforms', _hybrid_waveforms, 'sample'),
+    Case('tokenize', _tokenize, 'token'),
+    Case('parse_sexp', _parse_sexp, 'token'),
+    Case('place_components', _place_components, 'component'),
+]
+
+
+# =============================================================================
+# Measurement
+# =============================================================================
+
+def measure(call: Callable[[], object], min_time: float = 0.2, repeat: int = 5) -> float:
+    """Best seconds per call over repeat runs of at least min_time each."""
+    call()                                  # Warm up (caches, lazy imports)
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            call()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9) * 1.2))
+
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            call()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+def run(selected: Sequence[Case], min_time: float = 0.2, repeat: int = 5) -> Dict[str, dict]:
+    results = {}
+    for case in selected:
+        call, items = case.setup()
+        seconds = measure(call, min_time, repeat)
+        results[case.name] = dict(seconds=seconds, items=items, unit=case.unit,
+                                  throughput=items / seconds)
+    return results
+
+
+def machine() -> Dict[str, str]:
+    """What the numbers depend on besides the code."""
+    return dict(machine=platform.machine(), processor=platform.processor() or '',
+                cpu_count=str(os.cpu_count()), python=platform.python_version(),
+                numpy=np.__version__, node=platform.node())
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict],
+            threshold: float) -> Dict[str, float]:
+    """Time ratio (now / baseline) of every case slower than 1 + threshold."""
+    regressions = {}
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = r['seconds'] / base['seconds']
+        if ratio > 1 + threshold:
+            regressions[name] = ratio
+    return regressions
+
+
+def print_results(results: Dict[str, dict], baseline: Optional[Dict[str, dict]],
+                  threshold: float):
+    print("=" * 92)
+    print("BENCHMARKS")
+    print("=" * 92)
+    print(f"{'Case':<24} {'Per call':>12} {'Throughput':>22} {'Baseline':>12} {'Change':>9}")
+    print("-" * 92)
+    for name, r in results.items():
+        rate = f"{r['throughput']:,.0f} {r['unit']}/s"
+        line = f"{name:<24} {r['seconds'] * 1000:>10.3f}ms {rate:>22}"
+        base = (baseline or {}).get(name)
+        if base is not None:
+            change = r['seconds'] / base['seconds'] - 1
+            flag = '  REGRESSION' if change > threshold else ''
+            line += f" {base['seconds'] * 1000:>10.3f}ms {change:>+8.1%}{flag}"
+        print(line)
+
+
+@main_stage
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the computational hot paths')
+    parser.add_argument('cases', nargs='*', help='Cases to run (default: all)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save', action='store_true', help='Write the results as the baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed slowdown per case before failing (fraction)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Seconds per timed run')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results here')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_from_args(args)
+
+    names = [c.name for c in CASES]
+    unknown = [n for n in args.cases if n not in names]
+    if unknown:
+        print(f"Unknown cases: {', '.join(unknown)} (have: {', '.join(names)})", file=sys.stderr)
+        return 2
+    selected = [c for c in CASES if not args.cases or c.name in args.cases]
+
+    results = run(selected, args.min_time, args.repeat)
+    report = dict(created=time.time(), machine=machine(), results=results)
+
+    baseline = None
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        baseline = stored['results']
+        if stored.get('machine') != report['machine']:
+            print(f"Warning: baseline {args.baseline} was recorded on a different machine "
+                  f"or library versions; times are not comparable", file=sys.stderr)
+
+    print_results(results, baseline, args.threshold)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save:
+        if os.path.exists(args.baseline) and args.cases:
+            # Saving a subset updates those cases and keeps the others
+            with open(args.baseline) as f:
+                stored = json.load(f)
+            report['results'] = {**stored['results'], **results}
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved baseline: {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save to record one")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}: "
+              + ', '.join(f"{n} ({r:.2f}x)" for n, r in regressions.items()), file=sys.stderr)
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
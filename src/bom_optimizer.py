@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Cheapest mixed-vendor BOM for a production run.
+
+Each vendor's offer for a part has a price-break table (unit price by order
+quantity, all-units), a minimum order quantity, an order multiple (reel,
+tray or lot size) and optionally limited stock; each vendor also charges a
+fixed shipping cost per order. For a run we need Q_p units of every part p
+and choose how many to buy from each vendor, overbuying where a higher
+break makes that cheaper.
+
+Per part this is a DP over vendors: C_S(Q) is the cheapest way to get at
+least Q units from the vendor set S, and adding vendor v is a min-plus
+convolution with v's order cost. Within one price break the order cost is
+linear, so each break reduces to a strided sliding-window minimum over the
+whole quantity axis (one vectorized pass), not a loop over order sizes.
+Shipping couples the parts, so the curves are built for every vendor subset
+(2^V, a few dozen) and the run cost is
+
+    min over S of  Σ_p C_S,p(Q_p) + Σ_{v in S} shipping_v
+
+Once the curves exist, pricing any number of designs is a table lookup per
+part and subset, which is what lets a sweep re-price every candidate.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy.ndimage import minimum_filter1d
+
+ArrayLike = Union[int, Sequence[int], np.ndarray]
+
+
+@dataclass
+class Vendor:
+    """A distributor, with its fixed cost per order."""
+    name: str
+    shipping: float = 0.0
+    notes: str = ""
+
+
+@dataclass
+class Offer:
+    """One vendor's pricing for one part."""
+    vendor: str
+    part: str
+    breaks: Sequence[Tuple[int, float]]   # (min quantity, unit price), ascending
+    moq: int = 1
+    multiple: int = 1                     # Order in multiples of this
+    stock: Optional[int] = None
+
+    def tiers(self, limit: int) -> List[Tuple[int, int, float]]:
+        """(lowest, highest legal order, unit price) per break, orders capped near limit."""
+        m = self.multiple
+        out = []
+        for k, (qty, price) in enumerate(self.breaks):
+            lo = -(-max(qty, self.moq, 1) // m) * m
+            hi = self.breaks[k + 1][0] - 1 if k + 1 < len(self.breaks) else None
+            # Never useful to order more than the need, rounded up to the tier
+            cap = max(lo, -(-limit // m) * m)
+            hi = cap if hi is None else min(hi, cap)
+            if self.stock is not None:
+                hi = min(hi, self.stock)
+            hi = hi // m * m
+            if lo <= hi:
+                out.append((lo, hi, price))
+        return out
+
+    def order_cost(self, limit: int) -> np.ndarray:
+        """Cost of ordering exactly q units, q = 0..max legal order (inf if illegal)."""
+        tiers = self.tiers(limit)
+        cost = np.full((tiers[-1][1] if tiers else 0) + 1, np.inf)
+        cost[0] = 0.0
+        for lo, hi, price in tiers:
+            q = np.arange(lo, hi + 1, self.multiple)
+            cost[q] = q * price
+        return cost
+
+
+@dataclass
+class Order:
+    vendor: str
+    part: str
+    quantity: int
+    unit_price: float
+
+    @property
+    def cost(self) -> float:
+        return self.quantity * self.unit_price
+
+
+@dataclass
+class Plan:
+    """Cheapest purchase for one run."""
+    orders: List[Order]
+    shipping: Dict[str, float]
+    parts_cost: float
+    total: float
+    quantities: Dict[str, int] = field(default_factory=dict)
+
+
+def _convolve(need: np.ndarray, offer: Offer, limit: int) -> np.ndarray:
+    """
+    Cheapest cost to cover r = 0..limit units when offer is added to the
+    vendors behind need (need[r]: their cheapest cost for at least r units).
+
+    For a break with price p and legal orders q = lo, lo+m, ..., hi:
+        new[r] = p·r + min_j (need[max(j, 0)] - p·j),  j = r - q
+    a forward window minimum with stride m over j.
+    """
+    best = need.copy()
+    r = np.arange(limit + 1)
+    for lo, hi, price in offer.tiers(limit):
+        m = offer.multiple
+        width = (hi - lo) // m + 1
+        # g[x] for j = x - hi, j from -hi to limit - lo
+        j = np.arange(-hi, limit - lo + 1)
+        g = need[np.maximum(j, 0)] - price * j
+        rows = -(-len(g) // m)
+        grid = np.full(rows * m, np.inf)
+        grid[:len(g)] = g
+        window = minimum_filter1d(grid.reshape(rows, m), width, axis=0, mode='constant',
+                                  cval=np.inf, origin=-(width // 2)).ravel()
+        # r's window starts at j = r - hi, i.e. x = r
+        np.minimum(best, price * r + window[:limit + 1], out=best)
+    return best
+
+
+class BomPricer:
+    """
+    Cost curves for every part and vendor subset, built up to a quantity limit.
+
+    quantities passed to price()/plan() are whole-run totals per part;
+    curves are rebuilt with a larger limit if a request exceeds it.
+    """
+
+    def __init__(self, vendors: Sequence[Vendor], offers: Sequence[Offer], limit: int = 1024):
+        self.vendors = list(vendors)
+        self.offers = list(offers)
+        self.parts = sorted({o.part for o in offers}, key=[o.part for o in offers].index)
+        self._shipping = np.array([
+            sum(v.shipping for k, v in enumerate(self.vendors) if mask >> k & 1)
+            for mask in range(1 << len(self.vendors))])
+        self.limit = 0
+        self._curves: Dict[str, np.ndarray] = {}
+        self._build(limit)
+
+    def offer(self, vendor: str, part: str) -> Optional[Offer]:
+        return next((o for o in self.offers if o.vendor == vendor and o.part == part), None)
+
+    def _build(self, limit: int):
+        """curves[part][mask, r]: cheapest cost for >= r units from vendor subset mask."""
+        n_sets = 1 << len(self.vendors)
+        for part in self.parts:
+            curves = np.empty((n_sets, limit + 1))
+            curves[0] = np.inf
+            curves[0, 0] = 0.0
+            for mask in range(1, n_sets):
+                k = mask.bit_length() - 1
+                parent = curves[mask ^ (1 << k)]
+                offer = self.offer(self.vendors[k].name, part)
+                curves[mask] = parent if offer is None else _convolve(parent, offer, limit)
+            self._curves[part] = curves
+        self.limit = limit
+
+    def _ensure(self, largest: int):
+        if largest > self.limit:
+            self._build(max(largest, 2 * self.limit))
+
+    def price(self, quantities: Mapping[str, ArrayLike],
+              allowed: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cheapest run cost for every design (quantities broadcast).
+
+        allowed restricts the purchase to those vendors. Returns (total cost
+        incl. shipping, vendor subset bitmask used); inf where the vendors
+        cannot supply the quantity.
+        """
+        qty = {p: np.asarray(q, dtype=int) for p, q in quantities.items()}
+        shape = np.broadcast(*qty.values()).shape if qty else ()
+        self._ensure(max([int(q.max()) for q in qty.values() if q.size] + [0]))
+        total = np.zeros(shape + self._shipping.shape) + self._shipping
+        for part, q in qty.items():
+            curves = self._curves.get(part)
+            if curves is None:      # No vendor offers it: any nonzero quantity is unobtainable
+                total += np.where(np.broadcast_to(q, shape) > 0, np.inf, 0.0)[..., None]
+                continue
+            total += np.moveaxis(curves[:, np.broadcast_to(q, shape)], 0, -1)
+        if allowed is not None:
+            keep = sum(1 << k for k, v in enumerate(self.vendors) if v.name in allowed)
+            total[..., (np.arange(len(self._shipping)) & ~keep) != 0] = np.inf
+        best = np.argmin(total, axis=-1)
+        cost = np.take_along_axis(total, best[..., None], axis=-1)[..., 0]
+        return cost, best
+
+    def plan(self, quantities: Mapping[str, int],
+             allowed: Optional[Sequence[str]] = None) -> Plan:
+        """Per-vendor orders for one run (backtracks the DP)."""
+        cost, best = self.price(quantities, allowed)
+        mask = int(best)
+        if not np.isfinite(cost):
+            missing = [p for p, q in quantities.items() if q > 0 and p not in self._curves]
+            if missing:
+                raise ValueError(f"no vendor offers {', '.join(missing)}")
+            raise ValueError(f"quantities {dict(quantities)} cannot be sourced")
+
+        orders = []
+        for part, need in quantities.items():
+            if part not in self._curves:
+                continue            # Zero quantity of a part nobody offers
+            curves = self._curves[part]
+            remaining = int(need)
+            subset = mask
+            while subset and remaining > 0:
+                k = subset.bit_length() - 1
+                parent = subset ^ (1 << k)
+                offer = self.offer(self.vendors[k].name, part)
+                if offer is not None:
+                    order = offer.order_cost(self.limit)
+                    q = np.arange(len(order))
+                    options = curves[parent][np.maximum(remaining - q, 0)] + order
+                    bought = int(np.argmin(options))
+                    if bought:
+                        price = order[bought] / bought
+                        orders.append(Order(offer.vendor, part, bought, price))
+                        remaining = max(remaining - bought, 0)
+                subset = parent
+
+        used = {o.vendor for o in orders}
+        shipping = {v.name: v.shipping for v in self.vendors if v.name in used}
+        parts_cost = sum(o.cost for o in orders)
+        return Plan(orders, shipping, parts_cost, parts_cost + sum(shipping.values()),
+                    {p: int(q) for p, q in quantities.items()})
+
+
+def price_designs(pricer: BomPricer, table, run_size: int,
+                  per_unit: Optional[Mapping[str, int]] = None) -> np.ndarray:
+    """
+    Per-unit capacitor + fixed-part cost of every design in a DesignTable
+    when run_size boards are built, buying from the cheapest vendor mix.
+
+    per_unit adds parts every board needs regardless of design (e.g. an
+    electronics kit). Supercaps and electrolytics are priced as the parts
+    'supercap' and 'electrolytic'.
+    """
+    quantities: Dict[str, ArrayLike] = {
+        'supercap': table.total_supercaps * run_size,
+        'electrolytic': table.total_electrolytics * run_size,
+    }
+    for part, count in (per_unit or {}).items():
+        quantities[part] = np.full(len(table), count * run_size)
+    cost, _ = pricer.price(quantities)
+    return cost / run_size
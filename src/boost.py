@@ -1,5 +1,9 @@
+import argparse
+
 import numpy as np
-import matplotlib.pyplot as plt
+
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import print_waveform_summary, pyplot, show
 
 
 class BoostCircuitSimulation:
@@ -77,8 +81,9 @@ class BoostCircuitSimulation:
 
         return v_gen, v_cap, v_assist, v_total, u1_gate, u2_gate, i_cap
 
-    def plot_waveforms(self):
+    def plot_waveforms(self, save_path=None):
         """Create visualization of all waveforms"""
+        plt = pyplot()
         v_gen, v_cap, v_assist, v_total, u1_gate, u2_gate, i_cap = (
             self.calculate_waveforms()
         )
@@ -118,9 +123,37 @@ class BoostCircuitSimulation:
         ax4.legend()
 
         plt.tight_layout()
-        plt.show()
+
+        if save_path:
+            plt.savefig(save_path, dpi=150, bbox_inches="tight")
+            print(f"Saved: {save_path}")
+        show()
+
+
+@main_stage
+def main(plot=True, save_path=None):
+    sim = BoostCircuitSimulation()
+    if plot:
+        sim.plot_waveforms(save_path)
+    else:
+        v_gen, v_cap, v_assist, v_total, u1_gate, u2_gate, i_cap = (
+            sim.calculate_waveforms()
+        )
+        print_waveform_summary(
+            "Boost circuit",
+            sim.t,
+            v_gen=v_gen,
+            v_cap=v_cap,
+            v_assist=v_assist,
+            v_total=v_total,
+            u1_gate=u1_gate,
+            u2_gate=u2_gate,
+            i_cap=i_cap,
+        )
 
 
-# Create and run simulation
-sim = BoostCircuitSimulation()
-sim.plot_waveforms()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Boost circuit injection waveforms")
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
+    main()
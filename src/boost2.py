@@ -1,5 +1,9 @@
+import argparse
+
 import numpy as np
-import matplotlib.pyplot as plt
+
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import print_waveform_summary, pyplot, show
 
 
 class DualBoostCircuitSimulation:
@@ -116,8 +120,9 @@ class DualBoostCircuitSimulation:
             i_cap2,
         )
 
-    def plot_waveforms(self):
+    def plot_waveforms(self, save_path=None):
         """Create visualization of all waveforms"""
+        plt = pyplot()
         (
             v_gen,
             v_cap1,
@@ -176,9 +181,49 @@ class DualBoostCircuitSimulation:
         ax5.legend()
 
         plt.tight_layout()
-        plt.show()
+
+        if save_path:
+            plt.savefig(save_path, dpi=150, bbox_inches="tight")
+            print(f"Saved: {save_path}")
+        show()
+
+
+@main_stage
+def main(plot=True, save_path=None):
+    sim = DualBoostCircuitSimulation()
+    if plot:
+        sim.plot_waveforms(save_path)
+    else:
+        (
+            v_gen,
+            v_cap1,
+            v_cap2,
+            v_assist,
+            v_total,
+            u1_gate,
+            u2_gate,
+            u3_gate,
+            i_cap1,
+            i_cap2,
+        ) = sim.calculate_waveforms()
+        print_waveform_summary(
+            "Dual boost circuit",
+            sim.t,
+            v_gen=v_gen,
+            v_cap1=v_cap1,
+            v_cap2=v_cap2,
+            v_assist=v_assist,
+            v_total=v_total,
+            u1_gate=u1_gate,
+            u2_gate=u2_gate,
+            u3_gate=u3_gate,
+            i_cap1=i_cap1,
+            i_cap2=i_cap2,
+        )
 
 
-# Create and run simulation
-sim = DualBoostCircuitSimulation()
-sim.plot_waveforms()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dual boost circuit waveforms")
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Regenerate the analysis figures in docs/ that are out of date.
+
+Every PNG in docs/ is listed in FIGURES with the script and parameters that
+produce it. A figure's inputs are hashed: the script's source and every
+local module it imports (transitively), the render function and its
+parameters, and the matplotlib version. Hashes of the last successful build
+are kept in docs/.figures.json, so a refresh only renders figures whose
+inputs changed or whose PNG is missing, and a no-op refresh never imports
+matplotlib. Stale figures are rendered concurrently in a process pool.
+
+Usage:
+    python build_figures.py                 # refresh stale figures
+    python build_figures.py --dry-run       # show what is stale
+    python build_figures.py --force hybrid_stacking_analysis.png
+"""
+
+import argparse
+import ast
+import contextlib
+import hashlib
+import inspect
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from importlib import metadata
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from instrument import add_arguments, configure_from_args, main_stage
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+DOCS_DIR = os.path.join(os.path.dirname(SRC_DIR), 'docs')
+MANIFEST = '.figures.json'
+
+
+# =============================================================================
+# Render functions (one per script; paths are in Figure.outputs order)
+# =============================================================================
+
+def _supercap_configs(paths: Sequence[str], max_cells_per_bank: int):
+    import analyze_supercap_configs as m
+    results = m.analyze_range(list(range(1, max_cells_per_bank + 1)),
+                              m.SupercapCell(), m.ACSystem(), m.SystemLimits())
+    m.plot_power_vs_cost(results, save_path=paths[0])
+    m.plot_motor_start_scenario(results, save_path=paths[1])
+
+
+def _hybrid_stacking(paths: Sequence[str]):
+    import analyze_hybrid_stacking as m
+    m.plot_comparison(m.compare_configurations(), save_path=paths[0])
+
+
+def _minimal_hybrid(paths: Sequence[str], target_energy_j: float, window_ms: float):
+    import optimize_minimal_hybrid as m
+    results = m.find_optimal_configs(target_energy_j=target_energy_j, window_ms=window_ms)
+    m.plot_results(results, target_energy=target_energy_j, save_path=paths[0])
+
+
+def _motor_startup(paths: Sequence[str]):
+    import analyze_motor_startup as m
+    m.plot_analysis(m.analyze_scenarios(), save_path=paths[0])
+
+
+def _phase_coverage(paths: Sequence[str]):
+    import analyze_phase_coverage as m
+    m.plot_phase_analysis(m.analyze_phase_coverage(), save_path=paths[0])
+    m.plot_coverage_map(m.analyze_operating_grid(), save_path=paths[1])
+
+
+def _comprehensive(paths: Sequence[str]):
+    import comprehensive_analysis as m
+    designs = m.design_options()
+    loads = m.load_scenarios()
+    m.plot_summary(designs, loads, m.startup_matrix(designs, loads), save_path=paths[0])
+
+
+def _supercap_only_12f(paths: Sequence[str]):
+    import analyze_supercap_only_12f as m
+    m.plot_comparison(save_path=paths[0])
+
+
+def _budget_design(paths: Sequence[str]):
+    import analyze_budget_design as m
+    m.plot_comparison(save_path=paths[0])
+
+
+@dataclass(frozen=True)
+class Figure:
+    """PNGs in docs/ rendered together by one script."""
+    outputs: Tuple[str, ...]
+    script: str
+    render: Callable[..., None]
+    params: Dict[str, object] = field(default_factory=dict)
+
+
+FIGURES: List[Figure] = [
+    Figure(('supercap_analysis.png', 'motor_start_scenario.png'),
+           'analyze_supercap_configs', _supercap_configs, {'max_cells_per_bank': 40}),
+    Figure(('hybrid_stacking_analysis.png',), 'analyze_hybrid_stacking', _hybrid_stacking),
+    Figure(('minimal_hybrid_optimization.png',), 'optimize_minimal_hybrid', _minimal_hybrid,
+           {'target_energy_j': 200, 'window_ms': 200}),
+    Figure(('motor_startup_analysis.png',), 'analyze_motor_startup', _motor_startup),
+    Figure(('phase_coverage_analysis.png', 'phase_coverage_map.png'),
+           'analyze_phase_coverage', _phase_coverage),
+    Figure(('comprehensive_analysis.png',), 'comprehensive_analysis', _comprehensive),
+    Figure(('supercap_only_12f_analysis.png',), 'analyze_supercap_only_12f',
+           _supercap_only_12f),
+    Figure(('budget_design_analysis.png',), 'analyze_budget_design', _budget_design),
+]
+
+
+# =============================================================================
+# Dependency tracking
+# =============================================================================
+
+def local_imports(module: str) -> Set[str]:
+    """The module plus every module in src/ it imports, transitively."""
+    seen: Set[str] = set()
+    pending = [module]
+    while pending:
+        name = pending.pop()
+        path = os.path.join(SRC_DIR, name + '.py')
+        if name in seen or not os.path.exists(path):
+            continue
+        seen.add(name)
+        with open(path) as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                pending.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                pending.append(node.module)
+    return seen
+
+
+def input_hash(figure: Figure) -> str:
+    """Hash of everything that determines the figure's pixels."""
+    h = hashlib.sha256()
+    for name in sorted(local_imports(figure.script)):
+        with open(os.path.join(SRC_DIR, name + '.py'), 'rb') as f:
+            h.update(name.encode() + b'\0' + f.read() + b'\0')
+    h.update(inspect.getsource(figure.render).encode())
+    h.update(json.dumps(figure.params, sort_keys=True).encode())
+    h.update(metadata.version('matplotlib').encode())
+    return h.hexdigest()
+
+
+def load_manifest(out_dir: str) -> Dict[str, str]:
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(out_dir: str, manifest: Dict[str, str]):
+    path = os.path.join(out_dir, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(path + '.tmp', path)
+
+
+def is_stale(figure: Figure, digest: str, manifest: Dict[str, str], out_dir: str) -> bool:
+    return any(manifest.get(name) != digest or
+               not os.path.exists(os.path.join(out_dir, name))
+               for name in figure.outputs)
+
+
+# =============================================================================
+# Rendering
+# =============================================================================
+
+def render(figure: Figure, out_dir: str) -> float:
+    """Render one figure into out_dir; returns wall time in seconds."""
+    from plotting import pyplot
+
+    start = time.perf_counter()
+    tmp_paths = []
+    for name in figure.outputs:
+        stem, ext = os.path.splitext(name)
+        tmp_paths.append(os.path.join(out_dir, f'{stem}.tmp{ext}'))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        figure.render(tmp_paths, **figure.params)
+    pyplot().close('all')
+
+    # Swap in complete files only, so an interrupted build leaves no half PNGs
+    for tmp, name in zip(tmp_paths, figure.outputs):
+        os.replace(tmp, os.path.join(out_dir, name))
+    return time.perf_counter() - start
+
+
+def build(figures: Sequence[Figure], out_dir: str = DOCS_DIR, force: bool = False,
+          jobs: Optional[int] = None, dry_run: bool = False) -> List[Tuple[Figure, str]]:
+    """
+    Render the stale figures; returns (figure, status) for every figure.
+
+    The manifest is updated after each figure finishes, so figures that
+    failed stay stale for the next run.
+    """
+    manifest = load_manifest(out_dir)
+    digests = {f.outputs: input_hash(f) for f in figures}
+    stale = [f for f in figures
+             if force or is_stale(f, digests[f.outputs], manifest, out_dir)]
+    status = {f.outputs: 'stale' if f in stale else 'fresh' for f in figures}
+
+    def finish(figure: Figure, run: Callable[[], float]):
+        try:
+            elapsed = run()
+        except Exception as e:
+            status[figure.outputs] = f'FAILED: {e}'
+            return
+        status[figure.outputs] = f'rendered {elapsed:.2f}s'
+        for name in figure.outputs:
+            manifest[name] = digests[figure.outputs]
+        save_manifest(out_dir, manifest)
+
+    if not dry_run:
+        jobs = min(jobs or os.cpu_count() or 1, len(stale))
+        if jobs <= 1:
+            for figure in stale:
+                finish(figure, lambda: render(figure, out_dir))
+        elif stale:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = {pool.submit(render, f, out_dir): f for f in stale}
+                for future in as_completed(futures):
+                    finish(futures[future], future.result)
+
+    return [(f, status[f.outputs]) for f in figures]
+
+
+@main_stage
+def main():
+    parser = argparse.ArgumentParser(description='Regenerate stale analysis figures in docs/')
+    parser.add_argument('names', nargs='*', help='Only these figures (default: all)')
+    parser.add_argument('--force', action='store_true', help='Render even if up to date')
+    parser.add_argument('--dry-run', action='store_true', help='Only report stale figures')
+    parser.add_argument('--jobs', '-j', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--out-dir', default=DOCS_DIR, help='Output directory (default: docs/)')
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    figures = FIGURES
+    if args.names:
+        wanted = {os.path.basename(n) for n in args.names}
+        figures = [f for f in FIGURES if wanted & set(f.outputs)]
+        unknown = wanted - {name for f in FIGURES for name in f.outputs}
+        if unknown:
+            parser.error(f"unknown figures: {', '.join(sorted(unknown))}")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    start = time.perf_counter()
+    results = build(figures, args.out_dir, force=args.force, jobs=args.jobs,
+                    dry_run=args.dry_run)
+
+    for figure, status in results:
+        print(f"{', '.join(figure.outputs):<55} {status}")
+    print(f"\n{len(results)} figure sets in {time.perf_counter() - start:.2f}s")
+    return 1 if any(s.startswith('FAILED') for _, s in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Fit the motor start model to measured inrush envelopes.
+
+motor_current_profile() and motor_power_factor_profile() are driven by a
+handful of numbers: the LRA multiplier, the StartupProfile breakpoints and
+shape, the startup time and the two WindowACSpec power factors. Given
+measured starts (the per-half-cycle dicts capture.startup_event() returns:
+times, currents, power_factors, ac), calibrate() finds the values that best
+reproduce them.
+
+All starts are fitted in a single scipy.optimize.least_squares call. The
+residuals of every start are one vector, the parameters one vector with a
+block per unit, and the Jacobian is computed analytically and returned as a
+block-sparse matrix, so hundreds of starts cost little more than one.
+Starts that share a unit label share one parameter block.
+
+The surge duration and PF ramp start are held at their defaults: with one
+sample per half-cycle, moving them changes no residual (zero gradient).
+
+Usage:
+    ./calibration.py starts/*.csv --ac 8000 -o profiles.json
+    ./calibration.py --synthetic 300          # self-check on noisy model starts
+"""
+
+import argparse
+import dataclasses
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import least_squares
+
+from analyze_motor_startup import DEFAULT_PROFILE, StartupProfile, WindowACSpec
+from instrument import add_arguments, configure_from_args, main_stage
+
+# Fitted parameters, in parameter-vector order
+PARAMS = ('lra_multiplier', 'surge_level', 'locked_ms', 'locked_droop',
+          'startup_time_ms', 'decay_rate', 'pf_locked', 'pf_running')
+LOWER = np.array([2.0, 0.5, 20.0, -0.5, 60.0, 0.1, 0.05, 0.3])
+UPPER = np.array([12.0, 4.0, 400.0, 0.8, 3000.0, 20.0, 0.9, 1.0])
+
+PF_WEIGHT = 10.0   # PF residual weight relative to current residuals in units of FLA
+
+
+@dataclass
+class ProfileFit:
+    """Calibrated start model for one unit."""
+    unit: str
+    ac: WindowACSpec              # lra_multiplier and power factors fitted
+    profile: StartupProfile
+    startup_time_ms: float
+    rms_current: float            # RMS current residual (A)
+    rms_pf: float                 # RMS power factor residual
+    starts: int
+    points: int
+
+    def model_inputs(self) -> Tuple[WindowACSpec, float, StartupProfile]:
+        """(ac, startup_time_ms, profile) for calculate_power_demand()."""
+        return self.ac, self.startup_time_ms, self.profile
+
+
+# =============================================================================
+# Vectorized model and Jacobian
+# =============================================================================
+
+def parameter_vector(ac: WindowACSpec, startup_time_ms: float = 300,
+                     profile: StartupProfile = DEFAULT_PROFILE) -> np.ndarray:
+    """The model inputs calculate_power_demand() uses, in PARAMS order."""
+    return np.array([ac.lra_multiplier, profile.surge_level, profile.locked_ms,
+                     profile.locked_droop, startup_time_ms, profile.decay_rate,
+                     ac.power_factor_locked, ac.power_factor_running])
+
+def envelope(t_ms: np.ndarray, fla: np.ndarray, p: np.ndarray,
+             surge_ms: float = DEFAULT_PROFILE.surge_ms,
+             pf_ramp_ms: float = DEFAULT_PROFILE.pf_ramp_ms,
+             jacobian: bool = False):
+    """
+    Current and PF of the start model at every sample, with derivatives.
+
+    t_ms and fla are per sample; p is (samples, len(PARAMS)), i.e. each
+    sample's own parameter row. Matches motor_current_profile() and
+    motor_power_factor_profile(). Returns (current, pf) or, with jacobian,
+    (current, pf, d_current, d_pf), the derivatives shaped like p.
+    """
+    m, s, t1, d, ts, k, pl, pr = p.T
+    lra = m * fla
+
+    surge = (t_ms >= 0) & (t_ms < surge_ms)
+    locked = (t_ms >= surge_ms) & (t_ms < t1)
+    accel = (t_ms >= np.maximum(t1, surge_ms)) & (t_ms < ts)
+    running = t_ms >= np.maximum(ts, surge_ms)
+
+    e = 0.5 * np.exp(-np.maximum(t_ms, 0) / 2)
+    span1 = np.maximum(t1 - surge_ms, 1e-9)
+    u = (t_ms - surge_ms) / span1
+    span3 = np.where(ts > t1, ts - t1, 1.0)
+    q = (t_ms - t1) / span3
+    decay = np.exp(-k * q)
+
+    current = np.select([surge, locked, accel, running],
+                        [lra * (s + e), lra * (1 - d * u),
+                         lra * (1 - d) * decay + fla * (1 - decay), fla])
+
+    ramp = (t_ms >= pf_ramp_ms) & (t_ms < ts)
+    span_pf = np.where(ts > pf_ramp_ms, ts - pf_ramp_ms, 1.0)
+    r = (t_ms - pf_ramp_ms) / span_pf
+    pf = np.select([t_ms < 0, t_ms < pf_ramp_ms, ramp], [0.0, pl, pl + (pr - pl) * r], pr)
+
+    if not jacobian:
+        return current, pf
+
+    di = np.zeros_like(p)
+    # Surge: I = LRA (s + e)
+    di[surge, 0] = (fla * (s + e))[surge]
+    di[surge, 1] = lra[surge]
+    # Locked rotor: I = LRA (1 - d u), u = (t - surge) / (t1 - surge)
+    di[locked, 0] = (fla * (1 - d * u))[locked]
+    di[locked, 2] = (lra * d * u / span1)[locked]
+    di[locked, 3] = -(lra * u)[locked]
+    # Acceleration: I = LRA (1-d) D + FLA (1 - D), D = exp(-k q), q = (t - t1) / (ts - t1)
+    dd = (lra * (1 - d) - fla)              # dI/dD
+    dq = -k * decay                         # dD/dq
+    di[accel, 0] = (fla * (1 - d) * decay)[accel]
+    di[accel, 2] = (dd * dq * -(1 - q) / span3)[accel]
+    di[accel, 3] = -(lra * decay)[accel]
+    di[accel, 4] = (dd * dq * -q / span3)[accel]
+    di[accel, 5] = (dd * -q * decay)[accel]
+
+    dpf = np.zeros_like(p)
+    early = (t_ms >= 0) & (t_ms < pf_ramp_ms)
+    dpf[early, 6] = 1.0
+    dpf[ramp, 4] = (-(pr - pl) * r / span_pf)[ramp]
+    dpf[ramp, 6] = (1 - r)[ramp]
+    dpf[ramp, 7] = r[ramp]
+    dpf[t_ms >= np.maximum(ts, pf_ramp_ms), 7] = 1.0
+    return current, pf, di, dpf
+
+
+# =============================================================================
+# Batched fit
+# =============================================================================
+
+def initial_guess(times: np.ndarray, currents: np.ndarray, pfs: np.ndarray,
+                  fla: float) -> np.ndarray:
+    """Parameter row read off a measured envelope."""
+    locked = (times >= DEFAULT_PROFILE.surge_ms) & (times < DEFAULT_PROFILE.locked_ms)
+    lra = np.median(currents[locked]) if locked.any() else np.max(currents)
+    settled = np.nonzero((times > DEFAULT_PROFILE.locked_ms) & (currents < 1.5 * fla))[0]
+    startup = times[settled[0]] if len(settled) else 2 * DEFAULT_PROFILE.locked_ms + 100
+    early = times < DEFAULT_PROFILE.pf_ramp_ms
+    late = times >= startup
+    p0 = np.array([
+        lra / fla,
+        DEFAULT_PROFILE.surge_level,
+        DEFAULT_PROFILE.locked_ms,
+        DEFAULT_PROFILE.locked_droop,
+        startup,
+        DEFAULT_PROFILE.decay_rate,
+        np.median(pfs[early]) if early.any() else 0.35,
+        np.median(pfs[late]) if late.any() else 0.85,
+    ])
+    return np.clip(p0, LOWER + 1e-6, UPPER - 1e-6)
+
+
+def calibrate(events: Sequence[dict], units: Optional[Sequence[str]] = None,
+              pf_weight: float = PF_WEIGHT, **lsq_kwargs) -> Dict[str, ProfileFit]:
+    """
+    Fit one parameter set per unit to a batch of measured starts.
+
+    events are calculate_power_demand()-style dicts (times in ms from the
+    start, currents in A RMS, power_factors, ac); units labels each event's
+    unit (default: event['ac'].name). Pass distinct labels to fit every start
+    on its own. Returns {unit: ProfileFit}.
+    """
+    units = [e['ac'].name for e in events] if units is None else list(units)
+    labels = sorted(set(units), key=units.index)
+    block = {u: j for j, u in enumerate(labels)}
+    n_par = len(PARAMS)
+
+    t = np.concatenate([np.asarray(e['times'], dtype=float) for e in events])
+    i_meas = np.concatenate([np.asarray(e['currents'], dtype=float) for e in events])
+    pf_meas = np.concatenate([np.asarray(e['power_factors'], dtype=float) for e in events])
+    owner = np.concatenate([np.full(len(e['times']), block[u]) for e, u in zip(events, units)])
+    fla = np.concatenate([np.full(len(e['times']), e['ac'].running_amps) for e in events])
+
+    # Start from the per-unit median of each event's own guess
+    guesses: Dict[str, List[np.ndarray]] = {u: [] for u in labels}
+    for e, u in zip(events, units):
+        guesses[u].append(initial_guess(np.asarray(e['times']), np.asarray(e['currents']),
+                                        np.asarray(e['power_factors']), e['ac'].running_amps))
+    x0 = np.concatenate([np.median(guesses[u], axis=0) for u in labels])
+
+    # Block-sparse Jacobian: row r depends only on its owner's parameters
+    n = len(t)
+    cols = (owner[:, None] * n_par + np.arange(n_par)).ravel()
+    indices = np.concatenate([cols, cols])
+    indptr = np.arange(0, 2 * n * n_par + 1, n_par)
+    shape = (2 * n, len(labels) * n_par)
+
+    def rows(x):
+        return x.reshape(-1, n_par)[owner]
+
+    def residuals(x):
+        current, pf = envelope(t, fla, rows(x))
+        return np.concatenate([(current - i_meas) / fla, pf_weight * (pf - pf_meas)])
+
+    def jacobian(x):
+        _, _, di, dpf = envelope(t, fla, rows(x), jacobian=True)
+        data = np.concatenate([(di / fla[:, None]).ravel(), (pf_weight * dpf).ravel()])
+        return sparse.csr_matrix((data, indices, indptr), shape=shape)
+
+    options = dict(jac=jacobian, bounds=(np.tile(LOWER, len(labels)), np.tile(UPPER, len(labels))),
+                   x_scale='jac', tr_solver='lsmr', method='trf')
+    options.update(lsq_kwargs)
+    solution = least_squares(residuals, x0, **options)
+
+    res = solution.fun
+    fits = {}
+    for u in labels:
+        j = block[u]
+        mine = owner == j
+        p = dict(zip(PARAMS, solution.x[j * n_par:(j + 1) * n_par]))
+        ac = next(e['ac'] for e, lbl in zip(events, units) if lbl == u)
+        fits[u] = ProfileFit(
+            unit=u,
+            ac=dataclasses.replace(ac, lra_multiplier=p['lra_multiplier'],
+                                   power_factor_locked=p['pf_locked'],
+                                   power_factor_running=p['pf_running']),
+            profile=dataclasses.replace(DEFAULT_PROFILE, surge_level=p['surge_level'],
+                                        locked_ms=p['locked_ms'],
+                                        locked_droop=p['locked_droop'],
+                                        decay_rate=p['decay_rate']),
+            startup_time_ms=p['startup_time_ms'],
+            rms_current=float(np.sqrt(np.mean((res[:n][mine] * fla[mine]) ** 2))),
+            rms_pf=float(np.sqrt(np.mean(res[n:][mine] ** 2))) / pf_weight,
+            starts=units.count(u),
+            points=int(mine.sum()),
+        )
+    return fits
+
+
+# =============================================================================
+# Storage
+# =============================================================================
+
+def save_profiles(path: str, fits: Dict[str, ProfileFit]):
+    """Write fitted profiles as JSON, one entry per unit."""
+    with open(path + '.tmp', 'w') as f:
+        json.dump({u: dataclasses.asdict(fit) for u, fit in fits.items()}, f, indent=2)
+        f.write('\n')
+    os.replace(path + '.tmp', path)
+
+
+def load_profiles(path: str) -> Dict[str, ProfileFit]:
+    with open(path) as f:
+        data = json.load(f)
+    return {u: ProfileFit(**{**d, 'ac': WindowACSpec(**d['ac']),
+                             'profile': StartupProfile(**d['profile'])})
+            for u, d in data.items()}
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def synthetic_starts(count: int, ac: WindowACSpec, seed: int = 0,
+                     noise_a: float = 0.5) -> Tuple[List[dict], np.ndarray]:
+    """Noisy half-cycle envelopes from randomly perturbed models (for self-checks)."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(4.15, 2000, 1000 / 120)
+    truth = parameter_vector(ac) * rng.uniform(0.8, 1.2, (count, len(PARAMS)))
+    truth[:, 4] = rng.uniform(200, 700, count)
+    truth[:, 6] = rng.uniform(0.25, 0.45, count)
+    truth[:, 7] = rng.uniform(0.75, 0.95, count)
+    events = []
+    for p in truth:
+        current, pf = envelope(t, np.full(len(t), ac.running_amps), np.tile(p, (len(t), 1)))
+        events.append({
+            'times': t,
+            'currents': current + rng.normal(0, noise_a, len(t)),
+            'power_factors': pf + rng.normal(0, 0.02, len(t)),
+            'ac': ac,
+        })
+    return events, truth
+
+
+def print_fits(fits: Dict[str, ProfileFit]):
+    print(f"\n{'Unit':<20} {'Starts':>6} {'LRA x':>6} {'Surge':>6} {'Locked':>7} "
+          f"{'Droop':>6} {'Start':>6} {'Decay':>6} {'PF lk':>6} {'PF run':>6} {'RMS A':>6}")
+    print("-" * 96)
+    for fit in fits.values():
+        print(f"{fit.unit[:20]:<20} {fit.starts:>6} {fit.ac.lra_multiplier:>6.2f} "
+              f"{fit.profile.surge_level:>6.2f} {fit.profile.locked_ms:>5.0f}ms "
+              f"{fit.profile.locked_droop:>6.2f} {fit.startup_time_ms:>4.0f}ms "
+              f"{fit.profile.decay_rate:>6.2f} {fit.ac.power_factor_locked:>6.2f} "
+              f"{fit.ac.power_factor_running:>6.2f} {fit.rms_current:>6.2f}")
+
+
+@main_stage
+def main():
+    from analyze_motor_startup import analyze_scenarios
+
+    units = {r['ac'].btu: r['ac'] for r in analyze_scenarios()}
+
+    parser = argparse.ArgumentParser(description='Fit the motor start model to captured starts')
+    parser.add_argument('files', nargs='*', help='Captures (see capture.py)')
+    parser.add_argument('--ac', type=int, default=8000, choices=sorted(units),
+                        help='Nominal window AC size (BTU) of the captured unit')
+    parser.add_argument('--per-start', action='store_true',
+                        help='Fit every capture separately instead of one set per unit')
+    parser.add_argument('--synthetic', type=int, metavar='N',
+                        help='Fit N noisy synthetic starts and report parameter recovery')
+    parser.add_argument('-o', '--output', help='Save fitted profiles as JSON')
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    ac = units[args.ac]
+    print("=" * 70)
+    print("MOTOR START MODEL CALIBRATION")
+    print("=" * 70)
+
+    truth = None
+    if args.synthetic:
+        events, truth = synthetic_starts(args.synthetic, ac)
+        labels = [f'synthetic {k}' for k in range(len(events))]
+    else:
+        from capture import summarize_capture
+        from analyze_motor_startup import GeneratorSpec
+        gen = GeneratorSpec("Honda EU1000i", 900, 1000)
+        events, labels = [], []
+        for path in args.files:
+            event = summarize_capture(path, ac, gen)
+            if event is None:
+                print(f"{path}: no start found, skipped")
+                continue
+            events.append(event)
+            labels.append(path if args.per_start else ac.name)
+        if not events:
+            parser.error('no starts to fit')
+
+    start = time.perf_counter()
+    fits = calibrate(events, labels)
+    elapsed = time.perf_counter() - start
+    print(f"{len(events)} starts, {sum(len(e['times']) for e in events):,} points, "
+          f"{len(fits)} parameter sets fitted in {elapsed:.2f}s")
+
+    if truth is not None:
+        fitted = np.array([[f.ac.lra_multiplier, f.profile.surge_level,
+                            f.profile.locked_ms, f.profile.locked_droop, f.startup_time_ms,
+                            f.profile.decay_rate, f.ac.power_factor_locked,
+                            f.ac.power_factor_running] for f in fits.values()])
+        error = np.abs(fitted - truth)
+        print(f"\n{'Parameter':<18} {'Median |err|':>12} {'90th pct':>10}")
+        print("-" * 42)
+        for j, name in enumerate(PARAMS):
+            print(f"{name:<18} {np.median(error[:, j]):>12.4g} "
+                  f"{np.percentile(error[:, j], 90):>10.4g}")
+    else:
+        print_fits(fits)
+
+    if args.output:
+        save_profiles(args.output, fits)
+        print(f"\nSaved: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
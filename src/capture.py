@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Load oscilloscope/DAQ captures of real generator starts and summarize them.
+
+Captures are long, uniformly sampled voltage/current records (hundreds of
+MB). Nothing here ever holds a whole capture in memory:
+
+- CSV is parsed once, block by block, straight into a structured `.npy`
+  cache next to the source, which is reopened memory-mapped afterwards
+  (the same scheme hardware/simulation/spice_data.py uses for ngspice).
+- Raw binary (interleaved int16/float32 channels) and `.npy` files are
+  memory-mapped directly.
+- half_cycles() walks the capture in fixed-size chunks and reduces it to one
+  row per half-cycle: zero-crossing time, duration, V/I RMS, peak current and
+  real power. Sums come from per-chunk cumulative sums, with the open half-
+  cycle carried across chunk boundaries, so the pass is O(n).
+- startup_event() turns those rows into the dict calculate_power_demand()
+  returns (times, currents, power_factors, shortfalls, energies, ...), plus
+  measured extras (voltages, droop, frequencies), so model and measurement
+  can be compared key for key.
+
+Usage:
+    ./capture.py start_8k.csv --ac 8000
+    ./capture.py start.bin --names v i --dtype '<i2' --sample-rate 100000 \\
+        --scale 0.01 0.002 --ac 8000
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from analyze_motor_startup import GeneratorSpec, WindowACSpec
+from instrument import add_arguments, configure_from_args, main_stage
+
+CACHE_SUFFIX = '.npy'
+CHUNK = 1 << 20          # Samples per processing chunk
+CSV_BLOCK = 32 << 20     # Bytes of CSV parsed at a time
+TIME_NAMES = ('time', 't', 'time_s', 'seconds', 's')
+
+
+class Capture:
+    """Named, uniformly sampled channels backed by a (memory-mapped) structured array."""
+
+    def __init__(self, table: np.ndarray, sample_rate: float, t0: float = 0.0,
+                 scale: Optional[Dict[str, float]] = None, source: str = ''):
+        self.table = table
+        self.sample_rate = sample_rate
+        self.t0 = t0
+        self.scale = scale or {}
+        self.source = source
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.table.dtype.names or ())
+
+    @property
+    def duration(self) -> float:
+        return len(self.table) / self.sample_rate
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Whole channel in engineering units (reads the full column)."""
+        return self.table[name] * self.scale.get(name, 1.0)
+
+    def chunks(self, names: Sequence[str],
+               size: int = CHUNK) -> Iterator[Tuple[int, List[np.ndarray]]]:
+        """Yield (first sample index, [float64 channel slices]) per chunk."""
+        for start in range(0, len(self.table), size):
+            block = self.table[start:start + size]
+            yield start, [block[n].astype(np.float64) * self.scale.get(n, 1.0)
+                          for n in names]
+
+
+# =============================================================================
+# Loading
+# =============================================================================
+
+def _csv_header(path: str) -> Tuple[Optional[List[str]], int]:
+    """Column names from a header line (if any) and the number of header bytes."""
+    with open(path, 'rb') as f:
+        first = f.readline()
+    fields = first.decode('ascii', 'replace').replace(',', ' ').split()
+    try:
+        [float(x) for x in fields]
+        return None, 0
+    except ValueError:
+        names = [n.strip().strip('"').lower().split('(')[0].strip() for n in
+                 first.decode('ascii', 'replace').split(',')]
+        return names, len(first)
+
+
+def csv_to_npy(path: str, cached: str, names: Optional[Sequence[str]] = None):
+    """
+    Convert a numeric CSV to a structured float64 `.npy`, one block at a time.
+
+    Rows are counted first (cheap: newlines only) so the output can be
+    allocated memory-mapped at its final size and filled in place.
+    """
+    header, offset = _csv_header(path)
+    names = list(names or header or [])
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        first = f.readline()
+        ncols = len(first.replace(b',', b' ').split())
+        f.seek(offset)
+        rows = 0
+        last = b'\n'
+        while True:
+            block = f.read(CSV_BLOCK)
+            if not block:
+                break
+            rows += block.count(b'\n')
+            last = block[-1:]
+        rows += last != b'\n'
+
+    if len(names) != ncols:
+        names = [f'col{i + 1}' for i in range(ncols)]
+    dtype = np.dtype([(n, np.float64) for n in names])
+    out = np.lib.format.open_memmap(cached + '.tmp', mode='w+', dtype=dtype, shape=(rows,))
+    flat = out.view(np.float64).reshape(rows, ncols)
+
+    row = 0
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        tail = b''
+        while True:
+            block = f.read(CSV_BLOCK)
+            data = tail + block
+            if block:
+                cut = data.rfind(b'\n') + 1
+                data, tail = data[:cut], data[cut:]
+            values = np.array(data.replace(b',', b' ').split(), dtype=np.float64)
+            n = len(values) // ncols
+            flat[row:row + n] = values[:n * ncols].reshape(n, ncols)
+            row += n
+            if not block:
+                break
+
+    out.flush()
+    del flat, out
+    if row != rows:
+        # Blank lines: shrink to the rows actually read
+        trimmed = np.load(cached + '.tmp', mmap_mode='r')[:row]
+        np.save(cached, trimmed)
+        os.remove(cached + '.tmp')
+    else:
+        os.replace(cached + '.tmp', cached)
+
+
+def load_capture(path: str, names: Optional[Sequence[str]] = None,
+                 dtype: Optional[str] = None, sample_rate: Optional[float] = None,
+                 scale: Optional[Dict[str, float]] = None, offset: int = 0,
+                 refresh: bool = False) -> Capture:
+    """
+    Open a capture memory-mapped.
+
+    CSV (header optional) is converted to a `.npy` cache on first use and
+    whenever the source is newer. `.npy` files are mapped as they are. Any
+    other file is raw interleaved binary: pass the channel names and the
+    sample dtype (e.g. '<i2'), plus scale factors to volts/amps.
+
+    The sample rate comes from a time column if there is one, else it must
+    be given.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.npy':
+        table = np.load(path, mmap_mode='r')
+    elif ext in ('.csv', '.txt'):
+        cached = path + CACHE_SUFFIX
+        if (refresh or not os.path.exists(cached) or
+                os.path.getmtime(cached) < os.path.getmtime(path)):
+            csv_to_npy(path, cached, names)
+        table = np.load(cached, mmap_mode='r')
+    else:
+        if not names or not dtype:
+            raise ValueError(f"{path}: raw binary needs names and dtype")
+        record = np.dtype([(n, dtype) for n in names])
+        table = np.memmap(path, dtype=record, mode='r', offset=offset)
+
+    if table.dtype.names is None:
+        table = table.view([(n, table.dtype) for n in (names or
+                            [f'col{i + 1}' for i in range(table.shape[1])])]).reshape(-1)
+
+    t0 = 0.0
+    time_name = next((n for n in table.dtype.names if n in TIME_NAMES), None)
+    if time_name is not None:
+        t = np.asarray(table[time_name][:10001], dtype=np.float64)
+        t0 = float(t[0])
+        if sample_rate is None:
+            sample_rate = 1.0 / float(np.median(np.diff(t)))
+    if sample_rate is None:
+        raise ValueError(f"{path}: no time column, sample_rate is required")
+
+    return Capture(table, sample_rate, t0, scale, path)
+
+
+# =============================================================================
+# Half-cycle summary
+# =============================================================================
+
+HALF_CYCLE_DTYPE = np.dtype([
+    ('t_start', np.float64),    # s, voltage zero crossing that opens the half-cycle
+    ('duration', np.float64),   # s
+    ('v_rms', np.float64),
+    ('i_rms', np.float64),
+    ('i_peak', np.float64),     # max |i|
+    ('p_real', np.float64),     # mean v*i
+])
+
+
+def half_cycles(capture: Capture, voltage: str = 'v', current: str = 'i',
+                frequency: float = 60.0, chunk: int = CHUNK) -> np.ndarray:
+    """
+    Reduce a capture to one row per complete voltage half-cycle.
+
+    Zero crossings are located to a fraction of a sample by linear
+    interpolation; crossings closer than 30% of a nominal half-period to the
+    previous one (noise chatter around zero) are ignored. RMS and real power
+    use sample sums between crossings from per-chunk cumulative sums; the
+    half-cycle still open at the end of a chunk is carried into the next.
+    """
+    fs = capture.sample_rate
+    min_gap = 0.3 * fs / (2 * frequency)
+
+    starts: List[np.ndarray] = []       # fractional sample index of each crossing
+    ends: List[np.ndarray] = []
+    sums: List[np.ndarray] = []         # rows of Σv², Σi², Σvi, n
+    peaks: List[np.ndarray] = []
+
+    open_start: Optional[float] = None  # crossing that opened the carried half-cycle
+    carry = np.zeros(4)
+    carry_peak = 0.0
+    last_v: Optional[float] = None
+
+    for start, (v, i) in capture.chunks([voltage, current], chunk):
+        n = len(v)
+        prev = v[0] if last_v is None else last_v
+        last_v = v[-1]
+
+        # Sample k is the first one past a sign change
+        positive = np.concatenate([[prev], v]) >= 0
+        k = np.nonzero(positive[1:] != positive[:-1])[0]
+        before = np.where(k > 0, v[np.maximum(k - 1, 0)], prev)
+        zc = start + k - 1 + before / (before - v[k])
+
+        keep = np.zeros(len(k), dtype=bool)
+        last = open_start
+        for j, z in enumerate(zc):
+            if last is None or z - last >= min_gap:
+                keep[j] = True
+                last = z
+        k, zc = k[keep], zc[keep]
+
+        acc = np.zeros((4, n + 1))
+        np.cumsum(v * v, out=acc[0, 1:])
+        np.cumsum(i * i, out=acc[1, 1:])
+        np.cumsum(v * i, out=acc[2, 1:])
+        acc[3, 1:] = np.arange(1, n + 1)
+        abs_i = np.abs(i)
+
+        if not len(k):
+            carry += acc[:, -1]
+            carry_peak = max(carry_peak, float(abs_i.max()))
+            continue
+
+        # Segments [0, k0), [k0, k1), ..., [k_last, n); the first closes the
+        # carried half-cycle, the last stays open
+        bounds = np.concatenate([[0], k, [n]])
+        seg = acc[:, bounds[1:]] - acc[:, bounds[:-1]]
+        seg[:, 0] += carry
+        seg_peak = np.full(len(bounds) - 1, -np.inf)
+        filled = bounds[1:] > bounds[:-1]
+        seg_peak[filled] = np.maximum.reduceat(abs_i, bounds[:-1][filled])
+        seg_peak[0] = max(seg_peak[0], carry_peak)
+
+        first = 0 if open_start is not None else 1
+        opened = np.concatenate([[open_start if open_start is not None else np.nan], zc])
+        starts.append(opened[first:-1])
+        ends.append(zc[first:])
+        sums.append(seg[:, first:-1])
+        peaks.append(seg_peak[first:-1])
+
+        open_start = zc[-1]
+        carry = seg[:, -1].copy()
+        carry_peak = float(seg_peak[-1])
+
+    out = np.zeros(sum(len(s) for s in starts), HALF_CYCLE_DTYPE)
+    if not len(out):
+        return out
+    t_start = np.concatenate(starts)
+    total = np.concatenate(sums, axis=1)
+    count = total[3]
+    out['t_start'] = capture.t0 + t_start / fs
+    out['duration'] = (np.concatenate(ends) - t_start) / fs
+    out['v_rms'] = np.sqrt(total[0] / count)
+    out['i_rms'] = np.sqrt(total[1] / count)
+    out['i_peak'] = np.concatenate(peaks)
+    out['p_real'] = total[2] / count
+    return out
+
+
+# =============================================================================
+# Startup event
+# =============================================================================
+
+def startup_event(cycles: np.ndarray, ac: WindowACSpec, gen: GeneratorSpec,
+                  threshold_a: Optional[float] = None,
+                  window_ms: float = 2000) -> Optional[dict]:
+    """
+    Summarize the first compressor start in a half-cycle table.
+
+    The start is the first half-cycle whose RMS current exceeds threshold_a
+    (default 2x the running current). Returns the keys calculate_power_demand()
+    returns, sampled once per half-cycle instead of every millisecond, with
+    measured voltage and power factor in place of the nominal 120 V and the
+    modelled PF; startup_time_ms is how long the current stays above 1.5x
+    running. Extra measured keys: voltages, peak_currents, durations,
+    frequencies, v_nominal, droop, droop_depth, zero_crossings, start_time_s.
+    None if no start is found.
+    """
+    threshold_a = 2 * ac.running_amps if threshold_a is None else threshold_a
+    above = np.nonzero(cycles['i_rms'] > threshold_a)[0]
+    if not len(above):
+        return None
+    first = above[0]
+
+    pre = cycles['v_rms'][:first]
+    v_nominal = float(np.median(pre)) if len(pre) else float(gen.voltage)
+
+    t_start = cycles['t_start'][first]
+    mid = cycles['t_start'] + cycles['duration'] / 2
+    event = cycles[(mid >= t_start) & (mid < t_start + window_ms / 1000)]
+    times = (event['t_start'] + event['duration'] / 2 - t_start) * 1000
+    dt_s = event['duration']
+
+    currents = event['i_rms']
+    voltages = event['v_rms']
+    apparent_powers = currents * voltages
+    real_powers = event['p_real']
+    power_factors = np.divide(real_powers, apparent_powers,
+                              out=np.zeros(len(event)), where=apparent_powers > 0)
+
+    gen_power = np.minimum(currents, gen.max_amps) * voltages * power_factors
+    current_shortfall = np.maximum(currents - gen.max_amps, 0)
+    power_shortfall = current_shortfall * voltages * power_factors
+
+    mask_500 = times < 500
+    mask_200 = times < 200
+    running = np.nonzero(currents < 1.5 * ac.running_amps)[0]
+    startup_time_ms = float(times[running[0]]) if len(running) else float(times[-1])
+    droop = v_nominal - voltages
+
+    return {
+        'times': times,
+        'currents': currents,
+        'power_factors': power_factors,
+        'apparent_powers': apparent_powers,
+        'real_powers': real_powers,
+        'gen_power': gen_power,
+        'current_shortfall': current_shortfall,
+        'power_shortfall': power_shortfall,
+        'peak_current': np.max(currents),
+        'peak_power': np.max(real_powers),
+        'peak_shortfall_current': np.max(current_shortfall),
+        'peak_shortfall_power': np.max(power_shortfall),
+        'energy_needed_500ms': np.sum((real_powers * dt_s)[mask_500]),
+        'energy_gen_500ms': np.sum((gen_power * dt_s)[mask_500]),
+        'energy_shortfall_500ms': np.sum((power_shortfall * dt_s)[mask_500]),
+        'energy_shortfall_200ms': np.sum((power_shortfall * dt_s)[mask_200]),
+        'ac': ac,
+        'gen': gen,
+        'startup_time_ms': startup_time_ms,
+        # Measured only
+        'voltages': voltages,
+        'peak_currents': event['i_peak'],
+        'durations': dt_s * 1000,
+        'frequencies': 1 / (2 * dt_s),
+        'v_nominal': v_nominal,
+        'droop': droop,
+        'droop_depth': float(np.max(droop)),
+        'zero_crossings': event['t_start'],
+        'start_time_s': float(t_start),
+    }
+
+
+def summarize_capture(path: str, ac: WindowACSpec, gen: GeneratorSpec,
+                      voltage: str = 'v', current: str = 'i', frequency: float = 60.0,
+                      **load_kwargs) -> Optional[dict]:
+    """load_capture -> half_cycles -> startup_event in one call."""
+    capture = load_capture(path, **load_kwargs)
+    return startup_event(half_cycles(capture, voltage, current, frequency), ac, gen)
+
+
+@main_stage
+def main():
+    from analyze_motor_startup import analyze_scenarios
+
+    models = {r['ac'].btu: r for r in analyze_scenarios()}
+
+    parser = argparse.ArgumentParser(description='Summarize a captured generator motor start')
+    parser.add_argument('file', help='CSV, .npy or raw binary capture')
+    parser.add_argument('--ac', type=int, default=8000, choices=sorted(models),
+                        help='Window AC size (BTU) to compare against (default: 8000)')
+    parser.add_argument('--names', nargs='+', help='Channel names (raw binary, or CSV without header)')
+    parser.add_argument('--dtype', help="Raw binary sample type, e.g. '<i2'")
+    parser.add_argument('--sample-rate', type=float, help='Samples/s (if there is no time column)')
+    parser.add_argument('--scale', nargs='+', type=float,
+                        help='Volts/amps per count for each of --names')
+    parser.add_argument('--voltage', default='v', help='Voltage channel (default: v)')
+    parser.add_argument('--current', default='i', help='Current channel (default: i)')
+    parser.add_argument('--refresh', action='store_true', help='Ignore the .npy cache')
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    scale = dict(zip(args.names, args.scale)) if args.names and args.scale else None
+    capture = load_capture(args.file, names=args.names, dtype=args.dtype,
+                           sample_rate=args.sample_rate, scale=scale, refresh=args.refresh)
+    cycles = half_cycles(capture, args.voltage, args.current)
+
+    model = models[args.ac]
+    event = startup_event(cycles, model['ac'], model['gen'])
+
+    print("=" * 70)
+    print(f"CAPTURE: {args.file}")
+    print("=" * 70)
+    print(f"{len(capture):,} samples at {capture.sample_rate / 1000:.1f} kHz "
+          f"({capture.duration:.2f} s), {len(cycles)} half-cycles")
+    if event is None:
+        print(f"No start found (I_rms never above {2 * model['ac'].running_amps:.1f} A)")
+        return 1
+
+    print(f"Start at {event['start_time_s']:.3f} s, nominal {event['v_nominal']:.1f} V RMS")
+    print(f"\n{'':<28} {'Measured':>12} {model['ac'].name + ' model':>18}")
+    print("-" * 60)
+    rows = [
+        ('Peak current (A RMS)', 'peak_current', '.1f'),
+        ('Peak power (W)', 'peak_power', '.0f'),
+        ('Peak shortfall (A)', 'peak_shortfall_current', '.1f'),
+        ('Energy needed 500ms (J)', 'energy_needed_500ms', '.0f'),
+        ('Shortfall 200ms (J)', 'energy_shortfall_200ms', '.0f'),
+        ('Shortfall 500ms (J)', 'energy_shortfall_500ms', '.0f'),
+        ('Startup time (ms)', 'startup_time_ms', '.0f'),
+    ]
+    for label, key, fmt in rows:
+        print(f"{label:<28} {event[key]:>12{fmt}} {model[key]:>18{fmt}}")
+    print(f"{'Voltage droop (V)':<28} {event['droop_depth']:>12.1f} {'-':>18}")
+    print(f"{'Peak |i| (A)':<28} {np.max(event['peak_currents']):>12.1f} "
+          f"{model['peak_current'] * np.sqrt(2):>18.1f}")
+    print(f"{'Min frequency (Hz)':<28} {np.min(event['frequencies']):>12.2f} {'-':>18}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Local capacitor catalog and catalog x topology design search.
+
+Parts (supercaps and electrolytics: C, rated V, ESR, ripple current, can
+size, price, vendor) are kept in data/capacitors.csv, which is the file to
+edit. It is loaded into an SQLite database next to it (rebuilt whenever the
+CSV is newer), with indexes on (kind, voltage), (kind, capacitance),
+(kind, price) and (kind, energy), so range queries such as "supercaps rated
+2.5-3.0 V under $3" are index scans.
+
+design_sweep() crosses every supercap/electrolytic pair the query returns
+(an SQL join) with a grid of cells per bank and builds one DesignTable over
+all of them; cheapest() filters that table by energy delivered in the window
+and electrolytic ripple limits, so "cheapest design meeting 200 J in
+200 ms across all parts" is one query plus one vectorized sweep.
+
+Usage:
+    ./catalog.py --kind supercap --voltage 2.5 3.0 --price 0 3
+    ./catalog.py --cheapest 200 --window 200
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from design_table import DesignTable
+from instrument import add_arguments, configure_from_args, main_stage, stage
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+CATALOG_CSV = os.path.join(os.path.dirname(SRC_DIR), 'data', 'capacitors.csv')
+SCHEMA_VERSION = 1
+
+ELEC_DERATING = 0.9        # Charge electrolytics to at most 90% of rating
+ELEC_CHARGE_MAX = 60.0     # ... and never above the charger's 60 V
+
+SCHEMA = """
+CREATE TABLE parts (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    mpn TEXT NOT NULL,
+    manufacturer TEXT,
+    capacitance REAL NOT NULL,
+    voltage REAL NOT NULL,
+    esr REAL,
+    ripple_current REAL,
+    diameter_mm REAL,
+    length_mm REAL,
+    price REAL NOT NULL,
+    vendor TEXT,
+    energy REAL GENERATED ALWAYS AS (0.5 * capacitance * voltage * voltage) VIRTUAL,
+    volume REAL GENERATED ALWAYS AS
+        (0.785398 * diameter_mm * diameter_mm * length_mm / 1000) VIRTUAL,
+    UNIQUE (kind, mpn, vendor)
+);
+CREATE INDEX parts_voltage ON parts (kind, voltage);
+CREATE INDEX parts_capacitance ON parts (kind, capacitance);
+CREATE INDEX parts_price ON parts (kind, price);
+CREATE INDEX parts_energy ON parts (kind, energy);
+"""
+
+# Columns that may appear in range filters (validated before reaching SQL)
+RANGE_COLUMNS = ('capacitance', 'voltage', 'esr', 'ripple_current', 'diameter_mm',
+                 'length_mm', 'price', 'energy', 'volume')
+
+Range = Tuple[Optional[float], Optional[float]]
+
+
+@dataclass
+class Part:
+    """One catalog entry (SI units; volume in cm^3, energy in J at rated V)."""
+    id: int
+    kind: str
+    mpn: str
+    manufacturer: str
+    capacitance: float
+    voltage: float
+    esr: float
+    ripple_current: float
+    diameter_mm: float
+    length_mm: float
+    price: float
+    vendor: str
+    energy: float
+    volume: float
+
+
+PART_COLUMNS = [f.name for f in fields(Part)]
+
+
+def build(db_path: str, csv_path: str = CATALOG_CSV):
+    """(Re)create the database from the CSV."""
+    with open(csv_path, newline='') as f:
+        rows = list(csv.DictReader(line for line in f if not line.startswith('#')))
+
+    tmp = db_path + '.tmp'
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    con = sqlite3.connect(tmp)
+    with con:
+        con.executescript(SCHEMA)
+        con.executemany(
+            "INSERT INTO parts (kind, mpn, manufacturer, capacitance, voltage, esr, "
+            "ripple_current, diameter_mm, length_mm, price, vendor) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(r['kind'], r['mpn'], r['manufacturer'], float(r['capacitance_f']),
+              float(r['voltage']), float(r['esr']), float(r['ripple_current']),
+              float(r['diameter_mm']), float(r['length_mm']), float(r['price']),
+              r['vendor']) for r in rows])
+        con.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    con.close()
+    os.replace(tmp, db_path)
+
+
+def _where(kind: str, ranges: Dict[str, Range], alias: str = '') -> Tuple[str, list]:
+    """SQL condition and parameters for kind plus inclusive column ranges."""
+    prefix = f'{alias}.' if alias else ''
+    clauses = [f'{prefix}kind = ?']
+    params: list = [kind]
+    for column, (lo, hi) in ranges.items():
+        if column not in RANGE_COLUMNS:
+            raise ValueError(f"cannot filter on {column!r}; use one of {RANGE_COLUMNS}")
+        if lo is not None:
+            clauses.append(f'{prefix}{column} >= ?')
+            params.append(lo)
+        if hi is not None:
+            clauses.append(f'{prefix}{column} <= ?')
+            params.append(hi)
+    return ' AND '.join(clauses), params
+
+
+class Catalog:
+    """Capacitor parts in SQLite, built from data/capacitors.csv."""
+
+    def __init__(self, csv_path: str = CATALOG_CSV, db_path: Optional[str] = None,
+                 refresh: bool = False):
+        self.csv_path = csv_path
+        self.db_path = db_path or os.path.splitext(csv_path)[0] + '.sqlite'
+        if refresh or self._stale():
+            build(self.db_path, csv_path)
+        self.con = sqlite3.connect(self.db_path)
+
+    def _stale(self) -> bool:
+        if not os.path.exists(self.db_path):
+            return True
+        if os.path.getmtime(self.db_path) < os.path.getmtime(self.csv_path):
+            return True
+        con = sqlite3.connect(self.db_path)
+        try:
+            return con.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION
+        finally:
+            con.close()
+
+    def query(self, kind: str, **ranges: Range) -> List[Part]:
+        """Parts of one kind with every given column inside its (lo, hi) range, cheapest first."""
+        where, params = _where(kind, ranges)
+        rows = self.con.execute(
+            f"SELECT {', '.join(PART_COLUMNS)} FROM parts WHERE {where} ORDER BY price",
+            params)
+        return [Part(*row) for row in rows]
+
+    def plan(self, kind: str, **ranges: Range) -> List[str]:
+        """SQLite's query plan for a range query (to check the indexes are used)."""
+        where, params = _where(kind, ranges)
+        rows = self.con.execute(f"EXPLAIN QUERY PLAN SELECT * FROM parts WHERE {where}", params)
+        return [row[-1] for row in rows]
+
+    def pairs(self, sc: Optional[Dict[str, Range]] = None,
+              elec: Optional[Dict[str, Range]] = None) -> List[Tuple[Part, Part]]:
+        """Every (supercap, electrolytic) pair passing both filters."""
+        sc_where, sc_params = _where('supercap', sc or {}, 's')
+        el_where, el_params = _where('electrolytic', elec or {}, 'e')
+        columns = ', '.join([f's.{c}' for c in PART_COLUMNS] + [f'e.{c}' for c in PART_COLUMNS])
+        rows = self.con.execute(
+            f"SELECT {columns} FROM parts s JOIN parts e "
+            f"WHERE {sc_where} AND {el_where} ORDER BY s.price, e.price",
+            sc_params + el_params)
+        n = len(PART_COLUMNS)
+        return [(Part(*row[:n]), Part(*row[n:])) for row in rows]
+
+    def design_sweep(self, sc_per_bank: Sequence[int] = range(2, 15),
+                     elec_per_bank: Sequence[int] = range(0, 25),
+                     sc: Optional[Dict[str, Range]] = None,
+                     elec: Optional[Dict[str, Range]] = None,
+                     **design) -> DesignTable:
+        """
+        DesignTable over catalog pairs x cells per bank.
+
+        Supercap-only designs (elec_per_bank 0) appear once per supercap,
+        not once per pair. Extra columns: sc_part, elec_part,
+        elec_rated_voltage (0 without electrolytics), volume_cm3.
+        design is passed on to DesignTable (e.g. max_current).
+        """
+        pairs = self.pairs(sc, elec)
+        sc_counts = np.asarray(sc_per_bank)
+        el_counts = np.asarray([n for n in elec_per_bank if n > 0])
+
+        # Hybrid rows: pair x sc count x elec count; then supercap-only rows
+        n_pair, n_sc, n_el = len(pairs), len(sc_counts), len(el_counts)
+        p_idx = np.repeat(np.arange(n_pair), n_sc * n_el)
+        s_cnt = np.tile(np.repeat(sc_counts, n_el), n_pair)
+        e_cnt = np.tile(el_counts, n_pair * n_sc)
+        sc_parts = [s for s, _ in pairs]
+        el_parts: List[Optional[Part]] = [e for _, e in pairs]
+        if 0 in list(elec_per_bank):
+            only = self.query('supercap', **(sc or {}))
+            sc_parts = sc_parts + only
+            el_parts = el_parts + [None] * len(only)
+            p_idx = np.concatenate([p_idx, np.repeat(np.arange(n_pair, n_pair + len(only)), n_sc)])
+            s_cnt = np.concatenate([s_cnt, np.tile(sc_counts, len(only))])
+            e_cnt = np.concatenate([e_cnt, np.zeros(len(only) * n_sc, dtype=int)])
+
+        def col(parts, attr, default=0.0):
+            return np.array([getattr(p, attr) if p else default for p in parts])[p_idx]
+
+        elec_rating = col(el_parts, 'voltage')
+        table = DesignTable(
+            sc_per_bank=s_cnt,
+            elec_per_bank=e_cnt,
+            sc_capacitance=col(sc_parts, 'capacitance'),
+            sc_voltage=col(sc_parts, 'voltage'),
+            sc_esr=col(sc_parts, 'esr'),
+            sc_price=col(sc_parts, 'price'),
+            elec_capacitance_uf=col(el_parts, 'capacitance') * 1e6,
+            elec_voltage=np.minimum(elec_rating * ELEC_DERATING, ELEC_CHARGE_MAX),
+            elec_price=col(el_parts, 'price'),
+            elec_ripple_current=col(el_parts, 'ripple_current', 1.0),
+            sc_part=np.asarray([p.mpn for p in sc_parts], dtype=object)[p_idx],
+            elec_part=np.asarray([p.mpn if p else '' for p in el_parts], dtype=object)[p_idx],
+            elec_rated_voltage=elec_rating,
+            volume_cm3=(2 * s_cnt * col(sc_parts, 'volume')
+                        + 2 * e_cnt * col(el_parts, 'volume')),
+            **design,
+        )
+        return table
+
+    def cheapest(self, target_energy_j: float = 200, window_ms: float = 200,
+                 max_volume_cm3: Optional[float] = None,
+                 designs: Optional[DesignTable] = None, **sweep) -> DesignTable:
+        """
+        Designs delivering target_energy_j within window_ms, cheapest first.
+
+        Filters designs (a design_sweep() table) if given, else the
+        design_sweep(**sweep) table.
+        """
+        if designs is None:
+            with stage('sweep'):
+                designs = self.design_sweep(**sweep)
+        table = designs
+        with stage('filter'):
+            ok = table.elec_current_ok
+            if max_volume_cm3 is not None:
+                ok = ok & (table.volume_cm3 <= max_volume_cm3)
+            table = table[ok]
+        with stage('evaluate'):
+            energy = table.energy_in_window(window_ms)
+        with stage('filter'):
+            meets = energy >= target_energy_j
+            table = table[meets]
+            order = np.lexsort((energy[meets], table.total_cost))
+        return table[order]
+
+
+@main_stage
+def main():
+    parser = argparse.ArgumentParser(description='Query the capacitor catalog')
+    parser.add_argument('--kind', choices=['supercap', 'electrolytic'], default='supercap')
+    for column in RANGE_COLUMNS:
+        parser.add_argument(f'--{column.replace("_", "-")}', nargs=2, type=float,
+                            metavar=('LO', 'HI'), help=f'{column} range')
+    parser.add_argument('--cheapest', type=float, metavar='J',
+                        help='Cheapest designs delivering J joules (all catalog parts)')
+    parser.add_argument('--window', type=float, default=200, help='Window for --cheapest (ms)')
+    parser.add_argument('--max-current', type=float, default=40.0, help='Injection current (A)')
+    parser.add_argument('--refresh', action='store_true', help='Rebuild the database')
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    catalog = Catalog(refresh=args.refresh)
+    ranges = {c: tuple(getattr(args, c)) for c in RANGE_COLUMNS if getattr(args, c)}
+
+    if args.cheapest:
+        import time
+        start = time.perf_counter()
+        with stage('sweep'):
+            sweep = catalog.design_sweep(max_current=args.max_current)
+        best = catalog.cheapest(args.cheapest, args.window, designs=sweep)
+        elapsed = time.perf_counter() - start
+        print("=" * 100)
+        print(f"CHEAPEST DESIGNS: {args.cheapest:.0f}J in {args.window:.0f}ms "
+              f"({len(sweep):,} catalog designs, {elapsed:.2f}s)")
+        print("=" * 100)
+        print(f"\n{'Supercap':<20} {'Electrolytic':<18} {'SC':>4} {'Elec':>5} {'V_stack':>8} "
+              f"{'Cost':>8} {'Volume':>9}")
+        print("-" * 100)
+        for row in best[:15]:
+            print(f"{row.sc_part:<20} {row.elec_part or '-':<18} {row.total_supercaps:>4} "
+                  f"{row.total_electrolytics:>5} {row.stacked_voltage:>7.1f}V "
+                  f"${row.total_cost:>7.2f} {row.volume_cm3:>6.0f}cm³")
+        return 0
+
+    parts = catalog.query(args.kind, **ranges)
+    print(f"{'MPN':<20} {'Mfr':<10} {'C':>10} {'V':>6} {'ESR':>8} {'Ripple':>7} "
+          f"{'Energy':>8} {'Price':>7} {'Vendor':<10}")
+    print("-" * 96)
+    for p in parts:
+        c = f'{p.capacitance:g}F' if p.kind == 'supercap' else f'{p.capacitance * 1e6:g}µF'
+        print(f"{p.mpn:<20} {p.manufacturer:<10} {c:>10} {p.voltage:>5.1f}V "
+              f"{p.esr * 1000:>6.0f}mΩ {p.ripple_current:>6.1f}A {p.energy:>7.1f}J "
+              f"${p.price:>6.2f} {p.vendor:<10}")
+    print(f"\n{len(parts)} parts; plan: {'; '.join(catalog.plan(args.kind, **ranges))}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
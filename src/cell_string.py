@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Per-cell voltages in series supercap strings with capacitance tolerance.
+
+DesignTable treats each bank's 30-cell string as one ideal capacitor. Real
+cells are sold at ±20%, and in series every cell carries the same current,
+so each moves by I·dt / C_i: the smallest cell reaches 2.7 V first while
+the charger is still aiming at 30 × 2.7 V for the string, and it is also
+the one driven lowest when the boost drains the bank.
+
+The state is a (strings, cells) array stepped through charge, hold and
+discharge with the string current common to every cell plus a per-cell
+balancing current:
+
+    passive   switched shunt resistor across each cell above a threshold
+              (threshold 0 models plain bleeder resistors)
+    active    charge shuttle pushing each cell toward the string mean,
+              proportional to its deviation and limited to max_current
+
+The charger supplies a constant current until the string reaches its
+target and then holds it there; with cell_limit it also throttles so no
+cell exceeds its rating, as a charger watching every cell would. Monte
+Carlo draws 10^4 strings at once and reports per-cell peak voltage and the
+energy left unused, i.e. how far the stored energy falls short of every
+cell sitting at its rating.
+"""
+
+import argparse
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import pyplot, show
+
+BALANCING = ('none', 'passive', 'active')
+
+
+@dataclass
+class CellSpec:
+    """Nominal cell and how its capacitance is spread."""
+    capacitance: float = 12.0   # Tecate 12F
+    v_rated: float = 2.7
+    v_surge: float = 2.85
+    tolerance: float = 0.2      # ±fraction
+    spread: str = 'uniform'     # 'uniform' over ±tolerance, or 'normal' with 3σ = tolerance
+
+    def draw(self, strings: int, cells: int = 30, seed: int = 0) -> np.ndarray:
+        """Cell capacitances (F), shape (strings, cells)."""
+        rng = np.random.default_rng(seed)
+        if self.spread == 'uniform':
+            delta = rng.uniform(-self.tolerance, self.tolerance, (strings, cells))
+        elif self.spread == 'normal':
+            delta = np.clip(rng.normal(0.0, self.tolerance / 3, (strings, cells)),
+                            -self.tolerance, self.tolerance)
+        else:
+            raise ValueError(f"unknown spread {self.spread!r}")
+        return self.capacitance * (1 + delta)
+
+
+@dataclass
+class Balancer:
+    """Per-cell balancing circuit."""
+    kind: str = 'none'              # One of BALANCING
+    shunt_ohms: float = 100.0       # passive: shunt resistor
+    threshold: float = 2.65         # passive: shunt switches on above this
+    gain: float = 1.0               # active: A per V of deviation from the mean
+    max_current: float = 0.2        # active: per-cell limit
+
+    def __post_init__(self):
+        if self.kind not in BALANCING:
+            raise ValueError(f"unknown balancing {self.kind!r}, expected one of {BALANCING}")
+
+    def current(self, v: np.ndarray) -> np.ndarray:
+        """Current (A) drawn out of each cell."""
+        if self.kind == 'passive':
+            return np.where(v > self.threshold, v / self.shunt_ohms, 0.0)
+        if self.kind == 'active':
+            out = np.clip(self.gain * (v - v.mean(axis=-1, keepdims=True)),
+                          -self.max_current, self.max_current)
+            # A shuttle only moves charge between cells
+            return out - out.mean(axis=-1, keepdims=True)
+        return np.zeros_like(v)
+
+    def apply(self, v: np.ndarray, dt: float, capacitance: np.ndarray):
+        """Advance v in place by dt of balancing alone."""
+        if self.kind == 'passive':
+            # Exact RC decay while the shunt is on
+            decay = self._decay(dt, capacitance)
+            np.multiply(v, np.where(v > self.threshold, decay, 1.0), out=v)
+        elif self.kind == 'active':
+            v -= self.current(v) * dt / capacitance
+
+    def _decay(self, dt: float, capacitance: np.ndarray) -> np.ndarray:
+        cached = getattr(self, '_cache', None)
+        if cached is None or cached[0] != dt or cached[1] is not capacitance:
+            self._cache = (dt, capacitance, np.exp(-dt / (self.shunt_ohms * capacitance)))
+        return self._cache[2]
+
+    def fastest(self, capacitance: np.ndarray) -> float:
+        """Shortest time constant (s) an explicit step has to resolve."""
+        if self.kind == 'active':
+            return float(capacitance.min()) / self.gain
+        return np.inf
+
+
+def simulate(capacitance: np.ndarray, balancer: Optional[Balancer] = None,
+             v_rated: float = 2.7, i_charge: float = 0.5, charge_s: float = 600.0,
+             i_discharge: float = 20.0, discharge_s: float = 0.5,
+             v_target: Optional[float] = None, cell_limit: bool = False,
+             steps: int = 400, trace: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Charge, hold and discharge every string, one row of capacitance each.
+
+    The charger runs at i_charge until the string reaches v_target
+    (default cells × v_rated), then holds it until charge_s; the boost
+    then draws i_discharge for discharge_s. Steps per phase are raised as
+    needed to resolve the balancer. Returns (strings, cells) arrays peak
+    (while charging), low (while boosting), charged (end of hold) and
+    final, per-string stored_j, unused_j (Σ ½·C·(v_rated² - V²) over the
+    cells below their rating; overcharged cells do not make up for it),
+    delivered_j, and with trace > 0
+    the cell voltages of the first trace strings over time as
+    trace_v (time, trace, cells) with trace_t.
+    """
+    balancer = balancer or Balancer()
+    cap = np.asarray(capacitance, dtype=float)
+    strings, cells = cap.shape
+    target = cells * v_rated if v_target is None else v_target
+    inv_c = 1 / cap
+    sum_inv = inv_c.sum(axis=1)
+
+    v = np.zeros_like(cap)
+    peak = np.zeros_like(cap)
+    times = [0.0]
+    traces = [v[:trace].copy()]
+
+    def run(v: np.ndarray, duration: float, n: int, string_current,
+            extreme: np.ndarray, ufunc) -> None:
+        """Step v in place through one phase; string_current(v, dt) is the common current."""
+        n = max(n, int(np.ceil(duration / (0.2 * balancer.fastest(cap)))))
+        dt = duration / n
+        step = dt * inv_c
+        for _ in range(n):
+            balancer.apply(v, dt, cap)
+            v += string_current(v, dt)[:, None] * step
+            ufunc(extreme, v, out=extreme)
+            if trace:
+                times.append(times[-1] + dt)
+                traces.append(v[:trace].copy())
+
+    def charger(v: np.ndarray, dt: float) -> np.ndarray:
+        # Constant current up to the string target, then just enough to hold it
+        i = np.clip((target - v.sum(axis=1)) / (dt * sum_inv), 0.0, i_charge)
+        if cell_limit:
+            i = np.minimum(i, np.maximum(((v_rated - v) * cap).min(axis=1) / dt, 0.0))
+        return i
+
+    run(v, charge_s, steps, charger, peak, np.maximum)
+    charged = v.copy()
+    low = v.copy()
+    stored = 0.5 * (cap * charged ** 2).sum(axis=1)
+
+    delivered = np.zeros(strings)
+
+    def boost(v: np.ndarray, dt: float) -> np.ndarray:
+        nonlocal delivered
+        delivered = delivered + v.sum(axis=1) * i_discharge * dt
+        return np.full(strings, -i_discharge)
+
+    run(v, discharge_s, max(steps // 8, 50), boost, low, np.minimum)
+
+    result = {
+        'peak': peak,
+        'low': low,
+        'charged': charged,
+        'final': v,
+        'stored_j': stored,
+        'unused_j': 0.5 * (cap * (v_rated ** 2 - np.minimum(charged, v_rated) ** 2)).sum(axis=1),
+        'delivered_j': delivered,
+    }
+    if trace:
+        result['trace_t'] = np.array(times)
+        result['trace_v'] = np.array(traces)
+    return result
+
+
+def monte_carlo(strings: int = 10_000, cells: int = 30, spec: Optional[CellSpec] = None,
+                balancers: Optional[Dict[str, Balancer]] = None, seed: int = 0,
+                **kwargs) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    The same tolerance draw through each balancer, charged to the string
+    target ('<name>') and with a per-cell limited charger ('<name> limited').
+    kwargs go to simulate().
+    """
+    spec = spec or CellSpec()
+    cap = spec.draw(strings, cells, seed)
+    balancers = balancers or {kind: Balancer(kind) for kind in BALANCING}
+    out = {}
+    for name, balancer in balancers.items():
+        out[name] = simulate(cap, balancer, spec.v_rated, **kwargs)
+        out[f'{name} limited'] = simulate(cap, balancer, spec.v_rated, cell_limit=True,
+                                          **kwargs)
+    return out
+
+
+# =============================================================================
+# Report
+# =============================================================================
+
+def print_monte_carlo(results: Dict[str, Dict[str, np.ndarray]], spec: CellSpec):
+    """Peak cell voltage and unused energy per balancing scheme."""
+    first = next(iter(results.values()))
+    strings, cells = first['peak'].shape
+    print("\n" + "=" * 92)
+    print(f"PER-CELL STRING MONTE CARLO: {strings} strings of {cells} × "
+          f"{spec.capacitance:g}F, ±{spec.tolerance * 100:.0f}% {spec.spread}")
+    print("=" * 92)
+    print(f"{'Charger / balancing':<22} {'Peak cell V':>24} {'>rated':>8} {'>surge':>8} "
+          f"{'Low V':>7} {'Unused J':>16}")
+    print(f"{'':<22} {'median':>7} {'p99':>7} {'max':>8} {'strings':>8} {'strings':>8} "
+          f"{'min':>7} {'mean':>7} {'p99':>8}")
+    print("-" * 92)
+    for name, r in results.items():
+        top = r['peak'].max(axis=1)
+        print(f"{name:<22} {np.median(top):>7.3f} {np.percentile(top, 99):>7.3f} "
+              f"{top.max():>8.3f} {(top > spec.v_rated + 1e-6).mean() * 100:>7.1f}% "
+              f"{(top > spec.v_surge).mean() * 100:>7.1f}% {r['low'].min():>7.3f} "
+              f"{r['unused_j'].mean():>7.1f} {np.percentile(r['unused_j'], 99):>8.1f}")
+
+
+def plot_string(result: Dict[str, np.ndarray], spec: CellSpec, save_path: Optional[str] = None):
+    """Cell voltages of one traced string, and peak voltage against capacitance."""
+    plt = pyplot()
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(13, 5))
+
+    t = result['trace_t']
+    ax1.plot(t, result['trace_v'][:, 0, :], linewidth=0.8)
+    ax1.axhline(spec.v_rated, color='red', linestyle='--', alpha=0.6, label='Rated')
+    ax1.axhline(spec.v_surge, color='red', linestyle=':', alpha=0.6, label='Surge')
+    ax1.set_xlabel('Time (s)')
+    ax1.set_ylabel('Cell voltage (V)')
+    ax1.set_title('One string: charge, hold, boost (each line a cell)')
+    ax1.legend(fontsize=8)
+    ax1.grid(True, alpha=0.3)
+
+    cap = result['capacitance']
+    ax2.scatter(cap.ravel()[:20000], result['peak'].ravel()[:20000], s=2, alpha=0.3)
+    ax2.axhline(spec.v_rated, color='red', linestyle='--', alpha=0.6)
+    ax2.set_xlabel('Cell capacitance (F)')
+    ax2.set_ylabel('Peak cell voltage (V)')
+    ax2.set_title('Small cells take the overvoltage')
+    ax2.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+
+    if save_path:
+        plt.savefig(save_path, dpi=150, bbox_inches='tight')
+        print(f"Saved: {save_path}")
+
+    return fig
+
+
+@main_stage
+def main(plot=True):
+    spec = CellSpec()
+    results = monte_carlo(spec=spec)
+    print_monte_carlo(results, spec)
+
+    if plot:
+        cap = spec.draw(200, seed=1)
+        result = simulate(cap, Balancer('passive'), spec.v_rated, trace=1)
+        result['capacitance'] = cap
+        plot_string(result, spec, save_path='cell_string.png')
+        show()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
+    main()
@@ -6,23 +6,16 @@ This script reconciles the energy-based and current-based analyses
 to give a definitive answer on design adequacy.
 """
 
+import argparse
+
 import numpy as np
-import matplotlib.pyplot as plt
 from dataclasses import dataclass
 from typing import List
 
-
-@dataclass
-class DesignConfig:
-    """Our hybrid boost design configuration."""
-    name: str
-    supercaps: int
-    electrolytics: int
-    cost: float
-    energy_200ms: float  # Joules delivered in first 200ms
-    peak_power: float    # Watts
-    stacked_voltage: float
-    coverage: float      # Fraction of AC cycle
+from design_table import DesignRow, DesignTable
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import pyplot, show
+from results import record
 
 
 @dataclass
@@ -37,7 +30,7 @@ class LoadScenario:
     power_factor_locked: float = 0.35
 
 
-def analyze_startup_success(config: DesignConfig, load: LoadScenario,
+def analyze_startup_success(config: DesignRow, load: LoadScenario,
                             generator_max_current: float = 8.3) -> dict:
     """
     Analyze whether the configuration can successfully start the load.
@@ -118,17 +111,26 @@ def analyze_startup_success(config: DesignConfig, load: LoadScenario,
     }
 
 
-def main():
-    # Define our design options
-    designs = [
-        DesignConfig("Budget (18SC+40E)", 18, 40, 199, 162, 950, 81.0, 0.32),
-        DesignConfig("Recommended (16SC+56E)", 16, 56, 224, 206, 1000, 81.6, 0.32),
-        DesignConfig("Maximum (20SC+56E)", 20, 56, 248, 235, 1050, 84.0, 0.33),
-        DesignConfig("Extended (20SC+80E)", 20, 80, 302, 280, 1100, 84.0, 0.33),
-    ]
-
-    # Define load scenarios
-    loads = [
+def design_options() -> DesignTable:
+    """The four hybrid designs compared in this analysis."""
+    # Cost, energy in the first 200ms, peak power, stacked voltage and
+    # coverage are the results of the earlier hybrid analyses
+    return DesignTable(
+        ["Budget (18SC+40E)", "Recommended (16SC+56E)",
+         "Maximum (20SC+56E)", "Extended (20SC+80E)"],
+        sc_per_bank=[9, 8, 10, 10],
+        elec_per_bank=[20, 28, 28, 40],
+        total_cost=[199, 224, 248, 302],
+        energy_200ms=[162, 206, 235, 280],
+        peak_power=[950, 1000, 1050, 1100],
+        stacked_voltage=[81.0, 81.6, 84.0, 84.0],
+        coverage=[0.32, 0.32, 0.33, 0.33],
+    )
+
+
+def load_scenarios() -> List[LoadScenario]:
+    """Window AC sizes from 5000 to 12000 BTU."""
+    return [
         LoadScenario("5000 BTU", 5000, 450, 3.8, 21),
         LoadScenario("6000 BTU", 6000, 540, 4.5, 25),
         LoadScenario("8000 BTU", 8000, 720, 6.0, 33),
@@ -136,17 +138,87 @@ def main():
         LoadScenario("12000 BTU", 12000, 1080, 9.0, 50),
     ]
 
-    print("=" * 100)
-    print("COMPREHENSIVE STARTUP ANALYSIS")
-    print("Can our hybrid boost + Honda EU1000i start these window AC units?")
-    print("=" * 100)
 
-    # Create result matrix
+def startup_matrix(designs: DesignTable, loads: List[LoadScenario]) -> dict:
+    """analyze_startup_success for every design/load pair, keyed by name."""
     results = {}
     for design in designs:
         results[design.name] = {}
         for load in loads:
             results[design.name][load.name] = analyze_startup_success(design, load)
+    return results
+
+
+def plot_summary(designs: DesignTable, loads: List[LoadScenario], results: dict,
+                 save_path=None):
+    """Plot energy and zero-crossing current margins for every design/load."""
+    plt = pyplot()
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+    fig.suptitle('Startup Capability Analysis', fontsize=14, fontweight='bold')
+
+    # Plot 1: Energy margin by design and load
+    ax1 = axes[0]
+    x = np.arange(len(loads))
+    width = 0.2
+    colors = ['#3498db', '#2ecc71', '#e74c3c', '#9b59b6']
+
+    for i, design in enumerate(designs):
+        margins = [results[design.name][load.name]['energy_margin'] for load in loads]
+        ax1.bar(x + i*width, margins, width, label=design.name, color=colors[i])
+
+    ax1.axhline(y=0, color='black', linestyle='-', linewidth=1)
+    ax1.set_xlabel('AC Unit Size')
+    ax1.set_ylabel('Energy Margin (J)')
+    ax1.set_title('Energy Margin by Configuration')
+    ax1.set_xticks(x + 1.5*width)
+    ax1.set_xticklabels([l.name for l in loads], rotation=45, ha='right')
+    ax1.legend(loc='upper right', fontsize=8)
+    ax1.grid(True, alpha=0.3, axis='y')
+
+    # Plot 2: Current margin at zero-crossing
+    ax2 = axes[1]
+    for i, design in enumerate(designs):
+        margins = [results[design.name][load.name]['current_margin_at_zc'] for load in loads]
+        ax2.bar(x + i*width, margins, width, label=design.name, color=colors[i])
+
+    ax2.axhline(y=0, color='black', linestyle='-', linewidth=1)
+    ax2.axhline(y=-5, color='red', linestyle='--', linewidth=1, label='Failure threshold')
+    ax2.set_xlabel('AC Unit Size')
+    ax2.set_ylabel('Current Margin at Zero-Crossing (A)')
+    ax2.set_title('Current Capability at Critical Moment')
+    ax2.set_xticks(x + 1.5*width)
+    ax2.set_xticklabels([l.name for l in loads], rotation=45, ha='right')
+    ax2.legend(loc='upper right', fontsize=8)
+    ax2.grid(True, alpha=0.3, axis='y')
+
+    plt.tight_layout()
+
+    if save_path:
+        plt.savefig(save_path, dpi=150, bbox_inches='tight')
+        print(f"\nSaved: {save_path}")
+
+    return fig
+
+
+@main_stage
+def main(plot=True):
+    designs = design_options()
+    loads = load_scenarios()
+
+    print("=" * 100)
+    print("COMPREHENSIVE STARTUP ANALYSIS")
+    print("Can our hybrid boost + Honda EU1000i start these window AC units?")
+    print("=" * 100)
+
+    # Create result matrix
+    results = startup_matrix(designs, loads)
+    metrics = {'energy_200ms_j': designs.energy_200ms}
+    for load in loads:
+        rows = [results[d.name][load.name] for d in designs]
+        metrics[f'energy_margin_j[{load.name}]'] = [r['energy_margin'] for r in rows]
+        metrics[f'current_margin_a[{load.name}]'] = [r['current_margin_at_zc'] for r in rows]
+        metrics[f'can_start[{load.name}]'] = [r['can_start'] for r in rows]
+    record('comprehensive', designs, **metrics)
 
     # Print matrix
     print(f"\n{'Design':<25}", end="")
@@ -176,7 +248,7 @@ def main():
     r = results["Recommended (16SC+56E)"]["8000 BTU"]
 
     print(f"\nConfiguration: {r['config'].name}")
-    print(f"  Cost: ${r['config'].cost}")
+    print(f"  Cost: ${r['config'].total_cost}")
     print(f"  Energy capacity: {r['config'].energy_200ms}J in 200ms")
     print(f"  Stacked voltage: {r['config'].stacked_voltage}V")
 
@@ -237,49 +309,13 @@ Target Application: 8000 BTU window AC with Honda EU1000i generator
 Recommended Design: 16SC + 56E ($224) with 19% energy margin
 """)
 
-    # Plot summary
-    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
-    fig.suptitle('Startup Capability Analysis', fontsize=14, fontweight='bold')
-
-    # Plot 1: Energy margin by design and load
-    ax1 = axes[0]
-    x = np.arange(len(loads))
-    width = 0.2
-    colors = ['#3498db', '#2ecc71', '#e74c3c', '#9b59b6']
-
-    for i, design in enumerate(designs):
-        margins = [results[design.name][load.name]['energy_margin'] for load in loads]
-        ax1.bar(x + i*width, margins, width, label=design.name, color=colors[i])
-
-    ax1.axhline(y=0, color='black', linestyle='-', linewidth=1)
-    ax1.set_xlabel('AC Unit Size')
-    ax1.set_ylabel('Energy Margin (J)')
-    ax1.set_title('Energy Margin by Configuration')
-    ax1.set_xticks(x + 1.5*width)
-    ax1.set_xticklabels([l.name for l in loads], rotation=45, ha='right')
-    ax1.legend(loc='upper right', fontsize=8)
-    ax1.grid(True, alpha=0.3, axis='y')
-
-    # Plot 2: Current margin at zero-crossing
-    ax2 = axes[1]
-    for i, design in enumerate(designs):
-        margins = [results[design.name][load.name]['current_margin_at_zc'] for load in loads]
-        ax2.bar(x + i*width, margins, width, label=design.name, color=colors[i])
-
-    ax2.axhline(y=0, color='black', linestyle='-', linewidth=1)
-    ax2.axhline(y=-5, color='red', linestyle='--', linewidth=1, label='Failure threshold')
-    ax2.set_xlabel('AC Unit Size')
-    ax2.set_ylabel('Current Margin at Zero-Crossing (A)')
-    ax2.set_title('Current Capability at Critical Moment')
-    ax2.set_xticks(x + 1.5*width)
-    ax2.set_xticklabels([l.name for l in loads], rotation=45, ha='right')
-    ax2.legend(loc='upper right', fontsize=8)
-    ax2.grid(True, alpha=0.3, axis='y')
-
-    plt.tight_layout()
-    plt.savefig('comprehensive_analysis.png', dpi=150, bbox_inches='tight')
-    print("\nSaved: comprehensive_analysis.png")
+    if plot:
+        plot_summary(designs, loads, results, save_path='comprehensive_analysis.png')
+        show()
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
     main()
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Bank state of charge over hours of thermostat cycling.
+
+The firmware only boosts from STATE_READY, which it enters once both banks
+are above 75 V. After every boost it sits in STATE_COOLDOWN for 1 s, then
+recharges through the current-limiting resistors in STATE_CHARGING; if the
+banks are not back above 75 V within CHARGE_TIMEOUT_MS it latches
+FAULT_TIMEOUT and never assists again. A compressor that restarts during
+cooldown or recharge (short-cycling, or a failed start being retried) gets
+no assist at all.
+
+Each schedule is a row of start times; the simulation steps through the
+k-th start of every row at once, so thousands of schedules (or one
+schedule against many bank and resistor choices) run as a handful of
+vectorized passes. Each bank charges from its own half-cycles through
+R_charge, so with u = V / V_peak and α = arcsin(u) the average current is
+
+    I(u) = V_peak / R · g(u),   g(u) = (2·cos α - u·(π - 2α)) / 2π
+
+and the charge time between two voltages is R·C·(Φ(u1) - Φ(u0)) with
+Φ = ∫ du / g, tabulated once. That gives the voltage at any later start,
+the time to READY and whether the timeout fires without stepping through
+the gaps. The charger holds the bank at v_full. Each assisted start draws
+assist_w·boost_s (split between the two banks), limited to what is left
+above SC_FLOOR.
+"""
+
+import argparse
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from design_table import SC_FLOOR, DesignTable
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import pyplot, show
+from results import record
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+# Firmware timing (firmware/include/softstart.h, main.c)
+COOLDOWN_S = 1.0
+CHARGE_TIMEOUT_S = 120.0
+BOOST_MAX_S = 0.5
+READY_FRACTION = 75.0 / 81.0    # READY above 75 V on a 30 x 2.7 V bank
+
+
+@dataclass
+class Bank:
+    """One bank (the two are symmetric) and its charge path; fields broadcast."""
+    capacitance: ArrayLike = 0.4      # F (30S of 12F)
+    v_full: ArrayLike = 81.0          # V the charger settles at
+    charge_ohms: ArrayLike = 100.0    # Current-limiting resistor
+    v_peak: ArrayLike = 170.0         # AC peak the bank charges from
+    assist_w: ArrayLike = 500.0       # Total assist power while boosting (both banks)
+
+    @classmethod
+    def from_design(cls, table, charge_ohms: ArrayLike = 100.0,
+                    assist_w: ArrayLike = 500.0) -> 'Bank':
+        """Supercap banks of every design in a DesignTable."""
+        return cls(table.sc_bank_capacitance, table.sc_bank_voltage, charge_ohms,
+                   table.v_ac_peak, assist_w)
+
+    def arrays(self, rows: int) -> Dict[str, np.ndarray]:
+        """Fields broadcast to one value per schedule row."""
+        return {k: np.broadcast_to(np.asarray(v, dtype=float), (rows,)).copy()
+                for k, v in vars(self).items()}
+
+
+def thermostat_schedules(count: int, hours: float = 8.0,
+                         on_s: Tuple[float, float] = (300, 1200),
+                         off_s: Tuple[float, float] = (180, 900),
+                         short_fraction: float = 0.1,
+                         short_on_s: Tuple[float, float] = (2, 60),
+                         short_off_s: Tuple[float, float] = (1, 30),
+                         failed_fraction: float = 0.05, retry_s: float = 45.0,
+                         start_s: float = 0.3, first_s: Tuple[float, float] = (5, 120),
+                         seed: int = 0
+                         ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Random thermostat schedules, one per row.
+
+    Compressor on and off times are uniform in on_s/off_s; a short_fraction
+    of cycles are short-cycles (a thermostat chattering near its setpoint)
+    with times drawn from short_on_s/short_off_s instead. A failed
+    start boosts for the full BOOST_MAX_S and is retried retry_s later.
+    Returns (starts, boost durations), both (count, n) in seconds, padded
+    with inf past the horizon. The first start comes first_s after
+    power-up (the thermostat is usually already calling when the generator
+    comes up).
+    """
+    rng = np.random.default_rng(seed)
+    horizon = hours * 3600
+    mean = ((1 - short_fraction) * (sum(on_s) + sum(off_s))
+            + short_fraction * (sum(short_on_s) + sum(short_off_s))) / 2
+    cycles = int(1.5 * horizon / mean) + 16
+    on, off = np.empty((count, 0)), np.empty((count, 0))
+    failed = np.empty((count, 0), dtype=bool)
+    lead = rng.uniform(*first_s, (count, 1))
+    # Draw cycles in blocks until every row runs past the horizon
+    while not on.size or (lead[:, 0] + (on + off + failed * retry_s).sum(axis=1)).min() < horizon:
+        short = rng.random((count, cycles)) < short_fraction
+        off = np.hstack([off, np.where(short, rng.uniform(*short_off_s, (count, cycles)),
+                                       rng.uniform(*off_s, (count, cycles)))])
+        on = np.hstack([on, np.where(short, rng.uniform(*short_on_s, (count, cycles)),
+                                     rng.uniform(*on_s, (count, cycles)))])
+        failed = np.hstack([failed, rng.random((count, cycles)) < failed_fraction])
+    cycles = on.shape[1]
+
+    # Cycle k: optional failed attempt, retry, run, then off
+    length = off + failed * retry_s + on
+    first = np.cumsum(np.concatenate([lead, length[:, :-1]], axis=1), axis=1)
+    starts = np.concatenate([np.where(failed, first, np.inf), first + failed * retry_s],
+                            axis=1)
+    durations = np.concatenate([np.full((count, cycles), BOOST_MAX_S),
+                                np.full((count, cycles), start_s)], axis=1)
+
+    order = np.argsort(starts, axis=1)
+    starts = np.take_along_axis(starts, order, axis=1)
+    durations = np.take_along_axis(durations, order, axis=1)
+    starts[starts > horizon] = np.inf
+    keep = np.isfinite(starts).any(axis=0)
+    return starts[:, keep], durations[:, keep]
+
+
+def _charge_table(points: int = 4096) -> Tuple[np.ndarray, np.ndarray]:
+    """Φ(u) = ∫ du / g(u) on u = V / V_peak in [0, 1)."""
+    u = np.linspace(0.0, 1.0, points, endpoint=False)
+    alpha = np.arcsin(u)
+    g = (2 * np.cos(alpha) - u * (np.pi - 2 * alpha)) / (2 * np.pi)
+    return u, np.concatenate([[0.0], np.cumsum(np.diff(u) * (1 / g[1:] + 1 / g[:-1]) / 2)])
+
+
+_U, _PHI = _charge_table()
+
+
+def charge_time(v0: ArrayLike, v1: ArrayLike, bank: Dict[str, np.ndarray]) -> np.ndarray:
+    """Seconds to charge from v0 to v1 (0 if already there)."""
+    rc = bank['charge_ohms'] * bank['capacitance']
+    phi0 = np.interp(np.asarray(v0) / bank['v_peak'], _U, _PHI)
+    phi1 = np.interp(np.asarray(v1) / bank['v_peak'], _U, _PHI)
+    return rc * np.maximum(phi1 - phi0, 0.0)
+
+
+def charged_voltage(v0: ArrayLike, seconds: ArrayLike, bank: Dict[str, np.ndarray]) -> np.ndarray:
+    """Bank voltage after charging from v0 for the given time."""
+    rc = bank['charge_ohms'] * bank['capacitance']
+    phi = np.interp(np.asarray(v0) / bank['v_peak'], _U, _PHI) + np.maximum(seconds, 0.0) / rc
+    return np.minimum(np.interp(phi, _PHI, _U) * bank['v_peak'], bank['v_full'])
+
+
+def simulate(starts: np.ndarray, durations: ArrayLike, bank: Optional[Bank] = None,
+             v_initial: Optional[ArrayLike] = None) -> Dict[str, np.ndarray]:
+    """
+    Replay every schedule row through the firmware's charge/boost cycle.
+
+    starts is (rows, n) in seconds (inf marks padding); durations
+    broadcasts against it. v_initial is the bank voltage at t = 0, when the
+    firmware enters STATE_CHARGING (default: already full, 0 for a cold
+    power-up). Returns per-row arrays:
+
+        starts, assisted, energy_limited   start counts
+        assisted_fraction
+        fault_time         inf unless FAULT_TIMEOUT latched
+        recharge_mean/max  s from boost end to READY (cooldown included)
+        min_soc            lowest stored-energy fraction left after a boost
+                           (recharge and min_soc are NaN with no assisted start)
+        ready_at_first     whether the first start found the banks READY
+    """
+    starts = np.atleast_2d(np.asarray(starts, dtype=float))
+    durations = np.broadcast_to(np.asarray(durations, dtype=float), starts.shape)
+    rows = len(starts)
+    b = (bank or Bank()).arrays(rows)
+    cap, v_full = b['capacitance'], b['v_full']
+    v_ready = READY_FRACTION * v_full
+    v_floor = SC_FLOOR * v_full
+
+    # Charging state: entered at t_entry with the bank at v_entry
+    t_entry = np.zeros(rows)
+    v_entry = v_full.copy() if v_initial is None else np.broadcast_to(
+        np.asarray(v_initial, dtype=float), (rows,)).copy()
+    fault_time = np.where(charge_time(v_entry, v_ready, b) > CHARGE_TIMEOUT_S,
+                          CHARGE_TIMEOUT_S, np.inf)
+
+    assisted = np.zeros(rows, dtype=int)
+    limited = np.zeros(rows, dtype=int)
+    recharge_sum = np.zeros(rows)
+    recharge_max = np.full(rows, np.nan)
+    min_soc = np.full(rows, np.nan)
+    ready_first = np.zeros(rows, dtype=bool)
+
+    for k in range(starts.shape[1]):
+        t = starts[:, k]
+        valid = np.isfinite(t)
+        elapsed = t - t_entry
+        v = charged_voltage(v_entry, elapsed, b)
+        ready = (elapsed >= charge_time(v_entry, v_ready, b)) & (elapsed >= 0)
+        go = valid & ready & (t < fault_time)
+        if k == 0:
+            ready_first = go
+
+        # Boost: draw the demand from each bank, down to the floor at most
+        demand = b['assist_w'] / 2 * durations[:, k]
+        usable = 0.5 * cap * (v ** 2 - v_floor ** 2)
+        drawn = np.minimum(demand, usable)
+        v_after = np.sqrt(np.maximum(v ** 2 - 2 * drawn / cap, 0.0))
+
+        to_ready = charge_time(v_after, v_ready, b)
+        recharge = COOLDOWN_S + to_ready
+        t_entry = np.where(go, t + durations[:, k] + COOLDOWN_S, t_entry)
+        v_entry = np.where(go, v_after, v_entry)
+        fault_time = np.where(go & (to_ready > CHARGE_TIMEOUT_S),
+                              t_entry + CHARGE_TIMEOUT_S, fault_time)
+
+        assisted += go
+        limited += go & (demand > usable)
+        recharge_sum += np.where(go, recharge, 0.0)
+        recharge_max = np.where(go, np.fmax(recharge_max, recharge), recharge_max)
+        min_soc = np.where(go, np.fmin(min_soc, (v_after / v_full) ** 2), min_soc)
+
+    total = np.isfinite(starts).sum(axis=1)
+    return {
+        'starts': total,
+        'assisted': assisted,
+        'assisted_fraction': assisted / np.maximum(total, 1),
+        'energy_limited': limited,
+        'fault_time': fault_time,
+        'recharge_mean': np.where(assisted > 0, recharge_sum / np.maximum(assisted, 1), np.nan),
+        'recharge_max': recharge_max,
+        'min_soc': min_soc,
+        'ready_at_first': ready_first,
+    }
+
+
+def sweep(starts: np.ndarray, durations: np.ndarray, v_initial: Optional[float] = None,
+          **axes: ArrayLike) -> Dict[str, np.ndarray]:
+    """
+    Every schedule against every combination of Bank fields in axes.
+
+    Returns simulate()'s arrays reshaped to (*axis lengths, schedules),
+    plus the grid itself under each axis name.
+    """
+    names = list(axes)
+    grid = np.meshgrid(*[np.atleast_1d(np.asarray(axes[n], dtype=float)) for n in names],
+                       indexing='ij')
+    shape = grid[0].shape if grid else ()
+    n = len(starts)
+    combos = int(np.prod(shape))
+    bank = Bank(**{name: np.repeat(g.ravel(), n) for name, g in zip(names, grid)})
+    result = simulate(np.tile(starts, (combos, 1)), np.tile(durations, (combos, 1)), bank,
+                      None if v_initial is None else v_initial * np.ones(combos * n))
+    out = {k: v.reshape(shape + (n,)) for k, v in result.items()}
+    out.update({name: g for name, g in zip(names, grid)})
+    return out
+
+
+# =============================================================================
+# Report
+# =============================================================================
+
+# Bank options: (label, per-bank capacitance F) at 30 x 2.7 V
+BANKS = [('30x 12F', 0.4), ('30x 25F', 25 / 30), ('30x 50F', 50 / 30), ('30x 100F', 100 / 30)]
+CHARGE_OHMS = [22, 47, 100, 220]
+
+
+def sweep_metrics(result: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Per bank and charge resistor (flattened, bank outermost) statistics over
+    all schedules; recharge and SoC are NaN where no start was assisted.
+    """
+    frac = result['assisted_fraction']
+    boosted = result['assisted'] > 0
+    recharge = np.where(boosted, result['recharge_mean'], 0.0).sum(axis=-1)
+    metrics = {
+        'charge_ohms': result['charge_ohms'],
+        'assisted_fraction': frac.mean(axis=-1),
+        'assisted_p1': np.percentile(frac, 1, axis=-1),
+        'recharge_mean_s': np.where(boosted.any(axis=-1),
+                                    recharge / np.maximum(boosted.sum(axis=-1), 1), np.nan),
+        'recharge_max_s': np.fmax.reduce(result['recharge_max'], axis=-1),
+        'min_soc': np.fmin.reduce(result['min_soc'], axis=-1),
+        'fault_fraction': np.isfinite(result['fault_time']).mean(axis=-1),
+    }
+    return {k: np.ravel(v) for k, v in metrics.items()}
+
+
+def bank_table(labels: Sequence[str], capacitance: Sequence[float],
+               charge_ohms: Sequence[float]) -> DesignTable:
+    """The swept banks (30 cells per bank) as designs, in sweep_metrics() order."""
+    names = [f'{label}, {ohms:g} ohm' for label in labels for ohms in charge_ohms]
+    cells = np.repeat(np.asarray(capacitance) * 30, len(charge_ohms))
+    return DesignTable(names, sc_per_bank=30, sc_capacitance=cells)
+
+
+def print_sweep(result: Dict[str, np.ndarray], labels: Sequence[str]):
+    """Assist statistics per bank and charge resistor, over all schedules."""
+    count = result['starts'].shape[-1]
+    print("\n" + "=" * 90)
+    print(f"THERMOSTAT CYCLING: {count} schedules, "
+          f"{result['starts'].mean():.0f} starts each on average, from a cold power-up")
+    print("=" * 90)
+    print(f"{'Bank':<10} {'R_chg':>6} {'Boot':>7} {'Assisted':>9} {'Worst':>7} "
+          f"{'1st ok':>7} {'Recharge':>9} {'Max':>7} {'Min SoC':>8} {'Faults':>7}")
+    print(f"{'':<10} {'(ohm)':>6} {'(s)':>7} {'(mean)':>9} {'(p1)':>7} "
+          f"{'':>7} {'(mean s)':>9} {'(s)':>7} {'':>8} {'':>7}")
+    print("-" * 90)
+    for i, label in enumerate(labels):
+        for j, ohms in enumerate(result['charge_ohms'][i]):
+            frac = result['assisted_fraction'][i, j]
+            bank = Bank(result['capacitance'][i, j], charge_ohms=ohms).arrays(1)
+            boot = charge_time(0.0, READY_FRACTION * bank['v_full'], bank)[0]
+            faults = np.isfinite(result['fault_time'][i, j]).mean()
+            boot_text = f"{boot:>7.0f}" if boot <= CHARGE_TIMEOUT_S else f"{'FAULT':>7}"
+            # Recharge and SoC only exist for schedules with an assisted start
+            boosted = result['assisted'][i, j] > 0
+            if boosted.any():
+                recharge = (f"{result['recharge_mean'][i, j][boosted].mean():>9.1f} "
+                            f"{result['recharge_max'][i, j][boosted].max():>7.1f} "
+                            f"{result['min_soc'][i, j][boosted].min() * 100:>7.0f}%")
+            else:
+                recharge = f"{'-':>9} {'-':>7} {'-':>8}"
+            print(f"{label:<10} {ohms:>6.0f} {boot_text} {frac.mean() * 100:>8.1f}% "
+                  f"{np.percentile(frac, 1) * 100:>6.0f}% "
+                  f"{result['ready_at_first'][i, j].mean() * 100:>6.0f}% "
+                  f"{recharge} {faults * 100:>6.1f}%")
+
+
+def plot_sweep(result: Dict[str, np.ndarray], labels: Sequence[str],
+               save_path: Optional[str] = None):
+    """Assisted fraction and recharge time against charge resistor, per bank."""
+    plt = pyplot()
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
+
+    for i, label in enumerate(labels):
+        ohms = result['charge_ohms'][i]
+        ax1.plot(ohms, result['assisted_fraction'][i].mean(axis=-1) * 100, '-o',
+                 linewidth=2, markersize=5, label=label)
+        ax2.plot(ohms, np.fmax.reduce(result['recharge_max'][i], axis=-1), '-o',
+                 linewidth=2, markersize=5, label=label)
+
+    ax1.set_xscale('log')
+    ax1.set_xlabel('Charge resistor per bank (Ω)')
+    ax1.set_ylabel('Starts assisted (%)')
+    ax1.set_title('Assisted starts (mean over schedules)')
+    ax1.legend(fontsize=8)
+    ax1.grid(True, alpha=0.3)
+
+    ax2.set_xscale('log')
+    ax2.set_yscale('log')
+    ax2.axhline(CHARGE_TIMEOUT_S, color='red', linestyle='--', alpha=0.5,
+                label='CHARGE_TIMEOUT_MS')
+    ax2.set_xlabel('Charge resistor per bank (Ω)')
+    ax2.set_ylabel('Boost end to READY (s)')
+    ax2.set_title('Worst recharge time')
+    ax2.legend(fontsize=8)
+    ax2.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+
+    if save_path:
+        plt.savefig(save_path, dpi=150, bbox_inches='tight')
+        print(f"Saved: {save_path}")
+
+    return fig
+
+
+@main_stage
+def main(plot=True):
+    starts, durations = thermostat_schedules(2000)
+    labels = [label for label, _ in BANKS]
+    result = sweep(starts, durations, v_initial=0.0, capacitance=[c for _, c in BANKS],
+                   charge_ohms=CHARGE_OHMS)
+    print_sweep(result, labels)
+    record('cycling', bank_table(labels, [c for _, c in BANKS], CHARGE_OHMS),
+           dict(schedules=len(starts), v_initial=0.0), **sweep_metrics(result))
+
+    if plot:
+        plot_sweep(result, labels, save_path='thermostat_cycling.png')
+        show()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
+    main()
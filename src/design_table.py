@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Columnar table of supercap/electrolytic boost designs.
+
+Holds N designs as NumPy columns: the inputs (cells per bank, component
+specs, injection current) and every derived quantity the analysis scripts
+use (bank voltage, capacitance and ESR, stacked voltage, AC coverage, costs,
+boost duration). Derived columns are computed once when the table is built,
+so sweeps over many candidates never walk a chain of properties per access
+and never create a Python object per design.
+
+Indexing with an integer gives a lightweight row view that reads like the
+old per-script dataclasses (`row.sc_bank_voltage`); indexing with a slice,
+mask or index array gives a sub-table.
+
+Conventions: counts are per bank (two banks, one per half-cycle), voltages
+in volts, capacitance in farads, ESR in ohms, costs in USD. Coverage assumes
+a sine line unless the table is given a Waveform (see waveform.py), in which
+case v_ac_peak is the nominal peak √2·V_rms of that waveform.
+"""
+
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from waveform import Waveform
+
+ArrayLike = Union[float, int, Sequence[float], np.ndarray]
+
+# Input columns and their defaults (100F/2.7V cells, 4700uF/60V electrolytics,
+# supercaps discharged to half voltage)
+INPUTS: Dict[str, float] = {
+    "sc_per_bank": 0,
+    "sc_parallel": 1,
+    "elec_per_bank": 0,
+    "sc_capacitance": 100.0,
+    "sc_voltage": 2.7,
+    "sc_esr": 0.0,
+    "sc_price": 6.0,
+    "elec_capacitance_uf": 4700.0,
+    "elec_voltage": 60.0,
+    "elec_price": 2.28,
+    "elec_ripple_current": 3.0,
+    "max_current": 40.0,
+    "v_ac_peak": 170.0,
+    "fixed_cost": 0.0,
+    "sc_floor": 0.5,
+}
+
+COUNTS = ("sc_per_bank", "sc_parallel", "elec_per_bank")
+
+SC_FLOOR = INPUTS["sc_floor"]  # Supercaps are not discharged below half voltage
+
+
+def coverage_fraction(v: ArrayLike, v_peak: ArrayLike,
+                      waveform: Optional[Waveform] = None) -> np.ndarray:
+    """Fraction of each half-cycle where |V_ac| is below v (0..1)."""
+    if waveform is not None:
+        return waveform.coverage(np.asarray(v, dtype=float) / v_peak)
+    ratio = np.clip(np.asarray(v, dtype=float) / v_peak, 0.0, 1.0)
+    return np.arcsin(ratio) / (np.pi / 2)
+
+
+def _safe_div(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """a / b, with 0 wherever b is 0."""
+    out = np.zeros(np.broadcast(a, b).shape)
+    np.divide(a, b, out=out, where=b != 0)
+    return out
+
+
+class DesignTable:
+    """N designs stored column-wise, with derived columns computed once."""
+
+    def __init__(self, name: Optional[Sequence[str]] = None,
+                 waveform: Optional[Waveform] = None, **columns: ArrayLike):
+        """
+        Build a table from input columns (see INPUTS); scalars broadcast to
+        every design. Extra keyword columns are stored as given and take
+        precedence over a derived column of the same name. waveform replaces
+        the sine line in every coverage calculation.
+        """
+        unknown = [k for k in columns if k not in INPUTS]
+        inputs = {k: columns.pop(k) for k in list(columns) if k in INPUTS}
+        given = [np.asarray(v) for v in inputs.values()]
+        given += [np.asarray(v) for v in columns.values()]
+        n = max([a.size for a in given if a.ndim > 0] + [len(name or [])] + [1])
+
+        cols: Dict[str, np.ndarray] = {}
+        for key, default in INPUTS.items():
+            dtype = int if key in COUNTS else float
+            value = np.asarray(inputs.get(key, default), dtype=dtype)
+            cols[key] = np.broadcast_to(value, (n,))
+
+        if name is None:
+            cols["name"] = np.full(n, None, dtype=object)
+        else:
+            cols["name"] = np.array(list(name), dtype=object)
+
+        self._columns = cols
+        self.waveform = waveform
+        self._derive()
+
+        for key in unknown:
+            cols[key] = np.broadcast_to(np.asarray(columns[key]), (n,))
+
+    @classmethod
+    def _from_columns(cls, cols: Dict[str, np.ndarray],
+                      waveform: Optional[Waveform] = None) -> "DesignTable":
+        table = cls.__new__(cls)
+        table._columns = cols
+        table.waveform = waveform
+        return table
+
+    def _derive(self):
+        c = self._columns
+        sc = c["sc_per_bank"]
+        par = c["sc_parallel"]
+        elec = c["elec_per_bank"]
+        current = c["max_current"]
+
+        c["total_supercaps"] = 2 * sc * par
+        c["total_electrolytics"] = 2 * elec
+        c["sc_cost"] = c["total_supercaps"] * c["sc_price"]
+        c["elec_cost"] = c["total_electrolytics"] * c["elec_price"]
+        c["capacitor_cost"] = c["sc_cost"] + c["elec_cost"]
+        c["total_cost"] = c["capacitor_cost"] + c["fixed_cost"]
+
+        c["sc_bank_voltage"] = sc * c["sc_voltage"]
+        c["sc_bank_capacitance"] = _safe_div(c["sc_capacitance"], sc) * par
+        c["sc_bank_esr"] = _safe_div(sc * c["sc_esr"], par)
+        c["elec_bank_capacitance"] = elec * c["elec_capacitance_uf"] * 1e-6
+        c["elec_charge_voltage"] = np.where(elec > 0, c["elec_voltage"], 0.0)
+        c["stacked_voltage"] = c["sc_bank_voltage"] + c["elec_charge_voltage"]
+
+        wave = self.waveform
+        c["coverage"] = coverage_fraction(c["stacked_voltage"], c["v_ac_peak"], wave)
+        c["sc_only_coverage"] = coverage_fraction(c["sc_bank_voltage"], c["v_ac_peak"], wave)
+        c["effective_current"] = current * np.sqrt(c["coverage"])
+        c["peak_power"] = c["stacked_voltage"] * current * c["coverage"]
+
+        c["elec_boost_s"] = c["elec_charge_voltage"] * c["elec_bank_capacitance"] / current
+        c["elec_boost_duration_ms"] = c["elec_boost_s"] * 1000
+        c["sc_discharge_to_50pct_ms"] = (
+            (1 - c["sc_floor"]) * c["sc_bank_voltage"] * c["sc_bank_capacitance"] / current * 1000
+        )
+        v = c["sc_bank_voltage"]
+        c["sc_usable_energy_j"] = 0.5 * c["sc_bank_capacitance"] * (v**2 - (v * c["sc_floor"]) ** 2)
+        c["elec_energy_j"] = 0.5 * c["elec_bank_capacitance"] * c["elec_charge_voltage"] ** 2
+
+        # Electrolytics may carry 2x their ripple rating for short bursts
+        c["elec_current_ok"] = (elec == 0) | (
+            _safe_div(current, elec) <= 2 * c["elec_ripple_current"]
+        )
+        c["min_electrolytics_for_current"] = np.ceil(
+            current / (2 * c["elec_ripple_current"])
+        )
+
+    # -- access --------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._columns["name"])
+
+    def __getattr__(self, key: str) -> np.ndarray:
+        try:
+            return self.__dict__["_columns"][key]
+        except KeyError:
+            raise AttributeError(key) from None
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError(index)
+            return DesignRow(self, int(index))
+        columns = {k: v[index] for k, v in self._columns.items()}
+        return self._from_columns(columns, self.waveform)
+
+    def __iter__(self) -> Iterator["DesignRow"]:
+        for i in range(len(self)):
+            yield DesignRow(self, i)
+
+    def with_columns(self, **columns: ArrayLike) -> "DesignTable":
+        """
+        Copy with columns replaced or added. Replacing an input column
+        re-derives everything that depends on it; other keys are stored
+        as extra columns.
+        """
+        n = len(self)
+        cols = {"name": self._columns["name"]}
+        for key in INPUTS:
+            value = columns.pop(key, self._columns[key])
+            cols[key] = np.broadcast_to(np.asarray(value, dtype=self._columns[key].dtype), (n,))
+        table = self._from_columns(cols, self.waveform)
+        table._derive()
+        for key, value in self._columns.items():
+            cols.setdefault(key, value)
+        for key, value in columns.items():
+            cols[key] = np.broadcast_to(np.asarray(value), (n,))
+        return table
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def column(self, key: str) -> np.ndarray:
+        return self._columns[key]
+
+    # -- discharge models ------------------------------------------------------
+
+    def power_at(self, t: ArrayLike) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Effective injected power at time t after the boost starts.
+
+        Electrolytics are stacked on the supercaps until they have delivered
+        their charge at max_current, then the supercaps carry on alone down
+        to sc_floor (fraction of their voltage, half by default). A scalar t
+        gives one value per design; an array of times gives an (N, len(t))
+        grid.
+
+        Returns: (power_watts, coverage_fraction, stacked)
+        """
+        c = self._columns
+        t = np.asarray(t, dtype=float)
+        col = (lambda a: a[:, None]) if t.ndim else (lambda a: a)
+        v_sc = col(c["sc_bank_voltage"])
+        c_sc = col(c["sc_bank_capacitance"])
+        c_el = col(c["elec_bank_capacitance"])
+        current = col(c["max_current"])
+        t_boost = col(c["elec_boost_s"])
+
+        stacked = t < t_boost
+        v_stack = np.maximum(
+            v_sc + col(c["elec_charge_voltage"]) - _safe_div(current * t, c_el), v_sc
+        )
+        floor = v_sc * col(c["sc_floor"])
+        v_alone = np.maximum(v_sc - _safe_div(current * (t - t_boost), c_sc), floor)
+        v = np.where(stacked, v_stack, v_alone)
+
+        cov = coverage_fraction(v, col(c["v_ac_peak"]), self.waveform)
+        return v * current * cov, cov, stacked
+
+    def energy_by_time(self, window_ms: float, dt: float = 0.001) -> np.ndarray:
+        """Energy (J) per design from integrating power_at over the window."""
+        window_s = window_ms / 1000.0
+        total = np.zeros(len(self))
+        t = 0.0
+        while t < window_s:
+            total += self.power_at(t)[0] * dt
+            t += dt
+        return total
+
+    def energy_in_window(
+        self,
+        window_ms: float = 200,
+        dt: float = 0.0005,
+        elec_cutoff: float = 5.0,
+        hold_floor: bool = True,
+    ) -> np.ndarray:
+        """
+        Energy (J) per design in the first window_ms, stepping bank voltages.
+
+        The electrolytics discharge first until they fall to elec_cutoff,
+        then the supercaps. With hold_floor the supercaps keep delivering at
+        their floor (sc_floor); otherwise delivery stops when they reach it.
+        """
+        c = self._columns
+        window_s = window_ms / 1000
+        v_sc0 = c["sc_bank_voltage"]
+        floor = v_sc0 * c["sc_floor"]
+        current = c["max_current"]
+        d_el = _safe_div(current * dt, c["elec_bank_capacitance"])
+        d_sc = _safe_div(current * dt, c["sc_bank_capacitance"])
+
+        v_sc = v_sc0.astype(float)
+        v_el = c["elec_charge_voltage"].astype(float)
+        active = np.ones(len(self), dtype=bool)
+        total = np.zeros(len(self))
+        t = 0.0
+
+        while t < window_s:
+            if not hold_floor:
+                active &= v_sc >= floor
+            boosting = v_el > elec_cutoff
+            v_total = np.where(boosting, v_sc + v_el, v_sc)
+
+            cov = coverage_fraction(v_total, c["v_ac_peak"], self.waveform)
+            total += np.where(active, v_total * current * cov * dt, 0.0)
+
+            v_el = np.where(boosting, np.maximum(v_el - d_el, 0), v_el)
+            v_sc = np.where(boosting, v_sc, v_sc - d_sc)
+            if hold_floor:
+                v_sc = np.maximum(v_sc, floor)
+            t += dt
+
+        return total
+
+
+class DesignRow:
+    """View of one design in a DesignTable; attributes read its columns."""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: DesignTable, index: int):
+        self._table = table
+        self._index = index
+
+    def __getattr__(self, key: str):
+        try:
+            value = self._table.column(key)[self._index]
+        except KeyError:
+            raise AttributeError(key) from None
+        return value.item() if isinstance(value, np.generic) else value
+
+    def __repr__(self) -> str:
+        return f"DesignRow({self.name!r})"
+
+    def _single(self) -> DesignTable:
+        return self._table[self._index : self._index + 1]
+
+    def power_at(self, t: ArrayLike) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """power_at for this design; arrays of times give 1-D results."""
+        power, cov, stacked = self._single().power_at(t)
+        return power[0], cov[0], stacked[0]
+
+    def energy_by_time(self, window_ms: float, dt: float = 0.001) -> float:
+        return float(self._single().energy_by_time(window_ms, dt)[0])
+
+    def energy_in_window(self, window_ms: float = 200, **kwargs) -> float:
+        return float(self._single().energy_in_window(window_ms, **kwargs)[0])
@@ -1,5 +1,9 @@
+import argparse
+
 import numpy as np
-import matplotlib.pyplot as plt
+
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import print_waveform_summary, pyplot, show
 
 
 class GeneratorSimulation:
@@ -66,8 +70,9 @@ class GeneratorSimulation:
 
         return v_gen_ideal, np.real(v_gen_loaded), np.real(i_motor)
 
-    def plot_waveforms(self):
+    def plot_waveforms(self, save_path=None):
         """Create plots of voltage and current waveforms"""
+        plt = pyplot()
         v_gen_ideal, v_gen_loaded, i_motor = self.calculate_waveforms()
 
         # Create subplots
@@ -107,9 +112,31 @@ class GeneratorSimulation:
         ax2.legend()
 
         plt.tight_layout()
-        plt.show()
+
+        if save_path:
+            plt.savefig(save_path, dpi=150, bbox_inches="tight")
+            print(f"Saved: {save_path}")
+        show()
+
+
+@main_stage
+def main(plot=True, save_path=None):
+    sim = GeneratorSimulation(motor_start_ms=25)
+    if plot:
+        sim.plot_waveforms(save_path)
+    else:
+        v_gen_ideal, v_gen_loaded, i_motor = sim.calculate_waveforms()
+        print_waveform_summary(
+            "Generator with motor start",
+            sim.t,
+            v_gen_ideal=v_gen_ideal,
+            v_gen_loaded=v_gen_loaded,
+            i_motor=i_motor,
+        )
 
 
-# Example usage
-sim = GeneratorSimulation(motor_start_ms=25)
-sim.plot_waveforms()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generator waveforms during a motor start")
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
+    main()
@@ -1,5 +1,9 @@
+import argparse
+
 import numpy as np
-import matplotlib.pyplot as plt
+
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import print_waveform_summary, pyplot, show
 
 
 class HybridPowerSimulation:
@@ -67,8 +71,9 @@ class HybridPowerSimulation:
 
         return v_gen, v_pwm, v_smooth
 
-    def plot_waveforms(self):
+    def plot_waveforms(self, save_path=None):
         """Create plots of voltage waveforms"""
+        plt = pyplot()
         v_gen, v_pwm, v_smooth = self.calculate_waveforms()
 
         # Create subplots
@@ -115,9 +120,31 @@ class HybridPowerSimulation:
         ax2.legend()
 
         plt.tight_layout()
-        plt.show()
+
+        if save_path:
+            plt.savefig(save_path, dpi=150, bbox_inches="tight")
+            print(f"Saved: {save_path}")
+        show()
+
+
+@main_stage
+def main(plot=True, save_path=None):
+    sim = HybridPowerSimulation(battery_voltage=12, pwm_frequency=10000)
+    if plot:
+        sim.plot_waveforms(save_path)
+    else:
+        v_gen, v_pwm, v_smooth = sim.calculate_waveforms()
+        print_waveform_summary(
+            "Hybrid PWM assist (10 kHz)",
+            sim.t,
+            v_gen=v_gen,
+            v_pwm=v_pwm,
+            v_smooth=v_smooth,
+        )
 
 
-# Example usage
-sim = HybridPowerSimulation(battery_voltage=12, pwm_frequency=10000)
-sim.plot_waveforms()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generator plus 12V battery PWM assist")
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Per-stage timing and memory instrumentation shared by the scripts.
+
+    from instrument import stage
+
+    with stage('evaluate'):
+        energy = table.energy_by_time(window_ms)
+
+Stages cost nothing until profiling is switched on, either with --profile
+(--profile-json PATH, --profile-dump DIR), which every script, softstart_cli
+subcommand and hardware/ generator or simulation tool accepts, or through
+the environment:
+
+    SOFTSTART_PROFILE=1             summary table on stderr at exit
+    SOFTSTART_PROFILE=run.json      summary as JSON
+    SOFTSTART_PROFILE_DUMP=prof/    also a cProfile dump of the whole run
+                                    (prof/<program>.prof, for pstats or
+                                    snakeviz) and a tracemalloc snapshot
+                                    after each stage
+
+Each main() is decorated with @main_stage, which times the whole call as
+the 'main' stage. The environment switches profiling on as soon as this
+module is imported, so the run total also covers module imports and setup
+outside main(); multiprocessing workers (build_figures) are left
+unprofiled. --profile or --profile-json overrides where the environment
+sends the summary.
+
+For every stage name the summary gives the calls, wall and CPU time, and
+the peak traced memory above what was allocated when the stage began.
+Nested stages also count towards their parents. Memory is traced with
+tracemalloc, which sees numpy buffers as well as Python objects but slows
+allocation-heavy code down; the timings locate the slow stage, while
+benchmarks.py gives comparable absolute numbers.
+"""
+
+import argparse
+import atexit
+import cProfile
+import functools
+import json
+import multiprocessing
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+ENV_VAR = 'SOFTSTART_PROFILE'
+DUMP_ENV_VAR = 'SOFTSTART_PROFILE_DUMP'
+
+
+@dataclass
+class StageStats:
+    """Totals for one stage name over a run."""
+    name: str
+    calls: int = 0
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_bytes: int = 0         # Largest rise in traced memory during one call
+
+
+@dataclass
+class _Frame:
+    stats: StageStats
+    wall: float
+    cpu: float
+    base: int                   # Traced bytes at entry
+    peak: int                   # Highest traced bytes seen so far
+
+
+class Profiler:
+    """Collects stage statistics for one run and reports them at finish()."""
+
+    def __init__(self, output: str = '-', dump_dir: Optional[str] = None,
+                 program: Optional[str] = None):
+        self.output = output            # '-' for stderr, else a JSON path
+        self.dump_dir = dump_dir
+        self.program = program or os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0]
+        self.stages: Dict[str, StageStats] = {}
+        self._stack: List[_Frame] = []
+        self._profile: Optional[cProfile.Profile] = None
+        self._owns_tracing = False
+        self._finished = False
+        self._wall = self._cpu = 0.0
+        self._peak = 0                  # Run-wide traced peak across reset_peak() calls
+
+    def start(self) -> 'Profiler':
+        if not tracemalloc.is_tracing():
+            # Deeper tracebacks only when snapshots are dumped for inspection
+            tracemalloc.start(25 if self.dump_dir else 1)
+            self._owns_tracing = True
+        if self.dump_dir:
+            os.makedirs(self.dump_dir, exist_ok=True)
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    @contextmanager
+    def stage(self, name: str):
+        current, peak = tracemalloc.get_traced_memory()
+        # reset_peak() below hides the peak so far from the enclosing stages
+        for outer in self._stack:
+            outer.peak = max(outer.peak, peak)
+        self._peak = max(self._peak, peak)
+        tracemalloc.reset_peak()
+
+        stats = self.stages.setdefault(name, StageStats(name))
+        frame = _Frame(stats, time.perf_counter(), time.process_time(), current, current)
+        self._stack.append(frame)
+        try:
+            yield stats
+        finally:
+            self._stack.pop()
+            stats.calls += 1
+            stats.wall_s += time.perf_counter() - frame.wall
+            stats.cpu_s += time.process_time() - frame.cpu
+            peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+            stats.peak_bytes = max(stats.peak_bytes, peak - frame.base)
+            for outer in self._stack:
+                outer.peak = max(outer.peak, peak)
+            self._peak = max(self._peak, peak)
+            if self.dump_dir:
+                path = os.path.join(self.dump_dir,
+                                    f'{self.program}.{name}.{stats.calls}.tracemalloc')
+                tracemalloc.take_snapshot().dump(path)
+
+    def summary(self) -> dict:
+        return dict(
+            program=self.program,
+            argv=sys.argv[1:],
+            wall_s=time.perf_counter() - self._wall,
+            cpu_s=time.process_time() - self._cpu,
+            traced_peak_bytes=max(self._peak, tracemalloc.get_traced_memory()[1]),
+            max_rss_bytes=max_rss(),
+            stages=[asdict(s) for s in self.stages.values()],
+        )
+
+    def finish(self):
+        """Stop tracing, write the dumps and report the summary (once)."""
+        if self._finished:
+            return
+        self._finished = True
+        summary = self.summary()
+
+        if self._profile is not None and self.dump_dir:
+            self._profile.disable()
+            path = os.path.join(self.dump_dir, f'{self.program}.prof')
+            self._profile.dump_stats(path)
+            print(f"Saved: {path}", file=sys.stderr)
+        if self._owns_tracing:
+            tracemalloc.stop()
+
+        if self.output == '-':
+            print(format_summary(summary), file=sys.stderr)
+        else:
+            with open(self.output, 'w') as f:
+                json.dump(summary, f, indent=2)
+            print(f"Saved: {self.output}", file=sys.stderr)
+
+
+def max_rss() -> Optional[int]:
+    """Peak resident set size of the process in bytes (None where unavailable)."""
+    try:
+        import resource
+    except ImportError:         # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def format_summary(summary: dict) -> str:
+    mib = 1024 * 1024
+    lines = [
+        "=" * 70,
+        f"PROFILE: {summary['program']} {' '.join(summary['argv'])}".rstrip(),
+        "=" * 70,
+        f"{'Stage':<24} {'Calls':>6} {'Wall':>10} {'CPU':>10} {'Peak mem':>14}",
+        "-" * 70,
+    ]
+    for s in summary['stages']:
+        lines.append(f"{s['name']:<24} {s['calls']:>6} {s['wall_s']:>9.3f}s {s['cpu_s']:>9.3f}s "
+                     f"{s['peak_bytes'] / mib:>10.1f} MiB")
+    lines.append("-" * 70)
+    rss = summary['max_rss_bytes']
+    lines.append(f"{'Run':<24} {'':>6} {summary['wall_s']:>9.3f}s {summary['cpu_s']:>9.3f}s "
+                 f"{summary['traced_peak_bytes'] / mib:>10.1f} MiB"
+                 + (f"  (max RSS {rss / mib:.0f} MiB)" if rss else ""))
+    return "\n".join(lines)
+
+
+# =============================================================================
+# Process-wide profiler
+# =============================================================================
+
+_profiler: Optional[Profiler] = None
+_configured = False
+
+
+def configure(output: Optional[str] = '-', dump_dir: Optional[str] = None) -> Optional[Profiler]:
+    """
+    Switch profiling on for this process, reporting at exit to output ('-'
+    for stderr or a JSON path), or off with output=None and no dump_dir.
+    Once profiling is on, a later call only changes the output.
+    """
+    global _profiler, _configured
+    _configured = True
+    if _profiler is not None:
+        if output is not None:
+            _profiler.output = output
+        return _profiler
+    if output is None and dump_dir is None:
+        return None
+    _profiler = Profiler(output or '-', dump_dir).start()
+    atexit.register(_profiler.finish)
+    return _profiler
+
+
+def configure_from_env() -> Optional[Profiler]:
+    value = os.environ.get(ENV_VAR, '')
+    dump_dir = os.environ.get(DUMP_ENV_VAR) or None
+    if value.lower() in ('', '0', 'false', 'no'):
+        return configure(None, dump_dir)
+    return configure('-' if value.lower() in ('1', 'true', 'yes', 'stderr') else value, dump_dir)
+
+
+def add_arguments(parser):
+    """--profile, --profile-json and --profile-dump for an entry point's parser."""
+    parser.add_argument('--profile', action='store_true',
+                        help=f'Time each stage and print a summary to stderr (also ${ENV_VAR})')
+    parser.add_argument('--profile-json', metavar='PATH',
+                        help='Write the profile summary to PATH as JSON instead')
+    parser.add_argument('--profile-dump', metavar='DIR',
+                        help=f'Also write cProfile and tracemalloc dumps to DIR '
+                             f'(also ${DUMP_ENV_VAR})')
+
+
+def configure_from_args(args) -> Optional[Profiler]:
+    """Profile if any --profile option was given, else as the environment says."""
+    if args.profile or args.profile_json or args.profile_dump:
+        return configure(args.profile_json or '-', args.profile_dump)
+    return configure_from_env()
+
+
+def configure_from_argv(argv: Optional[List[str]] = None) -> Optional[Profiler]:
+    """configure_from_args() on the profiling options alone in argv (default sys.argv)."""
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    add_arguments(parser)
+    args, _ = parser.parse_known_args(argv)
+    return configure_from_args(args)
+
+
+def active() -> Optional[Profiler]:
+    if not _configured:
+        configure_from_env()
+    return _profiler
+
+
+def stage(name: str):
+    """Context manager timing one named stage; a no-op unless profiling."""
+    profiler = active()
+    return profiler.stage(name) if profiler is not None else nullcontext()
+
+
+def main_stage(func):
+    """
+    Decorator running an entry point's main() as the 'main' stage. When the
+    script itself is run, the profiling options are applied from sys.argv
+    first, so mains that parse their arguments inside are timed as well.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _configured and func.__module__ == '__main__':
+            configure_from_argv()
+        with stage('main'):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+# Profile from the start of the run when the environment asks for it
+if (os.environ.get(ENV_VAR) or os.environ.get(DUMP_ENV_VAR)) and multiprocessing.parent_process() is None:
+    configure_from_env()
@@ -6,168 +6,52 @@ Goal: Find the cheapest combination of supercaps + electrolytics that delivers
 approximately 200J during the critical motor start window (first 200ms).
 """
 
+import argparse
+
 import numpy as np
-import matplotlib.pyplot as plt
-from dataclasses import dataclass
-from itertools import product
-
-
-@dataclass
-class Config:
-    """Hybrid configuration."""
-    supercap_cells_per_bank: int
-    electrolytic_count_per_bank: int
-
-    # Constants
-    SC_CAPACITANCE_F: float = 100.0
-    SC_VOLTAGE_V: float = 2.7
-    SC_COST: float = 6.0
-
-    ELEC_CAPACITANCE_UF: float = 4700.0
-    ELEC_VOLTAGE_V: float = 60.0  # Charge voltage (derated)
-    ELEC_COST: float = 2.28
-    ELEC_RIPPLE_CURRENT_A: float = 3.0  # Per cap
-
-    V_AC_PEAK: float = 170.0
-    MAX_CURRENT_A: float = 40.0
-
-    @property
-    def total_supercaps(self) -> int:
-        return 2 * self.supercap_cells_per_bank
-
-    @property
-    def total_electrolytics(self) -> int:
-        return 2 * self.electrolytic_count_per_bank
-
-    @property
-    def total_cost(self) -> float:
-        return (self.total_supercaps * self.SC_COST +
-                self.total_electrolytics * self.ELEC_COST)
-
-    @property
-    def sc_bank_voltage(self) -> float:
-        return self.supercap_cells_per_bank * self.SC_VOLTAGE_V
-
-    @property
-    def sc_bank_capacitance(self) -> float:
-        if self.supercap_cells_per_bank == 0:
-            return 0
-        return self.SC_CAPACITANCE_F / self.supercap_cells_per_bank
-
-    @property
-    def elec_bank_capacitance(self) -> float:
-        return self.electrolytic_count_per_bank * self.ELEC_CAPACITANCE_UF * 1e-6
-
-    @property
-    def stacked_voltage(self) -> float:
-        return self.sc_bank_voltage + self.ELEC_VOLTAGE_V
-
-    @property
-    def coverage_stacked(self) -> float:
-        v = self.stacked_voltage
-        if v >= self.V_AC_PEAK:
-            return 1.0
-        return np.arcsin(v / self.V_AC_PEAK) / (np.pi / 2)
-
-    @property
-    def coverage_sc_only(self) -> float:
-        v = self.sc_bank_voltage
-        if v >= self.V_AC_PEAK:
-            return 1.0
-        if v <= 0:
-            return 0
-        return np.arcsin(v / self.V_AC_PEAK) / (np.pi / 2)
-
-    @property
-    def elec_discharge_time_s(self) -> float:
-        if self.elec_bank_capacitance == 0:
-            return 0
-        return self.ELEC_VOLTAGE_V * self.elec_bank_capacitance / self.MAX_CURRENT_A
-
-    @property
-    def elec_current_ok(self) -> bool:
-        """Check if electrolytics can handle the current."""
-        if self.electrolytic_count_per_bank == 0:
-            return True
-        current_per_cap = self.MAX_CURRENT_A / self.electrolytic_count_per_bank
-        return current_per_cap <= self.ELEC_RIPPLE_CURRENT_A * 2  # Allow 2x for short bursts
-
-    @property
-    def min_electrolytics_for_current(self) -> int:
-        """Minimum electrolytics needed for current handling."""
-        return int(np.ceil(self.MAX_CURRENT_A / (self.ELEC_RIPPLE_CURRENT_A * 2)))
-
-    def energy_delivered_in_window(self, window_ms: float) -> float:
-        """Calculate energy delivered in first N milliseconds."""
-        window_s = window_ms / 1000.0
-        dt = 0.001  # 1ms timestep
-
-        total_energy = 0
-        t = 0
-
-        while t < window_s:
-            if t < self.elec_discharge_time_s:
-                # Stacked mode
-                # Voltage decreases as electrolytics discharge
-                v_elec = self.ELEC_VOLTAGE_V - (self.MAX_CURRENT_A * t / self.elec_bank_capacitance) if self.elec_bank_capacitance > 0 else 0
-                v_elec = max(v_elec, 0)
-                v_total = self.sc_bank_voltage + v_elec
-            else:
-                # Supercap only mode
-                t_sc = t - self.elec_discharge_time_s
-                v_drop = self.MAX_CURRENT_A * t_sc / self.sc_bank_capacitance if self.sc_bank_capacitance > 0 else 0
-                v_total = max(self.sc_bank_voltage - v_drop, self.sc_bank_voltage * 0.5)
-
-            # Calculate coverage and power at this voltage
-            if v_total >= self.V_AC_PEAK:
-                coverage = 1.0
-            elif v_total <= 0:
-                coverage = 0
-            else:
-                coverage = np.arcsin(v_total / self.V_AC_PEAK) / (np.pi / 2)
-
-            power = v_total * self.MAX_CURRENT_A * coverage
-            total_energy += power * dt
-            t += dt
-
-        return total_energy
-
-    def peak_power(self) -> float:
-        """Peak effective power at t=0."""
-        return self.stacked_voltage * self.MAX_CURRENT_A * self.coverage_stacked
 
+from design_table import DesignTable
+from instrument import add_arguments, configure_from_args, main_stage, stage
+from plotting import pyplot, show
+from results import record
 
-def find_optimal_configs(target_energy_j: float = 200, window_ms: float = 200):
-    """Find configurations that deliver target energy at minimum cost."""
 
-    results = []
+def search_space() -> DesignTable:
+    """Every layout searched whose electrolytics can carry the injection current."""
+    sc_range = np.arange(2, 15)  # 2-14 supercaps per bank
+    elec_range = np.arange(0, 25)  # 0-24 electrolytics per bank
 
-    # Search space
-    sc_range = range(2, 15)  # 2-14 supercaps per bank
-    elec_range = range(0, 25)  # 0-24 electrolytics per bank
+    sc, elec = np.meshgrid(sc_range, elec_range, indexing='ij')
+    table = DesignTable(sc_per_bank=sc.ravel(), elec_per_bank=elec.ravel(),
+                        max_current=40.0)
 
-    for sc, elec in product(sc_range, elec_range):
-        config = Config(sc, elec)
+    # Skip if electrolytics can't handle current
+    with stage('filter'):
+        return table[table.elec_current_ok]
 
-        # Skip if electrolytics can't handle current
-        if elec > 0 and not config.elec_current_ok:
-            continue
 
-        energy = config.energy_delivered_in_window(window_ms)
+def find_optimal_configs(target_energy_j: float = 200, window_ms: float = 200):
+    """Find configurations that deliver target energy at minimum cost."""
+    table = search_space()
 
+    with stage('evaluate'):
+        energy = table.energy_by_time(window_ms)
+
+    results = []
+    for i, config in enumerate(table):
         results.append({
             'config': config,
-            'sc_per_bank': sc,
-            'elec_per_bank': elec,
-            'total_sc': config.total_supercaps,
-            'total_elec': config.total_electrolytics,
+            'sc_per_bank': config.sc_per_bank,
+            'elec_per_bank': config.elec_per_bank,
+            'total_sc': int(config.total_supercaps),
+            'total_elec': int(config.total_electrolytics),
             'cost': config.total_cost,
-            'energy_200ms': energy,
-            'peak_power': config.peak_power(),
+            'energy_200ms': energy[i],
+            'peak_power': config.peak_power,
             'sc_voltage': config.sc_bank_voltage,
             'stacked_voltage': config.stacked_voltage,
-            'coverage_stacked': config.coverage_stacked * 100,
-            'elec_boost_ms': config.elec_discharge_time_s * 1000,
+            'coverage_stacked': config.coverage * 100,
+            'elec_boost_ms': config.elec_boost_duration_ms,
         })
 
     return results
@@ -175,6 +59,7 @@ def find_optimal_configs(target_energy_j: float = 200, window_ms: float = 200):
 
 def plot_results(results, target_energy=200, save_path=None):
     """Plot optimization results."""
+    plt = pyplot()
 
     fig, axes = plt.subplots(2, 2, figsize=(14, 10))
     fig.suptitle(f'Minimal Hybrid Optimization (Target: {target_energy}J in 200ms)',
@@ -331,15 +216,47 @@ def print_recommendations(results, target_energy=200):
             print(f"    Hybrid saves: ${savings:.0f}")
 
 
-def main():
+def print_catalog_search(target_energy=200, window_ms=200, count=10):
+    """Cheapest designs meeting the target using any supercap/electrolytic in the catalog."""
+    from catalog import Catalog
+
+    best = Catalog().cheapest(target_energy, window_ms, max_current=40.0)
+
+    print("\n" + "=" * 90)
+    print(f"CATALOG SEARCH: all parts in data/capacitors.csv, {target_energy}J in {window_ms}ms")
+    print("=" * 90)
+    if not len(best):
+        print("No catalog design meets the target")
+        return best
+
+    print(f"\n{'Supercap':<20} {'Electrolytic':<18} {'Config':<10} {'Cost':>8} "
+          f"{'V_stack':>9} {'Coverage':>9}")
+    print("-" * 90)
+    for r in best[:count]:
+        name = f"{r.total_supercaps}SC+{r.total_electrolytics}E"
+        print(f"{r.sc_part:<20} {r.elec_part or '-':<18} {name:<10} ${r.total_cost:>7.2f} "
+              f"{r.stacked_voltage:>8.1f}V {r.coverage * 100:>8.0f}%")
+    return best
+
+
+@main_stage
+def main(plot=True):
     print("Searching for optimal configurations...")
     results = find_optimal_configs(target_energy_j=200, window_ms=200)
+    record('minimal_hybrid', search_space(), dict(window_ms=200),
+           energy_200ms_j=[r['energy_200ms'] for r in results])
 
     print_recommendations(results, target_energy=200)
+    print_catalog_search(target_energy=200, window_ms=200)
 
-    plot_results(results, target_energy=200, save_path='minimal_hybrid_optimization.png')
-    plt.show()
+    if plot:
+        with stage('plot'):
+            plot_results(results, target_energy=200, save_path='minimal_hybrid_optimization.png')
+        show()
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
     main()
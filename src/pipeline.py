@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Incremental computation graph for the start analysis.
+
+The analysis scripts recompute everything from the top whenever one input
+changes, although most quantities depend on only a few inputs: the motor's
+energy shortfall does not care about the supercap ESR, and the bank's
+discharge does not care about the generator. Graph holds each quantity as a
+node with named dependencies. A node's value is memoized under a key hashed
+from its name and the keys of its dependencies (ultimately the input
+values), so after Graph.set() only the nodes downstream of the changed
+inputs are recomputed, and setting an input back to an earlier value finds
+the earlier results still cached.
+
+Computed values live in one LRU cache bounded by entry count and by the
+bytes of the arrays they hold; inputs are never evicted.
+
+start_graph() wires up the soft-start analysis:
+
+    bank          DesignTable from the design inputs (INPUTS columns; arrays
+                  give one design per element)
+    discharge     power_at() and coverage on the window's time grid
+    energy_curve  cumulative delivered energy over the window (J)
+    delivered     energy_in_window() less the supercaps' I²·ESR loss (J)
+    demand        calculate_power_demand() for ac, gen, startup_time_ms
+    shortfall     energy beyond the generator within the window (J)
+    margin        delivered - shortfall (J)
+    success       chance a start needing Normal(shortfall, demand_cv·shortfall)
+                  joules gets it, as sensitivity.StartModel
+
+    graph = start_graph()
+    graph['success']
+    graph.set(sc_esr=0.04)                          # bank onwards; demand is reused
+    graph.set(gen=replace(graph['gen'], max_watts=1200))   # demand onwards
+"""
+
+import argparse
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields, is_dataclass, replace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.special import ndtr
+
+from analyze_motor_startup import (GeneratorSpec, StartupProfile, WindowACSpec,
+                                   calculate_power_demand)
+from design_table import INPUTS, DesignTable
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import pyplot, show
+from sensitivity import base_design
+
+
+def fingerprint(value: Any) -> str:
+    """Stable hash of an input value: arrays by content, dataclasses by field."""
+    h = hashlib.blake2b(digest_size=16)
+
+    def feed(v):
+        if isinstance(v, np.ndarray):
+            h.update(f'ndarray{v.dtype.str}{v.shape}'.encode())
+            h.update(np.ascontiguousarray(v).tobytes())
+        elif is_dataclass(v) and not isinstance(v, type):
+            h.update(type(v).__qualname__.encode())
+            for f in fields(v):
+                h.update(f.name.encode())
+                feed(getattr(v, f.name))
+        elif isinstance(v, dict):
+            h.update(b'dict')
+            for k in sorted(v):
+                h.update(repr(k).encode())
+                feed(v[k])
+        elif isinstance(v, (list, tuple)):
+            h.update(type(v).__name__.encode())
+            for item in v:
+                feed(item)
+        else:
+            h.update(f'{type(v).__name__}:{v!r}'.encode())
+
+    feed(value)
+    return h.hexdigest()
+
+
+def nbytes(value: Any) -> int:
+    """Bytes held in the arrays of a cached value (0 for anything else)."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, DesignTable):
+        return sum(value.column(k).nbytes for k in value.columns)
+    if isinstance(value, dict):
+        return sum(nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(nbytes(v) for v in value)
+    return 0
+
+
+@dataclass(frozen=True)
+class Node:
+    name: str
+    func: Callable
+    deps: Tuple[str, ...]
+
+
+class Graph:
+    """Inputs and memoized nodes; nodes may only depend on names already defined."""
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 256 * 2**20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._inputs: Dict[str, Any] = {}
+        self._input_keys: Dict[str, str] = {}
+        self._nodes: Dict[str, Node] = {}
+        self._cache: 'OrderedDict[str, Tuple[Any, int]]' = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.computed: List[str] = []     # Nodes evaluated by the last get()
+
+    # -- definition ------------------------------------------------------------
+
+    def input(self, name: str, value: Any):
+        """Declare an input with its initial value."""
+        if name in self._nodes:
+            raise ValueError(f"{name!r} is already a node")
+        self._inputs[name] = value
+        self._input_keys[name] = fingerprint(value)
+
+    def node(self, name: str, deps: Sequence[str]):
+        """Decorator: register func(*values of deps) as node name."""
+        missing = [d for d in deps if d not in self._inputs and d not in self._nodes]
+        if missing:
+            raise ValueError(f"{name!r} depends on undefined {missing}")
+        if name in self._inputs or name in self._nodes:
+            raise ValueError(f"{name!r} is already defined")
+
+        def register(func: Callable) -> Callable:
+            self._nodes[name] = Node(name, func, tuple(deps))
+            return func
+
+        return register
+
+    # -- evaluation ------------------------------------------------------------
+
+    def set(self, **values: Any):
+        """Change inputs; downstream nodes are recomputed on their next get()."""
+        unknown = [k for k in values if k not in self._inputs]
+        if unknown:
+            raise ValueError(f"unknown inputs: {unknown}")
+        for name, value in values.items():
+            self._inputs[name] = value
+            self._input_keys[name] = fingerprint(value)
+
+    def key(self, name: str, _memo: Optional[Dict[str, str]] = None) -> str:
+        """Cache key of a node (or an input's fingerprint)."""
+        if name in self._input_keys:
+            return self._input_keys[name]
+        memo = {} if _memo is None else _memo
+        if name not in memo:
+            node = self._nodes[name]
+            parts = [name] + [self.key(d, memo) for d in node.deps]
+            memo[name] = hashlib.blake2b('|'.join(parts).encode(), digest_size=16).hexdigest()
+        return memo[name]
+
+    def get(self, name: str) -> Any:
+        """Value of an input or node, computing only what is not cached."""
+        self.computed = []
+        return self._get(name, {})
+
+    def __getitem__(self, name: str) -> Any:
+        return self.get(name)
+
+    def _get(self, name: str, memo: Dict[str, str]) -> Any:
+        if name in self._inputs:
+            return self._inputs[name]
+        if name not in self._nodes:
+            raise KeyError(name)
+        key = self.key(name, memo)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return self._cache[key][0]
+
+        node = self._nodes[name]
+        value = node.func(*(self._get(d, memo) for d in node.deps))
+        self.misses += 1
+        self.computed.append(name)
+        self._store(key, value)
+        return value
+
+    def _store(self, key: str, value: Any):
+        size = nbytes(value)
+        self._cache[key] = (value, size)
+        self._bytes += size
+        while len(self._cache) > 1 and (len(self._cache) > self.max_entries
+                                        or self._bytes > self.max_bytes):
+            _, (_, evicted) = self._cache.popitem(last=False)
+            self._bytes -= evicted
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every cached value (inputs are kept)."""
+        self._cache.clear()
+        self._bytes = 0
+
+    # -- introspection ---------------------------------------------------------
+
+    def downstream(self, *inputs: str) -> List[str]:
+        """Nodes that depend, directly or not, on any of the given names."""
+        changed = set(inputs)
+        out = []
+        for name, node in self._nodes.items():   # Definition order is topological
+            if changed.intersection(node.deps):
+                changed.add(name)
+                out.append(name)
+        return out
+
+    @property
+    def inputs(self) -> List[str]:
+        return list(self._inputs)
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self._nodes)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(entries=len(self._cache), bytes=self._bytes, hits=self.hits,
+                    misses=self.misses, evictions=self.evictions)
+
+
+# =============================================================================
+# Start analysis graph
+# =============================================================================
+
+def start_graph(design: Optional[DesignTable] = None,
+                ac: Optional[WindowACSpec] = None,
+                gen: Optional[GeneratorSpec] = None,
+                startup_time_ms: float = 300.0,
+                profile: Optional[StartupProfile] = None,
+                window_ms: float = 200.0,
+                dt_ms: float = 1.0,
+                demand_cv: float = 0.15,
+                **cache) -> Graph:
+    """
+    The soft-start analysis as a Graph (see module docstring). design gives
+    the starting values of the INPUTS columns (its first row); defaults are
+    sensitivity.base_design(), an 8000 BTU window AC and a Honda EU1000i.
+    cache is passed to Graph (max_entries, max_bytes).
+    """
+    design = design if design is not None else base_design()
+    g = Graph(**cache)
+    for key in INPUTS:
+        g.input(key, design.column(key)[0].item())
+    g.input('ac', ac or WindowACSpec("8000 BTU", 8000, 720, 6.0))
+    g.input('gen', gen or GeneratorSpec("Honda EU1000i", 900, 1000))
+    g.input('startup_time_ms', startup_time_ms)
+    g.input('profile', profile or StartupProfile())
+    g.input('window_ms', window_ms)
+    g.input('dt_ms', dt_ms)
+    g.input('demand_cv', demand_cv)
+
+    @g.node('bank', INPUTS)
+    def bank(*values):
+        return DesignTable(**dict(zip(INPUTS, values)))
+
+    @g.node('discharge', ['bank', 'window_ms', 'dt_ms'])
+    def discharge(table, window_ms, dt_ms):
+        t_ms = np.arange(0, window_ms, dt_ms)
+        power, coverage, _ = table.power_at(t_ms / 1000)
+        return dict(t_ms=t_ms, power_w=power, coverage=coverage)
+
+    @g.node('energy_curve', ['discharge', 'dt_ms'])
+    def energy_curve(discharge, dt_ms):
+        return np.cumsum(discharge['power_w'], axis=-1) * dt_ms / 1000
+
+    @g.node('delivered', ['bank', 'window_ms'])
+    def delivered(table, window_ms):
+        loss = table.effective_current ** 2 * table.sc_bank_esr * window_ms / 1000
+        return table.energy_in_window(window_ms) - loss
+
+    @g.node('demand', ['ac', 'gen', 'startup_time_ms', 'dt_ms', 'profile'])
+    def demand(ac, gen, startup_time_ms, dt_ms, profile):
+        return calculate_power_demand(ac, gen, startup_time_ms, dt_ms, profile)
+
+    @g.node('shortfall', ['demand', 'window_ms', 'dt_ms'])
+    def shortfall(demand, window_ms, dt_ms):
+        mask = demand['times'] < window_ms
+        return float(np.sum(demand['power_shortfall'][mask]) * dt_ms / 1000)
+
+    @g.node('margin', ['delivered', 'shortfall'])
+    def margin(delivered, shortfall):
+        return delivered - shortfall
+
+    @g.node('success', ['margin', 'shortfall', 'demand_cv'])
+    def success(margin, shortfall, demand_cv):
+        if shortfall <= 0:
+            return np.ones_like(margin)
+        return ndtr(margin / (demand_cv * shortfall))
+
+    return g
+
+
+# =============================================================================
+# Report
+# =============================================================================
+
+def timed_changes(graph: Graph, target: str,
+                  changes: Sequence[Tuple[str, Dict[str, Any]]]) -> List[dict]:
+    """Apply each change in turn and time graph[target] after it."""
+    rows = []
+    for label, values in changes:
+        graph.set(**values)
+        start = time.perf_counter()
+        value = graph[target]
+        seconds = time.perf_counter() - start
+        rows.append(dict(label=label, seconds=seconds, computed=list(graph.computed),
+                         value=value, margin=graph['margin']))
+    return rows
+
+
+def print_changes(rows: List[dict], target: str):
+    print("=" * 100)
+    print(f"INCREMENTAL RECOMPUTATION OF '{target}'")
+    print("=" * 100)
+    print(f"{'Change':<30} {'Time':>9} {'Margin':>9} {target:>8}  Recomputed")
+    print("-" * 100)
+    for r in rows:
+        margin = np.atleast_1d(r['margin'])
+        value = np.atleast_1d(r['value'])
+        if margin.size == 1:
+            shown = f"{margin[0]:>8.1f}J {value[0]:>8.1%}"
+        else:
+            shown = f"{margin.min():>4.0f}..{margin.max():.0f}J {value.max():>7.1%}"
+        recomputed = ', '.join(r['computed']) or '(cached)'
+        print(f"{r['label']:<30} {r['seconds'] * 1000:>7.2f}ms {shown}  {recomputed}")
+
+
+def plot_energy(graph: Graph, save_path: Optional[str] = None):
+    """Delivered energy curve against the cumulative shortfall."""
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(9, 5))
+
+    t_ms = graph['discharge']['t_ms']
+    energy = np.atleast_2d(graph['energy_curve'])
+    demand = graph['demand']
+    mask = demand['times'] < graph['window_ms']
+    need = np.cumsum(demand['power_shortfall'][mask]) * graph['dt_ms'] / 1000
+
+    for row in energy:
+        ax.plot(t_ms, row, linewidth=2, label='Delivered (power_at)')
+    ax.plot(demand['times'][mask], need, 'r--', linewidth=2,
+            label=f"Shortfall beyond {graph['gen'].name}")
+    ax.set_xlabel('Time (ms)')
+    ax.set_ylabel('Cumulative energy (J)')
+    ax.set_title(f"Start energy, {graph['ac'].name} (success {float(np.min(graph['success'])):.0%})")
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+
+    plt.tight_layout()
+    if save_path:
+        plt.savefig(save_path, dpi=150, bbox_inches='tight')
+        print(f"Saved: {save_path}")
+    return fig
+
+
+@main_stage
+def main(plot=True):
+    graph = start_graph(DesignTable(sc_per_bank=30, sc_capacitance=25.0, sc_esr=0.02,
+                                    elec_per_bank=20, elec_voltage=50.0, max_current=40.0))
+    gen = graph['gen']
+    esr = graph['sc_esr']
+
+    rows = timed_changes(graph, 'success', [
+        ('Initial (everything)', {}),
+        ('Unchanged', {}),
+        ('sc_esr +50%', dict(sc_esr=esr * 1.5)),
+        ('gen max_watts 1000 → 1200', dict(gen=replace(gen, max_watts=1200))),
+        ('sc_esr back', dict(sc_esr=esr)),
+        ('gen back', dict(gen=gen)),
+        ('max_current 30 A', dict(max_current=30.0)),
+        ('sc_per_bank sweep 20..40', dict(sc_per_bank=np.arange(20, 41))),
+    ])
+    print_changes(rows, 'success')
+
+    s = graph.stats()
+    print(f"\nCache: {s['entries']} entries, {s['bytes'] / 1024:.0f} KiB, "
+          f"{s['hits']} hits, {s['misses']} misses, {s['evictions']} evictions")
+    print(f"Downstream of sc_esr: {', '.join(graph.downstream('sc_esr'))}")
+    print(f"Downstream of gen:    {', '.join(graph.downstream('gen'))}")
+
+    if plot:
+        graph.set(sc_per_bank=30, max_current=40.0)
+        plot_energy(graph, save_path='pipeline_energy.png')
+        show()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Lazy matplotlib access shared by the analysis scripts.
+
+pyplot is only imported when a plot is actually drawn, and with the
+non-interactive Agg backend unless MPLBACKEND is set or an interactive
+session was requested with use_interactive(). Importing a script, or
+running it with plots disabled, never loads matplotlib or opens a window.
+"""
+
+import os
+
+import numpy as np
+
+_interactive = False
+
+
+def use_interactive(enabled: bool = True):
+    """Let pyplot pick a GUI backend so show() opens windows."""
+    global _interactive
+    _interactive = enabled
+
+
+def pyplot():
+    """Import and return matplotlib.pyplot (Agg unless told otherwise)."""
+    import matplotlib
+
+    if not _interactive and "MPLBACKEND" not in os.environ:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def show():
+    """plt.show() in interactive sessions; closes the figures under Agg."""
+    plt = pyplot()
+    if plt.get_backend().lower() == "agg":
+        plt.close("all")
+    else:
+        plt.show()
+
+
+def print_waveform_summary(title: str, t: np.ndarray, **traces: np.ndarray):
+    """Text-only stand-in for a waveform plot: min/max/RMS per trace."""
+    print("=" * 60)
+    print(f"{title} ({t[-1] * 1000:.1f} ms, {len(t)} points)")
+    print("=" * 60)
+    print(f"{'Trace':<20} {'Min':>12} {'Max':>12} {'RMS':>12}")
+    print("-" * 60)
+    for name, values in traces.items():
+        values = np.real(values)
+        rms = np.sqrt(np.mean(values**2))
+        print(f"{name:<20} {values.min():>12.3f} {values.max():>12.3f} {rms:>12.3f}")
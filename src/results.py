@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Persistent, queryable store of analysis and sweep results.
+
+The analysis scripts print their tables and throw the numbers away, so a
+question such as "designs under $150 delivering at least 200 J with a
+positive 8000 BTU margin" means rerunning sweeps. Scripts now record() the
+DesignTable they evaluated together with their per-design results into an
+SQLite database (data/results.sqlite, or $SOFTSTART_RESULTS; set it empty
+to record nothing):
+
+    runs      one row per recorded analysis: name, JSON parameters, time
+    designs   one row per design: every DesignTable input column, the main
+              derived columns (cost, stacked voltage, coverage, energies)
+              and the catalog part numbers, indexed on cost, layout,
+              supercap part/ESR and injection current
+    metrics   (design, name, value) for any per-design result, indexed on
+              (name, value) so a threshold on a metric is a range scan
+
+Metric names follow the sweep-column convention of the scripts, with the
+scenario in brackets: energy_200ms_j, delivered_j, margin_j[8000 BTU],
+success[8000 BTU]. Recording an analysis again with the same parameters
+replaces its previous run.
+
+Recording happens only in a script's main(), never in the functions that
+compute a sweep, so build_figures and other importers write nothing. The
+recorded analyses are minimal_hybrid, hybrid_stacking, 12f_design, budget,
+supercap_only_12f, supercap_configs, sourcing, comprehensive, aging,
+cycling and the catalog sweep below. motor_startup and phase_coverage
+assess scenarios rather than a sweep; they record their scenario figures
+(shortfall per AC unit, window coverage per waveform) as metrics of the
+16SC+56E design they check. thermal, cell_string, pipeline, sensitivity,
+surrogate and batch_sim are not recorded: they produce time or Monte Carlo
+traces of one design, sensitivity indices, a fitted model or SPICE
+waveforms (cached per run directory by spice_data) rather than per-design
+rows.
+
+The schema version is kept in PRAGMA user_version and upgraded in place by
+MIGRATIONS; input columns added to design_table.INPUTS later are added to
+the designs table (with their default) when the store is opened.
+
+select() answers range queries on design columns and metrics and returns a
+DesignTable, so stored results feed straight back into the analysis code.
+
+Usage:
+    ./results.py                     # record the catalog sweep if missing, run the example query
+    ./results.py --refresh           # re-record the catalog sweep
+    ./results.py --max-cost 150 --metric energy_200ms_j 200 - --metric "margin_j[8000 BTU]" 0 -
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy.special import ndtr
+
+from design_table import COUNTS, INPUTS, DesignTable
+from instrument import add_arguments, configure_from_args, main_stage
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(os.path.dirname(SRC_DIR), 'data', 'results.sqlite')
+SCHEMA_VERSION = 1
+
+# Derived DesignTable columns kept with every design (inputs are always kept)
+STORED_DERIVED = {
+    'total_cost': 'REAL',
+    'total_supercaps': 'INTEGER',
+    'total_electrolytics': 'INTEGER',
+    'stacked_voltage': 'REAL',
+    'coverage': 'REAL',
+    'peak_power': 'REAL',
+    'sc_usable_energy_j': 'REAL',
+    'elec_energy_j': 'REAL',
+    'elec_current_ok': 'INTEGER',
+}
+# Extra columns stored when the table has them (catalog sweeps)
+STORED_EXTRA = {'sc_part': 'TEXT', 'elec_part': 'TEXT', 'volume_cm3': 'REAL'}
+
+SCHEMA = """
+CREATE TABLE runs (
+    id INTEGER PRIMARY KEY,
+    analysis TEXT NOT NULL,
+    params TEXT NOT NULL,
+    created REAL NOT NULL,
+    n_designs INTEGER NOT NULL
+);
+CREATE INDEX runs_analysis ON runs (analysis, params);
+CREATE TABLE designs (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    name TEXT
+);
+CREATE TABLE metrics (
+    design_id INTEGER NOT NULL REFERENCES designs (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (design_id, name)
+) WITHOUT ROWID;
+CREATE INDEX metrics_value ON metrics (name, value);
+"""
+
+# Indexes on design parameters, created once their columns exist
+DESIGN_INDEXES = {
+    'designs_run': ('run_id',),
+    'designs_cost': ('total_cost',),
+    'designs_layout': ('sc_per_bank', 'elec_per_bank'),
+    'designs_sc_part': ('sc_part', 'sc_esr'),
+    'designs_current': ('max_current',),
+}
+
+# SQL upgrading version v - 1 to v
+MIGRATIONS: Dict[int, str] = {}
+
+Range = Tuple[Optional[float], Optional[float]]
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+def design_columns() -> Dict[str, str]:
+    """Design column -> SQL type, in table order."""
+    columns = {key: 'INTEGER' if key in COUNTS else 'REAL' for key in INPUTS}
+    columns.update(STORED_DERIVED)
+    columns.update(STORED_EXTRA)
+    return columns
+
+
+def default_path() -> Optional[str]:
+    """Store path from $SOFTSTART_RESULTS (None when set empty)."""
+    path = os.environ.get('SOFTSTART_RESULTS', DEFAULT_PATH)
+    return path or None
+
+
+class ResultsStore:
+    """Runs, designs and per-design metrics in SQLite."""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.con = sqlite3.connect(path)
+        self.con.execute("PRAGMA foreign_keys = ON")
+        self._upgrade()
+        self.columns = [row[1] for row in self.con.execute("PRAGMA table_info(designs)")]
+
+    def _upgrade(self):
+        version = self.con.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(f"{self.path} has schema {version}, newer than {SCHEMA_VERSION}")
+        with self.con:
+            if version == 0:
+                self.con.executescript(SCHEMA)
+            for v in range(max(version, 1) + 1, SCHEMA_VERSION + 1):
+                self.con.executescript(MIGRATIONS[v])
+            have = {row[1] for row in self.con.execute("PRAGMA table_info(designs)")}
+            for key, sql_type in design_columns().items():
+                if key not in have:
+                    default = INPUTS.get(key)
+                    clause = f" DEFAULT {default!r}" if default is not None else ""
+                    self.con.execute(f"ALTER TABLE designs ADD COLUMN {key} {sql_type}{clause}")
+            for index, cols in DESIGN_INDEXES.items():
+                self.con.execute(f"CREATE INDEX IF NOT EXISTS {index} ON designs ({', '.join(cols)})")
+            self.con.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.con.close()
+
+    # -- writing ---------------------------------------------------------------
+
+    def record(self, analysis: str, table: DesignTable, params: Optional[dict] = None,
+               **metrics: ArrayLike) -> int:
+        """
+        Store table and per-design metrics (arrays of len(table), or scalars)
+        as a run of analysis, replacing any earlier run with the same params.
+        Returns the run id.
+        """
+        n = len(table)
+        params_json = json.dumps(params or {}, sort_keys=True, default=str)
+        values = {k: np.broadcast_to(np.asarray(v, dtype=float), (n,)) for k, v in metrics.items()}
+
+        keys = [k for k in design_columns() if k in table.columns]
+        cols = [table.column(k) for k in keys]
+        rows = zip(*([c.tolist() for c in [table.column('name')] + cols]))
+
+        with self.con:
+            self.con.execute("DELETE FROM runs WHERE analysis = ? AND params = ?",
+                             (analysis, params_json))
+            cursor = self.con.execute(
+                "INSERT INTO runs (analysis, params, created, n_designs) VALUES (?, ?, ?, ?)",
+                (analysis, params_json, time.time(), n))
+            run_id = int(cursor.lastrowid or 0)
+            first = self.con.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM designs").fetchone()[0]
+            placeholders = ', '.join('?' * (len(keys) + 3))
+            self.con.executemany(
+                f"INSERT INTO designs (id, run_id, name, {', '.join(keys)}) VALUES ({placeholders})",
+                ((first + i, run_id, None if row[0] is None else str(row[0])) + tuple(row[1:])
+                 for i, row in enumerate(rows)))
+            ids = np.arange(first, first + n).tolist()
+            for name, value in values.items():
+                self.con.executemany(
+                    "INSERT INTO metrics (design_id, name, value) VALUES (?, ?, ?)",
+                    zip(ids, [name] * n, value.tolist()))
+        return run_id
+
+    # -- reading ---------------------------------------------------------------
+
+    def runs(self) -> List[dict]:
+        rows = self.con.execute(
+            "SELECT id, analysis, params, created, n_designs FROM runs ORDER BY id")
+        return [dict(id=r[0], analysis=r[1], params=json.loads(r[2]), created=r[3],
+                     n_designs=r[4]) for r in rows]
+
+    def metric_names(self, analysis: Optional[str] = None) -> List[str]:
+        sql = "SELECT DISTINCT name FROM metrics"
+        params: list = []
+        if analysis is not None:
+            sql += (" WHERE design_id IN (SELECT d.id FROM designs d JOIN runs r "
+                    "ON d.run_id = r.id WHERE r.analysis = ?)")
+            params.append(analysis)
+        return sorted(row[0] for row in self.con.execute(sql + " ORDER BY name", params))
+
+    def _query(self, where: Optional[Dict[str, Range]], metrics: Optional[Dict[str, Range]],
+               analysis: Optional[str], columns: Sequence[str], order_by: Optional[str],
+               limit: Optional[int]) -> Tuple[str, list, List[str]]:
+        """SQL and parameters for select(); metric values come out as m0, m1, ..."""
+        metrics = metrics or {}
+        shown = list(metrics) + [c for c in columns if c not in metrics]
+        joins: List[str] = []
+        clauses: List[str] = []
+        join_params: list = []
+        params: list = []
+
+        def bound(expr, lo, hi):
+            if lo is not None:
+                clauses.append(f"{expr} >= ?")
+                params.append(lo)
+            if hi is not None:
+                clauses.append(f"{expr} <= ?")
+                params.append(hi)
+
+        for j, name in enumerate(shown):
+            kind = 'JOIN' if name in metrics else 'LEFT JOIN'
+            joins.append(f"{kind} metrics m{j} ON m{j}.design_id = d.id AND m{j}.name = ?")
+            join_params.append(name)
+            bound(f"m{j}.value", *metrics.get(name, (None, None)))
+        for column, (lo, hi) in (where or {}).items():
+            if column not in self.columns:
+                raise ValueError(f"cannot filter on {column!r}; use one of {self.columns}")
+            bound(f"d.{column}", lo, hi)
+        if analysis is not None:
+            clauses.append("r.analysis = ?")
+            params.append(analysis)
+
+        select = ', '.join([f"d.{c}" for c in self.columns] + ['r.analysis']
+                           + [f"m{j}.value" for j in range(len(shown))])
+        sql = (f"SELECT {select} FROM designs d JOIN runs r ON d.run_id = r.id "
+               + ' '.join(joins))
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if order_by is not None:
+            if order_by in shown:
+                sql += f" ORDER BY m{shown.index(order_by)}.value"
+            elif order_by in self.columns:
+                sql += f" ORDER BY d.{order_by}"
+            else:
+                raise ValueError(f"cannot order by {order_by!r}")
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return sql, join_params + params, shown
+
+    def select(self, where: Optional[Dict[str, Range]] = None,
+               metrics: Optional[Dict[str, Range]] = None, analysis: Optional[str] = None,
+               columns: Sequence[str] = (), order_by: Optional[str] = 'total_cost',
+               limit: Optional[int] = None) -> DesignTable:
+        """
+        Stored designs with every design column in where and every metric in
+        metrics inside its inclusive (lo, hi) range (None = open), as a
+        DesignTable. The filtered metrics and any named in columns become
+        extra columns, along with analysis and run_id.
+        """
+        sql, params, shown = self._query(where, metrics, analysis, columns, order_by, limit)
+        types = design_columns()
+        rows = self.con.execute(sql, params).fetchall()
+        if not rows:
+            # One placeholder row, sliced off below (DesignTable needs n >= 1)
+            rows = [tuple(INPUTS.get(c, 0 if types.get(c) == 'INTEGER' else None)
+                          for c in self.columns) + (None,) * (1 + len(shown))]
+        data = list(zip(*rows))
+        stored = dict(zip(self.columns, data))
+        inputs = {k: np.asarray(stored[k], dtype=int if k in COUNTS else float)
+                  for k in INPUTS if k in stored}
+        dtypes = {'TEXT': object, 'INTEGER': int}
+        extras: Dict[str, np.ndarray] = {k: np.asarray(v, dtype=dtypes.get(types.get(k, ''), float))
+                  for k, v in stored.items()
+                  if k not in INPUTS and k not in ('id', 'name')}
+        extras['analysis'] = np.asarray(data[len(self.columns)], dtype=object)
+        for j, name in enumerate(shown):
+            extras[name] = np.asarray(data[len(self.columns) + 1 + j], dtype=float)
+        extras['elec_current_ok'] = extras['elec_current_ok'] == 1
+        table = DesignTable(list(stored['name']), **inputs, **extras)
+        return table if stored['id'][0] is not None else table[:0]
+
+    def plan(self, where: Optional[Dict[str, Range]] = None,
+             metrics: Optional[Dict[str, Range]] = None, analysis: Optional[str] = None,
+             order_by: Optional[str] = 'total_cost') -> List[str]:
+        """SQLite's query plan for select() (to check the indexes are used)."""
+        sql, params, _ = self._query(where, metrics, analysis, (), order_by, None)
+        return [row[-1] for row in self.con.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def record(analysis: str, table: DesignTable, params: Optional[dict] = None,
+           **metrics: ArrayLike) -> Optional[int]:
+    """ResultsStore.record() into the default store; a no-op when it is disabled."""
+    path = default_path()
+    if path is None:
+        return None
+    store = ResultsStore(path)
+    try:
+        return store.record(analysis, table, params, **metrics)
+    finally:
+        store.close()
+
+
+# =============================================================================
+# Catalog sweep
+# =============================================================================
+
+def start_metrics(table: DesignTable, window_ms: float = 200,
+                  demand_cv: float = 0.15) -> Dict[str, np.ndarray]:
+    """
+    Energy, delivered energy (less I²·ESR loss), and margin and success per
+    comprehensive_analysis load scenario against a Honda EU1000i, as
+    pipeline.start_graph() computes them.
+    """
+    from analyze_motor_startup import GeneratorSpec, WindowACSpec, calculate_power_demand
+    from comprehensive_analysis import load_scenarios
+
+    gen = GeneratorSpec("Honda EU1000i", 900, 1000)
+    energy = table.energy_in_window(window_ms)
+    delivered = energy - table.effective_current ** 2 * table.sc_bank_esr * window_ms / 1000
+    out = {f'energy_{window_ms:.0f}ms_j': energy, 'delivered_j': delivered}
+    for load in load_scenarios():
+        ac = WindowACSpec(load.name, load.btu, load.running_watts, load.fla,
+                          lra_multiplier=load.lra / load.fla,
+                          power_factor_locked=load.power_factor_locked)
+        demand = calculate_power_demand(ac, gen, load.startup_time_ms)
+        mask = demand['times'] < window_ms
+        shortfall = float(np.sum(demand['power_shortfall'][mask])) / 1000
+        margin = delivered - shortfall
+        out[f'margin_j[{load.name}]'] = margin
+        out[f'success[{load.name}]'] = (ndtr(margin / (demand_cv * shortfall))
+                                        if shortfall > 0 else np.ones_like(margin))
+    return out
+
+
+def record_catalog_sweep(store: ResultsStore, max_current: float = 40.0) -> int:
+    """Every catalog design at max_current, with start_metrics(), as run 'catalog_sweep'."""
+    from catalog import Catalog
+
+    table = Catalog().design_sweep(max_current=max_current)
+    return store.record('catalog_sweep', table, dict(max_current=max_current),
+                        **start_metrics(table))
+
+
+def print_designs(table: DesignTable, metrics: Sequence[str], count: int = 15):
+    print(f"{'Analysis':<18} {'Supercap / design':<24} {'Electrolytic':<18} {'Layout':<10} "
+          f"{'Cost':>8} " + ' '.join(f"{m:>20}" for m in metrics))
+    print("-" * (82 + 21 * len(metrics)))
+    for row in table[:count]:
+        layout = f"{row.total_supercaps}SC+{row.total_electrolytics}E"
+        label = row.sc_part or row.name or '-'
+        values = ' '.join(f"{getattr(row, m):>20.3f}" for m in metrics)
+        print(f"{row.analysis:<18} {label:<24} {row.elec_part or '-':<18} {layout:<10} "
+              f"${row.total_cost:>7.2f} {values}")
+
+
+@main_stage
+def main(refresh=False, path=None, where=None, metrics=None):
+    store = ResultsStore(path or default_path() or DEFAULT_PATH)
+    if refresh or not any(r['analysis'] == 'catalog_sweep' for r in store.runs()):
+        start = time.perf_counter()
+        record_catalog_sweep(store)
+        print(f"Recorded catalog sweep in {time.perf_counter() - start:.1f}s")
+
+    where = where if where is not None else {'total_cost': (None, 150.0)}
+    metrics = metrics if metrics is not None else {
+        'energy_200ms_j': (200.0, None), 'margin_j[8000 BTU]': (0.0, None)}
+
+    start = time.perf_counter()
+    found = store.select(where, metrics)
+    elapsed = time.perf_counter() - start
+
+    conditions = [' '.join([k] + ([f"≥ {lo:g}"] if lo is not None else [])
+                           + ([f"≤ {hi:g}"] if hi is not None else []))
+                  for k, (lo, hi) in list(where.items()) + list(metrics.items())]
+    print("=" * 120)
+    print(f"STORED RESULTS: {', '.join(conditions)}")
+    print(f"{len(found)} designs in {elapsed * 1000:.1f} ms "
+          f"({sum(r['n_designs'] for r in store.runs()):,} stored designs)")
+    print("=" * 120)
+    print_designs(found, list(metrics))
+    print(f"\nPlan: {'; '.join(store.plan(where, metrics))}")
+
+    print(f"\n{'Run':>4} {'Analysis':<24} {'Designs':>8}  Parameters")
+    for r in store.runs():
+        print(f"{r['id']:>4} {r['analysis']:<24} {r['n_designs']:>8}  {json.dumps(r['params'])}")
+    store.close()
+
+
+def _bound(text: str) -> Optional[float]:
+    return None if text == '-' else float(text)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--refresh', action='store_true', help='re-record the catalog sweep')
+    parser.add_argument('--path', help='database file (default $SOFTSTART_RESULTS or data/results.sqlite)')
+    parser.add_argument('--max-cost', type=float, help='total_cost upper bound ($)')
+    parser.add_argument('--where', nargs=3, action='append', default=[],
+                        metavar=('COLUMN', 'LO', 'HI'), help="design column range ('-' = open)")
+    parser.add_argument('--metric', nargs=3, action='append', default=[],
+                        metavar=('NAME', 'LO', 'HI'), help="metric range ('-' = open)")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    where = {c: (_bound(lo), _bound(hi)) for c, lo, hi in args.where}
+    if args.max_cost is not None:
+        where['total_cost'] = (None, args.max_cost)
+    metrics = {m: (_bound(lo), _bound(hi)) for m, lo, hi in args.metric}
+    main(refresh=args.refresh, path=args.path,
+         where=where if where or metrics else None, metrics=metrics or None)
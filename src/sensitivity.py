@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Global sensitivity of start success to design and load parameters.
+
+Which inputs actually decide whether a start succeeds? Each Parameter is
+given a range; Saltelli (Sobol) or Morris sample matrices are drawn over
+the unit cube, scaled, and the whole matrix is evaluated in one batch:
+design inputs become DesignTable columns (one row per sample), and the
+motor start model is calibration.envelope() on a (time, sample) grid. No
+Python loop runs per sample, so the default 2^12 Saltelli base samples
+(32k model runs for six parameters) take about two seconds.
+
+Two outputs are analysed:
+
+    energy_margin_j    energy the boost delivers in the window, less the
+                       supercaps' I²·ESR loss, minus the energy the motor
+                       needs beyond the generator's current limit
+    current_margin_a   worst case over the zero crossings in the window of
+                       injected + generator current minus motor current
+                       (as comprehensive_analysis: LRA·√2·sin φ against
+                       generator ½·√2·I_max); injection stops once the
+                       supercaps, less their I·R drop, reach sc_floor
+
+Sobol first-order (S1) and total-order (ST) indices use the Saltelli
+(2010) and Jansen estimators with bootstrap 95% intervals; Morris gives
+μ* (mean |elementary effect|) and σ per full parameter range.
+"""
+
+import argparse
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from scipy.special import ndtr
+from scipy.stats import qmc
+
+from analyze_motor_startup import StartupProfile, WindowACSpec
+from calibration import PARAMS, parameter_vector, envelope
+from design_table import INPUTS, DesignTable
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import pyplot, show
+
+LINE_HZ = 60.0
+OUTPUTS = ('energy_margin_j', 'current_margin_a')
+
+
+@dataclass
+class Parameter:
+    """One uncertain input and its range."""
+    name: str           # DesignTable input, start model PARAMS entry or 'gen_max_amps'
+    low: float
+    high: float
+    label: str = ''
+    integer: bool = False
+
+    def scale(self, u: np.ndarray) -> np.ndarray:
+        """Map unit-cube samples onto the range (integers uniformly)."""
+        if self.integer:
+            return np.minimum(np.floor(self.low + u * (self.high - self.low + 1)), self.high)
+        return self.low + u * (self.high - self.low)
+
+
+PARAMETERS = [
+    Parameter('sc_per_bank', 10, 30, 'SC cells per bank', integer=True),
+    Parameter('sc_esr', 0.020, 0.060, 'SC ESR per cell (Ω)'),
+    Parameter('max_current', 20.0, 50.0, 'Injection limit (A)'),
+    Parameter('sc_floor', 0.3, 0.7, 'SC discharge floor (×V)'),
+    Parameter('lra_multiplier', 4.0, 7.0, 'LRA / FLA'),
+    Parameter('gen_max_amps', 7.0, 9.5, 'Generator max current (A)'),
+]
+
+
+def base_design() -> DesignTable:
+    """15 Tecate 12F per bank with 20 electrolytics at 50 V (analyze_12f_design)."""
+    return DesignTable(["15S + 20 elec @ 50V"], sc_per_bank=15, elec_per_bank=20,
+                       sc_capacitance=12.0, sc_voltage=2.7, sc_price=0.91, sc_esr=0.036,
+                       elec_voltage=50.0, elec_price=0.80, max_current=40.0)
+
+
+@dataclass
+class StartModel:
+    """Design and load that sampled parameters are substituted into."""
+    design: DesignTable
+    ac: WindowACSpec
+    gen_max_amps: float = 1000 / 120        # Honda EU1000i
+    startup_time_ms: float = 300.0
+    profile: StartupProfile = field(default_factory=StartupProfile)
+    window_ms: float = 200.0
+    dt_ms: float = 1.0
+    demand_cv: float = 0.15                 # Start-to-start spread of the energy needed
+
+    @classmethod
+    def default(cls) -> 'StartModel':
+        return cls(base_design(), WindowACSpec("8000 BTU", 8000, 720, 6.0))
+
+    def evaluate(self, values: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Outputs for n samples; values maps parameter names to (n,) arrays,
+        anything not given stays at the model's value. Besides OUTPUTS:
+        delivered_j, shortfall_j, peak_shortfall_a (RMS current beyond the
+        generator, as calculate_power_demand) and success, the chance a
+        start needing Normal(shortfall, demand_cv·shortfall) joules gets it.
+        """
+        unknown = set(values) - set(INPUTS) - set(PARAMS) - {'gen_max_amps'}
+        if unknown:
+            raise ValueError(f"unknown parameters: {sorted(unknown)}")
+        n = len(next(iter(values.values())))
+        window_s = self.window_ms / 1000
+
+        # Design: one DesignTable row per sample
+        table = self.design[np.zeros(n, dtype=int)]
+        table = table.with_columns(**{k: v for k, v in values.items() if k in INPUTS})
+        delivered = (table.energy_in_window(self.window_ms)
+                     - table.effective_current ** 2 * table.sc_bank_esr * window_s)
+        current = table.max_current
+        sag = np.maximum(table.sc_bank_voltage * (1 - table.sc_floor)
+                         - current * table.sc_bank_esr, 0.0)
+        t_empty = table.elec_boost_s + sag * table.sc_bank_capacitance / current
+
+        # Motor: envelope() over a (time, sample) grid
+        p = np.tile(parameter_vector(self.ac, self.startup_time_ms, self.profile), (n, 1))
+        for k, name in enumerate(PARAMS):
+            if name in values:
+                p[:, k] = values[name]
+        gen = np.broadcast_to(np.asarray(values.get('gen_max_amps', self.gen_max_amps),
+                                         dtype=float), (n,))
+        kwargs = dict(surge_ms=self.profile.surge_ms, pf_ramp_ms=self.profile.pf_ramp_ms)
+
+        t = np.arange(0, self.window_ms, self.dt_ms)[:, None]
+        i_motor, pf = envelope(t, self.ac.running_amps, p, **kwargs)
+        excess = np.maximum(i_motor - gen, 0)
+        shortfall = (excess * 120 * pf).sum(axis=0) * self.dt_ms / 1000
+
+        t_zc = np.arange(0, self.window_ms, 500 / LINE_HZ)[:, None]
+        i_zc, pf_zc = envelope(t_zc, self.ac.running_amps, p, **kwargs)
+        motor_zc = i_zc * np.sqrt(2) * np.sqrt(1 - pf_zc ** 2)
+        ours = np.where(t_zc / 1000 < t_empty, current, 0.0)
+        margin_zc = (ours + gen * np.sqrt(2) * 0.5 - motor_zc).min(axis=0)
+
+        return {
+            'energy_margin_j': delivered - shortfall,
+            'current_margin_a': margin_zc,
+            'delivered_j': delivered,
+            'shortfall_j': shortfall,
+            'peak_shortfall_a': excess.max(axis=0),
+            'success': ndtr(np.divide(delivered - shortfall, self.demand_cv * shortfall,
+                                      out=np.full(n, np.inf), where=shortfall > 0)),
+        }
+
+    def value(self, name: str) -> float:
+        """The model's own (unsampled) value of a parameter."""
+        if name in INPUTS:
+            return float(self.design.column(name)[0])
+        if name in PARAMS:
+            vector = parameter_vector(self.ac, self.startup_time_ms, self.profile)
+            return float(vector[PARAMS.index(name)])
+        if name == 'gen_max_amps':
+            return self.gen_max_amps
+        raise ValueError(f"unknown parameter {name!r}")
+
+    def run(self, unit: np.ndarray, parameters: Sequence[Parameter]) -> Dict[str, np.ndarray]:
+        """evaluate() on unit-cube samples (n, len(parameters))."""
+        return self.evaluate({p.name: p.scale(unit[:, j]) for j, p in enumerate(parameters)})
+
+
+# =============================================================================
+# Sobol indices (Saltelli sampling)
+# =============================================================================
+
+def saltelli_matrix(base_log2: int, k: int, seed: int = 0) -> np.ndarray:
+    """
+    Rows [A; B; AB_1 … AB_k] in the unit cube, shape ((k + 2)·n, k) with
+    n = 2^base_log2; AB_i is A with column i taken from B.
+    """
+    ab = qmc.Sobol(2 * k, scramble=True, seed=seed).random_base2(base_log2)
+    a, b = ab[:, :k], ab[:, k:]
+    mixed = np.repeat(a[None], k, axis=0)
+    cols = np.arange(k)
+    mixed[cols, :, cols] = b[:, cols].T
+    return np.concatenate([a, b, mixed.reshape(-1, k)])
+
+
+def sobol_indices(y: np.ndarray, k: int, resamples: int = 200,
+                  seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    First- and total-order indices from outputs of saltelli_matrix() rows,
+    with bootstrap 95% half-widths S1_conf and ST_conf.
+    """
+    n = len(y) // (k + 2)
+    f_a, f_b = y[:n], y[n:2 * n]
+    f_ab = y[2 * n:].reshape(k, n)
+
+    def estimate(idx):
+        a, b, ab = f_a[idx], f_b[idx], f_ab[:, idx]
+        var = np.var(np.concatenate([a, b], axis=-1), axis=-1)
+        var = np.where(var > 0, var, np.inf)
+        s1 = np.mean(b * (ab - a), axis=-1) / var
+        st = 0.5 * np.mean((a - ab) ** 2, axis=-1) / var
+        return s1, st
+
+    s1, st = estimate(np.arange(n))
+    idx = np.random.default_rng(seed).integers(0, n, (resamples, n))
+    s1_b, st_b = estimate(idx)
+    return {
+        'S1': s1, 'ST': st,
+        'S1_conf': 1.96 * s1_b.std(axis=-1), 'ST_conf': 1.96 * st_b.std(axis=-1),
+    }
+
+
+def sobol(model: Optional[StartModel] = None,
+          parameters: Sequence[Parameter] = PARAMETERS, base_log2: int = 12,
+          seed: int = 0) -> Dict[str, Dict[str, np.ndarray]]:
+    """Sobol indices of every output, keyed by output name."""
+    model = model or StartModel.default()
+    k = len(parameters)
+    outputs = model.run(saltelli_matrix(base_log2, k, seed), parameters)
+    return {name: sobol_indices(outputs[name], k, seed=seed) for name in OUTPUTS}
+
+
+# =============================================================================
+# Morris elementary effects
+# =============================================================================
+
+def morris_matrix(trajectories: int, k: int, levels: int = 4,
+                  seed: int = 0) -> np.ndarray:
+    """
+    Morris one-at-a-time trajectories, shape (trajectories, k + 1, k): each
+    step moves one factor (in random order and direction) by
+    Δ = levels / (2·(levels - 1)).
+    """
+    rng = np.random.default_rng(seed)
+    delta = levels / (2 * (levels - 1))
+    # Base points on the grid such that x + Δ stays inside the cube
+    start = rng.integers(0, levels // 2, (trajectories, 1, k)) / (levels - 1)
+    steps = np.tril(np.ones((k + 1, k)), -1)
+    sign = rng.choice([-1.0, 1.0], (trajectories, 1, k))
+    order = np.argsort(rng.random((trajectories, k)), axis=1)
+    # Lower-triangular walk, directed by sign, columns permuted per trajectory
+    walk = start + delta / 2 * ((2 * steps - 1) * sign + 1)
+    return np.take_along_axis(walk, order[:, None, :], axis=2)
+
+
+def morris_effects(x: np.ndarray, y: np.ndarray) -> Dict[str, np.ndarray]:
+    """μ*, μ and σ of the elementary effects from morris_matrix() rows and outputs."""
+    r, steps, k = x.shape
+    y = y.reshape(r, steps)
+    dx = np.diff(x, axis=1)
+    factor = np.abs(dx).argmax(axis=2)
+    moved = np.take_along_axis(dx, factor[:, :, None], axis=2)[:, :, 0]
+    effects = np.empty((r, k))
+    np.put_along_axis(effects, factor, np.diff(y, axis=1) / moved, axis=1)
+    return {
+        'mu_star': np.abs(effects).mean(axis=0),
+        'mu': effects.mean(axis=0),
+        'sigma': effects.std(axis=0, ddof=1),
+    }
+
+
+def morris(model: Optional[StartModel] = None,
+           parameters: Sequence[Parameter] = PARAMETERS, trajectories: int = 500,
+           levels: int = 4, seed: int = 0) -> Dict[str, Dict[str, np.ndarray]]:
+    """Morris screening of every output, keyed by output name."""
+    model = model or StartModel.default()
+    k = len(parameters)
+    x = morris_matrix(trajectories, k, levels, seed)
+    outputs = model.run(x.reshape(-1, k), parameters)
+    return {name: morris_effects(x, outputs[name]) for name in OUTPUTS}
+
+
+# =============================================================================
+# Report
+# =============================================================================
+
+def print_sobol(indices: Dict[str, Dict[str, np.ndarray]],
+                parameters: Sequence[Parameter] = PARAMETERS):
+    """S1 and ST with confidence half-widths, per output."""
+    for output, s in indices.items():
+        print("\n" + "=" * 72)
+        print(f"SOBOL INDICES: {output}")
+        print("=" * 72)
+        print(f"{'Parameter':<28} {'Range':>14} {'S1':>12} {'ST':>12}")
+        print("-" * 72)
+        for j in np.argsort(-s['ST']):
+            p = parameters[j]
+            print(f"{p.label or p.name:<28} {p.low:>6g} – {p.high:<6g} "
+                  f"{s['S1'][j]:>6.3f}±{s['S1_conf'][j]:<5.3f} "
+                  f"{s['ST'][j]:>6.3f}±{s['ST_conf'][j]:<5.3f}")
+        print(f"{'Sum':<43} {s['S1'].sum():>6.3f}")
+
+
+def print_morris(effects: Dict[str, Dict[str, np.ndarray]],
+                 parameters: Sequence[Parameter] = PARAMETERS):
+    """μ*, μ and σ per output, in output units per full parameter range."""
+    for output, e in effects.items():
+        print("\n" + "=" * 64)
+        print(f"MORRIS SCREENING: {output}")
+        print("=" * 64)
+        print(f"{'Parameter':<28} {'μ*':>10} {'μ':>10} {'σ':>10}")
+        print("-" * 64)
+        for j in np.argsort(-e['mu_star']):
+            p = parameters[j]
+            print(f"{p.label or p.name:<28} {e['mu_star'][j]:>10.2f} {e['mu'][j]:>+10.2f} "
+                  f"{e['sigma'][j]:>10.2f}")
+
+
+def plot_sobol(indices: Dict[str, Dict[str, np.ndarray]],
+               parameters: Sequence[Parameter] = PARAMETERS, save_path: Optional[str] = None):
+    """S1 and ST bars per parameter, one panel per output."""
+    plt = pyplot()
+    fig, axes = plt.subplots(1, len(indices), figsize=(13, 5))
+    labels = [p.label or p.name for p in parameters]
+    x = np.arange(len(parameters))
+    for ax, (output, s) in zip(np.atleast_1d(axes), indices.items()):
+        ax.barh(x + 0.2, s['S1'], 0.4, xerr=s['S1_conf'], label='First order (S1)')
+        ax.barh(x - 0.2, s['ST'], 0.4, xerr=s['ST_conf'], label='Total order (ST)')
+        ax.set_yticks(x)
+        ax.set_yticklabels(labels, fontsize=8)
+        ax.set_xlabel('Sobol index')
+        ax.set_title(output)
+        ax.set_xlim(0, 1)
+        ax.grid(True, alpha=0.3, axis='x')
+        ax.legend(fontsize=8)
+
+    plt.tight_layout()
+
+    if save_path:
+        plt.savefig(save_path, dpi=150, bbox_inches='tight')
+        print(f"Saved: {save_path}")
+
+    return fig
+
+
+@main_stage
+def main(plot=True):
+    model = StartModel.default()
+    indices = sobol(model)
+    print_sobol(indices)
+    print_morris(morris(model))
+
+    if plot:
+        plot_sobol(indices, save_path='sensitivity_sobol.png')
+        show()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
+    main()
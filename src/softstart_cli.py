@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Command-line entry point for the analysis scripts.
+
+    softstart list
+    softstart hybrid-stacking --no-plot
+    softstart boost2 --out-dir docs
+    softstart motor-startup --show
+    softstart minimal-hybrid --no-plot --profile
+
+Each subcommand imports its script only when it runs, so `softstart list`
+and `--no-plot` runs never load matplotlib. Plots are rendered with the Agg
+backend and saved as PNGs; --show opens them in a window instead.
+--profile times each analysis and the stages inside it (see instrument.py).
+"""
+
+import argparse
+import importlib
+import os
+import sys
+from typing import Dict, Tuple
+
+from instrument import add_arguments, configure_from_args, stage
+
+# subcommand -> (module, takes save_path, description)
+COMMANDS: Dict[str, Tuple[str, bool, str]] = {
+    'generator': ('generator', True, 'Generator waveforms during a motor start'),
+    'hybrid': ('hybrid', True, 'Generator plus 12V battery PWM assist'),
+    'hybrid2': ('hybrid2', True, 'Hybrid PWM assist at 100 kHz'),
+    'boost': ('boost', True, 'Boost circuit injection waveforms'),
+    'boost2': ('boost2', True, 'Dual boost circuit waveforms'),
+    'assisted': ('assisted', True, 'Voltage assist around the zero crossing'),
+    'supercap-configs': ('analyze_supercap_configs', False,
+                         'Supercap bank size vs power and cost'),
+    'hybrid-stacking': ('analyze_hybrid_stacking', False,
+                        'Supercap + electrolytic stacking'),
+    'minimal-hybrid': ('optimize_minimal_hybrid', False,
+                       'Search for the cheapest ~200J hybrid'),
+    'budget': ('analyze_budget_design', False, '~$100 BOM designs'),
+    '12f': ('analyze_12f_design', False, 'Tecate 12F hybrid design'),
+    'supercap-only': ('analyze_supercap_only_12f', False, 'Tecate 12F supercap-only design'),
+    'motor-startup': ('analyze_motor_startup', False, 'Window AC startup demand'),
+    'phase-coverage': ('analyze_phase_coverage', False,
+                       'Injection window vs inductive motor current'),
+    'sourcing': ('analyze_sourcing', False, 'Component sourcing options'),
+    'comprehensive': ('comprehensive_analysis', False,
+                      'Startup capability across AC sizes'),
+    'thermal': ('thermal', False, 'Cell/FET/board heating over a day of starts'),
+    'cycling': ('cycling', False, 'Assisted starts vs bank size and charge resistor'),
+    'cell-string': ('cell_string', False, 'Per-cell voltages with tolerance and balancing'),
+    'aging': ('aging', False, 'End-of-life energy margin and start success over years'),
+    'sensitivity': ('sensitivity', False, 'Sobol/Morris indices for energy and current margins'),
+    'surrogate': ('surrogate', False, 'Fast surrogate of the start model with model fallback'),
+    'pipeline': ('pipeline', False, 'Incremental memoized start analysis graph'),
+    'results': ('results', False, 'Query the stored sweep and analysis results'),
+}
+
+# Scripts that only print tables
+NO_PLOTS = {'analyze_12f_design', 'analyze_sourcing', 'results'}
+
+
+def run(command: str, plot: bool = True, out_dir: str = '.') -> None:
+    """Run one analysis, writing any plots into out_dir."""
+    module_name, takes_path, _ = COMMANDS[command]
+    module = importlib.import_module(module_name)
+
+    os.makedirs(out_dir, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(out_dir)
+    try:
+        if module_name in NO_PLOTS:
+            module.main()
+        elif takes_path:
+            module.main(plot=plot, save_path=f'{module_name}.png' if plot else None)
+        else:
+            module.main(plot=plot)
+    finally:
+        os.chdir(cwd)
+
+
+def common_options(suppress: bool = False) -> argparse.ArgumentParser:
+    """
+    Options accepted both before and after the subcommand. The copy given to
+    the subcommands (suppress=True) has no defaults, so it only sets options
+    given after the subcommand and never overwrites ones given before it.
+    """
+    common = argparse.ArgumentParser(
+        add_help=False, argument_default=argparse.SUPPRESS if suppress else None)
+    common.add_argument('--no-plot', action='store_true',
+                        help='Print text summaries only; never import matplotlib')
+    common.add_argument('--show', action='store_true',
+                        help='Open plots in a window instead of only saving them')
+    common.add_argument('--out-dir', default=argparse.SUPPRESS if suppress else '.',
+                        help='Directory for saved plots')
+    add_arguments(common)
+    return common
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='softstart', description=__doc__.split('\n')[1],
+                                     parents=[common_options()])
+
+    after = common_options(suppress=True)
+    sub = parser.add_subparsers(dest='command', metavar='COMMAND')
+    sub.add_parser('list', help='List the available analyses')
+    sub.add_parser('all', parents=[after], help='Run every analysis')
+    for name, (_, _, description) in COMMANDS.items():
+        sub.add_parser(name, parents=[after], help=description)
+
+    args = parser.parse_args(argv)
+
+    if args.command in (None, 'list'):
+        for name, (module_name, _, description) in COMMANDS.items():
+            print(f"{name:<18} {description:<48} ({module_name}.py)")
+        return 0
+
+    if args.show:
+        from plotting import use_interactive
+        use_interactive()
+
+    configure_from_args(args)
+    commands = list(COMMANDS) if args.command == 'all' else [args.command]
+    for command in commands:
+        with stage(command):
+            run(command, plot=not args.no_plot, out_dir=args.out_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Fast surrogate of the start model for interactive "what if" queries.
+
+sensitivity.StartModel couples the stepped bank discharge of DesignTable
+with the motor start envelope; one design costs milliseconds, too slow to
+drag a slider through. Surrogate samples it offline on a scrambled Sobol
+design over a box of parameters (DESIGN_SPACE), fits a cubic radial basis
+function interpolant with a linear tail per output, and persists the fit
+to data/surrogate_start.npz keyed by a hash of the model, its source and
+the box.
+
+Error estimates come from the fit itself: Rippa's closed form gives every
+sample's leave-one-out error from the same matrix inverse as the weights,
+and a query's error estimate is the largest leave-one-out error around its
+nearest sample. A held-out random set gives the overall RMS and maximum
+error per output.
+
+A query is trusted when it lies inside the box, no further from a sample
+than the sampling fill distance, and every estimated error is within its
+tolerance; anything else is answered by the real model, so the surrogate
+never silently extrapolates.
+
+Usage:
+    ./surrogate.py                  # fit or load, report accuracy and timing
+    ./surrogate.py --refit
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import time
+from dataclasses import asdict, fields
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy.special import ndtr
+from scipy.stats import qmc
+
+from design_table import INPUTS
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import pyplot, show
+from sensitivity import Parameter, StartModel
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(os.path.dirname(SRC_DIR), 'data', 'surrogate_start.npz')
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+DESIGN_SPACE = [
+    Parameter('sc_per_bank', 10, 30, 'SC cells per bank', integer=True),
+    Parameter('sc_capacitance', 10.0, 100.0, 'SC cell capacitance (F)'),
+    Parameter('sc_esr', 0.005, 0.060, 'SC ESR per cell (Ω)'),
+    Parameter('elec_per_bank', 4, 40, 'Electrolytics per bank', integer=True),
+    Parameter('max_current', 20.0, 50.0, 'Injection limit (A)'),
+    Parameter('lra_multiplier', 4.0, 7.0, 'LRA / FLA'),
+]
+
+# Fitted outputs; energy_margin_j and success are derived from the first two
+FITTED = ('delivered_j', 'shortfall_j', 'current_margin_a', 'peak_shortfall_a')
+DERIVED = ('energy_margin_j', 'success')
+
+# Largest estimated error a trusted answer may carry
+TOLERANCE: Dict[str, float] = {
+    'delivered_j': 2.0,
+    'shortfall_j': 2.0,
+    'current_margin_a': 1.0,
+    'peak_shortfall_a': 0.5,
+    'energy_margin_j': 3.0,
+    'success': 0.03,
+}
+
+
+def model_key(model: StartModel, parameters: Sequence[Parameter]) -> str:
+    """Hash of what the fit depends on: model settings and source, and the box."""
+    h = hashlib.sha256()
+    for module in ('sensitivity', 'design_table', 'calibration', 'analyze_motor_startup'):
+        with open(os.path.join(SRC_DIR, module + '.py'), 'rb') as f:
+            h.update(f.read())
+    h.update(inspect.getsource(Surrogate).encode())
+    design = {k: model.design.column(k)[0].item() for k in INPUTS}
+    settings = {f.name: getattr(model, f.name) for f in fields(model) if f.name != 'design'}
+    h.update(json.dumps([design, settings, [asdict(p) for p in parameters]],
+                        sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+class Surrogate:
+    """Cubic RBF fit of StartModel outputs over a parameter box."""
+
+    neighbours = 4      # A sample's error bound covers this many of its neighbours too
+
+    def __init__(self, parameters: Sequence[Parameter], outputs: Sequence[str],
+                 centers: np.ndarray, weights: np.ndarray, tail: np.ndarray,
+                 loo: np.ndarray, fill_distance: float, validation: Dict[str, np.ndarray],
+                 key: str = '', model: Optional[StartModel] = None,
+                 tolerance: Optional[Dict[str, float]] = None):
+        self.parameters = list(parameters)
+        self.outputs = list(outputs)
+        self.centers = centers              # (n, d) in the unit cube
+        self.weights = weights              # (n, outputs)
+        self.tail = tail                    # (d + 1, outputs)
+        self.loo = loo                      # (n, outputs) leave-one-out errors
+        self.fill_distance = fill_distance
+        self.validation = validation        # 'rms', 'max' per output, from held-out points
+        self.key = key
+        self.model = model or StartModel.default()
+        self.names = self.outputs + [d for d in DERIVED if set(FITTED[:2]) <= set(outputs)]
+        self.tolerance = np.array([(tolerance or TOLERANCE).get(o, np.inf) for o in self.names])
+        self._low = np.array([p.low for p in self.parameters], dtype=float)
+        self._span = np.array([p.high - p.low for p in self.parameters], dtype=float)
+        # Centers transposed with their squared norms, so a query is one product
+        self._centers_t = np.ascontiguousarray(centers.T)
+        self._baseline = {p.name: self.model.value(p.name) for p in self.parameters}
+        self._norms = np.einsum('ij,ij->i', centers, centers)
+        # Error bound around each sample: worst leave-one-out error among it and its neighbours
+        near = np.argpartition(_sq_dist(centers, centers), self.neighbours, axis=1)
+        self._local_error = np.abs(loo)[near[:, :self.neighbours + 1]].max(axis=1)
+
+    # -- fitting ---------------------------------------------------------------
+
+    @classmethod
+    def fit(cls, model: Optional[StartModel] = None,
+            parameters: Sequence[Parameter] = DESIGN_SPACE,
+            outputs: Sequence[str] = FITTED, samples_log2: int = 11,
+            validation: int = 512, smoothing: float = 1e-9, seed: int = 0) -> 'Surrogate':
+        """Sample the model on 2^samples_log2 Sobol points and fit every output."""
+        model = model or StartModel.default()
+        k = len(parameters)
+        # Integer parameters are snapped, so fit on the values actually run
+        raw = qmc.Sobol(k, scramble=True, seed=seed).random_base2(samples_log2)
+        x = np.stack([p.scale(raw[:, j]) for j, p in enumerate(parameters)], axis=1)
+        low = np.array([p.low for p in parameters], dtype=float)
+        span = np.array([p.high - p.low for p in parameters], dtype=float)
+        u = (x - low) / span
+        y = _stack(model.evaluate({p.name: x[:, j] for j, p in enumerate(parameters)}), outputs)
+
+        n = len(u)
+        system = np.zeros((n + k + 1, n + k + 1))
+        system[:n, :n] = _kernel(u, u) + smoothing * np.eye(n)
+        system[:n, n:] = _tail(u)
+        system[n:, :n] = system[:n, n:].T
+        inverse = np.linalg.inv(system)
+        coef = inverse[:, :n] @ y
+        # Rippa: leave-one-out residual of sample i is coef_i / inverse_ii
+        loo = coef[:n] / np.diag(inverse)[:n, None]
+
+        # Fill distance: how far a random point may be from its nearest sample
+        probe = np.random.default_rng(seed).random((4096, k))
+        fill = float(np.percentile(np.sqrt(_sq_dist(probe, u).min(axis=1)), 99))
+
+        surrogate = cls(parameters, outputs, u, coef[:n], coef[n:], loo, fill, {},
+                        key=model_key(model, parameters), model=model)
+        check = surrogate.random_unit(validation, seed + 1)
+        error = (surrogate._complete(*surrogate._predict(check)[:2])[0]
+                 - surrogate._complete(surrogate._evaluate(check))[0])
+        surrogate.validation = {'rms': np.sqrt(np.mean(error ** 2, axis=0)),
+                                'max': np.abs(error).max(axis=0)}
+        return surrogate
+
+    # -- persistence -----------------------------------------------------------
+
+    def save(self, path: str = DEFAULT_PATH):
+        meta = {'parameters': [asdict(p) for p in self.parameters], 'outputs': self.outputs,
+                'fill_distance': self.fill_distance, 'key': self.key}
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, centers=self.centers, weights=self.weights, tail=self.tail,
+                     loo=self.loo, rms=self.validation['rms'], max=self.validation['max'],
+                     meta=json.dumps(meta))
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH, model: Optional[StartModel] = None) -> 'Surrogate':
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            return cls([Parameter(**p) for p in meta['parameters']], meta['outputs'],
+                       data['centers'], data['weights'], data['tail'], data['loo'],
+                       meta['fill_distance'], {'rms': data['rms'], 'max': data['max']},
+                       key=meta['key'], model=model)
+
+    @classmethod
+    def cached(cls, path: str = DEFAULT_PATH, model: Optional[StartModel] = None,
+               parameters: Sequence[Parameter] = DESIGN_SPACE, refit: bool = False,
+               **kwargs) -> 'Surrogate':
+        """The persisted fit if it matches the model and box, otherwise a new one (saved)."""
+        model = model or StartModel.default()
+        if not refit and os.path.exists(path):
+            try:
+                surrogate = cls.load(path, model)
+            except (OSError, ValueError, KeyError):
+                pass
+            else:
+                if surrogate.key == model_key(model, parameters):
+                    return surrogate
+        surrogate = cls.fit(model, parameters, **kwargs)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        surrogate.save(path)
+        return surrogate
+
+    # -- queries ---------------------------------------------------------------
+
+    def _predict(self, u: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(values, error estimates, nearest-sample distance) at unit-cube points."""
+        d2 = np.maximum(self._norms - 2 * u @ self._centers_t
+                        + np.einsum('ij,ij->i', u, u)[:, None], 0.0)
+        values = (d2 * np.sqrt(d2)) @ self.weights + _tail(u) @ self.tail
+        nearest = d2.argmin(axis=1)
+        distance = np.sqrt(d2[np.arange(len(u)), nearest])
+        return values, self._local_error[nearest], distance
+
+    def unit(self, values: Dict[str, ArrayLike]) -> np.ndarray:
+        """Parameter values (missing ones at the model's value) to unit-cube rows."""
+        if not values.keys() <= self._baseline.keys():
+            unknown = sorted(set(values) - set(self._baseline))
+            raise ValueError(f"not a surrogate parameter: {unknown}")
+        columns = [values.get(name, base) for name, base in self._baseline.items()]
+        if all(isinstance(c, (int, float)) for c in columns):
+            x = np.array([columns], dtype=float)
+        else:
+            x = np.stack(np.broadcast_arrays(*[np.asarray(c, dtype=float) for c in columns]),
+                         axis=-1)
+        return (x - self._low) / self._span
+
+    def random_unit(self, count: int, seed: int = 0) -> np.ndarray:
+        """Random designs in the box (integers snapped) as unit-cube rows."""
+        raw = np.random.default_rng(seed).random((count, len(self.parameters)))
+        x = np.stack([p.scale(raw[:, j]) for j, p in enumerate(self.parameters)], axis=1)
+        return (x - self._low) / self._span
+
+    def _evaluate(self, u: np.ndarray) -> np.ndarray:
+        """The real model at unit-cube rows, fitted outputs as columns."""
+        x = self._low + u * self._span
+        exact = self.model.evaluate({p.name: x[:, j] for j, p in enumerate(self.parameters)})
+        return _stack(exact, self.outputs)
+
+    def _complete(self, values: np.ndarray, error: Optional[np.ndarray] = None):
+        """Append the derived outputs (and their error estimates) to fitted columns."""
+        if error is None:
+            error = np.zeros_like(values)
+        if len(self.names) == len(self.outputs):
+            return values, error
+        n, k = values.shape
+        out = np.empty((n, k + 2))
+        bound = np.empty((n, k + 2))
+        out[:, :k] = values
+        bound[:, :k] = error
+        delivered, shortfall = values[:, 0], values[:, 1]
+        # Shortfall 0 means nothing is needed: z = +inf, success 1, no error
+        spread = self.model.demand_cv * shortfall
+        z = np.divide(delivered - shortfall, spread, out=np.full(n, np.inf), where=shortfall > 0)
+        out[:, k] = delivered - shortfall
+        out[:, k + 1] = ndtr(z)
+        bound[:, k] = error[:, 0] + error[:, 1]
+        bound[:, k + 1] = np.exp(-0.5 * z * z) / np.sqrt(2 * np.pi) * np.divide(
+            bound[:, k], spread, out=np.zeros(n), where=shortfall > 0)
+        return out, bound
+
+    def trusted(self, u: np.ndarray, error: np.ndarray, distance: np.ndarray) -> np.ndarray:
+        """Rows inside the box, near the samples, with every error within tolerance."""
+        inside = np.all((u >= -1e-9) & (u <= 1 + 1e-9), axis=1)
+        return inside & (distance <= self.fill_distance) & np.all(error <= self.tolerance, axis=1)
+
+    def predict(self, **values: ArrayLike) -> Dict[str, np.ndarray]:
+        """
+        Outputs for one or many designs, from the surrogate where trusted and
+        from the model elsewhere. Also returns '<output>_error' estimates
+        (0 for model answers) and 'trusted'.
+        """
+        u = self.unit(values)
+        out, error, distance = self._predict(u)
+        out, error = self._complete(out, error)
+        trusted = self.trusted(u, error, distance)
+        if not trusted.all():
+            rows = ~trusted
+            out[rows] = self._complete(self._evaluate(u[rows]))[0]
+            error[rows] = 0.0
+        result = {name: out[:, j] for j, name in enumerate(self.names)}
+        result.update({f'{name}_error': error[:, j] for j, name in enumerate(self.names)})
+        result['trusted'] = trusted
+        return result
+
+
+def _stack(outputs: Dict[str, np.ndarray], names: Sequence[str]) -> np.ndarray:
+    return np.stack([np.asarray(outputs[name], dtype=float) for name in names], axis=1)
+
+
+def _sq_dist(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Squared distances between rows of a and b, (len(a), len(b))."""
+    d2 = np.einsum('ij,ij->i', a, a)[:, None] - 2 * a @ b.T + np.einsum('ij,ij->i', b, b)
+    return np.maximum(d2, 0.0)
+
+
+def _kernel(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    d2 = _sq_dist(a, b)
+    return d2 * np.sqrt(d2)
+
+
+def _tail(u: np.ndarray) -> np.ndarray:
+    return np.hstack([np.ones((len(u), 1)), u])
+
+
+# =============================================================================
+# Report
+# =============================================================================
+
+def print_fit(surrogate: Surrogate, ready_s: float):
+    """Parameter box and leave-one-out and held-out errors per output."""
+    print("\n" + "=" * 72)
+    print(f"SURROGATE: {len(surrogate.centers)} samples over "
+          f"{len(surrogate.parameters)} parameters, ready in {ready_s:.2f}s")
+    print("=" * 72)
+    for p in surrogate.parameters:
+        print(f"  {p.label or p.name:<28} {p.low:>8g} – {p.high:<8g}")
+    print(f"\n{'Output':<20} {'LOO RMS':>10} {'Held-out RMS':>13} {'Max':>10} {'Tolerance':>10}")
+    print("-" * 72)
+    for j, name in enumerate(surrogate.names):
+        loo = (f"{np.sqrt(np.mean(surrogate.loo[:, j] ** 2)):>10.3f}"
+               if j < len(surrogate.outputs) else f"{'derived':>10}")
+        print(f"{name:<20} {loo} {surrogate.validation['rms'][j]:>13.3f} "
+              f"{surrogate.validation['max'][j]:>10.3f} {surrogate.tolerance[j]:>10g}")
+
+    u = surrogate.random_unit(4096, seed=11)
+    values, error, distance = surrogate._predict(u)
+    trusted = surrogate.trusted(u, surrogate._complete(values, error)[1], distance)
+    print(f"\nTrusted (answered without the model): {trusted.mean() * 100:.0f}% "
+          f"of random designs in the box")
+
+
+def print_queries(surrogate: Surrogate, queries: Sequence[Dict[str, float]]):
+    """A few what-if designs with the source of each answer."""
+    print("\n" + "=" * 120)
+    print("WHAT-IF QUERIES")
+    print("=" * 120)
+    print(f"{'Query':<70} {'Delivered':>10} {'Margin':>9} {'I_zc':>7} {'Success':>8}  Source")
+    print("-" * 120)
+    for q in queries:
+        r = surrogate.predict(**q)
+        label = ", ".join(f"{k}={v:g}" for k, v in q.items())
+        source = 'surrogate' if r['trusted'][0] else 'model'
+        print(f"{label:<70} {r['delivered_j'][0]:>9.1f}J {r['energy_margin_j'][0]:>+8.1f}J "
+              f"{r['current_margin_a'][0]:>+6.1f}A {r['success'][0] * 100:>7.1f}%  {source}")
+
+
+def time_queries(surrogate: Surrogate, repeat: int = 2000) -> Tuple[float, float]:
+    """Seconds per single-design predict(): a trusted design, and the model itself."""
+    u = surrogate.random_unit(1024, seed=3)
+    values, error, distance = surrogate._predict(u)
+    trusted = surrogate.trusted(u, surrogate._complete(values, error)[1], distance)
+    x = surrogate._low + u[np.argmax(trusted)] * surrogate._span
+    query = {p.name: float(x[j]) for j, p in enumerate(surrogate.parameters)}
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        surrogate.predict(**query)
+    fast = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(20):
+        surrogate.model.evaluate({k: np.array([v]) for k, v in query.items()})
+    return fast, (time.perf_counter() - start) / 20
+
+
+def plot_validation(surrogate: Surrogate, points: int = 512, save_path: Optional[str] = None):
+    """Surrogate against model on random points, one panel per output."""
+    plt = pyplot()
+    u = surrogate.random_unit(points, seed=7)
+    predicted = surrogate._complete(*surrogate._predict(u)[:2])[0]
+    actual = surrogate._complete(surrogate._evaluate(u))[0]
+
+    names = surrogate.names
+    fig, axes = plt.subplots(2, (len(names) + 1) // 2, figsize=(4 * ((len(names) + 1) // 2), 8))
+    for j, (ax, name) in enumerate(zip(axes.ravel(), names)):
+        ax.scatter(actual[:, j], predicted[:, j], s=4, alpha=0.5)
+        lo, hi = actual[:, j].min(), actual[:, j].max()
+        ax.plot([lo, hi], [lo, hi], 'k--', linewidth=1)
+        ax.set_xlabel('Model')
+        ax.set_ylabel('Surrogate')
+        ax.set_title(name)
+        ax.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+
+    if save_path:
+        plt.savefig(save_path, dpi=150, bbox_inches='tight')
+        print(f"Saved: {save_path}")
+
+    return fig
+
+
+@main_stage
+def main(plot=True, refit=False, path=DEFAULT_PATH):
+    start = time.perf_counter()
+    surrogate = Surrogate.cached(path, refit=refit)
+    print_fit(surrogate, time.perf_counter() - start)
+
+    fast, slow = time_queries(surrogate)
+    print(f"\nOne design: surrogate {fast * 1e6:.0f} µs, model {slow * 1e3:.1f} ms "
+          f"({slow / fast:.0f}x)")
+
+    print_queries(surrogate, [
+        dict(sc_per_bank=15, sc_capacitance=12.0, elec_per_bank=20),
+        dict(sc_per_bank=30, sc_capacitance=25.0, elec_per_bank=20),
+        dict(sc_per_bank=30, sc_capacitance=50.0, elec_per_bank=30, max_current=40.0),
+        dict(sc_per_bank=30, sc_capacitance=50.0, elec_per_bank=30, lra_multiplier=6.5),
+        dict(sc_per_bank=30, sc_capacitance=150.0, elec_per_bank=30),   # outside the box
+    ])
+
+    if plot:
+        plot_validation(surrogate, save_path='surrogate_validation.png')
+        show()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--refit', action='store_true', help='ignore the persisted fit')
+    parser.add_argument('--path', default=DEFAULT_PATH, help='fit file (.npz)')
+    parser.add_argument('--no-plot', action='store_true')
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+    main(plot=not args.no_plot, refit=args.refit, path=args.path)
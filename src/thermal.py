@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Transient thermal model of the supercaps, IRFB4110 FETs and board over
+repeated compressor starts.
+
+analyze_supercap_configs reports only the static I²·ESR loss, and the
+firmware caps each boost at BOOST_DURATION_MS, but a window AC cycles for
+hours and a short-cycling thermostat can restart it every few seconds.
+Here the hottest cell, one FET (junction and case) and the board are nodes
+of a linear RC network to ambient:
+
+    C dT/dt = -G (T - T_amb) + P(t)
+
+with P piecewise constant: I²R heating while boosting, the charge
+resistors' loss while the banks recharge, nothing in between. With
+M = C^-1/2 G C^-1/2 = V diag(λ) Vᵀ the solution over any interval of
+constant P is closed form per mode,
+
+    z(t) = e^(-λt) z0 + (1 - e^(-λt)) / λ · q
+
+so a schedule is stepped event to event (no time stepping in between) and
+a day of cycling takes milliseconds. The same modal form gives the periodic
+steady state for starts every T seconds in closed form, and with it the
+shortest sustained restart interval that keeps every node under its limit.
+"""
+
+import argparse
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from instrument import add_arguments, configure_from_args, main_stage
+from plotting import pyplot, show
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+NODES = ('cell', 'fet_junction', 'fet_case', 'board')
+
+# Maximum temperatures (°C): cell rating, derated Tj, tab, FR4 well below Tg
+LIMITS = {'cell': 65.0, 'fet_junction': 150.0, 'fet_case': 125.0, 'board': 105.0}
+
+SAMPLES_PER_INTERVAL = 12   # Points per constant-power interval for peaks and plots
+
+
+@dataclass
+class ThermalNetwork:
+    """Lumped RC network; resistances in K/W, capacitances in J/K."""
+    capacitance: Dict[str, float] = field(default_factory=lambda: {
+        'cell': 2.5,            # 8x20 mm can, ~3 g
+        'fet_junction': 0.15,   # Die and solder
+        'fet_case': 1.5,        # TO-220 tab
+        'board': 60.0,          # 100x150 mm FR4 with copper and parts
+    })
+    links: Dict[Tuple[str, str], float] = field(default_factory=lambda: {
+        ('fet_junction', 'fet_case'): 0.402,   # IRFB4110 R_thJC
+        ('fet_case', 'board'): 3.0,            # Tab on copper pour
+        ('cell', 'board'): 150.0,              # Through the leads
+    })
+    to_ambient: Dict[str, float] = field(default_factory=lambda: {
+        'cell': 60.0,
+        'fet_case': 60.0,
+        'board': 6.0,
+    })
+
+    def __post_init__(self):
+        index = {name: k for k, name in enumerate(NODES)}
+        g = np.zeros((len(NODES), len(NODES)))
+        for (a, b), r in self.links.items():
+            i, j = index[a], index[b]
+            g[i, i] += 1 / r
+            g[j, j] += 1 / r
+            g[i, j] -= 1 / r
+            g[j, i] -= 1 / r
+        for name, r in self.to_ambient.items():
+            g[index[name], index[name]] += 1 / r
+
+        c = np.array([self.capacitance[n] for n in NODES])
+        self._s = 1 / np.sqrt(c)
+        self.rate, self._v = np.linalg.eigh(self._s[:, None] * g * self._s[None, :])
+
+    @property
+    def time_constants(self) -> np.ndarray:
+        return 1 / self.rate
+
+    def to_modes(self, rise: np.ndarray) -> np.ndarray:
+        """Node temperature rise -> modal coordinates."""
+        return self._v.T @ (rise / self._s)
+
+    def from_modes(self, z: np.ndarray) -> np.ndarray:
+        """Modal coordinates (modes along axis 0) -> node temperature rise."""
+        return self._s[:, None] * (self._v @ z) if z.ndim > 1 else self._s * (self._v @ z)
+
+    def drive(self, power: np.ndarray) -> np.ndarray:
+        """Node heat input (W) -> modal steady-state rise q / λ."""
+        return (self._v.T @ (self._s * power)) / self.rate
+
+    def propagate(self, z0: np.ndarray, power: np.ndarray, t: np.ndarray) -> np.ndarray:
+        """Modal state after each time in t (s) at constant power; shape (modes, len(t))."""
+        decay = np.exp(-np.outer(self.rate, t))
+        return decay * z0[:, None] + (1 - decay) * self.drive(power)[:, None]
+
+
+@dataclass
+class BoostLoad:
+    """Heat released by one boost and the recharge that follows."""
+    current: float = 25.0       # Injection current (A)
+    coverage: float = 0.32      # Fraction of each half-cycle injecting
+    cell_esr: float = 0.036     # Tecate 12F
+    rds_on: float = 0.0065      # IRFB4110 at ~100 °C (3.7 mΩ at 25 °C)
+    v_bank: float = 81.0
+    pwm_freq: float = 20e3
+    t_switch: float = 100e-9    # Rise + fall
+    shunt: float = 0.005
+    recharge_s: float = 30.0    # Time to replace the delivered charge
+
+    def boost_power(self) -> np.ndarray:
+        """Per-node heat (W) while boosting; each bank conducts on its own half-cycles."""
+        i_rms_sq = self.current ** 2 * self.coverage / 2
+        switching = 0.5 * self.v_bank * self.current * self.t_switch * self.pwm_freq
+        board = 2 * i_rms_sq * self.shunt
+        return np.array([i_rms_sq * self.cell_esr,
+                         i_rms_sq * self.rds_on + switching * self.coverage / 2,
+                         0.0, board])
+
+    def recharge_power(self, boost_s: float) -> np.ndarray:
+        """Charge resistor heat (W, on the board) to replace boost_s of delivery."""
+        delivered = self.v_bank * self.current * self.coverage * boost_s
+        return np.array([0.0, 0.0, 0.0, delivered / self.recharge_s])
+
+
+# =============================================================================
+# Schedules
+# =============================================================================
+
+def segments(starts: ArrayLike, durations: ArrayLike,
+             load: BoostLoad) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Boundaries and per-interval heat for a start schedule.
+
+    Each start adds its boost power over [start, start + duration] and the
+    recharge power over the following recharge_s (overlaps add up).
+    Returns (edges, power) with power[k] applying on [edges[k], edges[k+1]].
+    """
+    begin = np.atleast_1d(np.asarray(starts, dtype=float))
+    length = np.broadcast_to(np.asarray(durations, dtype=float), begin.shape)
+    ends = begin + length
+    boost = np.tile(load.boost_power(), (len(begin), 1))
+    recharge = np.array([load.recharge_power(d) for d in length]).reshape(-1, len(NODES))
+
+    times = np.concatenate([begin, ends, ends, ends + load.recharge_s])
+    deltas = np.concatenate([boost, -boost, recharge, -recharge])
+    order = np.argsort(times, kind='stable')
+    edges, first = np.unique(times[order], return_index=True)
+    power = np.add.reduceat(deltas[order], first, axis=0).cumsum(axis=0)
+    power[np.abs(power) < 1e-12] = 0.0
+    return edges, power[:-1]
+
+
+def thermostat_day(seed: int = 0, hours: float = 24.0, on_min: Tuple[float, float] = (8, 20),
+                   off_min: Tuple[float, float] = (4, 12), start_ms: float = 300,
+                   failed_fraction: float = 0.05, retry_s: float = 45.0,
+                   burst: Optional[Tuple[float, float, float]] = (14.0, 10.0, 20.0)
+                   ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Start times and boost durations (s) for a day of compressor cycling.
+
+    Cycles alternate random on/off times. A failed start runs the full
+    500 ms boost and is retried retry_s later. burst = (hour, minutes,
+    seconds between starts) adds a stretch of short-cycling.
+    """
+    rng = np.random.default_rng(seed)
+    starts: List[float] = []
+    durations: List[float] = []
+    t = 0.0
+    end = hours * 3600
+    while t < end:
+        while rng.random() < failed_fraction:
+            starts.append(t)
+            durations.append(0.5)
+            t += retry_s
+        starts.append(t)
+        durations.append(start_ms / 1000)
+        t += 60 * (rng.uniform(*on_min) + rng.uniform(*off_min))
+
+    if burst is not None:
+        hour, minutes, every = burst
+        extra = np.arange(hour * 3600, hour * 3600 + minutes * 60, every)
+        starts.extend(extra)
+        durations.extend([0.5] * len(extra))
+
+    order = np.argsort(starts)
+    return np.asarray(starts)[order], np.asarray(durations)[order]
+
+
+# =============================================================================
+# Simulation
+# =============================================================================
+
+def simulate(network: ThermalNetwork, edges: np.ndarray, power: np.ndarray,
+             t_ambient: float = 35.0, z0: Optional[np.ndarray] = None,
+             samples: int = SAMPLES_PER_INTERVAL) -> dict:
+    """
+    Temperatures over piecewise-constant heating, exact at every sample.
+
+    power[k] applies on [edges[k], edges[k+1]]. Each interval is sampled at
+    log-spaced points (dense right after the step, where the fast FET modes
+    move), which catches the delayed peaks of indirectly heated nodes.
+    Returns times (s), temps (°C, shape (len(times), nodes)), peak per node
+    and the final modal state.
+    """
+    z = np.zeros(len(NODES)) if z0 is None else z0
+    fractions = np.geomspace(1e-3, 1.0, samples)
+
+    times = [np.array([edges[0]])]
+    rises = [network.from_modes(z)[None, :]]
+    for k, p in enumerate(power):
+        span = edges[k + 1] - edges[k]
+        if span <= 0:
+            continue
+        modes = network.propagate(z, p, span * fractions)
+        z = modes[:, -1]
+        times.append(edges[k] + span * fractions)
+        rises.append(network.from_modes(modes).T)
+
+    temps = t_ambient + np.concatenate(rises)
+    return {
+        'times': np.concatenate(times),
+        'temps': temps,
+        'peak': dict(zip(NODES, temps.max(axis=0))),
+        'state': z,
+        't_ambient': t_ambient,
+    }
+
+
+def run_schedule(starts: ArrayLike, durations: ArrayLike,
+                 network: Optional[ThermalNetwork] = None, load: Optional[BoostLoad] = None,
+                 t_ambient: float = 35.0, tail_s: float = 600.0) -> dict:
+    """Simulate a start schedule, continuing tail_s past the last recharge."""
+    network = network or ThermalNetwork()
+    load = load or BoostLoad()
+    edges, power = segments(starts, durations, load)
+    edges = np.append(edges, edges[-1] + tail_s)
+    power = np.vstack([power, np.zeros(len(NODES))])
+    result = simulate(network, edges, power, t_ambient)
+    result['starts'] = np.atleast_1d(np.asarray(starts))
+    return result
+
+
+def _over_limit(peaks: np.ndarray) -> Optional[str]:
+    """First node above its limit, or None."""
+    for name, peak in zip(NODES, peaks):
+        if peak > LIMITS[name]:
+            return name
+    return None
+
+
+def periodic_peak(network: ThermalNetwork, load: BoostLoad, interval: float,
+                  boost_s: float = 0.5, t_ambient: float = 35.0) -> np.ndarray:
+    """
+    Peak node temperatures once starts every interval seconds have settled.
+
+    Heating is periodic with period T (recharges longer than T are folded
+    back onto the cycle), so the state at each start satisfies
+    z* = e^(-λT) z* + z_T, with z_T the modal state one cycle after
+    starting from rest; z* = z_T / (1 - e^(-λT)) per mode. One cycle is then
+    replayed from z* to find the peaks.
+    """
+    n = int(np.ceil((boost_s + load.recharge_s) / interval)) + 1
+    edges, power = segments(-interval * np.arange(n)[::-1], boost_s, load)
+    cut = np.concatenate([[0.0], edges[(edges > 0) & (edges < interval)], [interval]])
+    index = np.searchsorted(edges, cut[:-1], side='right') - 1
+    power = np.where((index < len(power))[:, None], power[np.minimum(index, len(power) - 1)], 0.0)
+
+    z = np.zeros(len(NODES))
+    for k, p in enumerate(power):
+        z = network.propagate(z, p, np.array([cut[k + 1] - cut[k]]))[:, 0]
+    z_start = z / -np.expm1(-network.rate * interval)
+    return simulate(network, cut, power, t_ambient, z0=z_start)['temps'].max(axis=0)
+
+
+def safe_interval(network: Optional[ThermalNetwork] = None, load: Optional[BoostLoad] = None,
+                  boost_s: float = 0.5, t_ambient: float = 35.0,
+                  longest: float = 3600.0, tol: float = 0.1) -> Tuple[float, Optional[str]]:
+    """
+    Shortest sustained restart interval (s) that keeps every node in limits.
+
+    Returns (interval, limiting node). The interval is inf if even starts
+    an hour apart overheat, and boost_s if the parts never get too hot.
+    """
+    network = network or ThermalNetwork()
+    load = load or BoostLoad()
+    hot = _over_limit(periodic_peak(network, load, longest, boost_s, t_ambient))
+    if hot is not None:
+        return float('inf'), hot
+    lo = boost_s
+    limiting = _over_limit(periodic_peak(network, load, lo, boost_s, t_ambient))
+    if limiting is None:
+        return lo, None
+    hi = longest
+    while hi - lo > tol:
+        mid = np.sqrt(lo * hi) if hi / lo > 2 else (lo + hi) / 2
+        node = _over_limit(periodic_peak(network, load, mid, boost_s, t_ambient))
+        if node is None:
+            hi = mid
+        else:
+            lo, limiting = mid, node
+    return hi, limiting
+
+
+def restart_delay(result: dict, network: Optional[ThermalNetwork] = None,
+                  load: Optional[BoostLoad] = None, boost_s: float = 0.5,
+                  tol: float = 0.1, longest: float = 3600.0) -> float:
+    """
+    Shortest wait (s) after the end of a simulated schedule before one more
+    full boost stays within limits, starting from its final state.
+    """
+    network = network or ThermalNetwork()
+    load = load or BoostLoad()
+    edges, power = segments([0.0], [boost_s], load)
+
+    def fits(wait: float) -> bool:
+        z = network.propagate(result['state'], np.zeros(len(NODES)), np.array([wait]))[:, 0]
+        peaks = simulate(network, edges, power, result['t_ambient'], z0=z)['temps'].max(axis=0)
+        return _over_limit(peaks) is None
+
+    if fits(0.0):
+        return 0.0
+    if not fits(longest):
+        return float('inf')
+    lo, hi = 0.0, longest
+    while hi - lo > tol:
+        mid = (lo + hi) / 2
+        lo, hi = (lo, mid) if fits(mid) else (mid, hi)
+    return hi
+
+
+# =============================================================================
+# Report
+# =============================================================================
+
+def print_day(result: dict):
+    """Peak temperatures over a simulated schedule."""
+    starts = result['starts']
+    print("\n" + "=" * 70)
+    print(f"THERMAL: {len(starts)} starts over {starts[-1] / 3600:.1f} h, "
+          f"ambient {result['t_ambient']:.0f}°C")
+    print("=" * 70)
+    print(f"{'Node':<14} {'Peak':>8} {'Limit':>8} {'Margin':>8} {'At':>10}")
+    print("-" * 70)
+    for k, name in enumerate(NODES):
+        at = result['times'][np.argmax(result['temps'][:, k])]
+        peak = result['peak'][name]
+        print(f"{name:<14} {peak:>7.1f}C {LIMITS[name]:>7.0f}C "
+              f"{LIMITS[name] - peak:>7.1f}K {at / 3600:>9.2f}h")
+
+
+def print_intervals(network: ThermalNetwork, load: BoostLoad,
+                    ambients: Sequence[float] = (25.0, 35.0, 45.0),
+                    boosts: Sequence[float] = (0.3, 0.5)):
+    """Shortest sustained restart interval by ambient and boost length."""
+    print("\n" + "=" * 70)
+    print("SAFE RESTART INTERVAL (repeated starts, settled)")
+    print("=" * 70)
+    print(f"{'Ambient':>8} {'Boost':>8} {'Interval':>10} {'Limited by':>14}")
+    print("-" * 70)
+    for t_ambient in ambients:
+        for boost_s in boosts:
+            interval, node = safe_interval(network, load, boost_s, t_ambient)
+            print(f"{t_ambient:>7.0f}C {boost_s * 1000:>6.0f}ms {interval:>9.1f}s "
+                  f"{node or '-':>14}")
+
+
+def plot_day(result: dict, save_path: Optional[str] = None):
+    """Node temperatures over the day, with a zoom on the hottest stretch."""
+    plt = pyplot()
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8))
+    hours = result['times'] / 3600
+    hottest = result['times'][np.argmax(result['temps'][:, NODES.index('board')])]
+
+    for k, name in enumerate(NODES):
+        line, = ax1.plot(hours, result['temps'][:, k], linewidth=1, label=name)
+        ax1.axhline(LIMITS[name], color=line.get_color(), linestyle=':', alpha=0.6)
+        zoom = np.abs(result['times'] - hottest) < 900
+        ax2.plot((result['times'][zoom] - hottest) / 60, result['temps'][zoom, k],
+                 color=line.get_color(), linewidth=1, label=name)
+        ax2.axhline(LIMITS[name], color=line.get_color(), linestyle=':', alpha=0.6)
+
+    ax1.set_xlabel('Time (h)')
+    ax1.set_ylabel('Temperature (°C)')
+    ax1.set_title(f"Thermal response to {len(result['starts'])} starts "
+                  f"(ambient {result['t_ambient']:.0f}°C, dotted: limits)")
+    ax1.legend(loc='upper right', fontsize=8)
+    ax1.grid(True, alpha=0.3)
+
+    ax2.set_xlabel('Minutes from board peak')
+    ax2.set_ylabel('Temperature (°C)')
+    ax2.set_title('Hottest stretch')
+    ax2.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+
+    if save_path:
+        plt.savefig(save_path, dpi=150, bbox_inches='tight')
+        print(f"Saved: {save_path}")
+
+    return fig
+
+
+@main_stage
+def main(plot=True):
+    network = ThermalNetwork()
+    load = BoostLoad()
+    print("Node time constants: " + ", ".join(f"{tau:.2f}s" for tau in network.time_constants))
+    print("Heat while boosting: " + ", ".join(
+        f"{name} {p:.2f}W" for name, p in zip(NODES, load.boost_power()) if p))
+
+    starts, durations = thermostat_day()
+    result = run_schedule(starts, durations, network, load)
+    print_day(result)
+    delay = restart_delay(result, network, load)
+    print(f"\nAfter the last start: next full boost safe after {delay:.1f}s")
+
+    print_intervals(network, load)
+
+    if plot:
+        plot_day(result, save_path='thermal_day.png')
+        show()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
+    main()
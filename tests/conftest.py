@@ -0,0 +1,8 @@
+"""The scripts import each other flatly from src/ and hardware/simulation/."""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in ('src', os.path.join('hardware', 'simulation')):
+    sys.path.insert(0, os.path.join(ROOT, path))
@@ -0,0 +1,87 @@
+"""Price-break BOM DP against exhaustive search on small runs."""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from bom_optimizer import BomPricer, Offer, Vendor
+
+
+def unit_price(offer, q):
+    """All-units pricing: the price of the highest break q reaches."""
+    return max((qty, price) for qty, price in offer.breaks if qty <= q)[1]
+
+
+def legal_orders(offer, top):
+    """Every legal order size up to top (MOQ, multiple, stock)."""
+    out = [0]
+    for q in range(1, top + 1):
+        if (q >= max(offer.moq, offer.breaks[0][0]) and q % offer.multiple == 0
+                and (offer.stock is None or q <= offer.stock)):
+            out.append(q)
+    return out
+
+
+def exhaustive(vendors, offers, quantities):
+    """Cheapest run cost trying every vendor set and every combination of order sizes."""
+    # Buying past the largest break (or the need) only ever costs more
+    top = max([q for q in quantities.values()]
+              + [qty for o in offers for qty, _ in o.breaks]) + max(o.multiple for o in offers)
+    best = np.inf
+    for n in range(len(vendors) + 1):
+        for chosen in itertools.combinations(vendors, n):
+            names = {v.name for v in chosen}
+            total = sum(v.shipping for v in chosen)
+            # Once the vendor set is fixed the parts are independent
+            for part, need in quantities.items():
+                choices = [[(q, q * unit_price(o, q) if q else 0.0) for q in legal_orders(o, top)]
+                           for o in offers if o.part == part and o.vendor in names]
+                total += min((sum(c for _, c in combo) for combo in itertools.product(*choices)
+                              if sum(q for q, _ in combo) >= need), default=np.inf)
+            best = min(best, total)
+    return best
+
+
+def random_case(rng):
+    vendors = [Vendor(f'v{k}', float(rng.choice([0.0, 5.0, 12.0]))) for k in range(3)]
+    offers = []
+    for part in ('sc', 'elec'):
+        for vendor in vendors:
+            if rng.random() < 0.25:
+                continue            # Not every vendor carries every part
+            first = float(rng.uniform(1, 10))
+            qtys = sorted(rng.choice(np.arange(2, 30), size=int(rng.integers(0, 3)), replace=False))
+            breaks = [(1, first)] + [(int(q), first * (0.9 - 0.15 * k)) for k, q in enumerate(qtys)]
+            offers.append(Offer(vendor.name, part, breaks,
+                                moq=int(rng.choice([1, 1, 3])),
+                                multiple=int(rng.choice([1, 1, 2, 5])),
+                                stock=None if rng.random() < 0.7 else int(rng.integers(5, 25))))
+    return vendors, offers
+
+
+@pytest.mark.parametrize('seed', range(24))
+def test_price_matches_exhaustive_search(seed):
+    rng = np.random.default_rng(seed)
+    vendors, offers = random_case(rng)
+    pricer = BomPricer(vendors, offers, limit=64)
+    parts = {o.part for o in offers}
+    for _ in range(3):
+        quantities = {p: int(rng.integers(0, 25)) for p in parts}
+        cost, _ = pricer.price(quantities)
+        expected = exhaustive(vendors, offers, quantities)
+        assert float(cost) == pytest.approx(expected)
+        if np.isfinite(expected):
+            plan = pricer.plan(quantities)
+            assert plan.total == pytest.approx(expected)
+            for part, need in quantities.items():
+                assert sum(o.quantity for o in plan.orders if o.part == part) >= need
+
+
+def test_missing_part_is_unobtainable():
+    pricer = BomPricer([Vendor('a', 1.0)], [Offer('a', 'sc', [(1, 2.0)])])
+    cost, _ = pricer.price({'sc': 3, 'elec': [0, 2]})
+    assert cost[0] == pytest.approx(7.0)
+    assert np.isinf(cost[1])
+    with pytest.raises(ValueError, match='elec'):
+        pricer.plan({'sc': 3, 'elec': 2})
@@ -0,0 +1,45 @@
+"""Analytic start-model Jacobian against central finite differences."""
+
+import numpy as np
+import pytest
+
+from analyze_motor_startup import DEFAULT_PROFILE, WindowACSpec, motor_current_profile
+from calibration import PARAMS, envelope, parameter_vector
+
+AC = WindowACSpec("8000 BTU", 8000, 720, 6.0)
+
+
+def sample_times(p, count=400):
+    """Times across every phase, kept clear of the piecewise breakpoints."""
+    t = np.linspace(0.5, 1500, count)
+    breaks = [0.0, DEFAULT_PROFILE.surge_ms, DEFAULT_PROFILE.pf_ramp_ms, p[2], p[4]]
+    return t[np.min(np.abs(t[:, None] - breaks), axis=1) > 1.0]
+
+
+@pytest.mark.parametrize('startup_ms', [300.0, 650.0])
+def test_jacobian_matches_finite_differences(startup_ms):
+    base = parameter_vector(AC, startup_ms)
+    t = sample_times(base)
+    fla = np.full(len(t), AC.running_amps)
+    p = np.tile(base, (len(t), 1))
+    _, _, di, dpf = envelope(t, fla, p, jacobian=True)
+
+    for j, name in enumerate(PARAMS):
+        h = 1e-6 * max(abs(base[j]), 1.0)
+        up, down = p.copy(), p.copy()
+        up[:, j] += h
+        down[:, j] -= h
+        i_up, pf_up = envelope(t, fla, up)
+        i_down, pf_down = envelope(t, fla, down)
+        np.testing.assert_allclose(di[:, j], (i_up - i_down) / (2 * h),
+                                   rtol=1e-5, atol=1e-6 * AC.running_amps, err_msg=name)
+        np.testing.assert_allclose(dpf[:, j], (pf_up - pf_down) / (2 * h),
+                                   rtol=1e-5, atol=1e-8, err_msg=name)
+
+
+def test_envelope_matches_scalar_model():
+    p = parameter_vector(AC, 300)
+    t = sample_times(p)
+    current, _ = envelope(t, np.full(len(t), AC.running_amps), np.tile(p, (len(t), 1)))
+    expected = [motor_current_profile(x, AC, 300) for x in t]
+    np.testing.assert_allclose(current, expected, rtol=1e-12)
@@ -0,0 +1,61 @@
+"""Chunked capture processing must not depend on where the chunks fall."""
+
+import numpy as np
+import pytest
+
+import capture
+from capture import CHUNK, Capture, csv_to_npy, half_cycles, load_capture
+
+FS = 20000.0
+
+
+def synthetic_capture(seconds=0.5, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * FS)) / FS
+    v = 170 * np.sin(2 * np.pi * 60 * t + 0.3) + rng.normal(0, 0.5, len(t))
+    i = 20 * np.sin(2 * np.pi * 60 * t - 0.5) + 3 * np.sin(2 * np.pi * 180 * t)
+    table = np.empty(len(t), dtype=[('time', np.float64), ('v', np.float64), ('i', np.float64)])
+    table['time'], table['v'], table['i'] = t, v, i
+    return Capture(table, FS)
+
+
+def test_half_cycles_independent_of_chunk_size():
+    cap = synthetic_capture()
+    reference = half_cycles(cap, chunk=CHUNK)
+    assert len(reference) == 59          # 60 crossings in 0.5 s, 59 complete half-cycles
+    for size in (5000, 997, 64, 7):
+        cycles = half_cycles(cap, chunk=size)
+        assert len(cycles) == len(reference)
+        for name in reference.dtype.names:
+            np.testing.assert_allclose(cycles[name], reference[name], rtol=1e-9, err_msg=name)
+
+
+def test_half_cycles_match_direct_sums():
+    cap = synthetic_capture()
+    cycles = half_cycles(cap, chunk=997)
+    v, i = cap['v'], cap['i']
+    for row in cycles[::7]:
+        lo = int(np.ceil(row['t_start'] * FS))
+        hi = int(np.ceil((row['t_start'] + row['duration']) * FS))
+        assert row['v_rms'] == pytest.approx(np.sqrt(np.mean(v[lo:hi] ** 2)))
+        assert row['i_rms'] == pytest.approx(np.sqrt(np.mean(i[lo:hi] ** 2)))
+        assert row['i_peak'] == pytest.approx(np.abs(i[lo:hi]).max())
+        assert row['p_real'] == pytest.approx(np.mean(v[lo:hi] * i[lo:hi]))
+
+
+@pytest.mark.parametrize('block', [64, 1000, 32 << 20])
+def test_csv_blocks_match_loadtxt(tmp_path, monkeypatch, block):
+    monkeypatch.setattr(capture, 'CSV_BLOCK', block)
+    data = np.random.default_rng(1).normal(size=(500, 3))
+    path = tmp_path / 'run.csv'
+    np.savetxt(path, data, delimiter=',', header='Time (s),V,I', comments='')
+
+    cached = str(path) + '.npy'
+    csv_to_npy(str(path), cached)
+    table = np.load(cached)
+    assert table.dtype.names == ('time', 'v', 'i')
+    np.testing.assert_array_equal(table.view(np.float64).reshape(-1, 3),
+                                  np.loadtxt(path, delimiter=',', skiprows=1))
+
+    cap = load_capture(str(path))
+    assert len(cap) == 500
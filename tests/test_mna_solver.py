@@ -0,0 +1,60 @@
+"""MNA transient solver against closed-form RC and RLC responses."""
+
+import io
+
+import numpy as np
+import pytest
+
+import mna_solver
+
+RC_DECK = """* RC charge
+V1 in 0 DC 10
+R1 in out 1k
+C1 out 0 1u IC=0
+.tran 10u 5m 0 10u uic
+.control
+run
+meas tran tau when v(out)=6.321205588 rise=1
+.endc
+.end
+"""
+
+RLC_DECK = """* Series RLC ring-down
+R1 a b 10
+L1 b c 1m IC=0
+C1 c 0 10u IC=5
+V1 a 0 DC 0
+.tran 1u 2m 0 1u uic
+.end
+"""
+
+
+def simulate(tmp_path, text, **kwargs):
+    deck = tmp_path / 'deck.cir'
+    deck.write_text(text)
+    return mna_solver.simulate(str(deck), out=io.StringIO(), **kwargs)
+
+
+@pytest.mark.parametrize('method, tol', [('trap', 1e-4), ('be', 0.05)])
+def test_rc_charge(tmp_path, method, tol):
+    result, meas = simulate(tmp_path, RC_DECK, method=method)
+    t = result.time
+    expected = 10 * (1 - np.exp(-t / 1e-3))
+    assert np.max(np.abs(result.vector('v(out)') - expected)) < tol
+    assert meas['tau'] == pytest.approx(1e-3, rel=10 * tol)
+
+
+@pytest.mark.parametrize('method, tol', [('trap', 1e-4), ('be', 0.05)])
+def test_rlc_ring_down(tmp_path, method, tol):
+    result, _ = simulate(tmp_path, RLC_DECK, method=method)
+    # As in ngspice, device IC= values only show up from the first step on
+    t = result.time[1:]
+    r, l, c, v0 = 10, 1e-3, 10e-6, 5
+    alpha = r / (2 * l)
+    w0 = 1 / np.sqrt(l * c)
+    wd = np.sqrt(w0**2 - alpha**2)
+    v = v0 * np.exp(-alpha * t) * (np.cos(wd * t) + alpha / wd * np.sin(wd * t))
+    # The capacitor discharges through L1 from c to b
+    i = -c * v0 * w0**2 / wd * np.exp(-alpha * t) * np.sin(wd * t)
+    assert np.max(np.abs(result.vector('v(c)')[1:] - v)) < tol
+    assert np.max(np.abs(result.vector('i(l1)')[1:] - i)) < tol
@@ -0,0 +1,88 @@
+"""Closed-form and tabulated window metrics against brute-force sampling."""
+
+import numpy as np
+import pytest
+
+from phase_window import phase_window, phase_window_grid
+from waveform import Waveform
+
+N = 1 << 20
+THETA = (np.arange(N) + 0.5) * 2 * np.pi / N
+D_THETA = 2 * np.pi / N
+
+RATIOS = [0.0, 0.1, 0.35, 0.48, 0.7, 0.95, 1.0]
+PHIS = [0.0, 0.4, 1.2, np.pi / 2]
+
+
+def sampled(v, ratio, phi):
+    """coverage, ∫|v| and ∫|sin(θ - φ)| over |v| < ratio, by summing samples."""
+    inside = np.abs(v) < ratio
+    return (inside.mean(), np.sum(np.abs(v) * inside) * D_THETA,
+            np.sum(np.abs(np.sin(THETA - phi)) * inside) * D_THETA)
+
+
+@pytest.mark.parametrize('ratio', RATIOS)
+@pytest.mark.parametrize('phi', PHIS)
+def test_sine_window_matches_sampling(ratio, phi):
+    v_line, current, lra, freq = 120.0, 40.0, 33.0, 60.0
+    v_peak = v_line * np.sqrt(2)
+    result = phase_window(ratio * v_peak, np.cos(phi), v_line, current, lra, freq)
+
+    coverage, area_v, area_motor = sampled(np.sin(THETA), ratio, phi)
+    omega = 2 * np.pi * freq
+    assert result['coverage'] == pytest.approx(coverage, abs=1e-5)
+    per_unit = result['energy_per_cycle'] * omega / (current * v_peak)
+    assert per_unit == pytest.approx(area_v, abs=1e-5)
+    assert result['motor_overlap'] == pytest.approx(area_motor / 4, abs=1e-5)
+    if coverage > 0:
+        mean_motor = lra * np.sqrt(2) * area_motor / (2 * np.pi * coverage)
+        assert result['motor_in_window'] == pytest.approx(mean_motor, rel=1e-4)
+    assert result['motor_at_zc'] == pytest.approx(lra * np.sqrt(2) * np.sin(phi))
+
+
+def test_grid_matches_pointwise():
+    v_stacked = np.array([20.0, 81.6, 150.0])
+    pf = np.array([0.3, 0.9])
+    v_line = np.array([110.0, 120.0])
+    grid = phase_window_grid(v_stacked, pf, v_line)
+    assert grid['coverage'].shape == (3, 2, 2)
+    for (a, b, c), value in np.ndenumerate(grid['energy_per_cycle']):
+        point = phase_window(v_stacked[a], pf[b], v_line[c])
+        assert value == pytest.approx(float(point['energy_per_cycle']))
+
+
+WAVEFORMS = {
+    'sine': Waveform.sine(),
+    'clipped': Waveform.clipped(0.85),
+    'harmonics': Waveform.from_harmonics([1.0, 0.0, 0.15, 0.0, 0.08], [0.0, 0.0, 0.7, 0.0, 2.1]),
+}
+
+
+@pytest.mark.parametrize('name', sorted(WAVEFORMS))
+@pytest.mark.parametrize('phi', PHIS)
+def test_waveform_tables_match_sampling(name, phi):
+    waveform = WAVEFORMS[name]
+    v = waveform(THETA)
+    for ratio in np.array(RATIOS) * waveform.peak:
+        coverage, area_v, area_motor = sampled(v, ratio, phi)
+        assert waveform.coverage(ratio) == pytest.approx(coverage, abs=1e-3)
+        assert waveform.window_energy(ratio) == pytest.approx(area_v, abs=1e-3)
+        assert waveform.motor_area(ratio, phi) == pytest.approx(area_motor, abs=1e-3)
+
+
+def test_waveform_sine_matches_closed_form():
+    v_stacked = np.linspace(0, 170, 18)
+    pf = np.array([0.2, 0.5, 0.95])
+    exact = phase_window_grid(v_stacked, pf)
+    tabulated = phase_window_grid(v_stacked, pf, waveform=Waveform.sine())
+    for key in ('coverage', 'energy_per_cycle', 'motor_overlap', 'motor_at_zc'):
+        np.testing.assert_allclose(tabulated[key], exact[key], rtol=1e-3, atol=1e-3)
+
+
+def test_waveform_call_interpolates_the_cycle():
+    waveform = WAVEFORMS['harmonics']
+    theta = np.linspace(-7, 20, 5001)
+    exact = sum(a * np.sin(n * theta + p) for n, a, p in
+                zip(range(1, 6), [1.0, 0.0, 0.15, 0.0, 0.08], [0.0, 0.0, 0.7, 0.0, 2.1]))
+    exact *= waveform(np.pi / 2) / exact[np.argmin(np.abs(theta - np.pi / 2))]
+    np.testing.assert_allclose(waveform(theta), exact, atol=1e-3)